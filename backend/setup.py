@@ -69,6 +69,7 @@ requires = [
     # search support
     'elasticsearch',
     'elasticsearch-dsl',
+    'PyPDF2',
     # text-formatting
     'humanize',
     # logging
@@ -160,10 +161,13 @@ setup(
             'webdav start = tracim_backend.command.webdav:WebdavRunnerCommand',
             'caldav start = tracim_backend.command.caldav:CaldavRunnerCommand',
             'caldav sync = tracim_backend.command.caldav:CaldavSyncCommand',
+            'workspace used-space-update = tracim_backend.command.workspace:WorkspaceUsedSpaceUpdateCommand',
+            'workspace clone = tracim_backend.command.workspace:WorkspaceCloneCommand',
             'search index-create = tracim_backend.command.search:SearchIndexInitCommand',
             'search index-populate = tracim_backend.command.search:SearchIndexIndexCommand',
             'search index-upgrade-experimental = tracim_backend.command.search:SearchIndexUpgradeCommand',
             'search index-drop = tracim_backend.command.search:SearchIndexDeleteCommand',
+            'preview generate = tracim_backend.command.preview:PreviewGenerateCommand',
             'dev parameters list = tracim_backend.command.devtools:ParametersListCommand'
         ]
     },
@@ -257,6 +257,11 @@ def web(global_config: OrderedDict, **local_settings) -> Router:
             radicale_base_path=app_config.CALDAV__RADICALE__BASE_PATH,
             radicale_user_path=app_config.CALDAV__RADICALE__USER_PATH,
             radicale_workspace_path=app_config.CALDAV_RADICALE_WORKSPACE_PATH,
+            proxy_pool_size=app_config.CALDAV__RADICALE_PROXY__POOL_SIZE,
+            proxy_timeout=(
+                app_config.CALDAV__RADICALE_PROXY__CONNECT_TIMEOUT,
+                app_config.CALDAV__RADICALE_PROXY__READ_TIMEOUT,
+            ),
         )
         agenda_controller = AgendaController()
         configurator.include(agenda_controller.bind, route_prefix=BASE_API_V2)
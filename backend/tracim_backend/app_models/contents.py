@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 from enum import Enum
+from types import MappingProxyType
 import typing
-from typing import List
 
 ####
 # Content Status
@@ -162,6 +162,52 @@ comment_type = ContentType(
 )
 
 
+class ContentTypeRegistry(object):
+    """
+    Immutable registry of content types, built once from loaded applications:
+    content types by slug and alias, and allowed slugs are precomputed so that
+    they are not built again on each query or validation.
+    """
+
+    def __init__(
+        self,
+        content_types: typing.Iterable[ContentType],
+        special_content_types: typing.Iterable[ContentType],
+        other_content_types: typing.Iterable[ContentType],
+        extra_slugs: typing.Iterable[str],
+    ) -> None:
+        """
+        :param content_types: content types of active applications
+        :param special_content_types: content types allowed in endpoints, like comment
+        :param other_content_types: content types only available by slug, like event
+        :param extra_slugs: extra slugs allowed in queries, like "any"
+        """
+        self.content_types = tuple(content_types)
+        self.endpoint_allowed_types = self.content_types + tuple(special_content_types)
+        self.restricted_allowed_types_slug = tuple(
+            content_type.slug for content_type in self.content_types
+        )
+        self.endpoint_allowed_types_slug = tuple(
+            content_type.slug for content_type in self.endpoint_allowed_types
+        )
+        query_allowed_types_slugs = []  # type: typing.List[str]
+        for content_type in self.endpoint_allowed_types:
+            query_allowed_types_slugs.append(content_type.slug)
+            if content_type.slug_alias:
+                query_allowed_types_slugs.extend(content_type.slug_alias)
+        query_allowed_types_slugs.extend(extra_slugs)
+        self.query_allowed_types_slugs = tuple(query_allowed_types_slugs)
+
+        content_types_by_slug = {}  # type: typing.Dict[str, ContentType]
+        # INFO - G.M - 2019-11-28 - first content type found for a slug or an alias
+        # wins, as done by previous linear search.
+        for content_type in reversed(self.endpoint_allowed_types + tuple(other_content_types)):
+            for slug in content_type.slug_alias or []:
+                content_types_by_slug[slug] = content_type
+            content_types_by_slug[content_type.slug] = content_type
+        self.content_types_by_slug = MappingProxyType(content_types_by_slug)
+
+
 class ContentTypeList(object):
     """
     ContentType List
@@ -191,69 +237,71 @@ class ContentTypeList(object):
         self.app_list = app_list
         self._special_contents_types = [self.Comment]
         self._extra_slugs = [self.Any_SLUG]
+        self._registry = None  # type: typing.Optional[ContentTypeRegistry]
 
-    @property
-    def _content_types(self) -> List[ContentType]:
+    def load_content_types(self) -> None:
+        """
+        Build content types registry from content types of active applications.
+        Should be called each time app_list is updated.
+        """
         app_api = ApplicationApi(self.app_list)
-        content_types = app_api.get_content_types()
-        return content_types
+        self._registry = ContentTypeRegistry(
+            content_types=app_api.get_content_types(),
+            special_content_types=self._special_contents_types,
+            other_content_types=[self.Event],
+            extra_slugs=self._extra_slugs,
+        )
+
+    @property
+    def registry(self) -> ContentTypeRegistry:
+        if not self._registry:
+            self.load_content_types()
+        return self._registry
+
+    @property
+    def _content_types(self) -> typing.Tuple[ContentType, ...]:
+        return self.registry.content_types
 
     def get_one_by_slug(self, slug: str) -> ContentType:
         """
         Get ContentType object according to slug
         match for both slug and slug_alias
         """
-        content_types = self._content_types.copy()
-        content_types.extend(self._special_contents_types)
-        content_types.append(self.Event)
-        for item in content_types:
-            if item.slug == slug or (item.slug_alias and slug in item.slug_alias):
-                return item
-        raise ContentTypeNotExist()
+        try:
+            return self.registry.content_types_by_slug[slug]
+        except KeyError as exc:
+            raise ContentTypeNotExist() from exc
 
-    def restricted_allowed_types_slug(self) -> typing.List[str]:
+    def restricted_allowed_types_slug(self) -> typing.Tuple[str, ...]:
         """
         Return restricted list of content_type: don't return
         "any" slug, dont return content type slug alias , don't return event.
         Useful to restrict slug param in schema.
         """
-        allowed_type_slug = [contents_type.slug for contents_type in self._content_types]
-        return allowed_type_slug
+        return self.registry.restricted_allowed_types_slug
 
-    def endpoint_allowed_types(self) -> typing.List[ContentType]:
+    def endpoint_allowed_types(self) -> typing.Tuple[ContentType, ...]:
         """
         Same as restricted_allowed_types_slug but return
         ContentType instead of str slug
         and add special content_type included like comments.
         """
-        content_types = self._content_types
-        content_types.extend(self._special_contents_types)
-        return content_types
+        return self.registry.endpoint_allowed_types
 
-    def endpoint_allowed_types_slug(self) -> typing.List[str]:
+    def endpoint_allowed_types_slug(self) -> typing.Tuple[str, ...]:
         """
         same as endpoint_allowed_types but return str slug
         instead of ContentType
         """
-        content_types = self.endpoint_allowed_types()
-        allowed_type_slug = [contents_type.slug for contents_type in content_types]
-        return allowed_type_slug
+        return self.registry.endpoint_allowed_types_slug
 
-    def query_allowed_types_slugs(self) -> typing.List[str]:
+    def query_allowed_types_slugs(self) -> typing.Tuple[str, ...]:
         """
         Return alls allowed types slug : content_type slug + all alias, any
         and special content_type like comment. Do not return event.
         Usefull allowed value to perform query to database.
         """
-        allowed_types_slug = []
-        content_types = self._content_types
-        content_types.extend(self._special_contents_types)
-        for content_type in content_types:
-            allowed_types_slug.append(content_type.slug)
-            if content_type.slug_alias:
-                allowed_types_slug.extend(content_type.slug_alias)
-        allowed_types_slug.extend(self._extra_slugs)
-        return allowed_types_slug
+        return self.registry.query_allowed_types_slugs
 
     def default_allowed_content_properties(self, slug: str) -> dict:
         content_type = self.get_one_by_slug(slug)
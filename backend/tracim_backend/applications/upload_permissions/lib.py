@@ -303,9 +303,10 @@ class UploadPermissionLib(object):
             content_api.create_comment(
                 parent=content, content=comment_message, do_save=True, do_notify=False
             )
-            created_contents.append(content_api.get_content_in_context(content))
+            created_contents.append(content)
             content_api.execute_created_content_actions(content)
 
+        created_contents = content_api.get_contents_in_context(created_contents)
         if do_notify:
             workspace_lib = WorkspaceApi(
                 config=self._config, current_user=upload_permission.author, session=self._session
@@ -5,15 +5,14 @@ import plaster
 from pyramid.scripting import AppEnvironment
 
 from tracim_backend.command import AppContextCommand
-from tracim_backend.exceptions import AgendaServerConnectionError
-from tracim_backend.exceptions import CannotCreateAgenda
-from tracim_backend.lib.agenda.agenda import AgendaApi
-from tracim_backend.lib.core.user import UserApi
-from tracim_backend.lib.core.workspace import WorkspaceApi
-from tracim_backend.lib.utils.logger import logger
+from tracim_backend.lib.agenda.sync import DEFAULT_AGENDA_SYNC_WORKERS
+from tracim_backend.lib.agenda.sync import AgendaSynchronizer
+from tracim_backend.lib.agenda.sync import AgendaSyncResult
 from tracim_backend.wsgi import CALDAV_APP_NAME
 from tracim_backend.wsgi import caldav_app
 
+AGENDA_SYNC_PROGRESS_STEP = 1000
+
 
 class CaldavRunnerCommand(AppContextCommand):
     auto_setup_context = False
@@ -43,6 +42,24 @@ class CaldavSyncCommand(AppContextCommand):
 
     def get_parser(self, prog_name: str) -> argparse.ArgumentParser:
         parser = super().get_parser(prog_name)
+        parser.add_argument(
+            "--workers",
+            help="number of agendas synchronized at the same time (default: {})".format(
+                DEFAULT_AGENDA_SYNC_WORKERS
+            ),
+            dest="nb_workers",
+            required=False,
+            default=DEFAULT_AGENDA_SYNC_WORKERS,
+            type=int,
+        )
+        parser.add_argument(
+            "--force",
+            help="synchronize all agendas, even ones not changed since last synchronization",
+            dest="force",
+            required=False,
+            action="store_true",
+            default=False,
+        )
         return parser
 
     def take_app_action(self, parsed_args: argparse.Namespace, app_context: AppEnvironment) -> None:
@@ -50,64 +67,43 @@ class CaldavSyncCommand(AppContextCommand):
         # to not setup object var outside of __init__ .
         self._session = app_context["request"].dbsession
         self._app_config = app_context["registry"].settings["CFG"]
-        self._user_api = UserApi(current_user=None, session=self._session, config=self._app_config)
-        self._workspace_api = WorkspaceApi(
-            current_user=None, force_role=True, session=self._session, config=self._app_config
-        )
-        self._agenda_api = AgendaApi(
-            current_user=None, session=self._session, config=self._app_config
+        synchronizer = AgendaSynchronizer(
+            session=self._session,
+            config=self._app_config,
+            nb_workers=parsed_args.nb_workers,
+            force=parsed_args.force,
         )
+        nb_synced = 0
 
-        # INFO - G.M - 2019-03-13 - check users agendas
-        users = self._user_api.get_all()
-        nb_error_agenda_access = 0
-        for user in users:
-            try:
-                already_exist = self._agenda_api.ensure_user_agenda_exists(user)
-                if not already_exist:
-                    print("New created agenda for user {}".format(user))
-            except CannotCreateAgenda as exc:
-                nb_error_agenda_access += 1
-                print("Cannot create agenda for user {}".format(user.user_id))
-                logger.exception(self, exc)
-            except AgendaServerConnectionError as exc:
-                nb_error_agenda_access += 1
-                print("Cannot access to agenda server: connection error.")
-                logger.exception(self, exc)
-            except Exception as exc:
-                nb_error_agenda_access += 1
-                print("Something goes wrong during agenda create/update")
-                logger.exception(self, exc)
-        nb_user_agendas = len(users)
-        nb_verified_user_agenda = len(users) - nb_error_agenda_access
-        print("{}/{} users agenda verified".format(nb_verified_user_agenda, nb_user_agendas))
+        def agenda_synced(result: AgendaSyncResult) -> None:
+            nonlocal nb_synced
+            nb_synced += 1
+            agenda = result.agenda
+            if result.error:
+                print(
+                    "Cannot sync {} agenda {}: {}".format(
+                        agenda.agenda_type, agenda.owner_id, result.error
+                    )
+                )
+            elif result.created:
+                print("New created agenda for {} {}".format(agenda.agenda_type, agenda.owner_id))
+            if nb_synced % AGENDA_SYNC_PROGRESS_STEP == 0:
+                print("{} agendas synchronized".format(nb_synced))
 
-        # # INFO - G.M - 2019-03-13 - check workspaces agendas
-        workspaces = self._workspace_api.get_all()
-        nb_error_agenda_access = 0
-        nb_workspaces = 0
-        nb_agenda_enabled_workspace = 0
-        for workspace in workspaces:
-            nb_workspaces += 1
-            if workspace.agenda_enabled:
-                nb_agenda_enabled_workspace += 1
-                try:
-                    already_exist = self._agenda_api.ensure_workspace_agenda_exists(workspace)
-                    if not already_exist:
-                        print("New created agenda for workspace {}".format(workspace.workspace_id))
-                except CannotCreateAgenda as exc:
-                    print("Cannot create agenda for workspace {}".format(workspace.workspace_id))
-                    logger.exception(self, exc)
-                except AgendaServerConnectionError as exc:
-                    nb_error_agenda_access += 1
-                    print("Cannot access to agenda server: connection error.")
-                    logger.exception(self, exc)
-        nb_verified_workspace_agenda = nb_agenda_enabled_workspace - nb_error_agenda_access
-        nb_workspace_without_agenda_enabled = nb_workspaces - nb_agenda_enabled_workspace
+        stats = synchronizer.sync(result_callback=agenda_synced)
+        print(
+            "{} agendas: {} created, {} updated, {} unchanged since last sync, {} errors".format(
+                stats.nb_agendas,
+                stats.nb_created,
+                stats.nb_updated,
+                stats.nb_skipped,
+                stats.nb_errors,
+            )
+        )
         print(
-            "{}/{} workspace agenda verified ({} workspace without agenda feature enabled)".format(
-                nb_verified_workspace_agenda,
-                nb_agenda_enabled_workspace,
-                nb_workspace_without_agenda_enabled,
+            "Synchronization done in {:.1f}s ({:.1f} agendas/s)".format(
+                stats.duration, stats.throughput
             )
         )
+        if stats.nb_errors:
+            print("Warning ! {} agendas cannot be synchronized.".format(stats.nb_errors))
@@ -0,0 +1,128 @@
+import argparse
+import time
+import typing
+
+from pyramid.scripting import AppEnvironment
+from sqlalchemy.orm import Query
+
+from tracim_backend.app_models.contents import FILE_TYPE
+from tracim_backend.command import AppContextCommand
+from tracim_backend.lib.preview.pregeneration import PreviewPregenerator
+from tracim_backend.lib.preview.pregeneration import RevisionPreviewsResult
+from tracim_backend.models.data import Content
+from tracim_backend.models.data import ContentRevisionRO
+
+PREVIEW_GENERATION_BATCH_SIZE = 100
+
+
+class PreviewGenerateCommand(AppContextCommand):
+    def get_description(self) -> str:
+        return "generate previews of file(s) revisions, so that they are served from preview cache"
+
+    def get_parser(self, prog_name: str) -> argparse.ArgumentParser:
+        parser = super().get_parser(prog_name)
+        parser.add_argument(
+            "--revision-id",
+            help="select a specific revision_id to generate previews for, "
+            "if not provided will generate previews of current revision of all files",
+            dest="revision_id",
+            required=False,
+            default=None,
+            type=int,
+        )
+        parser.add_argument(
+            "--all-revisions",
+            help="generate previews of all revisions of files, not only current ones",
+            dest="all_revisions",
+            required=False,
+            action="store_true",
+            default=False,
+        )
+        parser.add_argument(
+            "--processes",
+            help="number of processes generating previews "
+            "(default to preview.pregeneration.workers)",
+            dest="nb_processes",
+            required=False,
+            default=None,
+            type=int,
+        )
+        parser.add_argument(
+            "--batch-size",
+            help="number of revisions read from database at once",
+            dest="batch_size",
+            required=False,
+            default=PREVIEW_GENERATION_BATCH_SIZE,
+            type=int,
+        )
+        return parser
+
+    def take_app_action(self, parsed_args: argparse.Namespace, app_context: AppEnvironment) -> None:
+        # TODO - G.M - 05-04-2018 -Refactor this in order
+        # to not setup object var outside of __init__ .
+        self._session = app_context["request"].dbsession
+        self._app_config = app_context["registry"].settings["CFG"]
+        start_time = time.time()
+        nb_revisions = 0
+        nb_previews = 0
+        nb_errors = 0
+
+        def revision_previews_built(result: RevisionPreviewsResult) -> None:
+            nonlocal nb_revisions, nb_previews, nb_errors
+            nb_revisions += 1
+            nb_previews += result.nb_previews
+            if result.error:
+                nb_errors += 1
+            elapsed_time = time.time() - start_time
+            print(
+                "{} revisions processed ({:.1f} revisions/s), {} previews built, "
+                "last revision processed: {}".format(
+                    nb_revisions,
+                    nb_revisions / elapsed_time if elapsed_time else 0,
+                    nb_previews,
+                    result.revision_id,
+                )
+            )
+
+        with PreviewPregenerator(self._app_config, parsed_args.nb_processes) as pregenerator:
+            for revision_ids in self._get_revision_ids_batches(
+                parsed_args.revision_id, parsed_args.all_revisions, parsed_args.batch_size
+            ):
+                revision_files = pregenerator.get_revision_files(self._session, revision_ids)
+                pregenerator.build_previews(revision_files, result_callback=revision_previews_built)
+        if nb_errors == 0:
+            print("Previews of {} revisions were generated".format(nb_revisions))
+        else:
+            print(
+                "Warning ! previews of {}/{} revisions cannot be generated properly.".format(
+                    nb_errors, nb_revisions
+                )
+            )
+
+    def _get_revision_ids_batches(
+        self, revision_id: typing.Optional[int], all_revisions: bool, batch_size: int
+    ) -> typing.Iterator[typing.List[int]]:
+        if revision_id:
+            yield [revision_id]
+            return
+        query = self._get_revision_ids_query(all_revisions)
+        after_revision_id = 0
+        while True:
+            revision_ids = [
+                revision_id
+                for revision_id, in query.filter(
+                    ContentRevisionRO.revision_id > after_revision_id
+                ).limit(batch_size)
+            ]
+            if not revision_ids:
+                return
+            yield revision_ids
+            after_revision_id = revision_ids[-1]
+
+    def _get_revision_ids_query(self, all_revisions: bool) -> Query:
+        query = self._session.query(ContentRevisionRO.revision_id).filter(
+            ContentRevisionRO.type == FILE_TYPE
+        )
+        if not all_revisions:
+            query = query.join(Content, Content.cached_revision_id == ContentRevisionRO.revision_id)
+        return query.order_by(ContentRevisionRO.revision_id)
@@ -1,10 +1,16 @@
 import argparse
+import os
+import time
+import typing
 
 from pyramid.scripting import AppEnvironment
 
 from tracim_backend.app_models.contents import content_type_list
 from tracim_backend.command import AppContextCommand
 from tracim_backend.lib.core.content import ContentApi
+from tracim_backend.lib.search.elasticsearch_search.elasticsearch_search import INDEX_BATCH_SIZE
+from tracim_backend.lib.search.search import IndexedContentsResults
+from tracim_backend.lib.search.search_factory import ELASTICSEARCH__SEARCH_ENGINE_SLUG
 from tracim_backend.lib.search.search_factory import SearchFactory
 from tracim_backend.models.context_models import ContentInContext
 
@@ -22,9 +28,19 @@ class IndexingCommand(AppContextCommand):
         self.search_api.index_content(content_in_context)
         print('content "{}" correctly indexed.'.format(content_id))
 
-    def _index_all_contents(self) -> None:
+    def _index_all_contents(
+        self,
+        batch_size: int = INDEX_BATCH_SIZE,
+        nb_processes: int = 1,
+        checkpoint_file_path: typing.Optional[str] = None,
+    ) -> None:
         print("Indexing all content")
-        index_contents_result = self.search_api.index_all_content()
+        if self._app_config.SEARCH__ENGINE == ELASTICSEARCH__SEARCH_ENGINE_SLUG:
+            index_contents_result = self._index_all_contents_by_batch(
+                batch_size, nb_processes, checkpoint_file_path
+            )
+        else:
+            index_contents_result = self.search_api.index_all_content()
         nb_index_errors = index_contents_result.get_nb_index_errors()
         nb_contents_to_index = index_contents_result.get_nb_contents_to_index()
         if nb_index_errors == 0:
@@ -36,6 +52,46 @@ class IndexingCommand(AppContextCommand):
                 )
             )
 
+    def _index_all_contents_by_batch(
+        self, batch_size: int, nb_processes: int, checkpoint_file_path: typing.Optional[str]
+    ) -> IndexedContentsResults:
+        after_content_id = 0
+        if checkpoint_file_path and os.path.isfile(checkpoint_file_path):
+            with open(checkpoint_file_path) as checkpoint_file:
+                after_content_id = int(checkpoint_file.read().strip() or 0)
+            print("Resume indexing after content {}".format(after_content_id))
+        start_time = time.time()
+        nb_indexed_contents = 0
+
+        def batch_indexed(content_ids: typing.List[int], result: IndexedContentsResults) -> None:
+            nonlocal nb_indexed_contents
+            nb_indexed_contents += result.get_nb_contents_to_index()
+            if checkpoint_file_path:
+                with open(checkpoint_file_path, "w") as checkpoint_file:
+                    checkpoint_file.write(str(content_ids[-1]))
+            elapsed_time = time.time() - start_time
+            print(
+                "{} contents indexed ({:.1f} contents/s), {} errors in last batch, "
+                "last content indexed: {}".format(
+                    nb_indexed_contents,
+                    nb_indexed_contents / elapsed_time if elapsed_time else 0,
+                    result.get_nb_index_errors(),
+                    content_ids[-1],
+                )
+            )
+
+        index_contents_result = self.search_api.index_all_content(
+            batch_size=batch_size,
+            nb_processes=nb_processes,
+            after_content_id=after_content_id,
+            batch_indexed_callback=batch_indexed,
+        )
+        # INFO - G.M - 2019-11-15 - indexing is complete, next indexing should restart from
+        # first content
+        if checkpoint_file_path and os.path.isfile(checkpoint_file_path):
+            os.remove(checkpoint_file_path)
+        return index_contents_result
+
 
 class SearchIndexInitCommand(IndexingCommand):
     def get_description(self) -> str:
@@ -97,6 +153,32 @@ class SearchIndexIndexCommand(IndexingCommand):
             default=None,
             type=int,
         )
+        parser.add_argument(
+            "--batch-size",
+            help="number of contents indexed at once when indexing all contents "
+            "(elasticsearch only)",
+            dest="batch_size",
+            required=False,
+            default=INDEX_BATCH_SIZE,
+            type=int,
+        )
+        parser.add_argument(
+            "--processes",
+            help="number of processes preparing contents to index when indexing all contents "
+            "(elasticsearch only)",
+            dest="nb_processes",
+            required=False,
+            default=1,
+            type=int,
+        )
+        parser.add_argument(
+            "--checkpoint-file",
+            help="file where last indexed content_id is stored when indexing all contents, "
+            "indexing is resumed from it if it exists (elasticsearch only)",
+            dest="checkpoint_file_path",
+            required=False,
+            default=None,
+        )
         return parser
 
     def take_app_action(self, parsed_args: argparse.Namespace, app_context: AppEnvironment) -> None:
@@ -119,7 +201,11 @@ class SearchIndexIndexCommand(IndexingCommand):
             )
             self.search_api.index_content(content_in_context)
         else:
-            self._index_all_contents()
+            self._index_all_contents(
+                batch_size=parsed_args.batch_size,
+                nb_processes=parsed_args.nb_processes,
+                checkpoint_file_path=parsed_args.checkpoint_file_path,
+            )
 
 
 class SearchIndexDeleteCommand(AppContextCommand):
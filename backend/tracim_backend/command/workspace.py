@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+import argparse
+
+from pyramid.scripting import AppEnvironment
+
+from tracim_backend.command import AppContextCommand
+from tracim_backend.lib.core.content import COPY_BATCH_SIZE
+from tracim_backend.lib.core.content import ContentApi
+from tracim_backend.lib.core.user import UserApi
+from tracim_backend.lib.core.workspace import WorkspaceApi
+
+
+class WorkspaceUsedSpaceUpdateCommand(AppContextCommand):
+    def get_description(self) -> str:
+        return "recompute (or check) stored used space of workspaces"
+
+    def get_parser(self, prog_name: str) -> argparse.ArgumentParser:
+        parser = super().get_parser(prog_name)
+        parser.add_argument(
+            "--workspace_id",
+            help="select a specific workspace_id, if not provided all workspaces are updated",
+            dest="workspace_id",
+            required=False,
+            default=None,
+            type=int,
+        )
+        parser.add_argument(
+            "--check",
+            help="do not update stored used space, only check if it is correct",
+            dest="check",
+            required=False,
+            action="store_true",
+            default=False,
+        )
+        return parser
+
+    def take_app_action(self, parsed_args: argparse.Namespace, app_context: AppEnvironment) -> None:
+        # TODO - G.M - 05-04-2018 -Refactor this in order
+        # to not setup object var outside of __init__ .
+        self._session = app_context["request"].dbsession
+        self._app_config = app_context["registry"].settings["CFG"]
+        self._workspace_api = WorkspaceApi(
+            current_user=None, session=self._session, config=self._app_config, show_deleted=True
+        )
+        if parsed_args.workspace_id:
+            workspaces = [self._workspace_api.get_one(parsed_args.workspace_id)]
+        else:
+            workspaces = self._workspace_api.get_all()
+
+        nb_wrong_used_space = 0
+        for workspace in workspaces:
+            stored_used_space = workspace.used_space
+            if parsed_args.check:
+                used_space = workspace.get_size()
+            else:
+                used_space = self._workspace_api.update_used_space(workspace)
+            if stored_used_space != used_space:
+                nb_wrong_used_space += 1
+                print(
+                    'used space of workspace "{}" was {} instead of {}'.format(
+                        workspace.workspace_id, stored_used_space, used_space
+                    )
+                )
+
+        if nb_wrong_used_space == 0:
+            print("used space of all {} workspace(s) is correct".format(len(workspaces)))
+        elif parsed_args.check:
+            print(
+                "Warning ! used space of {}/{} workspace(s) is not correct".format(
+                    nb_wrong_used_space, len(workspaces)
+                )
+            )
+        else:
+            print(
+                "used space of {}/{} workspace(s) updated".format(
+                    nb_wrong_used_space, len(workspaces)
+                )
+            )
+
+
+class WorkspaceCloneCommand(AppContextCommand):
+    def get_description(self) -> str:
+        return "clone a workspace with all its contents"
+
+    def get_parser(self, prog_name: str) -> argparse.ArgumentParser:
+        parser = super().get_parser(prog_name)
+        parser.add_argument(
+            "--workspace_id",
+            help="id of workspace to clone",
+            dest="workspace_id",
+            required=True,
+            type=int,
+        )
+        parser.add_argument("--label", help="label of new workspace", dest="label", required=True)
+        parser.add_argument(
+            "-l",
+            "--login",
+            help="login (email) of user owning new workspace",
+            dest="login",
+            required=True,
+        )
+        return parser
+
+    def take_app_action(self, parsed_args: argparse.Namespace, app_context: AppEnvironment) -> None:
+        # TODO - G.M - 05-04-2018 -Refactor this in order
+        # to not setup object var outside of __init__ .
+        self._session = app_context["request"].dbsession
+        self._app_config = app_context["registry"].settings["CFG"]
+        user = UserApi(
+            current_user=None, session=self._session, config=self._app_config
+        ).get_one_by_email(parsed_args.login)
+        workspace_api = WorkspaceApi(
+            current_user=user, session=self._session, config=self._app_config
+        )
+        workspace = workspace_api.get_one(parsed_args.workspace_id)
+        new_workspace = workspace_api.create_workspace(
+            label=parsed_args.label,
+            description=workspace.description,
+            agenda_enabled=workspace.agenda_enabled,
+            public_download_enabled=workspace.public_download_enabled,
+            public_upload_enabled=workspace.public_upload_enabled,
+            save_now=True,
+        )
+        content_api = ContentApi(current_user=user, session=self._session, config=self._app_config)
+        root_contents = content_api.get_all(parent_ids=[0], workspace=workspace)
+        for content in root_contents:
+            print('copying content "{}" ({})'.format(content.label, content.content_id))
+            content_api.copy(
+                content,
+                new_workspace=new_workspace,
+                new_content_namespace=content.content_namespace,
+                do_notify=False,
+                progress_callback=self._print_copy_progress,
+            )
+        print(
+            'workspace "{}" cloned to workspace "{}" ({})'.format(
+                workspace.workspace_id, new_workspace.label, new_workspace.workspace_id
+            )
+        )
+
+    @staticmethod
+    def _print_copy_progress(copied_revisions: int, total_revisions: int) -> None:
+        if copied_revisions % COPY_BATCH_SIZE == 0 or copied_revisions == total_revisions:
+            print("{}/{} revisions copied".format(copied_revisions, total_revisions))
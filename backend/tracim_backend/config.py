@@ -9,6 +9,7 @@ from paste.deploy.converters import asbool
 
 from tracim_backend.app_models.applications import Application
 from tracim_backend.app_models.contents import content_status_list
+from tracim_backend.app_models.contents import content_type_list
 from tracim_backend.app_models.validator import update_validators
 from tracim_backend.exceptions import ConfigCodeError
 from tracim_backend.exceptions import ConfigurationError
@@ -16,6 +17,8 @@ from tracim_backend.exceptions import NotReadableDirectory
 from tracim_backend.exceptions import NotWritableDirectory
 from tracim_backend.extensions import app_list
 from tracim_backend.lib.collaborative_document_edition.data import COLLABORA_DOCUMENT_EDITION_SLUG
+from tracim_backend.lib.search.elasticsearch_search.data import ELASTICSEARCH_TEXT_EXTRACTION_MODE
+from tracim_backend.lib.search.elasticsearch_search.data import LOCAL_TEXT_EXTRACTION_MODE
 from tracim_backend.lib.utils.logger import logger
 from tracim_backend.lib.utils.translation import DEFAULT_FALLBACK_LANG
 from tracim_backend.lib.utils.translation import translator_marker as _
@@ -272,6 +275,35 @@ class CFG(object):
             cast_func=PreviewDim.from_string,
             separator=",",
         )
+        self.PREVIEW__PREGENERATION__ACTIVATED = asbool(
+            self.get_raw_config("preview.pregeneration.activated", "false")
+        )
+        self.PREVIEW__PREGENERATION__MAX_PAGES = int(
+            self.get_raw_config("preview.pregeneration.max_pages", "1")
+        )
+        self.PREVIEW__PREGENERATION__WORKERS = int(
+            self.get_raw_config("preview.pregeneration.workers", "2")
+        )
+        # INFO - G.M - 2019-11-25 - office documents previews are built with
+        # libreoffice, which is slow and memory hungry.
+        default_mimetype_concurrency = ",".join(
+            [
+                "application/vnd.oasis.opendocument:1",
+                "application/vnd.openxmlformats-officedocument:1",
+                "application/msword:1",
+                "application/vnd.ms-:1",
+            ]
+        )
+        self.PREVIEW__PREGENERATION__MIMETYPE_CONCURRENCY = dict(
+            string_to_list(
+                self.get_raw_config(
+                    "preview.pregeneration.mimetype_concurrency", default_mimetype_concurrency
+                ),
+                cast_func=lambda item: (item.rsplit(":", 1)[0], int(item.rsplit(":", 1)[1])),
+                separator=",",
+                do_strip=True,
+            )
+        )
 
         self.FRONTEND__SERVE = asbool(self.get_raw_config("frontend.serve", "false"))
         # INFO - G.M - 2018-08-06 - we pretend that frontend_dist_folder
@@ -284,6 +316,11 @@ class CFG(object):
         self.BACKEND__I18N_FOLDER_PATH = self.get_raw_config(
             "backend.i18n_folder_path", backend_i18n_folder
         )
+        # INFO - G.M - 2019-11-27 - translations files are read once by process,
+        # auto reload allow to get updated translations without restarting tracim.
+        self.BACKEND__I18N_AUTO_RELOAD = asbool(
+            self.get_raw_config("backend.i18n_auto_reload", "false")
+        )
 
         frontend_dist_folder = os.path.join(tracim_v2_folder, "frontend", "dist")
         self.FRONTEND__DIST_FOLDER_PATH = self.get_raw_config(
@@ -388,9 +425,12 @@ class CFG(object):
             _("[{website_title}] A password reset has been requested"),
         )
 
-        # TODO - G.M - 2019-01-22 - add feature to process notification email
-        # asynchronously see issue https://github.com/tracim/tracim/issues/1345
-        self.EMAIL__NOTIFICATION__PROCESSING_MODE = "sync"
+        self.EMAIL__NOTIFICATION__PROCESSING_MODE = self.get_raw_config(
+            "email.notification.processing_mode", "sync"
+        ).upper()
+        self.EMAIL__NOTIFICATION__ASYNC__DIGEST_DELAY = int(
+            self.get_raw_config("email.notification.async.digest_delay", "30")
+        )
         self.EMAIL__NOTIFICATION__ACTIVATED = asbool(
             self.get_raw_config("email.notification.activated")
         )
@@ -403,6 +443,12 @@ class CFG(object):
         self.EMAIL__NOTIFICATION__SMTP__PASSWORD = self.get_raw_config(
             "email.notification.smtp.password", secret=True
         )
+        self.EMAIL__NOTIFICATION__SMTP__POOL_SIZE = int(
+            self.get_raw_config("email.notification.smtp.pool_size", "2")
+        )
+        self.EMAIL__NOTIFICATION__SMTP__KEEPALIVE_INTERVAL = int(
+            self.get_raw_config("email.notification.smtp.keepalive_interval", "60")
+        )
 
         self.EMAIL__REPLY__ACTIVATED = asbool(self.get_raw_config("email.reply.activated", "false"))
 
@@ -430,6 +476,12 @@ class CFG(object):
             self.get_raw_config("email.reply.use_txt_parsing", "true")
         )
         self.EMAIL__REPLY__LOCKFILE_PATH = self.get_raw_config("email.reply.lockfile_path", "")
+        self.EMAIL__REPLY__PROCESSING_MODE = self.get_raw_config(
+            "email.reply.processing_mode", "api"
+        ).upper()
+        self.EMAIL__REPLY__PARSING_WORKERS = int(
+            self.get_raw_config("email.reply.parsing_workers", "4")
+        )
 
         self.EMAIL__PROCESSING_MODE = self.get_raw_config("email.processing_mode", "sync").upper()
 
@@ -458,6 +510,8 @@ class CFG(object):
         self.WEBDAV__VERBOSE__LEVEL = int(self.get_raw_config("webdav.verbose.level", "1"))
         self.WEBDAV__ROOT_PATH = self.get_raw_config("webdav.root_path", "/")
         self.WEBDAV__BLOCK_SIZE = int(self.get_raw_config("webdav.block_size", "8192"))
+        self.WEBDAV__PATH_CACHE__TTL = float(self.get_raw_config("webdav.path_cache.ttl", "5"))
+        self.WEBDAV__LOCK_STORAGE = self.get_raw_config("webdav.lock_storage", "memory")
         self.WEBDAV__DIR_BROWSER__ENABLED = asbool(
             self.get_raw_config("webdav.dir_browser.enabled", "true")
         )
@@ -495,6 +549,15 @@ class CFG(object):
         self.CALDAV__RADICALE_PROXY__BASE_URL = self.get_raw_config(
             "caldav.radicale_proxy.base_url", None
         )
+        self.CALDAV__RADICALE_PROXY__POOL_SIZE = int(
+            self.get_raw_config("caldav.radicale_proxy.pool_size", "10")
+        )
+        self.CALDAV__RADICALE_PROXY__CONNECT_TIMEOUT = float(
+            self.get_raw_config("caldav.radicale_proxy.connect_timeout", "5")
+        )
+        self.CALDAV__RADICALE_PROXY__READ_TIMEOUT = float(
+            self.get_raw_config("caldav.radicale_proxy.read_timeout", "60")
+        )
         self.CALDAV__RADICALE__STORAGE__FILESYSTEM_FOLDER = self.get_raw_config(
             "caldav.radicale.storage.filesystem_folder"
         )
@@ -572,6 +635,18 @@ class CFG(object):
         self.SEARCH__ELASTICSEARCH__INGEST__SIZE_LIMIT = int(
             self.get_raw_config("search.elasticsearch.ingest.size_limit", "52428800")
         )
+        self.SEARCH__ELASTICSEARCH__INGEST__TEXT_EXTRACTION_MODE = self.get_raw_config(
+            "search.elasticsearch.ingest.text_extraction_mode", ELASTICSEARCH_TEXT_EXTRACTION_MODE
+        )
+        self.SEARCH__ELASTICSEARCH__INGEST__TEXT_EXTRACTION_WORKERS = int(
+            self.get_raw_config("search.elasticsearch.ingest.text_extraction_workers", "2")
+        )
+        default_text_cache_dir = None
+        if self.PREVIEW_CACHE_DIR:
+            default_text_cache_dir = os.path.join(self.PREVIEW_CACHE_DIR, "search_texts")
+        self.SEARCH__ELASTICSEARCH__INGEST__TEXT_CACHE_DIR = self.get_raw_config(
+            "search.elasticsearch.ingest.text_cache_dir", default_text_cache_dir
+        )
         self.SEARCH__ELASTICSEARCH__HOST = self.get_raw_config(
             "search.elasticsearch.host", "localhost"
         )
@@ -581,6 +656,9 @@ class CFG(object):
         self.SEARCH__ELASTICSEARCH__REQUEST_TIMEOUT = int(
             self.get_raw_config("search.elasticsearch.request_timeout", "60")
         )
+        self.SEARCH__ELASTICSEARCH__INDEXING_PROCESSING_MODE = self.get_raw_config(
+            "search.elasticsearch.indexing_processing_mode", "sync"
+        ).upper()
 
     def _load_collaborative_document_edition_config(self):
         self.COLLABORATIVE_DOCUMENT_EDITION__ACTIVATED = asbool(
@@ -605,6 +683,7 @@ class CFG(object):
         self._check_global_config_validity()
         self._check_email_config_validity()
         self._check_caldav_config_validity()
+        self._check_webdav_config_validity()
         self._check_search_config_validity()
         self._check_collaborative_document_edition_config_validity()
 
@@ -716,6 +795,14 @@ class CFG(object):
                 self.EMAIL__REPLY__LOCKFILE_PATH,
                 when_str="when email reply is activated",
             )
+        if self.EMAIL__REPLY__PROCESSING_MODE not in (self.CST.API, self.CST.DIRECT):
+            raise Exception(
+                "EMAIL__REPLY__PROCESSING_MODE "
+                "can "
+                'be "{}" or "{}", not "{}"'.format(
+                    self.CST.API, self.CST.DIRECT, self.EMAIL__REPLY__PROCESSING_MODE
+                )
+            )
         # INFO - G.M - 2019-02-01 - check if template are available,
         # do not allow running with email_notification_activated
         # if templates needed are not available
@@ -743,6 +830,15 @@ class CFG(object):
                 )
             )
 
+        if self.EMAIL__NOTIFICATION__PROCESSING_MODE not in (self.CST.ASYNC, self.CST.SYNC):
+            raise Exception(
+                "EMAIL__NOTIFICATION__PROCESSING_MODE "
+                "can "
+                'be "{}" or "{}", not "{}"'.format(
+                    self.CST.ASYNC, self.CST.SYNC, self.EMAIL__NOTIFICATION__PROCESSING_MODE
+                )
+            )
+
     def _check_caldav_config_validity(self) -> None:
         """
         Check if config is correctly setted for caldav features
@@ -927,10 +1023,21 @@ class CFG(object):
         for app_slug in enabled_app_list:
             if app_slug in available_apps.keys():
                 app_list.append(available_apps[app_slug])
+        content_type_list.load_content_types()
         # TODO - G.M - 2018-08-08 - We need to update validators each time
         # app_list is updated.
         update_validators()
 
+    def _check_webdav_config_validity(self) -> None:
+        lock_storage_valid = ["memory", "redis"]
+        if self.WEBDAV__LOCK_STORAGE not in lock_storage_valid:
+            lock_storage_list_str = ", ".join(
+                '"{}"'.format(lock_storage) for lock_storage in lock_storage_valid
+            )
+            raise ConfigurationError(
+                "ERROR: WEBDAV__LOCK_STORAGE valid values are {}.".format(lock_storage_list_str)
+            )
+
     def _check_search_config_validity(self):
         search_engine_valid = ["elasticsearch", "simple"]
         if self.SEARCH__ENGINE not in search_engine_valid:
@@ -949,6 +1056,44 @@ class CFG(object):
                 self.SEARCH__ELASTICSEARCH__INDEX_ALIAS,
                 when_str="if elasticsearch search feature is enabled",
             )
+            text_extraction_mode_valid = [
+                ELASTICSEARCH_TEXT_EXTRACTION_MODE,
+                LOCAL_TEXT_EXTRACTION_MODE,
+            ]
+            if (
+                self.SEARCH__ELASTICSEARCH__INGEST__TEXT_EXTRACTION_MODE
+                not in text_extraction_mode_valid
+            ):
+                text_extraction_mode_list_str = ", ".join(
+                    '"{}"'.format(mode) for mode in text_extraction_mode_valid
+                )
+                raise ConfigurationError(
+                    "ERROR: SEARCH__ELASTICSEARCH__INGEST__TEXT_EXTRACTION_MODE valid values are {}.".format(
+                        text_extraction_mode_list_str
+                    )
+                )
+            if (
+                self.SEARCH__ELASTICSEARCH__USE_INGEST
+                and self.SEARCH__ELASTICSEARCH__INGEST__TEXT_EXTRACTION_MODE
+                == LOCAL_TEXT_EXTRACTION_MODE
+            ):
+                self.check_mandatory_param(
+                    "SEARCH__ELASTICSEARCH__INGEST__TEXT_CACHE_DIR",
+                    self.SEARCH__ELASTICSEARCH__INGEST__TEXT_CACHE_DIR,
+                    when_str="if local text extraction is used",
+                )
+            if self.SEARCH__ELASTICSEARCH__INDEXING_PROCESSING_MODE not in (
+                self.CST.ASYNC,
+                self.CST.SYNC,
+            ):
+                raise ConfigurationError(
+                    "ERROR: SEARCH__ELASTICSEARCH__INDEXING_PROCESSING_MODE "
+                    'can be "{}" or "{}", not "{}"'.format(
+                        self.CST.ASYNC,
+                        self.CST.SYNC,
+                        self.SEARCH__ELASTICSEARCH__INDEXING_PROCESSING_MODE,
+                    )
+                )
 
     # INFO - G.M - 2019-04-05 - Others methods
     def _check_consistency(self):
@@ -982,6 +1127,8 @@ class CFG(object):
     class CST(object):
         ASYNC = "ASYNC"
         SYNC = "SYNC"
+        API = "API"
+        DIRECT = "DIRECT"
 
     def check_mandatory_param(self, param_name: str, value: typing.Any, when_str: str = "") -> None:
         """
@@ -70,6 +70,7 @@ class ErrorCode(IntEnum):
     WORKSPACE_PUBLIC_UPLOAD_DISABLED = 2054
     WORKSPACE_PUBLIC_DOWNLOAD_DISABLED = 2055
     CONTENT_NAMESPACE_DO_NOT_MATCH = 2060
+    INVALID_PAGE_TOKEN = 2061
     # Conflict Error
     USER_ALREADY_EXIST = 3001
     CONTENT_FILENAME_ALREADY_USED_IN_FOLDER = 3002
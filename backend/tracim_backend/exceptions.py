@@ -279,6 +279,10 @@ class ContentNamespaceDoNotMatch(TracimException):
     error_code = ErrorCode.CONTENT_NAMESPACE_DO_NOT_MATCH
 
 
+class InvalidPageToken(TracimException):
+    error_code = ErrorCode.INVALID_PAGE_TOKEN
+
+
 class PasswordDoNotMatch(TracimException):
     error_code = ErrorCode.PASSWORD_DO_NOT_MATCH
 
@@ -41,20 +41,42 @@ CREATE_AGENDA_TEMPLATE = """<?xml version="1.0" encoding="UTF-8" ?>
 </create>
 """
 
+SET_AGENDA_PROPS_TEMPLATE = """<?xml version="1.0" encoding="UTF-8" ?>
+<propertyupdate xmlns="DAV:" xmlns:C="urn:ietf:params:xml:ns:caldav">
+  <set>
+    <prop>
+      <displayname>{agenda_name}</displayname>
+      <C:calendar-description>{agenda_description}</C:calendar-description>
+    </prop>
+  </set>
+</propertyupdate>
+"""
+
 
 class CalendarDescription(ValuedBaseElement):
     tag = ns("C", "calendar-description")
 
 
 class AgendaApi(object):
-    def __init__(self, session: Session, current_user: typing.Optional[User], config: CFG) -> None:
+    def __init__(
+        self,
+        session: Session,
+        current_user: typing.Optional[User],
+        config: CFG,
+        http_session: typing.Optional[requests.Session] = None,
+    ) -> None:
+        """
+        :param http_session: session used for requests to radicale server, give one
+        to reuse connections between calls.
+        """
         self._user = current_user
         self._session = session
         self._config = config
+        self._http = http_session or requests
 
     def _check_agenda_exist(self, agenda_url) -> bool:
         try:
-            response = requests.get(agenda_url)
+            response = self._http.get(agenda_url)
         except requests.exceptions.ConnectionError as exc:
             logger.error(self, "Cannot check agenda existence, connection error to radicale server")
             logger.exception(self, exc)
@@ -75,7 +97,7 @@ class AgendaApi(object):
             agenda_description=escape(agenda_description),
         )
         try:
-            response = requests.request("mkcol", agenda_url, data=body.encode("utf-8"))
+            response = self._http.request("mkcol", agenda_url, data=body.encode("utf-8"))
         except requests.exceptions.ConnectionError as exc:
             raise AgendaServerConnectionError() from exc
         if not response.status_code == 201:
@@ -108,6 +130,25 @@ class AgendaApi(object):
         except Exception as exc:
             raise AgendaPropsUpdateFailed("Failed to update props of agenda") from exc
 
+    def _set_agenda_props(self, agenda_url, agenda_name, agenda_description):
+        """
+        Set props of existing agenda without reading them first.
+        """
+        logger.debug(self, "set caldav agenda props at url {}".format(agenda_url))
+        body = SET_AGENDA_PROPS_TEMPLATE.format(
+            agenda_name=escape(agenda_name), agenda_description=escape(agenda_description)
+        )
+        try:
+            response = self._http.request("proppatch", agenda_url, data=body.encode("utf-8"))
+        except requests.exceptions.ConnectionError as exc:
+            raise AgendaServerConnectionError() from exc
+        if response.status_code >= 400:
+            raise AgendaPropsUpdateFailed(
+                "Failed to set props of agenda {}:{},{}".format(
+                    agenda_url, response.status_code, response.content
+                )
+            )
+
     def _get_agenda_base_url(self, use_proxy: bool) -> str:
         if use_proxy:
             base_url = self._config.WEBSITE__BASE_URL
@@ -116,14 +157,18 @@ class AgendaApi(object):
         return base_url
 
     def get_workspace_agenda_url(self, workspace: Workspace, use_proxy: bool) -> str:
+        return self.get_workspace_agenda_url_by_id(workspace.workspace_id, use_proxy=use_proxy)
+
+    def get_workspace_agenda_url_by_id(self, workspace_id: int, use_proxy: bool) -> str:
         base_url = self._get_agenda_base_url(use_proxy=use_proxy)
-        return "{}{}{}/".format(
-            base_url, self._config.CALDAV_RADICALE_WORKSPACE_PATH, workspace.workspace_id
-        )
+        return "{}{}{}/".format(base_url, self._config.CALDAV_RADICALE_WORKSPACE_PATH, workspace_id)
 
     def get_user_agenda_url(self, user: User, use_proxy: bool) -> str:
+        return self.get_user_agenda_url_by_id(user.user_id, use_proxy=use_proxy)
+
+    def get_user_agenda_url_by_id(self, user_id: int, use_proxy: bool) -> str:
         base_url = self._get_agenda_base_url(use_proxy=use_proxy)
-        return "{}{}{}/".format(base_url, self._config.CALDAV__RADICALE__USER_PATH, user.user_id)
+        return "{}{}{}/".format(base_url, self._config.CALDAV__RADICALE__USER_PATH, user_id)
 
     def ensure_workspace_agenda_exists(self, workspace: Workspace) -> bool:
         """
@@ -136,20 +181,11 @@ class AgendaApi(object):
         if not workspace.agenda_enabled:
             raise WorkspaceAgendaDisabledException()
         workspace_agenda_url = self.get_workspace_agenda_url(workspace, use_proxy=False)
-        if not self._check_agenda_exist(workspace_agenda_url):
-            self._create_agenda(
-                agenda_url=workspace_agenda_url,
-                agenda_name=workspace.label,
-                agenda_description=workspace.description,
-            )
-            return False
-        else:
-            self._update_agenda_props(
-                agenda_url=workspace_agenda_url,
-                agenda_name=workspace.label,
-                agenda_description=workspace.description,
-            )
-            return True
+        return self.ensure_agenda_exists(
+            agenda_url=workspace_agenda_url,
+            agenda_name=workspace.label,
+            agenda_description=workspace.description,
+        )
 
     def ensure_user_agenda_exists(self, user: User) -> bool:
         """
@@ -158,16 +194,40 @@ class AgendaApi(object):
         """
         logger.debug(self, "check for agenda existence of user {}".format(user.user_id))
         user_agenda_url = self.get_user_agenda_url(user, use_proxy=False)
-        if not self._check_agenda_exist(user_agenda_url):
+        return self.ensure_agenda_exists(
+            agenda_url=user_agenda_url, agenda_name=user.display_name, agenda_description=""
+        )
+
+    def ensure_agenda_exists(
+        self, agenda_url: str, agenda_name: str, agenda_description: str, force_props: bool = False,
+    ) -> bool:
+        """
+        Return true if agenda already exist, false if it was just create,
+        raise Exception if agenda cannot be created.
+        Database is not used, so this can be called outside of session thread.
+        :param force_props: set props of existing agenda without checking current
+        values first, saving one request when props are known to be outdated.
+        """
+        if not self._check_agenda_exist(agenda_url):
             self._create_agenda(
-                agenda_url=user_agenda_url, agenda_name=user.display_name, agenda_description=""
+                agenda_url=agenda_url,
+                agenda_name=agenda_name,
+                agenda_description=agenda_description,
             )
             return False
+        if force_props:
+            self._set_agenda_props(
+                agenda_url=agenda_url,
+                agenda_name=agenda_name,
+                agenda_description=agenda_description,
+            )
         else:
             self._update_agenda_props(
-                agenda_url=user_agenda_url, agenda_name=user.display_name, agenda_description=""
+                agenda_url=agenda_url,
+                agenda_name=agenda_name,
+                agenda_description=agenda_description,
             )
-            return True
+        return True
 
     def get_user_agendas(
         self,
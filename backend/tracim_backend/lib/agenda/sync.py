@@ -0,0 +1,240 @@
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+from datetime import datetime
+import threading
+import time
+import typing
+
+import requests
+from requests.adapters import HTTPAdapter
+from sqlalchemy.orm import Session
+
+from tracim_backend.config import CFG
+from tracim_backend.lib.agenda.agenda import AgendaApi
+from tracim_backend.lib.utils.logger import logger
+from tracim_backend.models.agenda_sync import AgendaSyncState
+from tracim_backend.models.auth import User
+from tracim_backend.models.data import Workspace
+from tracim_backend.views.agenda_api.models import AgendaType
+
+DEFAULT_AGENDA_SYNC_WORKERS = 8
+
+
+AgendaToSync = typing.NamedTuple(
+    "AgendaToSync",
+    [
+        ("agenda_type", str),
+        ("owner_id", int),
+        ("agenda_url", str),
+        ("agenda_name", str),
+        ("agenda_description", str),
+    ],
+)
+
+AgendaSyncResult = typing.NamedTuple(
+    "AgendaSyncResult",
+    [("agenda", AgendaToSync), ("created", bool), ("error", typing.Optional[str])],
+)
+
+
+class AgendaSyncStats(object):
+    def __init__(self) -> None:
+        self.nb_agendas = 0
+        self.nb_skipped = 0
+        self.nb_created = 0
+        self.nb_updated = 0
+        self.nb_errors = 0
+        self.start_time = time.time()
+        self.end_time = None  # type: typing.Optional[float]
+
+    @property
+    def duration(self) -> float:
+        return (self.end_time or time.time()) - self.start_time
+
+    @property
+    def throughput(self) -> float:
+        """
+        Number of agendas synchronized (created or updated) by second.
+        """
+        duration = self.duration
+        return (self.nb_created + self.nb_updated) / duration if duration else 0
+
+
+class AgendaSynchronizer(object):
+    """
+    Create or update radicale agendas of users and agenda enabled workspaces.
+    Radicale requests are done in a bounded thread pool, each thread reusing its
+    own http connection. Agendas whose props did not change since last successful
+    sync are skipped: states of synced agendas are stored in agenda_sync_states.
+    Database is only used from calling thread.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        config: CFG,
+        nb_workers: int = DEFAULT_AGENDA_SYNC_WORKERS,
+        force: bool = False,
+    ) -> None:
+        """
+        :param nb_workers: number of threads doing radicale requests
+        :param force: sync all agendas, even ones not changed since last sync.
+        """
+        self._session = session
+        self._config = config
+        self.nb_workers = nb_workers
+        self.force = force
+        self._thread_data = threading.local()
+        self._http_sessions = []  # type: typing.List[requests.Session]
+        self._http_sessions_lock = threading.Lock()
+
+    def get_agendas(self) -> typing.List[AgendaToSync]:
+        """
+        Agendas expected on radicale server: one by user, one by agenda enabled workspace.
+        """
+        agenda_api = AgendaApi(session=self._session, current_user=None, config=self._config)
+        agendas = []  # type: typing.List[AgendaToSync]
+        # INFO - G.M - 2019-11-30 - only needed columns are loaded, not whole users
+        # and workspaces
+        for user_id, display_name in self._session.query(User.user_id, User.display_name):
+            agendas.append(
+                AgendaToSync(
+                    agenda_type=AgendaType.private.value,
+                    owner_id=user_id,
+                    agenda_url=agenda_api.get_user_agenda_url_by_id(user_id, use_proxy=False),
+                    agenda_name=display_name or "",
+                    agenda_description="",
+                )
+            )
+        workspaces = self._session.query(
+            Workspace.workspace_id, Workspace.label, Workspace.description
+        ).filter(
+            Workspace.is_deleted == False, Workspace.agenda_enabled == True  # noqa: E712
+        )
+        for workspace_id, label, description in workspaces:
+            agendas.append(
+                AgendaToSync(
+                    agenda_type=AgendaType.workspace.value,
+                    owner_id=workspace_id,
+                    agenda_url=agenda_api.get_workspace_agenda_url_by_id(
+                        workspace_id, use_proxy=False
+                    ),
+                    agenda_name=label or "",
+                    agenda_description=description or "",
+                )
+            )
+        return agendas
+
+    def sync(
+        self,
+        agendas: typing.Optional[typing.Iterable[AgendaToSync]] = None,
+        result_callback: typing.Optional[typing.Callable[[AgendaSyncResult], None]] = None,
+    ) -> AgendaSyncStats:
+        """
+        Sync given agendas (all agendas if not given) and store states of
+        successfully synced ones in session.
+        :param result_callback: called from calling thread with result of each
+        synced agenda.
+        """
+        stats = AgendaSyncStats()
+        if agendas is None:
+            agendas = self.get_agendas()
+        states = {
+            (state.agenda_type, state.owner_id): state
+            for state in self._session.query(AgendaSyncState)
+        }
+        agendas_to_sync = []  # type: typing.List[AgendaToSync]
+        for agenda in agendas:
+            stats.nb_agendas += 1
+            state = states.get((agenda.agenda_type, agenda.owner_id))
+            if not self.force and self._is_synced(agenda, state):
+                stats.nb_skipped += 1
+                continue
+            agendas_to_sync.append(agenda)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.nb_workers) as executor:
+                futures = [executor.submit(self._sync_agenda, agenda) for agenda in agendas_to_sync]
+                for future in as_completed(futures):
+                    result = future.result()
+                    if result.error:
+                        stats.nb_errors += 1
+                        logger.error(
+                            self,
+                            "Failed to sync agenda {}: {}".format(
+                                result.agenda.agenda_url, result.error
+                            ),
+                        )
+                    else:
+                        if result.created:
+                            stats.nb_created += 1
+                        else:
+                            stats.nb_updated += 1
+                        self._save_state(result.agenda, states)
+                    if result_callback:
+                        result_callback(result)
+        finally:
+            self._close_http_sessions()
+        self._session.flush()
+        stats.end_time = time.time()
+        return stats
+
+    def _is_synced(self, agenda: AgendaToSync, state: typing.Optional[AgendaSyncState]) -> bool:
+        return bool(
+            state
+            and state.agenda_name == agenda.agenda_name
+            and state.agenda_description == agenda.agenda_description
+        )
+
+    def _save_state(
+        self, agenda: AgendaToSync, states: typing.Dict[typing.Tuple[str, int], AgendaSyncState],
+    ) -> None:
+        state = states.get((agenda.agenda_type, agenda.owner_id))
+        if not state:
+            state = AgendaSyncState(agenda_type=agenda.agenda_type, owner_id=agenda.owner_id)
+            self._session.add(state)
+            states[(agenda.agenda_type, agenda.owner_id)] = state
+        state.agenda_name = agenda.agenda_name
+        state.agenda_description = agenda.agenda_description
+        state.synced = datetime.utcnow()
+
+    def _sync_agenda(self, agenda: AgendaToSync) -> AgendaSyncResult:
+        """
+        Run in a thread of the pool: no database access here.
+        """
+        try:
+            # INFO - G.M - 2019-11-30 - setting props is idempotent: set them without
+            # reading them first, all requests going through pooled connection.
+            already_exist = self._get_agenda_api().ensure_agenda_exists(
+                agenda_url=agenda.agenda_url,
+                agenda_name=agenda.agenda_name,
+                agenda_description=agenda.agenda_description,
+                force_props=True,
+            )
+        except Exception as exc:
+            return AgendaSyncResult(
+                agenda=agenda, created=False, error=str(exc) or exc.__class__.__name__
+            )
+        return AgendaSyncResult(agenda=agenda, created=not already_exist, error=None)
+
+    def _get_agenda_api(self) -> AgendaApi:
+        agenda_api = getattr(self._thread_data, "agenda_api", None)
+        if not agenda_api:
+            http_session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+            http_session.mount("http://", adapter)
+            http_session.mount("https://", adapter)
+            with self._http_sessions_lock:
+                self._http_sessions.append(http_session)
+            agenda_api = AgendaApi(
+                session=None, current_user=None, config=self._config, http_session=http_session
+            )
+            self._thread_data.agenda_api = agenda_api
+        return agenda_api
+
+    def _close_http_sessions(self) -> None:
+        with self._http_sessions_lock:
+            for http_session in self._http_sessions:
+                http_session.close()
+            self._http_sessions = []
+        self._thread_data = threading.local()
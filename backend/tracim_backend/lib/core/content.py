@@ -5,6 +5,7 @@ import os
 import traceback
 import typing
 
+from depot.fields.upload import UploadedFile
 from depot.io.interfaces import StoredFile
 from depot.io.utils import FileIntent
 from depot.manager import DepotManager
@@ -15,13 +16,18 @@ import sqlalchemy
 from sqlalchemy import desc
 from sqlalchemy import func
 from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Query
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm import contains_eager
 from sqlalchemy.orm.attributes import QueryableAttribute
 from sqlalchemy.orm.attributes import get_history
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.orm.session import Session
 from sqlalchemy.sql.elements import and_
+from sqlalchemy.sql.selectable import CTE
 import transaction
+from zope.sqlalchemy import mark_changed
 
 from tracim_backend.app_models.contents import FOLDER_TYPE
 from tracim_backend.app_models.contents import ContentType
@@ -52,8 +58,14 @@ from tracim_backend.exceptions import WorkspacesDoNotMatch
 from tracim_backend.lib.core.notifications import NotifierFactory
 from tracim_backend.lib.core.userworkspace import RoleApi
 from tracim_backend.lib.core.workspace import WorkspaceApi
+from tracim_backend.lib.preview.pregeneration import queue_revision_previews_generation
+from tracim_backend.lib.search.elasticsearch_search.indexer import is_contents_indexing_async
+from tracim_backend.lib.search.elasticsearch_search.indexer import queue_contents_indexing
 from tracim_backend.lib.search.search_factory import SearchFactory
 from tracim_backend.lib.utils.logger import logger
+from tracim_backend.lib.utils.pagination import OrderColumn
+from tracim_backend.lib.utils.pagination import Page
+from tracim_backend.lib.utils.pagination import paginate_query
 from tracim_backend.lib.utils.sanitizer import HtmlSanitizer
 from tracim_backend.lib.utils.sanitizer import HtmlSanitizerConfig
 from tracim_backend.lib.utils.translation import Translator
@@ -69,12 +81,19 @@ from tracim_backend.models.data import Content
 from tracim_backend.models.data import ContentNamespaces
 from tracim_backend.models.data import ContentRevisionRO
 from tracim_backend.models.data import NodeTreeItem
+from tracim_backend.models.data import RevisionReadStatus
 from tracim_backend.models.data import UserRoleInWorkspace
 from tracim_backend.models.data import Workspace
+from tracim_backend.models.preview_info import RevisionPreviewInfo
 from tracim_backend.models.revision_protection import new_revision
 
 __author__ = "damien"
 
+# INFO - G.M - 2019-11-12 - max number of contents ids given in one read status query,
+# to stay under parameter number limits of databases like sqlite
+READ_STATUS_BATCH_SIZE = 500
+COPY_BATCH_SIZE = 500
+
 
 # TODO - G.M - 2018-07-24 - [Cleanup] Is this method already needed ?
 def compare_content_for_sorting_by_type_and_name(content1: Content, content2: Content) -> int:
@@ -204,6 +223,79 @@ class ContentApi(object):
     def get_content_in_context(self, content: Content) -> ContentInContext:
         return ContentInContext(content, self._session, self._config, self._user)
 
+    def get_contents_in_context(
+        self, contents: typing.List[Content]
+    ) -> typing.List[ContentInContext]:
+        """
+        Bulk version of get_content_in_context: authors, last modifiers,
+        parents, actives shares count and read status of all given contents
+        are loaded in a fixed number of queries instead of once per content.
+        :param contents: list of contents
+        :return: list of contents in context, in the same order
+        """
+        if not contents:
+            return []
+        # INFO - G.M - 2019-11-07 - import here to avoid circular import issue
+        from tracim_backend.applications.share.models import ContentShare
+
+        content_ids = [content.content_id for content in contents]
+
+        # INFO - G.M - 2019-11-07 - parents and last modifiers are loaded in
+        # session identity map, so lazy loading of them will not trigger new queries.
+        parent_ids = {content.parent_id for content in contents if content.parent_id}
+        if parent_ids:
+            self.get_canonical_query().filter(Content.id.in_(parent_ids)).all()
+        last_modifier_ids = {content.revision.owner_id for content in contents}
+        self._session.query(User).filter(User.user_id.in_(last_modifier_ids)).all()
+
+        first_revision_ids = (
+            self._session.query(func.min(ContentRevisionRO.revision_id))
+            .filter(ContentRevisionRO.content_id.in_(content_ids))
+            .group_by(ContentRevisionRO.content_id)
+        )
+        authors = dict(
+            self._session.query(ContentRevisionRO.content_id, User)
+            .join(User, ContentRevisionRO.owner_id == User.user_id)
+            .filter(ContentRevisionRO.revision_id.in_(first_revision_ids))
+        )
+        actives_shares = dict(
+            self._session.query(ContentShare.content_id, func.count(ContentShare.share_id))
+            .filter(ContentShare.content_id.in_(content_ids))
+            .filter(ContentShare.enabled == True)  # noqa: E712
+            .group_by(ContentShare.content_id)
+        )
+
+        read_statuses = {}  # type: typing.Dict[int, bool]
+        if self._user:
+            read_statuses = self.get_read_statuses(content_ids)
+
+        self.load_preview_infos(
+            content.cached_revision_id for content in contents if content.depot_file
+        )
+
+        content_api = ContentApi(
+            current_user=self._user,
+            session=self._session,
+            config=self._config,
+            show_deleted=True,
+            show_archived=True,
+            show_active=True,
+            show_temporary=True,
+        )
+        return [
+            ContentInContext(
+                content,
+                self._session,
+                self._config,
+                self._user,
+                content_api=content_api,
+                author=authors.get(content.content_id),
+                actives_shares=actives_shares.get(content.content_id, 0),
+                read_by_user=read_statuses.get(content.content_id),
+            )
+            for content in contents
+        ]
+
     def get_revision_in_context(self, revision: ContentRevisionRO) -> RevisionInContext:
         # TODO - G.M - 2018-06-173 - create revision in context object
         return RevisionInContext(revision, self._session, self._config, self._user)
@@ -215,12 +307,7 @@ class ContentApi(object):
         """
         return and_(
             Content.id == ContentRevisionRO.content_id,
-            ContentRevisionRO.revision_id
-            == self._session.query(ContentRevisionRO.revision_id)
-            .filter(ContentRevisionRO.content_id == Content.id)
-            .order_by(ContentRevisionRO.revision_id.desc())
-            .limit(1)
-            .correlate(Content),
+            Content.cached_revision_id == ContentRevisionRO.revision_id,
         )
 
     def get_canonical_query(self) -> Query:
@@ -228,7 +315,11 @@ class ContentApi(object):
         Return the Content/ContentRevision base query who join these table on the last revision.
         :return: Content/ContentRevision Query
         """
-        return self._session.query(Content).join(ContentRevisionRO, self._get_revision_join())
+        return (
+            self._session.query(Content)
+            .join(ContentRevisionRO, self._get_revision_join())
+            .options(contains_eager(Content.current_revision))
+        )
 
     # TODO - G.M - 2018-07-24 - [Cleanup] Is this method already needed ?
     @classmethod
@@ -611,6 +702,9 @@ class ContentApi(object):
         This method do post-create user actions
         """
         try:
+            if is_contents_indexing_async(self._config):
+                queue_contents_indexing(self._session, self._config, [content.content_id])
+                return
             content_in_context = ContentInContext(
                 content, config=self._config, dbsession=self._session
             )
@@ -631,6 +725,20 @@ class ContentApi(object):
         """
 
         try:
+            # FIXME - G.M - 2019-06-03 - reindex children to avoid trouble when deleting, archiving
+            # see https://github.com/tracim/tracim/issues/1833
+            reindex_children = content.last_revision.revision_type in (
+                ActionDescription.DELETION,
+                ActionDescription.ARCHIVING,
+                ActionDescription.UNARCHIVING,
+                ActionDescription.UNDELETION,
+            )
+            if is_contents_indexing_async(self._config):
+                content_ids = [content.content_id]
+                if reindex_children:
+                    content_ids.extend(content.get_children_ids(recursively=True))
+                queue_contents_indexing(self._session, self._config, content_ids)
+                return
             content_in_context = ContentInContext(
                 content, config=self._config, dbsession=self._session
             )
@@ -638,14 +746,7 @@ class ContentApi(object):
                 current_user=self._user, config=self._config, session=self._session
             )
             search_api.index_content(content_in_context)
-            # FIXME - G.M - 2019-06-03 - reindex children to avoid trouble when deleting, archiving
-            # see https://github.com/tracim/tracim/issues/1833
-            if content.last_revision.revision_type in (
-                ActionDescription.DELETION,
-                ActionDescription.ARCHIVING,
-                ActionDescription.UNARCHIVING,
-                ActionDescription.UNDELETION,
-            ):
+            if reindex_children:
                 for child_content in content.get_children(recursively=True):
                     child_in_context = ContentInContext(
                         child_content, config=self._config, dbsession=self._session
@@ -830,36 +931,157 @@ class ContentApi(object):
         E.g.: ['foo', 'bar'] for complete path /Workspace1/foo/bar folder
         :return: Found Content
         """
-        query = self._base_query(workspace)
-        parent_folder = None
+        content, _ = self.get_one_and_parent_ids_by_filename_and_parent_labels(
+            content_label=content_label,
+            workspace=workspace,
+            content_parent_labels=content_parent_labels,
+        )
+        return content
 
-        # Grab content parent folder if parent path given
-        if content_parent_labels:
-            parent_folder = self.get_folder_with_workspace_path_labels(
-                content_parent_labels, workspace
-            )
+    def get_one_and_parent_ids_by_filename_and_parent_labels(
+        self,
+        content_label: str,
+        workspace: Workspace,
+        content_parent_labels: typing.List[str] = None,
+    ) -> typing.Tuple[Content, typing.List[int]]:
+        """
+        Same as get_one_by_filename_and_parent_labels, also returning ids of parent
+        folders found in the same query.
+        :return: Found Content and ids of its parent folders, ordered like
+        content_parent_labels.
+        """
+        query = self._base_query(workspace)
 
         # Build query for found content by label
         content_query = self.filter_query_for_content_label_as_path(
             query=query, filename=content_label
         )
 
-        # Modify query to apply parent folder filter if any
-        if parent_folder:
-            content_query = content_query.filter(Content.parent_id == parent_folder.content_id)
-        else:
-            content_query = content_query.filter(Content.parent_id == None)  # noqa: E711
-
         # Filter with workspace
         content_query = content_query.filter(Content.workspace_id == workspace.workspace_id)
 
+        # INFO - G.M - 2019-11-18 - join parent folders from the nearest one to the
+        # workspace root, to resolve the whole path in one query.
+        parent_id_column = ContentRevisionRO.parent_id
+        parent_folder_id_columns = []
+        for parent_label in reversed(content_parent_labels or []):
+            parent_folder = aliased(Content)
+            parent_folder_revision = aliased(ContentRevisionRO)
+            content_query = (
+                content_query.join(parent_folder, parent_folder.id == parent_id_column)
+                .join(
+                    parent_folder_revision,
+                    parent_folder.cached_revision_id == parent_folder_revision.revision_id,
+                )
+                .filter(
+                    parent_folder_revision.type == content_type_list.Folder.slug,
+                    parent_folder_revision.label == parent_label,
+                    parent_folder_revision.workspace_id == workspace.workspace_id,
+                )
+            )
+            content_query = self._filter_revision_visibility(content_query, parent_folder_revision)
+            parent_id_column = parent_folder_revision.parent_id
+            parent_folder_id_columns.insert(0, parent_folder.id)
+        content_query = content_query.filter(parent_id_column == None)  # noqa: E711
+
         # Return the content
         try:
-            return content_query.order_by(Content.revision_id.desc()).one()
+            result = (
+                content_query.add_columns(*parent_folder_id_columns)
+                .order_by(Content.revision_id.desc())
+                .one()
+            )
         except NoResultFound as exc:
             raise ContentNotFound(
                 'Content "{}" not found in database'.format(content_label)
             ) from exc
+        if not parent_folder_id_columns:
+            return result, []
+        return result[0], list(result[1:])
+
+    def get_one_and_workspace_label_by_path_ids(
+        self,
+        content_id: int,
+        workspace_id: int,
+        content_parent_ids: typing.List[int],
+        content_parent_labels: typing.List[str],
+    ) -> typing.Tuple[Content, str]:
+        """
+        Get content of a path already resolved to content and parent folder ids,
+        like the ones returned by get_one_and_parent_ids_by_filename_and_parent_labels.
+        Check in one query, by ids, that parent folders still have given labels and
+        that content, parent folders and workspace are still visible.
+        :param content_parent_ids: ids of parent folders, ordered like content_parent_labels.
+        :return: Found Content and label of its workspace.
+        """
+        query = (
+            self.get_canonical_query()
+            .join(Workspace, Workspace.workspace_id == ContentRevisionRO.workspace_id)
+            .filter(Content.id == content_id)
+            .filter(Workspace.workspace_id == workspace_id)
+            .filter(Workspace.is_deleted == False)  # noqa: E712
+        )
+        if not self._force_show_all_types:
+            query = query.filter(
+                ContentRevisionRO.type.in_(content_type_list.query_allowed_types_slugs())
+            )
+        if self._user and not self._disable_user_workspaces_filter:
+            # INFO - G.M - 2019-11-18 - check role with a subquery instead of loading
+            # all user workspaces ids like _base_query.
+            user_workspace_ids = (
+                self._session.query(UserRoleInWorkspace.workspace_id)
+                .filter(UserRoleInWorkspace.user_id == self._user_id)
+                .filter(UserRoleInWorkspace.role >= UserRoleInWorkspace.READER)
+            )
+            query = query.filter(Workspace.workspace_id.in_(user_workspace_ids.subquery()))
+        query = self._filter_revision_visibility(query, ContentRevisionRO)
+
+        parent_id_column = ContentRevisionRO.parent_id
+        for parent_id, parent_label in reversed(
+            list(zip(content_parent_ids, content_parent_labels))
+        ):
+            parent_folder = aliased(Content)
+            parent_folder_revision = aliased(ContentRevisionRO)
+            query = (
+                query.join(parent_folder, parent_folder.id == parent_id_column)
+                .join(
+                    parent_folder_revision,
+                    parent_folder.cached_revision_id == parent_folder_revision.revision_id,
+                )
+                .filter(
+                    parent_folder.id == parent_id,
+                    parent_folder_revision.type == content_type_list.Folder.slug,
+                    parent_folder_revision.label == parent_label,
+                    parent_folder_revision.workspace_id == workspace_id,
+                )
+            )
+            query = self._filter_revision_visibility(query, parent_folder_revision)
+            parent_id_column = parent_folder_revision.parent_id
+        query = query.filter(parent_id_column == None)  # noqa: E711
+
+        try:
+            return query.add_columns(Workspace.label).one()
+        except NoResultFound as exc:
+            raise ContentNotFound('Content "{}" not found in database'.format(content_id)) from exc
+
+    def _filter_revision_visibility(self, query: Query, revision: ContentRevisionRO) -> Query:
+        """
+        Apply to given revision (usually an aliased one) same deleted/archived/temporary
+        and namespace filters as _base_query
+        """
+        if not self._show_active:
+            query = query.filter(
+                or_(revision.is_deleted == True, revision.is_archived == True)  # noqa: E712
+            )
+        if not self._show_deleted:
+            query = query.filter(revision.is_deleted == False)  # noqa: E712
+        if not self._show_archived:
+            query = query.filter(revision.is_archived == False)  # noqa: E712
+        if not self._show_temporary:
+            query = query.filter(revision.is_temporary == False)  # noqa: E712
+        if self.namespaces_filter:
+            query = query.filter(revision.content_namespace.in_(self.namespaces_filter))
+        return query
 
     # TODO - G.M - 2018-07-24 - [Cleanup] Is this method already needed ?
     def get_folder_with_workspace_path_labels(
@@ -1098,6 +1320,7 @@ class ContentApi(object):
             typing.List[typing.Union[str, QueryableAttribute]]
         ] = None,
         complete_path_to_id: int = None,
+        content_ids: typing.Optional[typing.List[int]] = None,
     ) -> Query:
         """
         Extended filter for better "get all data" query
@@ -1106,6 +1329,7 @@ class ContentApi(object):
         :param workspace: filter by workspace
         :param complete_path_to_id: add all parent(root included) of content_id
         given there to parent_ids filter.
+        :param content_ids: filter by content_ids
         :param order_by_properties: filter by properties can be both string of
         attribute or attribute of Model object from sqlalchemy(preferred way,
         QueryableAttribute object)
@@ -1166,6 +1390,9 @@ class ContentApi(object):
         if label:
             resultset = resultset.filter(Content.label.ilike("%{}%".format(label)))
 
+        if content_ids is not None:
+            resultset = resultset.filter(Content.id.in_(content_ids))
+
         for _property in order_by_properties:
             resultset = resultset.order_by(_property)
 
@@ -1181,12 +1408,14 @@ class ContentApi(object):
             typing.List[typing.Union[str, QueryableAttribute]]
         ] = None,
         complete_path_to_id: int = None,
+        content_ids: typing.Optional[typing.List[int]] = None,
     ) -> typing.List[Content]:
         """
         Return all content using some filters
         :param parent_ids: filter by parent_id
         :param complete_path_to_id: filter by path of content_id
         (add all parent, root included to parent_ids filter)
+        :param content_ids: filter by content_ids
         :param content_type: filter by content_type slug
         :param workspace: filter by workspace
         :param order_by_properties: filter by properties can be both string of
@@ -1196,9 +1425,42 @@ class ContentApi(object):
         """
         order_by_properties = order_by_properties or []  # FDV
         return self._get_all_query(
-            parent_ids, content_type, workspace, label, order_by_properties, complete_path_to_id
+            parent_ids,
+            content_type,
+            workspace,
+            label,
+            order_by_properties,
+            complete_path_to_id,
+            content_ids,
         ).all()
 
+    def get_all_page(
+        self,
+        count: int,
+        page_token: typing.Optional[str] = None,
+        parent_ids: typing.List[int] = None,
+        content_type: str = content_type_list.Any_SLUG,
+        workspace: Workspace = None,
+        label: str = None,
+        complete_path_to_id: int = None,
+    ) -> Page:
+        """
+        Paginated version of get_all, contents are sorted by label then content_id.
+        :param count: max number of contents returned
+        :param page_token: next_page_token of previous page, None for first page
+        See get_all for other params.
+        :return: Page of contents
+        """
+        resultset = self._get_all_query(
+            parent_ids, content_type, workspace, label, complete_path_to_id=complete_path_to_id
+        )
+        return paginate_query(
+            resultset,
+            [OrderColumn(Content.label, False), OrderColumn(Content.id, False)],
+            count,
+            page_token,
+        )
+
     # TODO - G.M - 2018-07-17 - [Cleanup] Drop this method if unneeded
     # def get_children(self, parent_id: int, content_types: list, workspace: Workspace=None) -> typing.List[Content]:
     #     """
@@ -1305,9 +1567,78 @@ class ContentApi(object):
         :return: list of content
         """
 
-        resultset = self._get_all_query(workspace=workspace)
-        if content_ids:
+        resultset, activity = self._get_last_active_query(workspace, content_ids)
+
+        if before_content:
+            # INFO - G.M - 2019-11-06 - keyset pagination on
+            # (last_activity, content_id): no need to walk through newer contents
+            before_last_activity = (
+                self._session.query(activity.c.last_activity)
+                .filter(activity.c.content_id == before_content.content_id)
+                .scalar()
+            ) or before_content.updated
             resultset = resultset.filter(
+                or_(
+                    activity.c.last_activity < before_last_activity,
+                    and_(
+                        activity.c.last_activity == before_last_activity,
+                        Content.id < before_content.content_id,
+                    ),
+                )
+            )
+
+        resultset = resultset.order_by(desc(activity.c.last_activity), desc(Content.id))
+        if limit:
+            resultset = resultset.limit(limit)
+        return resultset.all()
+
+    def get_last_active_page(
+        self,
+        count: int,
+        page_token: typing.Optional[str] = None,
+        workspace: Workspace = None,
+        content_ids: typing.Optional[typing.List[int]] = None,
+    ) -> Page:
+        """
+        Paginated version of get_last_active.
+        :param count: max number of contents returned
+        :param page_token: next_page_token of previous page, None for first page
+        See get_last_active for other params.
+        :return: Page of contents
+        """
+        resultset, activity = self._get_last_active_query(workspace, content_ids)
+        return paginate_query(
+            resultset,
+            [
+                OrderColumn(activity.c.last_activity, descending=True),
+                OrderColumn(Content.id, descending=True),
+            ],
+            count,
+            page_token,
+        )
+
+    def _get_last_active_query(
+        self, workspace: Workspace = None, content_ids: typing.Optional[typing.List[int]] = None
+    ) -> typing.Tuple[Query, sqlalchemy.sql.expression.Alias]:
+        """
+        Query of contents joined with their last activity (activity.c.last_activity),
+        not sorted.
+        """
+        # INFO - G.M - 2019-11-06 - last activity of a content is the last update
+        # of the content itself or of one of its comments: comments are grouped
+        # on their parent and deduplicated in sql instead of python.
+        active_content_id = sqlalchemy.case(
+            [
+                (
+                    ContentRevisionRO.type == content_type_list.Comment.slug,
+                    ContentRevisionRO.parent_id,
+                )
+            ],
+            else_=ContentRevisionRO.content_id,
+        )
+        activity_query = self._base_query(workspace=workspace)
+        if content_ids:
+            activity_query = activity_query.filter(
                 or_(
                     Content.content_id.in_(content_ids),
                     and_(
@@ -1316,47 +1647,22 @@ class ContentApi(object):
                     ),
                 )
             )
-
-        resultset = resultset.order_by(
-            desc(ContentRevisionRO.updated),
-            desc(ContentRevisionRO.revision_id),
-            desc(ContentRevisionRO.content_id),
+        activity = (
+            activity_query.with_entities(
+                active_content_id.label("content_id"),
+                func.max(ContentRevisionRO.updated).label("last_activity"),
+            )
+            .group_by(active_content_id)
+            .subquery("activity")
         )
 
-        active_contents = []
-        too_recent_content = []
-        before_content_find = False
-        for content in resultset:
-            related_active_content = None
-            if content_type_list.Comment.slug == content.type:
-                related_active_content = content.parent
-            else:
-                related_active_content = content
-
-            # INFO - G.M - 2018-08-10 - re-apply general filters here to avoid
-            # issue with comments
-            if not self._show_deleted and related_active_content.is_deleted:
-                continue
-            if not self._show_archived and related_active_content.is_archived:
-                continue
-
-            if (
-                related_active_content not in active_contents
-                and related_active_content not in too_recent_content
-            ):
-
-                if not before_content or before_content_find:
-                    active_contents.append(related_active_content)
-                else:
-                    too_recent_content.append(related_active_content)
-
-                if before_content and related_active_content == before_content:
-                    before_content_find = True
-
-            if limit and len(active_contents) >= limit:
-                break
+        # INFO - G.M - 2019-11-06 - general filters are applied on the related
+        # content too, to avoid returning deleted/archived parent of comments
+        resultset = self._get_all_query(workspace=workspace).join(
+            activity, activity.c.content_id == Content.id
+        )
 
-        return active_contents
+        return resultset, activity
 
     def _set_allowed_content(self, content: Content, allowed_content_dict: dict) -> Content:
         """
@@ -1543,7 +1849,7 @@ class ContentApi(object):
         if new_parent:
             if content.content_id == new_parent.content_id:
                 raise ConflictingMoveInItself("You can't move a content into itself")
-            if new_parent in content.get_children(recursively=True):
+            if new_parent.content_id in content.get_children_ids(recursively=True):
                 raise ConflictingMoveInChild("You can't move a content into one of its children")
 
     def copy(
@@ -1556,6 +1862,7 @@ class ContentApi(object):
         new_content_namespace: ContentNamespaces = ContentNamespaces.CONTENT,
         do_save: bool = True,
         do_notify: bool = True,
+        progress_callback: typing.Optional[typing.Callable[[int, int], None]] = None,
     ) -> Content:
         """
         Copy all content, revision and children included (children are included
@@ -1564,6 +1871,8 @@ class ContentApi(object):
         :param new_parent: new parent of the new copied item
         :param new_label: new label of the new copied item
         :param do_notify: notify copy or not
+        :param progress_callback: called with number of revisions copied and
+        total number of revisions to copy each time a revision is copied.
         :return: Newly copied item
         """
         if (not new_parent and not new_label and not new_file_extension and not new_workspace) or (
@@ -1627,7 +1936,9 @@ class ContentApi(object):
                 "and a valid filename".format(item.content_id, content_type_slug)
             )
 
-        copy_result = self._copy(item, content_namespace, parent)
+        copy_result = self._copy(
+            item, content_namespace, parent, progress_callback=progress_callback
+        )
         copy_result = self._add_copy_revisions(
             original_content=item,
             new_content=copy_result.new_content,
@@ -1648,12 +1959,15 @@ class ContentApi(object):
         content: Content,
         new_content_namespace: ContentNamespaces = None,
         new_parent: Content = None,
+        progress_callback: typing.Optional[typing.Callable[[int, int], None]] = None,
     ) -> AddCopyRevisionsResult:
         """
         Create new content for content and his children, recreate all revision in order and
         return all these new content
         :param content: original root content of copy
         :param new_parent: new parent of root content of copy
+        :param progress_callback: called with number of revisions copied and
+        total number of revisions to copy each time a revision is copied.
         :return: new content created based on original root content,
         dict of new children content and original children content with original content id as key.
         """
@@ -1666,7 +1980,8 @@ class ContentApi(object):
         # revision related to old data. key of dict is original content id.
         original_content_children = {}  # type: typing.Dict[int,Content]
 
-        for rev in content.get_tree_revisions():
+        tree_revisions = content.get_tree_revisions()
+        for revision_number, rev in enumerate(tree_revisions, start=1):
             if rev.content_id == content.content_id:
                 related_content = new_content
                 related_parent = new_parent
@@ -1682,10 +1997,19 @@ class ContentApi(object):
                 else:
                     related_parent = new_content_children[rev.parent_id]
             # INFO - G.M - 2019-04-30 - copy of revision itself.
-            cpy_rev = ContentRevisionRO.copy(rev, related_parent, new_content_namespace)
+            cpy_rev = ContentRevisionRO.copy(
+                rev, related_parent, new_content_namespace, reuse_depot_file=True
+            )
             related_content.revisions.append(cpy_rev)
+            related_content.current_revision = cpy_rev
             self._session.add(related_content)
-            self._session.flush()
+            # INFO - G.M - 2019-11-13 - insert revisions by batch, revisions are inserted
+            # in the order they were added, so revision order is kept.
+            if revision_number % COPY_BATCH_SIZE == 0:
+                self._session.flush()
+            if progress_callback:
+                progress_callback(revision_number, len(tree_revisions))
+        self._session.flush()
         return AddCopyRevisionsResult(
             new_content=new_content,
             new_children_dict=new_content_children,
@@ -1720,28 +2044,39 @@ class ContentApi(object):
         dict of new children content and original children content with original content id as key.
         """
         assert new_content_namespace
-        for original_content_id, new_child in new_content_children.items():
+        for child_number, (original_content_id, new_child) in enumerate(
+            new_content_children.items(), start=1
+        ):
             original_child = original_content_children[original_content_id]
             with new_revision(
                 session=self._session,
                 tm=transaction.manager,
                 content=new_child,
-                force_create_new_revision=True,
+                reuse_depot_file=True,
             ) as rev:
                 rev.workspace = new_workspace
                 rev.revision_type = ActionDescription.COPY
                 properties = rev.properties.copy()
                 properties["origin"] = {
                     "content": original_child.id,
-                    "revision": original_child.last_revision.revision_id,
+                    "revision": original_child.cached_revision_id,
                 }
                 rev.properties = properties
-            self.save(new_child, ActionDescription.COPY, do_notify=False)
+            if child_number % COPY_BATCH_SIZE == 0:
+                self._session.flush()
+        self._session.flush()
+        # INFO - G.M - 2019-11-13 - mark all children read at once instead of
+        # saving them one by one.
+        if self._user and new_content_children:
+            self._set_read_status(
+                [new_child.content_id for new_child in new_content_children.values()],
+                datetime.datetime.now(),
+            )
         with new_revision(
             session=self._session,
             tm=transaction.manager,
             content=new_content,
-            force_create_new_revision=True,
+            reuse_depot_file=True,
         ) as rev:
             if self._user:
                 rev.owner = self._user
@@ -1871,8 +2206,16 @@ class ContentApi(object):
         return item
 
     def update_file_data(
-        self, item: Content, new_filename: str, new_mimetype: str, new_content: bytes
+        self,
+        item: Content,
+        new_filename: str,
+        new_mimetype: str,
+        new_content: typing.Union[bytes, typing.BinaryIO, UploadedFile],
     ) -> Content:
+        """
+        Set new file of item.
+        :param new_content: file data, or file already stored in depot (streamed upload)
+        """
         if not self.is_editable(item):
             raise ContentInNotEditableState(
                 "Can't update not editable file, you need to change his status or state (deleted/archived) before any change."
@@ -1906,8 +2249,13 @@ class ContentApi(object):
             )
         item.file_name = new_filename
         item.file_mimetype = new_mimetype
-        item.depot_file = FileIntent(new_content, new_filename, new_mimetype)
+        if isinstance(new_content, UploadedFile):
+            item.depot_file = new_content
+        else:
+            item.depot_file = FileIntent(new_content, new_filename, new_mimetype)
         item.revision_type = ActionDescription.REVISION
+        if self._config.PREVIEW__PREGENERATION__ACTIVATED:
+            queue_revision_previews_generation(self._session, self._config, item.revision)
         return item
 
     def check_upload_size(self, content_length: int, workspace: Workspace) -> None:
@@ -1927,7 +2275,7 @@ class ContentApi(object):
             )
 
     def check_workspace_size_limitation(self, content_length: int, workspace: Workspace) -> None:
-        workspace_size = workspace.get_size()
+        workspace_size = workspace.used_space
         # INFO - G.M - 2019-08-23 - 0 mean no size limit
         if self._config.LIMITATION__WORKSPACE_SIZE == 0:
             return
@@ -2003,56 +2351,118 @@ class ContentApi(object):
         content.revision_type = ActionDescription.UNDELETION
 
     def get_preview_page_nb(self, revision_id: int, file_extension: str) -> typing.Optional[int]:
-        try:
-            file_path = self.get_one_revision_filepath(revision_id)
-            nb_pages = self.preview_manager.get_page_nb(file_path, file_ext=file_extension)
-        except UnsupportedMimeType:
-            return None
-        except RevisionFilePathSearchFailedDepotCorrupted as exc:
-            logger.warning(
-                self, "Unable to get revision filepath, depot is corrupted: {}".format(str(exc))
-            )
-            logger.warning(self, traceback.format_exc())
-            return None
-        except Exception as e:
-            logger.warning(self, "Unknown Preview_Generator Exception Occured : {}".format(str(e)))
-            logger.warning(self, traceback.format_exc())
-            return None
-        return nb_pages
+        return self.get_preview_info(revision_id, file_extension).page_nb
 
     def has_pdf_preview(self, revision_id: int, file_extension: str) -> bool:
+        return self.get_preview_info(revision_id, file_extension).has_pdf_preview
+
+    def has_jpeg_preview(self, revision_id: int, file_extension: str) -> bool:
+        return self.get_preview_info(revision_id, file_extension).has_jpeg_preview
+
+    def get_preview_info(self, revision_id: int, file_extension: str) -> RevisionPreviewInfo:
+        """
+        Get preview capabilities (page number, pdf and jpeg preview availability)
+        of a revision. They are asked to preview generator the first time only,
+        then stored in database, see RevisionPreviewInfo.
+        """
+        stored_preview_info = self._session.query(RevisionPreviewInfo).get(revision_id)
+        if stored_preview_info and not stored_preview_info.is_outdated():
+            return stored_preview_info
         try:
             file_path = self.get_one_revision_filepath(revision_id)
-            return self.preview_manager.has_pdf_preview(file_path, file_ext=file_extension)
-        except UnsupportedMimeType:
-            return False
+            preview_info = RevisionPreviewInfo(
+                revision_id=revision_id,
+                page_nb=self._get_preview_capability(
+                    self.preview_manager.get_page_nb, file_path, file_extension, None
+                ),
+                has_pdf_preview=self._get_preview_capability(
+                    self.preview_manager.has_pdf_preview, file_path, file_extension, False
+                ),
+                has_jpeg_preview=self._get_preview_capability(
+                    self.preview_manager.has_jpeg_preview, file_path, file_extension, False
+                ),
+                created=datetime.datetime.utcnow(),
+            )
         except RevisionFilePathSearchFailedDepotCorrupted as exc:
             logger.warning(
                 self, "Unable to get revision filepath, depot is corrupted: {}".format(str(exc))
             )
             logger.warning(self, traceback.format_exc())
-            return False
+            # INFO - G.M - 2019-11-26 - do not store preview info, file may be available later
+            return self._get_unavailable_preview_info(revision_id)
         except Exception as e:
             logger.warning(self, "Unknown Preview_Generator Exception Occured : {}".format(str(e)))
             logger.warning(self, traceback.format_exc())
-            return False
+            return self._get_unavailable_preview_info(revision_id)
+        self._store_preview_info(preview_info, update=stored_preview_info is not None)
+        if stored_preview_info:
+            self._session.expire(stored_preview_info)
+        return preview_info
+
+    def _store_preview_info(self, preview_info: RevisionPreviewInfo, update: bool) -> None:
+        """
+        Store preview info directly in database: preview infos are stored during
+        GET requests, this avoid flushing other pending changes of session.
+        """
+        preview_infos_table = RevisionPreviewInfo.__table__
+        values = {
+            "page_nb": preview_info.page_nb,
+            "has_pdf_preview": preview_info.has_pdf_preview,
+            "has_jpeg_preview": preview_info.has_jpeg_preview,
+            "created": preview_info.created,
+        }
+        connection = self._session.connection()
+        if update:
+            connection.execute(
+                preview_infos_table.update()
+                .where(preview_infos_table.c.revision_id == preview_info.revision_id)
+                .values(**values)
+            )
+        else:
+            try:
+                # INFO - G.M - 2019-11-26 - preview info may be stored by a concurrent
+                # request, use a savepoint for this insert only to not break current
+                # transaction in this case.
+                with connection.begin_nested():
+                    connection.execute(
+                        preview_infos_table.insert().values(
+                            revision_id=preview_info.revision_id, **values
+                        )
+                    )
+            except IntegrityError:
+                logger.debug(
+                    self,
+                    "Preview info of revision {} already stored".format(preview_info.revision_id),
+                )
+        mark_changed(self._session)
 
-    def has_jpeg_preview(self, revision_id: int, file_extension: str) -> bool:
+    def load_preview_infos(self, revision_ids: typing.Iterable[int]) -> None:
+        """
+        Load stored preview infos of given revisions in session identity map, so that
+        get_preview_info does not query them one by one.
+        """
+        revision_ids = list(revision_ids)
+        if revision_ids:
+            self._session.query(RevisionPreviewInfo).filter(
+                RevisionPreviewInfo.revision_id.in_(revision_ids)
+            ).all()
+
+    def _get_unavailable_preview_info(self, revision_id: int) -> RevisionPreviewInfo:
+        return RevisionPreviewInfo(
+            revision_id=revision_id, page_nb=None, has_pdf_preview=False, has_jpeg_preview=False
+        )
+
+    def _get_preview_capability(
+        self,
+        preview_manager_method: typing.Callable[..., typing.Any],
+        file_path: str,
+        file_extension: str,
+        unsupported_value: typing.Any,
+    ) -> typing.Any:
         try:
-            file_path = self.get_one_revision_filepath(revision_id)
-            return self.preview_manager.has_jpeg_preview(file_path, file_ext=file_extension)
+            return preview_manager_method(file_path, file_ext=file_extension)
         except UnsupportedMimeType:
-            return False
-        except RevisionFilePathSearchFailedDepotCorrupted as exc:
-            logger.warning(
-                self, "Unable to get revision filepath, depot is corrupted: {}".format(str(exc))
-            )
-            logger.warning(self, traceback.format_exc())
-            return False
-        except Exception as e:
-            logger.warning(self, "Unknown Preview_Generator Exception Occured : {}".format(str(e)))
-            logger.warning(self, traceback.format_exc())
-            return False
+            return unsupported_value
 
     def mark_read__all(
         self, read_datetime: datetime = None, do_flush: bool = True, recursive: bool = True
@@ -2080,10 +2490,19 @@ class ContentApi(object):
         :param recursive: mark read subcontent too
         :return: nothing
         """
-        itemset = self.get_last_active(workspace)
-        for item in itemset:
-            if item.has_new_information_for(self._user):
-                self.mark_read(item, read_datetime, do_flush, recursive)
+        assert self._user
+        if not read_datetime:
+            read_datetime = datetime.datetime.now()
+        # INFO - G.M - 2019-11-12 - flush to be sure pending revisions are in database
+        self._session.flush()
+        content_ids = [content.content_id for content in self.get_last_active(workspace)]
+        read_statuses = self.get_read_statuses(content_ids)
+        unread_content_ids = [
+            content_id for content_id, is_read in read_statuses.items() if not is_read
+        ]
+        if recursive:
+            unread_content_ids = self._get_active_tree_content_ids(unread_content_ids)
+        self._set_read_status(unread_content_ids, read_datetime)
 
     def mark_read(
         self,
@@ -2104,40 +2523,27 @@ class ContentApi(object):
 
         # The algorithm is:
         # 1. define the read datetime
-        # 2. update all revisions related to current Content
-        # 3. do the same for all child revisions
-        #    (ie parent_id is content_id of current content)
+        # 2. get ids of current Content and if recursive of all its active children
+        #    (ie parent_id is content_id of current content), parent and parent comments
+        #    for comment.
+        # 3. update/insert read status of all revisions of these contents in database
 
         if not read_datetime:
             read_datetime = datetime.datetime.now()
 
-        viewed_revisions = (
-            self._session.query(ContentRevisionRO)
-            .filter(ContentRevisionRO.content_id == content.content_id)
-            .all()
-        )
-
-        for revision in viewed_revisions:
-            revision.read_by[self._user] = read_datetime
-
+        # INFO - G.M - 2019-11-12 - flush to be sure pending revisions are in database
+        self._session.flush()
+        read_content_ids = [content.content_id]
         if recursive:
-            # mark read :
-            # - all children
-            # - parent stuff (if you mark a comment as read,
-            #                 then you have seen the parent)
-            # - parent comments
-            for child in content.get_valid_children():
-                self.mark_read(child, read_datetime=read_datetime, do_flush=False)
-
+            read_content_ids = self._get_active_tree_content_ids(read_content_ids)
+            # INFO - G.M - 2019-11-12 - if you mark a comment as read,
+            # then you have seen the parent and its comments
             if content_type_list.Comment.slug == content.type:
-                self.mark_read(
-                    content.parent, read_datetime=read_datetime, do_flush=False, recursive=False
+                read_content_ids.add(content.parent_id)
+                read_content_ids.update(
+                    comment.content_id for comment in content.parent.get_comments()
                 )
-                for comment in content.parent.get_comments():
-                    if comment != content:
-                        self.mark_read(
-                            comment, read_datetime=read_datetime, do_flush=False, recursive=False
-                        )
+        self._set_read_status(read_content_ids, read_datetime)
 
         if do_flush:
             self.flush()
@@ -2148,26 +2554,142 @@ class ContentApi(object):
         assert self._user
         assert content
 
-        revisions = (
-            self._session.query(ContentRevisionRO)
-            .filter(ContentRevisionRO.content_id == content.content_id)
-            .all()
-        )
-
-        for revision in revisions:
-            try:
-                del revision.read_by[self._user]
-            except KeyError:
-                pass
-
-        for child in content.get_valid_children():
-            self.mark_unread(child, do_flush=False)
+        # INFO - G.M - 2019-11-12 - flush to be sure pending revisions are in database
+        self._session.flush()
+        content_ids = list(self._get_active_tree_content_ids([content.content_id]))
+        for batch_start in range(0, len(content_ids), READ_STATUS_BATCH_SIZE):
+            batch_end = batch_start + READ_STATUS_BATCH_SIZE
+            revision_ids = sqlalchemy.select([ContentRevisionRO.revision_id]).where(
+                ContentRevisionRO.content_id.in_(content_ids[batch_start:batch_end])
+            )
+            self._session.execute(
+                RevisionReadStatus.__table__.delete()
+                .where(RevisionReadStatus.user_id == self._user_id)
+                .where(RevisionReadStatus.revision_id.in_(revision_ids))
+            )
+        self._mark_read_statuses_changed()
 
         if do_flush:
             self.flush()
 
         return content
 
+    def get_read_statuses(self, content_ids: typing.List[int]) -> typing.Dict[int, bool]:
+        """
+        Get read status of many contents for current user in one query.
+        A content is read if current revision of content and of all its active
+        children (recursively) are read by user.
+        :param content_ids: ids of contents
+        :return: dict of read status (True if read) by content_id
+        """
+        if not self._user or not content_ids:
+            return {content_id: True for content_id in content_ids}
+        content_ids = list(content_ids)
+        unread_content_ids = set()  # type: typing.Set[int]
+        for batch_start in range(0, len(content_ids), READ_STATUS_BATCH_SIZE):
+            batch_end = batch_start + READ_STATUS_BATCH_SIZE
+            tree = self._get_active_tree_cte(content_ids[batch_start:batch_end])
+            unread_content_ids.update(
+                content_id
+                for (content_id,) in self._session.query(tree.c.root_id)
+                .join(Content, Content.id == tree.c.content_id)
+                .outerjoin(
+                    RevisionReadStatus,
+                    and_(
+                        RevisionReadStatus.revision_id == Content.cached_revision_id,
+                        RevisionReadStatus.user_id == self._user_id,
+                    ),
+                )
+                .filter(RevisionReadStatus.revision_id == None)  # noqa: E711
+                .distinct()
+            )
+        return {content_id: content_id not in unread_content_ids for content_id in content_ids}
+
+    def _get_active_tree_cte(self, content_ids: typing.Iterable[int]) -> CTE:
+        """
+        Recursive CTE of (root_id, content_id) for given contents (root) and all their
+        children (recursively) which are not deleted and not archived.
+        Callers give at most READ_STATUS_BATCH_SIZE content ids.
+        """
+        tree = (
+            self._session.query(Content.id.label("root_id"), Content.id.label("content_id"))
+            .filter(Content.id.in_(content_ids))
+            .cte("active_tree", recursive=True)
+        )
+        # INFO - G.M - 2019-11-12 - use UNION instead of UNION ALL to be sure to stop
+        # even if database contains a cycle in content tree.
+        return tree.union(
+            self._session.query(tree.c.root_id, ContentRevisionRO.content_id)
+            .join(Content, Content.cached_revision_id == ContentRevisionRO.revision_id)
+            .join(tree, ContentRevisionRO.parent_id == tree.c.content_id)
+            .filter(ContentRevisionRO.is_deleted == False)  # noqa: E712
+            .filter(ContentRevisionRO.is_archived == False)  # noqa: E712
+        )
+
+    def _get_active_tree_content_ids(self, content_ids: typing.Iterable[int]) -> typing.Set[int]:
+        content_ids = list(content_ids)
+        tree_content_ids = set()  # type: typing.Set[int]
+        for batch_start in range(0, len(content_ids), READ_STATUS_BATCH_SIZE):
+            batch_end = batch_start + READ_STATUS_BATCH_SIZE
+            tree = self._get_active_tree_cte(content_ids[batch_start:batch_end])
+            tree_content_ids.update(
+                content_id for (content_id,) in self._session.query(tree.c.content_id).distinct()
+            )
+        return tree_content_ids
+
+    def _set_read_status(
+        self, content_ids: typing.Iterable[int], read_datetime: datetime.datetime
+    ) -> None:
+        """
+        Set read status of all revisions of given contents for current user
+        directly in database: update existing ones, insert missing ones.
+        """
+        content_ids = list(content_ids)
+        for batch_start in range(0, len(content_ids), READ_STATUS_BATCH_SIZE):
+            batch_end = batch_start + READ_STATUS_BATCH_SIZE
+            revision_ids = sqlalchemy.select([ContentRevisionRO.revision_id]).where(
+                ContentRevisionRO.content_id.in_(content_ids[batch_start:batch_end])
+            )
+            self._session.execute(
+                RevisionReadStatus.__table__.update()
+                .where(RevisionReadStatus.user_id == self._user_id)
+                .where(RevisionReadStatus.revision_id.in_(revision_ids))
+                .values(view_datetime=read_datetime)
+            )
+            already_read_revision_ids = sqlalchemy.select([RevisionReadStatus.revision_id]).where(
+                RevisionReadStatus.user_id == self._user_id
+            )
+            unread_revisions = revision_ids.where(
+                ~ContentRevisionRO.revision_id.in_(already_read_revision_ids)
+            ).with_only_columns(
+                [
+                    ContentRevisionRO.revision_id,
+                    sqlalchemy.literal(self._user_id, type_=sqlalchemy.Integer),
+                    sqlalchemy.literal(read_datetime, type_=sqlalchemy.DateTime),
+                ]
+            )
+            self._session.execute(
+                RevisionReadStatus.__table__.insert().from_select(
+                    ["revision_id", "user_id", "view_datetime"], unread_revisions
+                )
+            )
+        self._mark_read_statuses_changed()
+
+    def _mark_read_statuses_changed(self) -> None:
+        """
+        Read statuses are updated directly in database: tell transaction manager
+        that session changed, as it only knows about orm changes, and refresh
+        objects related to them already loaded in session.
+        """
+        mark_changed(self._session)
+        for instance in list(self._session.identity_map.values()):
+            if isinstance(instance, ContentRevisionRO):
+                self._session.expire(instance, ["revision_read_statuses"])
+            elif isinstance(instance, RevisionReadStatus) and instance.user_id == self._user_id:
+                self._session.expunge(instance)
+        if self._user in self._session:
+            self._session.expire(self._user, ["revision_readers"])
+
     def flush(self):
         self._session.flush()
 
@@ -51,6 +51,9 @@ from tracim_backend.lib.core.group import GroupApi
 from tracim_backend.lib.core.workspace import WorkspaceApi
 from tracim_backend.lib.mail_notifier.notifier import get_email_manager
 from tracim_backend.lib.utils.logger import logger
+from tracim_backend.lib.utils.pagination import OrderColumn
+from tracim_backend.lib.utils.pagination import Page
+from tracim_backend.lib.utils.pagination import paginate_query
 from tracim_backend.models.auth import AuthType
 from tracim_backend.models.auth import Group
 from tracim_backend.models.auth import User
@@ -153,6 +156,23 @@ class UserApi(object):
     def get_all(self) -> typing.Iterable[User]:
         return self._get_all_query().all()
 
+    def get_all_page(self, count: int, page_token: typing.Optional[str] = None) -> Page:
+        """
+        Paginated version of get_all, users are sorted by display name then user_id.
+        :param count: max number of users returned
+        :param page_token: next_page_token of previous page, None for first page
+        :return: Page of users
+        """
+        return paginate_query(
+            self._session.query(User),
+            [
+                OrderColumn(func.lower(func.coalesce(User.display_name, "")), False),
+                OrderColumn(User.user_id, False),
+            ],
+            count,
+            page_token,
+        )
+
     def get_known_user(
         self,
         acp: str,
@@ -2,9 +2,11 @@
 from datetime import datetime
 import typing
 
+from sqlalchemy import func
 from sqlalchemy.orm import Query
 from sqlalchemy.orm import Session
 from sqlalchemy.orm.exc import NoResultFound
+from zope.sqlalchemy import mark_changed
 
 from tracim_backend.config import CFG
 from tracim_backend.exceptions import AgendaServerConnectionError
@@ -21,6 +23,7 @@ from tracim_backend.models.auth import AuthType
 from tracim_backend.models.auth import Group
 from tracim_backend.models.auth import User
 from tracim_backend.models.context_models import WorkspaceInContext
+from tracim_backend.models.data import ContentRevisionRO
 from tracim_backend.models.data import UserRoleInWorkspace
 from tracim_backend.models.data import Workspace
 
@@ -209,11 +212,45 @@ class WorkspaceApi(object):
         return self.default_order_workspace(self._base_query()).all()
 
     def get_user_used_space(self, user: User) -> int:
-        workspaces = self.get_all_for_user(user, include_owned=True, include_with_role=False)
-        used_space = 0
-        for workspace in workspaces:
-            used_space += workspace.get_size()
-        return used_space
+        """
+        Return space used by all workspaces owned by user, from stored
+        workspaces used_space.
+        """
+        return (
+            self._base_query_without_roles()
+            .filter(Workspace.owner_id == user.user_id)
+            .with_entities(func.coalesce(func.sum(Workspace.used_space), 0))
+            .scalar()
+        )
+
+    def update_used_space(self, workspace: Workspace) -> int:
+        """
+        Recompute stored used space of workspace from its revisions,
+        filling missing revision file size from depot.
+        :return: new used space of workspace
+        """
+        revisions_without_size = (
+            self._session.query(ContentRevisionRO)
+            .filter(ContentRevisionRO.workspace_id == workspace.workspace_id)
+            .filter(ContentRevisionRO.depot_file != None)  # noqa: E711
+            .filter(ContentRevisionRO.file_size == None)  # noqa: E711
+            .all()
+        )
+        # INFO - G.M - 2019-11-18 - file_size of existing revisions can't be set through orm
+        # as revisions are protected against update, update it directly in database.
+        for revision in revisions_without_size:
+            self._session.execute(
+                ContentRevisionRO.__table__.update()
+                .where(ContentRevisionRO.revision_id == revision.revision_id)
+                .values(file_size=revision.get_depot_file_size())
+            )
+        if revisions_without_size:
+            mark_changed(self._session)
+            for revision in revisions_without_size:
+                self._session.expire(revision, ["file_size"])
+        workspace.used_space = workspace.get_size()
+        self._session.flush()
+        return workspace.used_space
 
     def _get_workspaces_owned_by_user(self, user_id: int) -> typing.List[Workspace]:
         return self._base_query_without_roles().filter(Workspace.owner_id == user_id).all()
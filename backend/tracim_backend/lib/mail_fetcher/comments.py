@@ -0,0 +1,133 @@
+import typing
+
+from sqlalchemy.orm import sessionmaker
+import transaction
+
+from tracim_backend.app_models.contents import content_type_list
+from tracim_backend.config import CFG
+from tracim_backend.exceptions import InsufficientUserRoleInWorkspace
+from tracim_backend.lib.core.content import ContentApi
+from tracim_backend.lib.core.user import UserApi
+from tracim_backend.lib.utils.logger import logger
+from tracim_backend.models.auth import User
+from tracim_backend.models.data import Content
+from tracim_backend.models.email_reply import ProcessedEmailReply
+from tracim_backend.models.roles import WorkspaceRoles
+from tracim_backend.models.setup_models import get_tm_session
+from tracim_backend.models.tracim_session import TracimSession
+
+
+# INFO - G.M - 2019-11-21 - reply email already parsed, ready to be added as comment.
+EmailReply = typing.NamedTuple(
+    "EmailReply",
+    [
+        ("uid", int),
+        ("message_id", typing.Optional[str]),
+        ("content_id", int),
+        ("user_email", str),
+        ("body", str),
+    ],
+)
+
+
+def create_comments_from_replies(
+    config: CFG, session_factory: sessionmaker, replies: typing.Iterable[EmailReply]
+) -> typing.List[int]:
+    """
+    Add replies as comments of their content, directly through ContentApi and in a
+    single transaction, with a savepoint by reply. Replies whose Message-ID was
+    already processed are skipped.
+    Permissions are checked as done by comment creation endpoint.
+    :return: uid of replies handled (comment created or already created), invalid
+    replies are logged and not returned.
+    """
+    handled_uids = []  # type: typing.List[int]
+    transaction_manager = transaction.TransactionManager()
+    with transaction_manager:
+        session = get_tm_session(session_factory, transaction_manager)
+        replies = list(replies)
+        message_id_hashes = {
+            ProcessedEmailReply.hash_message_id(reply.message_id)
+            for reply in replies
+            if reply.message_id
+        }
+        processed_hashes = set()  # type: typing.Set[str]
+        if message_id_hashes:
+            processed_hashes = {
+                message_id_hash
+                for message_id_hash, in session.query(ProcessedEmailReply.message_id_hash).filter(
+                    ProcessedEmailReply.message_id_hash.in_(message_id_hashes)
+                )
+            }
+        users_by_email = {}  # type: typing.Dict[str, typing.Optional[User]]
+        user_api = UserApi(None, session=session, config=config)
+        for reply in replies:
+            message_id_hash = None
+            if reply.message_id:
+                message_id_hash = ProcessedEmailReply.hash_message_id(reply.message_id)
+                if message_id_hash in processed_hashes:
+                    logger.info(
+                        create_comments_from_replies,
+                        "Reply {} already added as comment, skip it".format(reply.message_id),
+                    )
+                    handled_uids.append(reply.uid)
+                    continue
+            if reply.user_email not in users_by_email:
+                try:
+                    users_by_email[reply.user_email] = user_api.get_one_by_email(reply.user_email)
+                except Exception:
+                    users_by_email[reply.user_email] = None
+            user = users_by_email[reply.user_email]
+            if not user or not user.is_active or user.is_deleted:
+                logger.error(
+                    create_comments_from_replies,
+                    "No valid user found for reply sender {}, skip reply".format(reply.user_email),
+                )
+                continue
+            # INFO - G.M - 2019-11-21 - use a savepoint by reply so that an invalid
+            # reply does not rollback comments of other replies.
+            savepoint = session.begin_nested()
+            try:
+                comment = _create_comment(config, session, user, reply)
+                if message_id_hash:
+                    session.add(
+                        ProcessedEmailReply(
+                            message_id_hash=message_id_hash, comment_id=comment.content_id
+                        )
+                    )
+                savepoint.commit()
+            except Exception as exc:
+                savepoint.rollback()
+                log = "Failed to create comment from reply of {} on content {}: {}"
+                logger.error(
+                    create_comments_from_replies,
+                    log.format(reply.user_email, reply.content_id, str(exc)),
+                )
+                continue
+            if message_id_hash:
+                processed_hashes.add(message_id_hash)
+            handled_uids.append(reply.uid)
+            try:
+                ContentApi(
+                    current_user=user, session=session, config=config
+                ).execute_created_content_actions(comment)
+            except Exception:
+                logger.exception(
+                    create_comments_from_replies,
+                    "Failed to execute actions of comment {}".format(comment.content_id),
+                )
+    return handled_uids
+
+
+def _create_comment(config: CFG, session: TracimSession, user: User, reply: EmailReply) -> Content:
+    content_api = ContentApi(
+        show_archived=True, show_deleted=True, current_user=user, session=session, config=config
+    )
+    content = content_api.get_one(reply.content_id, content_type=content_type_list.Any_SLUG)
+    if content.workspace.get_user_role(user) < WorkspaceRoles.CONTRIBUTOR.level:
+        raise InsufficientUserRoleInWorkspace(
+            "user {} is not contributor of workspace {}".format(
+                user.email, content.workspace.workspace_id
+            )
+        )
+    return content_api.create_comment(content.workspace, content, reply.body, do_save=True)
@@ -50,5 +50,8 @@ class MailFetcherDaemon(FakeDaemon):
             use_txt_parsing=self.config.EMAIL__REPLY__USE_TXT_PARSING,
             lockfile_path=self.config.EMAIL__REPLY__LOCKFILE_PATH,
             burst=self.burst,
+            processing_mode=self.config.EMAIL__REPLY__PROCESSING_MODE,
+            parsing_workers=self.config.EMAIL__REPLY__PARSING_WORKERS,
+            config=self.config,
         )
         self._fetcher.run()
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+from concurrent.futures import ThreadPoolExecutor
 from email import message_from_bytes
 from email.header import decode_header
 from email.header import make_header
@@ -15,17 +16,24 @@ import filelock
 import imapclient
 import markdown
 import requests
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
 
+from tracim_backend.config import CFG
 from tracim_backend.exceptions import AutoReplyEmailNotAllowed
 from tracim_backend.exceptions import BadStatusCode
 from tracim_backend.exceptions import EmptyEmailBody
 from tracim_backend.exceptions import NoSpecialKeyFound
 from tracim_backend.exceptions import UnsupportedRequestMethod
+from tracim_backend.lib.mail_fetcher.comments import EmailReply
+from tracim_backend.lib.mail_fetcher.comments import create_comments_from_replies
 from tracim_backend.lib.mail_fetcher.email_processing.parser import ParsedHTMLMail
 from tracim_backend.lib.utils.authentification import TRACIM_API_KEY_HEADER
 from tracim_backend.lib.utils.authentification import TRACIM_API_USER_EMAIL_LOGIN_HEADER
 from tracim_backend.lib.utils.logger import logger
 from tracim_backend.lib.utils.sanitizer import HtmlSanitizer  # nopep8
+from tracim_backend.models.setup_models import get_engine
+from tracim_backend.models.setup_models import get_session_factory
 
 TRACIM_SPECIAL_KEY_HEADER = "X-Tracim-Key"
 CONTENT_TYPE_TEXT_PLAIN = "text/plain"
@@ -78,6 +86,12 @@ class DecodedMail(object):
     def get_first_ref(self) -> str:
         return parseaddr(self._message["References"])[1]
 
+    def get_message_id(self) -> typing.Optional[str]:
+        message_id = self._decode_header("Message-ID")
+        if message_id:
+            return message_id.strip()
+        return None
+
     def get_special_key(self) -> typing.Optional[str]:
         return self._decode_header(TRACIM_SPECIAL_KEY_HEADER)
 
@@ -241,10 +255,14 @@ class MailFetcher(object):
         use_txt_parsing: bool,
         lockfile_path: str,
         burst: bool,
+        processing_mode: str = CFG.CST.API,
+        parsing_workers: int = 1,
+        config: typing.Optional[CFG] = None,
     ) -> None:
         """
         Fetch mail from a mailbox folder through IMAP and add their content to
-        Tracim through http according to mail Headers.
+        Tracim through http (api mode) or directly in database (direct mode)
+        according to mail Headers.
         Fetch is regular.
         :param host: imap server hostname
         :param port: imap connection port
@@ -265,6 +283,11 @@ class MailFetcher(object):
         :param use_txt_parsing: parse txt mail
         :param burst: if true, run only one time,
         if false run as continous daemon.
+        :param processing_mode: API to add comments through http requests to tracim
+        api, DIRECT to parse mails in a worker pool and add all comments at once
+        through ContentApi.
+        :param parsing_workers: number of threads parsing mails in direct mode
+        :param config: tracim config, needed in direct mode
         """
         self.host = host
         self.port = port
@@ -284,9 +307,24 @@ class MailFetcher(object):
         self.lock = filelock.FileLock(lockfile_path)
         self._is_active = True
         self.burst = burst
+        self.processing_mode = processing_mode
+        self.parsing_workers = parsing_workers
+        self.config = config
+        self._engine = None  # type: typing.Optional[Engine]
+        self._session_factory = None  # type: typing.Optional[sessionmaker]
 
     def run(self) -> None:
         logger.info(self, "Starting MailFetcher")
+        if self.processing_mode == CFG.CST.DIRECT:
+            self._engine = get_engine(self.config)
+            self._session_factory = get_session_factory(self._engine)
+        try:
+            self._run()
+        finally:
+            if self._engine:
+                self._engine.dispose()
+
+    def _run(self) -> None:
         while self._is_active:
             imapc = None
             sleep_after_connection = True
@@ -417,7 +455,10 @@ class MailFetcher(object):
                 DecodedMail(m.message, m.uid, self.reply_to_pattern, self.references_pattern)
                 for m in messages
             ]
-            self._notify_tracim(cleaned_mails, imapc)
+            if self.processing_mode == CFG.CST.DIRECT:
+                self._add_comments(cleaned_mails, imapc)
+            else:
+                self._notify_tracim(cleaned_mails, imapc)
 
     def stop(self) -> None:
         self._is_active = False
@@ -503,6 +544,53 @@ class MailFetcher(object):
                 log = "Fail to transmit fetched mail to tracim : {}"
                 logger.error(self, log.format(str(e)))
 
+    def _add_comments(self, mails: typing.List[DecodedMail], imapc: imapclient.IMAPClient) -> None:
+        """
+        Parse mails in a worker pool, add them as comments in a single transaction
+        then flag all handled mails with one IMAP STORE command.
+        :param mails: list of mails to add
+        :return: none
+        """
+        logger.debug(self, "Add {} new responses as comments".format(len(mails)))
+        if not mails:
+            return
+        with ThreadPoolExecutor(max_workers=self.parsing_workers) as executor:
+            replies = [reply for reply in executor.map(self._parse_reply, mails) if reply]
+        if not replies:
+            return
+        handled_uids = create_comments_from_replies(self.config, self._session_factory, replies)
+        logger.info(
+            self, "{} comment(s) added from {} response(s)".format(len(handled_uids), len(mails))
+        )
+        if handled_uids:
+            imapc.add_flags(handled_uids, [IMAP_CHECKED_FLAG, IMAP_SEEN_FLAG])
+
+    def _parse_reply(self, mail: DecodedMail) -> typing.Optional[EmailReply]:
+        try:
+            mail.check_validity_for_comment_content()
+            return EmailReply(
+                uid=mail.uid,
+                message_id=mail.get_message_id(),
+                content_id=int(mail.get_key()),
+                user_email=mail.get_from_address(),
+                body=mail.get_body(
+                    use_html_parsing=self.use_html_parsing, use_txt_parsing=self.use_txt_parsing
+                ),
+            )
+        except NoSpecialKeyFound as exc:
+            log = "Failed to parse response due to missing specialkey in mail {}"
+            logger.error(self, log.format(exc.__str__()))
+        except EmptyEmailBody:
+            log = "Empty body, skip mail"
+            logger.error(self, log)
+        except AutoReplyEmailNotAllowed:
+            log = "Autoreply mail, skip mail"
+            logger.warning(self, log)
+        except Exception as exc:
+            log = "Failed to parse response in mail fetcher error : {}"
+            logger.error(self, log.format(exc.__str__()))
+        return None
+
     def _get_auth_headers(self, user_email) -> dict:
         return {TRACIM_API_KEY_HEADER: self.api_key, TRACIM_API_USER_EMAIL_LOGIN_HEADER: user_email}
 
@@ -0,0 +1,103 @@
+import typing
+
+from sqlalchemy.event import listen
+from sqlalchemy.orm import Session
+from sqlalchemy.orm import sessionmaker
+import transaction
+
+from tracim_backend.config import CFG
+from tracim_backend.lib.utils.logger import logger
+from tracim_backend.lib.utils.utils import get_redis_connection
+from tracim_backend.lib.utils.utils import get_rq_queue
+
+CONTENT_NOTIFICATION_QUEUE_NAME = "content_notification"
+PENDING_EVENTS_SESSION_KEY = "content_notification_pending_events"
+LISTENED_SESSION_KEY = "content_notification_listened"
+
+
+ContentNotificationEvent = typing.NamedTuple(
+    "ContentNotificationEvent", [("actor_id", int), ("content_id", int), ("revision_id", int)]
+)
+
+
+def is_content_notification_async(config: CFG) -> bool:
+    return config.EMAIL__NOTIFICATION__PROCESSING_MODE.upper() == config.CST.ASYNC
+
+
+def notify_content_events(
+    config: CFG,
+    events: typing.Iterable[typing.Sequence[int]],
+    session_factory: sessionmaker = None,
+) -> None:
+    """
+    Resolve recipients, build and send notification emails of content events using
+    their own database session.
+    This is the function run by jobs of content notification queue.
+    :param config: tracim config
+    :param events: (actor_id, content_id, revision_id) of events
+    :param session_factory: session factory to use, a new one is created if not given.
+    """
+    # TODO - G.M - 2019-11-20 - fix circular import
+    from tracim_backend.lib.mail_notifier.notifier import get_email_manager
+    from tracim_backend.models.setup_models import get_engine
+    from tracim_backend.models.setup_models import get_session_factory
+    from tracim_backend.models.setup_models import get_tm_session
+
+    events = sorted(
+        (ContentNotificationEvent(*event) for event in events), key=lambda event: event.revision_id
+    )
+    engine = None
+    if not session_factory:
+        engine = get_engine(config)
+        session_factory = get_session_factory(engine)
+    transaction_manager = transaction.TransactionManager()
+    try:
+        with transaction_manager:
+            session = get_tm_session(session_factory, transaction_manager)
+            get_email_manager(config, session).notify_content_updates(
+                [(event.actor_id, event.content_id) for event in events]
+            )
+    finally:
+        if engine:
+            engine.dispose()
+
+
+def queue_content_notification(
+    session: Session, config: CFG, event: ContentNotificationEvent
+) -> None:
+    """
+    Queue notification of a content event for the content notifier daemon.
+    Jobs are queued once session is committed, so that the daemon reads up to date data,
+    and all events of a transaction are queued in a single job.
+    """
+    if not session.info.get(LISTENED_SESSION_KEY):
+
+        def enqueue_pending_events(session: Session) -> None:
+            pending_events = session.info.pop(PENDING_EVENTS_SESSION_KEY, None)
+            if not pending_events:
+                return
+            try:
+                redis_connection = get_redis_connection(config)
+                queue = get_rq_queue(redis_connection, CONTENT_NOTIFICATION_QUEUE_NAME)
+                queue.enqueue(
+                    notify_content_events,
+                    config=config,
+                    events=[tuple(event) for event in pending_events],
+                )
+            except Exception:
+                # INFO - G.M - 2019-11-20 - data are already committed at this step,
+                # do not fail because of notification.
+                logger.exception(
+                    queue_content_notification,
+                    "Something goes wrong during queuing of notification of {}".format(
+                        pending_events
+                    ),
+                )
+
+        def discard_pending_events(session: Session) -> None:
+            session.info.pop(PENDING_EVENTS_SESSION_KEY, None)
+
+        listen(session, "after_commit", enqueue_pending_events)
+        listen(session, "after_rollback", discard_pending_events)
+        session.info[LISTENED_SESSION_KEY] = True
+    session.info.setdefault(PENDING_EVENTS_SESSION_KEY, []).append(event)
@@ -1,18 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+import time
 import typing
 
-from rq import Connection as RQConnection
-from rq import Worker as BaseRQWorker
-from rq.dummy import do_nothing
-from rq.worker import StopRequested
+from rq import Queue
+from rq.exceptions import DequeueTimeout
+from rq.job import Job
 
 from tracim_backend.config import CFG
+from tracim_backend.lib.mail_notifier.content_notification import CONTENT_NOTIFICATION_QUEUE_NAME
+from tracim_backend.lib.mail_notifier.content_notification import notify_content_events
+from tracim_backend.lib.mail_notifier.sender import get_smtp_connection_pool
+from tracim_backend.lib.mail_notifier.utils import SmtpConfiguration
 from tracim_backend.lib.utils.daemon import FakeDaemon
 from tracim_backend.lib.utils.logger import logger
 from tracim_backend.lib.utils.utils import get_redis_connection
 from tracim_backend.lib.utils.utils import get_rq_queue
+from tracim_backend.models.setup_models import get_engine
+from tracim_backend.models.setup_models import get_session_factory
+
+# INFO - G.M - 2019-11-21 - max number of queued emails dequeued at the same time
+MAX_SENT_JOBS = 100
+# INFO - G.M - 2019-11-20 - max number of queued jobs merged in one notification
+MAX_MERGED_JOBS = 500
+# INFO - G.M - 2019-11-20 - time in seconds to wait for a job before checking
+# if daemon stop was requested.
+DEQUEUE_TIMEOUT = 5
 
 
 class MailSenderDaemon(FakeDaemon):
+    """
+    Send emails queued in mail sender queue. Jobs available at the same time are
+    sent concurrently, each sending thread using a connection of smtp connection
+    pool, so that connections are kept opened between emails.
+    """
+
     # NOTE: use *args and **kwargs because parent __init__ use strange
     # * parameter
     def __init__(self, config: "CFG", burst=True, *args, **kwargs):
@@ -22,40 +44,173 @@ class MailSenderDaemon(FakeDaemon):
         """
         super().__init__(*args, **kwargs)
         self.config = config
-        self.worker = None  # type: RQWorker
         self.burst = burst
+        self._stop_requested = False
+        self.nb_sent_jobs = 0
+        self.sending_duration = 0.0
+
+    @property
+    def mails_per_second(self) -> float:
+        """
+        Mean number of queued emails sent by second since daemon start,
+        waiting time between jobs excluded.
+        """
+        if not self.sending_duration:
+            return 0.0
+        return self.nb_sent_jobs / self.sending_duration
 
     def append_thread_callback(self, callback: typing.Callable) -> None:
         logger.warning("MailSenderDaemon not implement append_thread_callback")
         pass
 
     def stop(self) -> None:
-        # When _stop_requested at False, tracim.lib.daemons.RQWorker
-        # will raise StopRequested exception in worker thread after receive a
-        # job.
-        self.worker._stop_requested = True
-        redis_connection = get_redis_connection(self.config)
-        queue = get_rq_queue(redis_connection, "mail_sender")
-        queue.enqueue(do_nothing)
+        self._stop_requested = True
 
     def run(self) -> None:
+        queue = get_rq_queue(get_redis_connection(self.config), "mail_sender")
+        smtp_config = SmtpConfiguration(
+            self.config.EMAIL__NOTIFICATION__SMTP__SERVER,
+            self.config.EMAIL__NOTIFICATION__SMTP__PORT,
+            self.config.EMAIL__NOTIFICATION__SMTP__USER,
+            self.config.EMAIL__NOTIFICATION__SMTP__PASSWORD,
+        )
+        smtp_connection_pool = get_smtp_connection_pool(self.config, smtp_config)
+        nb_workers = max(1, self.config.EMAIL__NOTIFICATION__SMTP__POOL_SIZE)
+        try:
+            with ThreadPoolExecutor(max_workers=nb_workers) as executor:
+                while not self._stop_requested:
+                    jobs = self._dequeue_jobs(queue)
+                    if not jobs:
+                        if self.burst:
+                            break
+                        smtp_connection_pool.keep_alive()
+                        continue
+                    start = time.monotonic()
+                    for _ in executor.map(self._perform_job, jobs):
+                        pass
+                    duration = time.monotonic() - start
+                    self.nb_sent_jobs += len(jobs)
+                    self.sending_duration += duration
+                    logger.info(
+                        self,
+                        "{} email(s) sent in {:.3f}s, {:.1f} emails/s since start".format(
+                            len(jobs), duration, self.mails_per_second
+                        ),
+                    )
+        finally:
+            smtp_connection_pool.clear()
+
+    def _perform_job(self, job: Job) -> None:
+        # INFO - G.M - 2019-11-21 - jobs are email sending functions of EmailSender,
+        # which send emails through smtp connection pool.
+        try:
+            job.func(*job.args, **job.kwargs)
+        except Exception:
+            logger.exception(self, "Something goes wrong during job {}".format(job.id))
+        finally:
+            job.delete()
+
+    def _dequeue_jobs(self, queue: Queue) -> typing.List[Job]:
+        """
+        Wait for a job then get all other jobs already queued, up to MAX_SENT_JOBS.
+        """
+        timeout = None if self.burst else DEQUEUE_TIMEOUT
+        try:
+            result = Queue.dequeue_any([queue], timeout, connection=queue.connection)
+        except DequeueTimeout:
+            return []
+        if not result:
+            return []
+        jobs = [result[0]]
+        while len(jobs) < MAX_SENT_JOBS:
+            job = queue.dequeue()
+            if not job:
+                break
+            jobs.append(job)
+        return jobs
 
-        with RQConnection(get_redis_connection(self.config)):
-            self.worker = RQWorker(["mail_sender"])
-            self.worker.work(burst=self.burst)
 
+class ContentNotifierDaemon(FakeDaemon):
+    """
+    Build and send notification emails of content events queued in content notification
+    queue. Events queued during digest delay after first event are merged so that
+    events of same main content are sent in a single digest email per user.
+    """
 
-class RQWorker(BaseRQWorker):
-    def _install_signal_handlers(self):
-        # RQ Worker is designed to work in main thread
-        # So we have to disable these signals (we implement server stop in
-        # MailSenderDaemon.stop method).
+    # NOTE: use *args and **kwargs because parent __init__ use strange
+    # * parameter
+    def __init__(self, config: "CFG", burst=True, *args, **kwargs):
+        """
+        :param config: tracim config
+        :param burst: if true, run one time, if false, run continously
+        """
+        super().__init__(*args, **kwargs)
+        self.config = config
+        self.burst = burst
+        self._stop_requested = False
+
+    def append_thread_callback(self, callback: typing.Callable) -> None:
+        logger.warning("ContentNotifierDaemon not implement append_thread_callback")
         pass
 
-    def dequeue_job_and_maintain_ttl(self, timeout):
-        # RQ Worker is designed to work in main thread, so we add behaviour
-        # here: if _stop_requested has been set to True, raise the standard way
-        # StopRequested exception to stop worker.
-        if self._stop_requested:
-            raise StopRequested()
-        return super().dequeue_job_and_maintain_ttl(timeout)
+    def stop(self) -> None:
+        self._stop_requested = True
+
+    def run(self) -> None:
+        queue = get_rq_queue(get_redis_connection(self.config), CONTENT_NOTIFICATION_QUEUE_NAME)
+        engine = get_engine(self.config)
+        session_factory = get_session_factory(engine)
+        try:
+            while not self._stop_requested:
+                jobs = self._dequeue_jobs(queue)
+                if not jobs:
+                    if self.burst:
+                        break
+                    continue
+                events = []  # type: typing.List[typing.Sequence[int]]
+                for job in jobs:
+                    events.extend(job.kwargs["events"])
+                try:
+                    notify_content_events(self.config, events, session_factory)
+                    logger.info(
+                        self, "{} event(s) notified from {} job(s)".format(len(events), len(jobs))
+                    )
+                except Exception:
+                    # INFO - G.M - 2019-11-20 - do not retry, as some emails may
+                    # already be sent.
+                    logger.exception(
+                        self, "Something goes wrong during notification of {}".format(events)
+                    )
+                finally:
+                    for job in jobs:
+                        job.delete()
+        finally:
+            engine.dispose()
+
+    def _dequeue_jobs(self, queue: Queue) -> typing.List[Job]:
+        """
+        Wait for a job, wait end of digest delay of this job, then get all other jobs
+        queued, up to MAX_MERGED_JOBS.
+        """
+        timeout = None if self.burst else DEQUEUE_TIMEOUT
+        try:
+            result = Queue.dequeue_any([queue], timeout, connection=queue.connection)
+        except DequeueTimeout:
+            return []
+        if not result:
+            return []
+        jobs = [result[0]]
+        if not self.burst:
+            digest_end = jobs[0].enqueued_at + datetime.timedelta(
+                seconds=self.config.EMAIL__NOTIFICATION__ASYNC__DIGEST_DELAY
+            )
+            remaining_delay = (digest_end - datetime.datetime.utcnow()).total_seconds()
+            while not self._stop_requested and remaining_delay > 0:
+                time.sleep(min(1, remaining_delay))
+                remaining_delay = (digest_end - datetime.datetime.utcnow()).total_seconds()
+        while len(jobs) < MAX_MERGED_JOBS:
+            job = queue.dequeue()
+            if not job:
+                break
+            jobs.append(job)
+        return jobs
@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
+from collections import OrderedDict
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.utils import formataddr
 import logging
+import os
+import threading
 import typing
 
+from mako.exceptions import MakoException
 from mako.template import Template
 from sqlalchemy.orm import Session
 
@@ -13,6 +17,9 @@ from tracim_backend.config import CFG
 from tracim_backend.exceptions import EmailTemplateError
 from tracim_backend.lib.core.notifications import INotifier
 from tracim_backend.lib.core.workspace import WorkspaceApi
+from tracim_backend.lib.mail_notifier.content_notification import ContentNotificationEvent
+from tracim_backend.lib.mail_notifier.content_notification import is_content_notification_async
+from tracim_backend.lib.mail_notifier.content_notification import queue_content_notification
 from tracim_backend.lib.mail_notifier.sender import EmailSender
 from tracim_backend.lib.mail_notifier.sender import send_email_through
 from tracim_backend.lib.mail_notifier.utils import EST
@@ -29,6 +36,11 @@ from tracim_backend.models.data import ActionDescription
 from tracim_backend.models.data import Content
 from tracim_backend.models.data import UserRoleInWorkspace
 
+# INFO - G.M - 2019-11-19 - compiled email templates by file path, with modification
+# time of file when compiled.
+_email_templates = {}  # type: typing.Dict[str, typing.Tuple[float, Template]]
+_email_templates_lock = threading.Lock()
+
 
 class EmailNotifier(INotifier):
     """
@@ -109,14 +121,19 @@ class EmailNotifier(INotifier):
         # (SQLA objects are related to a given thread/session)
         #
         try:
-            if (
-                self.config.EMAIL__NOTIFICATION__PROCESSING_MODE.lower()
-                == self.config.CST.ASYNC.lower()
-            ):
+            if is_content_notification_async(self.config):
                 logger.info(self, "Sending email in ASYNC mode")
-                # TODO - D.A - 2014-11-06
-                # This feature must be implemented in order to be able to scale to large communities
-                raise NotImplementedError("Sending emails through ASYNC mode is not working yet")
+                # INFO - G.M - 2019-11-20 - recipients, emails building and sending are
+                # done by content notifier daemon.
+                queue_content_notification(
+                    self.session,
+                    self.config,
+                    ContentNotificationEvent(
+                        actor_id=self._user.user_id,
+                        content_id=content.content_id,
+                        revision_id=content.revision_id or 0,
+                    ),
+                )
             else:
                 logger.info(self, "Sending email in SYNC mode")
                 EmailManager(self._smtp_config, self.config, self.session).notify_content_update(
@@ -202,44 +219,87 @@ class EmailManager(object):
         :param event_content_id: related content_id
         :return:
         """
+        self.notify_content_updates([(event_actor_id, event_content_id)])
+
+    def notify_content_updates(self, events: typing.List[typing.Tuple[int, int]]) -> None:
+        """
+        Notify updates of many contents, updates related to same main content (a thread
+        and its comments for example) are sent in a single digest email per user.
+        :param events: (actor_id, content_id) of each update, in order of happening.
+        Only last update of a content is notified.
+        """
         # FIXME - D.A. - 2014-11-05
         # Dirty import. It's here in order to avoid circular import
         from tracim_backend.lib.core.content import ContentApi
         from tracim_backend.lib.core.user import UserApi
 
-        user = UserApi(None, config=self.config, session=self.session).get_one(event_actor_id)
-        logger.debug(self, "Content: {}".format(event_content_id))
-        content_api = ContentApi(current_user=user, session=self.session, config=self.config)
-        content = ContentApi(
+        user_api = UserApi(None, config=self.config, session=self.session)
+        content_api = ContentApi(
             session=self.session,
-            current_user=user,
+            current_user=None,
             # TODO - G.M - 2019-04-24 - use a system user instead of the user that has triggered the event
             config=self.config,
             show_archived=True,
             show_deleted=True,
-        ).get_one(event_content_id, content_type_list.Any_SLUG)
-        workspace_api = WorkspaceApi(session=self.session, current_user=user, config=self.config)
+        )
+        actor_id_by_content_id = OrderedDict()  # type: typing.Dict[int, int]
+        for actor_id, content_id in events:
+            actor_id_by_content_id.pop(content_id, None)
+            actor_id_by_content_id[content_id] = actor_id
+        updates_by_main_content = (
+            OrderedDict()
+        )  # type: typing.Dict[int, typing.List[typing.Tuple[User, Content]]]
+        main_contents = {}  # type: typing.Dict[int, Content]
+        for content_id, actor_id in actor_id_by_content_id.items():
+            logger.debug(self, "Content: {}".format(content_id))
+            content = content_api.get_one(content_id, content_type_list.Any_SLUG)
+            main_content = (
+                content.parent if content.type == content_type_list.Comment.slug else content
+            )
+            main_contents[main_content.content_id] = main_content
+            updates_by_main_content.setdefault(main_content.content_id, []).append(
+                (user_api.get_one(actor_id), content)
+            )
+        for main_content_id, updates in updates_by_main_content.items():
+            self._notify_main_content_updates(main_contents[main_content_id], updates)
+
+    def _notify_main_content_updates(
+        self, main_content: Content, updates: typing.List[typing.Tuple[User, Content]]
+    ) -> None:
+        """
+        Send email about updates of contents of main content to each notifiable user.
+        :param updates: (actor, content) of each update
+        """
+        # FIXME - D.A. - 2014-11-05
+        # Dirty import. It's here in order to avoid circular import
+        from tracim_backend.lib.core.content import ContentApi
+
+        first_actor = updates[0][0]
+        content_api = ContentApi(current_user=first_actor, session=self.session, config=self.config)
+        workspace_api = WorkspaceApi(session=self.session, current_user=None, config=self.config)
         workpace_in_context = workspace_api.get_workspace_with_context(
-            workspace_api.get_one(content.workspace_id)
+            workspace_api.get_one(main_content.workspace_id)
         )
-        main_content = content.parent if content.type == content_type_list.Comment.slug else content
-        notifiable_roles = WorkspaceApi(
-            current_user=user, session=self.session, config=self.config
-        ).get_notifiable_roles(content.workspace)
+        # INFO - G.M - 2019-11-20 - actors are not notified of their own updates
+        notifiable_roles = [
+            role
+            for role in workspace_api.get_notifiable_roles(main_content.workspace)
+            if any(actor != role.user for actor, _ in updates)
+        ]
 
         if len(notifiable_roles) <= 0:
             logger.info(
                 self,
                 "Skipping notification as nobody subscribed to in workspace {}".format(
-                    content.workspace.label
+                    main_content.workspace.label
                 ),
             )
             return
 
         logger.info(
             self,
-            "Generating content {} notification email for {} user(s)".format(
-                content.content_id, len(notifiable_roles)
+            "Generating content {} notification email for {} user(s) about {} update(s)".format(
+                main_content.content_id, len(notifiable_roles), len(updates)
             ),
         )
         # INFO - D.A. - 2014-11-06
@@ -251,76 +311,97 @@ class EmailManager(object):
         email_sender = EmailSender(
             self.config, self._smtp_config, self.config.EMAIL__NOTIFICATION__ACTIVATED
         )
+        # INFO - G.M - 2019-11-19 - everything not depending on recipient is built once:
+        # headers by language and email body by language and role, only "To" header
+        # is built for each recipient.
+        # INFO - G.M - 2017-11-15 - set content_id in header to permit reply
+        # references can have multiple values, but only one in this case.
+        replyto_addr = self.config.EMAIL__NOTIFICATION__REPLY_TO__EMAIL.replace(
+            "{content_id}", str(main_content.content_id)
+        )
+        reference_addr = self.config.EMAIL__NOTIFICATION__REFERENCES__EMAIL.replace(
+            "{content_id}", str(main_content.content_id)
+        )
+        contents_in_context = (
+            []
+        )  # type: typing.List[typing.Tuple[ContentInContext, typing.Optional[ContentInContext]]]
+        for _, content in updates:
+            parent_in_context = None
+            if content.parent_id:
+                parent_in_context = content_api.get_content_in_context(content.parent)
+            contents_in_context.append(
+                (content_api.get_content_in_context(content), parent_in_context)
+            )
+        template_filepath = self.config.EMAIL__NOTIFICATION__CONTENT_UPDATE__TEMPLATE__HTML
+        body_depends_on_recipient = not self._is_template_recipient_independent(template_filepath)
+        translators = {}  # type: typing.Dict[typing.Optional[str], Translator]
+        headers = {}  # type: typing.Dict[typing.Tuple, typing.Tuple[str, str, str]]
+        update_bodies = {}  # type: typing.Dict[typing.Tuple, str]
+        bodies = {}  # type: typing.Dict[typing.Tuple, MIMEText]
         for role in notifiable_roles:
             logger.info(
                 self,
                 "Generating content {} notification email to {}".format(
-                    content.content_id, role.user.email
+                    main_content.content_id, role.user.email
                 ),
             )
-            translator = Translator(app_config=self.config, default_lang=role.user.lang)
-            _ = translator.get_translation
-            to_addr = formataddr((role.user.display_name, role.user.email))
-            # INFO - G.M - 2017-11-15 - set content_id in header to permit reply
-            # references can have multiple values, but only one in this case.
-            replyto_addr = self.config.EMAIL__NOTIFICATION__REPLY_TO__EMAIL.replace(
-                "{content_id}", str(main_content.content_id)
-            )
-
-            reference_addr = self.config.EMAIL__NOTIFICATION__REFERENCES__EMAIL.replace(
-                "{content_id}", str(main_content.content_id)
-            )
-            #
-            #  INFO - D.A. - 2014-11-06
-            # We do not use .format() here because the subject defined in the .ini file
-            # may not include all required labels. In order to avoid partial format() (which result in an exception)
-            # we do use replace and force the use of .__str__() in order to process LazyString objects
-            #
-            content_status = translator.get_translation(main_content.get_status().label)
-            translated_subject = translator.get_translation(
-                self.config.EMAIL__NOTIFICATION__CONTENT_UPDATE__SUBJECT
-            )
-            subject = translated_subject.replace(
-                EST.WEBSITE_TITLE, self.config.WEBSITE__TITLE.__str__()
-            )
-            subject = subject.replace(EST.WORKSPACE_LABEL, main_content.workspace.label.__str__())
-            subject = subject.replace(EST.CONTENT_LABEL, main_content.label.__str__())
-            subject = subject.replace(EST.CONTENT_STATUS_LABEL, content_status)
-            reply_to_label = _("{username} & all members of {workspace}").format(
-                username=user.display_name, workspace=main_content.workspace.label
+            lang = role.user.lang
+            if lang not in translators:
+                translators[lang] = Translator(app_config=self.config, default_lang=lang)
+            translator = translators[lang]
+            update_indexes = tuple(
+                index for index, (actor, _) in enumerate(updates) if actor != role.user
             )
+            # INFO - G.M - 2019-11-20 - digest email is sent by tracim if updates
+            # were done by many users.
+            actors = {updates[index][0] for index in update_indexes}
+            last_actor = updates[update_indexes[-1]][0]
+            sender_actor = last_actor if len(actors) == 1 else None
+            headers_key = (lang, last_actor.user_id, len(actors) == 1)
+            if headers_key not in headers:
+                subject, reply_to = self._build_content_update_headers(
+                    main_content, last_actor, replyto_addr, translator
+                )
+                headers[headers_key] = (subject, reply_to, self._get_sender(sender_actor))
+            subject, reply_to, sender = headers[headers_key]
 
             message = MIMEMultipart("alternative")
             message["Subject"] = subject
-            message["From"] = self._get_sender(user)
-            message["To"] = to_addr
-            message["Reply-to"] = formataddr((reply_to_label, replyto_addr))
+            message["From"] = sender
+            message["To"] = formataddr((role.user.display_name, role.user.email))
+            message["Reply-to"] = reply_to
             # INFO - G.M - 2017-11-15
             # References can theorically have label, but in pratice, references
             # contains only message_id from parents post in thread.
             # To link this email to a content we create a virtual parent
             # in reference who contain the content_id.
             message["References"] = formataddr(("", reference_addr))
-            content_in_context = content_api.get_content_in_context(content)
-            parent_in_context = None
-            if content.parent_id:
-                parent_in_context = content_api.get_content_in_context(content.parent)
-
-            body_html = self._build_email_body_for_content(
-                self.config.EMAIL__NOTIFICATION__CONTENT_UPDATE__TEMPLATE__HTML,
-                role,
-                content_in_context,
-                parent_in_context,
-                workpace_in_context,
-                user,
-                translator,
-            )
 
-            part2 = MIMEText(body_html, "html", "utf-8")
+            group_key = (lang, role.role)  # type: typing.Tuple
+            if body_depends_on_recipient:
+                group_key += (role.user_id,)
+            body_key = group_key + (update_indexes,)
+            if body_key not in bodies:
+                update_bodies_html = []
+                for index in update_indexes:
+                    update_body_key = group_key + (index,)
+                    if update_body_key not in update_bodies:
+                        content_in_context, parent_in_context = contents_in_context[index]
+                        update_bodies[update_body_key] = self._build_email_body_for_content(
+                            template_filepath,
+                            role,
+                            content_in_context,
+                            parent_in_context,
+                            workpace_in_context,
+                            updates[index][0],
+                            translator,
+                        )
+                    update_bodies_html.append(update_bodies[update_body_key])
+                bodies[body_key] = MIMEText("<hr/>".join(update_bodies_html), "html", "utf-8")
             # Attach parts into message container.
             # According to RFC 2046, the last part of a multipart message, in this case
             # the HTML message, is best and preferred.
-            message.attach(part2)
+            message.attach(bodies[body_key])
 
             self.log_email_notification(
                 msg="an email was created to {}".format(message["To"]),
@@ -332,6 +413,35 @@ class EmailManager(object):
 
             send_email_through(self.config, email_sender.send_mail, message)
 
+    def _build_content_update_headers(
+        self, main_content: Content, actor: User, replyto_addr: str, translator: Translator
+    ) -> typing.Tuple[str, str]:
+        """
+        Build translated headers of content update email
+        :return: subject and reply-to headers
+        """
+        _ = translator.get_translation
+        #
+        #  INFO - D.A. - 2014-11-06
+        # We do not use .format() here because the subject defined in the .ini file
+        # may not include all required labels. In order to avoid partial format() (which result in an exception)
+        # we do use replace and force the use of .__str__() in order to process LazyString objects
+        #
+        content_status = translator.get_translation(main_content.get_status().label)
+        translated_subject = translator.get_translation(
+            self.config.EMAIL__NOTIFICATION__CONTENT_UPDATE__SUBJECT
+        )
+        subject = translated_subject.replace(
+            EST.WEBSITE_TITLE, self.config.WEBSITE__TITLE.__str__()
+        )
+        subject = subject.replace(EST.WORKSPACE_LABEL, main_content.workspace.label.__str__())
+        subject = subject.replace(EST.CONTENT_LABEL, main_content.label.__str__())
+        subject = subject.replace(EST.CONTENT_STATUS_LABEL, content_status)
+        reply_to_label = _("{username} & all members of {workspace}").format(
+            username=actor.display_name, workspace=main_content.workspace.label
+        )
+        return subject, formataddr((reply_to_label, replyto_addr))
+
     def notify_created_account(
         self, user: User, password: str, origin_user: typing.Optional[User] = None
     ) -> None:
@@ -440,20 +550,30 @@ class EmailManager(object):
         :return: template rendered string
         """
         try:
-            template = Template(
-                filename=mako_template_filepath,
-                default_filters=["html_escape"],
-                imports=[
-                    "from mako.filters import html_escape",
-                    "from lxml.html.diff import htmldiff",
-                    "import humanize",
-                ],
-            )
+            template = get_email_template(mako_template_filepath)
             return template.render(_=translator.get_translation, config=self.config, **context)
         except Exception as exc:
             logger.exception(self, "Failed to render email template: {}".format(exc.__str__()))
             raise EmailTemplateError("Failed to render email template: {}".format(exc.__str__()))
 
+    def _is_template_recipient_independent(self, mako_template_filepath: str) -> bool:
+        """
+        Check if template is declared as not using recipient ("user" variable),
+        with a module-level block: <%! recipient_independent = True %>. If so, same
+        body is sent to all recipients with same language and role, otherwise body is
+        rendered for each recipient.
+        """
+        try:
+            template = get_email_template(mako_template_filepath)
+        except MakoException:
+            # INFO - G.M - 2019-11-19 - template syntax error is raised on rendering
+            return False
+        except (OSError, TypeError) as exc:
+            raise EmailTemplateError(
+                "Failed to read email template {}: {}".format(mako_template_filepath, str(exc))
+            ) from exc
+        return getattr(template.module, "recipient_independent", False) is True
+
     def _build_context_for_content_update(
         self,
         role: UserRoleInWorkspace,
@@ -541,6 +661,30 @@ class EmailManager(object):
         return body_content
 
 
+def get_email_template(mako_template_filepath: str) -> Template:
+    """
+    Return compiled mako template of email, compiled templates are cached by process
+    and compiled again only when template file is modified.
+    """
+    modified_at = os.path.getmtime(mako_template_filepath)
+    with _email_templates_lock:
+        cached_template = _email_templates.get(mako_template_filepath)
+    if cached_template and cached_template[0] == modified_at:
+        return cached_template[1]
+    template = Template(
+        filename=mako_template_filepath,
+        default_filters=["html_escape"],
+        imports=[
+            "from mako.filters import html_escape",
+            "from lxml.html.diff import htmldiff",
+            "import humanize",
+        ],
+    )
+    with _email_templates_lock:
+        _email_templates[mako_template_filepath] = (modified_at, template)
+    return template
+
+
 def get_email_manager(config: CFG, session: Session):
     """
     :return: EmailManager instance
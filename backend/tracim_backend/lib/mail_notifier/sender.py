@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 from email.message import Message
 from email.mime.multipart import MIMEMultipart
+import os
 import smtplib
+import threading
+import time
 import traceback
 import typing
 
@@ -45,6 +48,196 @@ def send_email_through(
         )
 
 
+def open_smtp_connection(smtp_config: SmtpConfiguration) -> smtplib.SMTP:
+    log = "Connecting to SMTP server {}"
+    logger.info(open_smtp_connection, log.format(smtp_config.server))
+    # TODO - G.M - 2019-01-29 - Support for SMTP SSL-only port connection
+    # using smtplib.SMTP_SSL
+    smtp_connection = smtplib.SMTP(smtp_config.server, smtp_config.port)
+    smtp_connection.ehlo()
+
+    if smtp_config.login:
+        try:
+            starttls_result = smtp_connection.starttls()
+
+            if starttls_result[0] == 220:
+                logger.info(open_smtp_connection, "SMTP Start TLS OK")
+
+            log = "SMTP Start TLS return code: {} with message: {}"
+            logger.debug(
+                open_smtp_connection,
+                log.format(starttls_result[0], starttls_result[1].decode("utf-8")),
+            )
+        except smtplib.SMTPResponseException as exc:
+            log = "SMTP start TLS return error code: {} with message: {}"
+            logger.error(
+                open_smtp_connection, log.format(exc.smtp_code, exc.smtp_error.decode("utf-8"))
+            )
+        except Exception as exc:
+            log = "Unexpected exception during SMTP start TLS process: {}"
+            logger.error(open_smtp_connection, log.format(exc.__str__()))
+            logger.error(open_smtp_connection, traceback.format_exc())
+
+    if smtp_config.login:
+        try:
+            login_res = smtp_connection.login(smtp_config.login, smtp_config.password)
+
+            if login_res[0] == 235:
+                logger.info(open_smtp_connection, "SMTP Authentication Successful")
+            if login_res[0] == 503:
+                logger.info(open_smtp_connection, "SMTP Already Authenticated")
+
+            log = "SMTP login return code: {} with message: {}"
+            logger.debug(
+                open_smtp_connection, log.format(login_res[0], login_res[1].decode("utf-8"))
+            )
+        except smtplib.SMTPAuthenticationError as exc:
+
+            log = "SMTP auth return error code: {} with message: {}"
+            logger.error(
+                open_smtp_connection, log.format(exc.smtp_code, exc.smtp_error.decode("utf-8"))
+            )
+            logger.error(
+                open_smtp_connection,
+                "check your auth params combinaison " "(login/password) for SMTP",
+            )
+        except smtplib.SMTPResponseException as exc:
+            log = "SMTP login return error code: {} with message: {}"
+            logger.error(
+                open_smtp_connection, log.format(exc.smtp_code, exc.smtp_error.decode("utf-8"))
+            )
+        except Exception as exc:
+            log = "Unexpected exception during SMTP login {}"
+            logger.error(open_smtp_connection, log.format(exc.__str__()))
+            logger.error(open_smtp_connection, traceback.format_exc())
+    return smtp_connection
+
+
+class SmtpConnectionPool(object):
+    """
+    Keep smtp connections opened (and authenticated) between emails, so that
+    each email does not pay for connection, tls negociation and login.
+    Connections idle for more than keepalive interval are checked with a NOOP
+    command before reuse and replaced if server closed them.
+    """
+
+    def __init__(
+        self, smtp_config: SmtpConfiguration, max_size: int, keepalive_interval: float
+    ) -> None:
+        """
+        :param smtp_config: configuration of smtp server of connections
+        :param max_size: max number of idle connections kept, 0 disable reuse.
+        :param keepalive_interval: time in seconds after which an idle connection
+        is checked before reuse.
+        """
+        self._smtp_config = smtp_config
+        self.max_size = max_size
+        self.keepalive_interval = keepalive_interval
+        # INFO - G.M - 2019-11-21 - idle connections with time of their last use,
+        # last released connection is reused first.
+        self._idle_connections = []  # type: typing.List[typing.Tuple[smtplib.SMTP, float]]
+        self._lock = threading.Lock()
+
+    def acquire(self) -> smtplib.SMTP:
+        """
+        Get an idle connection, or open a new one if none available.
+        Connection must be given back with release().
+        """
+        while True:
+            with self._lock:
+                if not self._idle_connections:
+                    break
+                connection, last_use = self._idle_connections.pop()
+            if time.monotonic() - last_use < self.keepalive_interval or self._is_alive(connection):
+                return connection
+            self._close(connection)
+        return open_smtp_connection(self._smtp_config)
+
+    def release(self, connection: smtplib.SMTP, reusable: bool = True) -> None:
+        """
+        Give back a connection to the pool, connection is closed if it is not
+        reusable (broken connection) or if pool is full.
+        """
+        if reusable:
+            with self._lock:
+                if len(self._idle_connections) < self.max_size:
+                    self._idle_connections.append((connection, time.monotonic()))
+                    return
+        self._close(connection)
+
+    def keep_alive(self) -> None:
+        """
+        Check idle connections not used since keepalive interval,
+        drop ones closed by server.
+        """
+        with self._lock:
+            connections = self._idle_connections
+            self._idle_connections = []
+        now = time.monotonic()
+        alive_connections = []
+        for connection, last_use in connections:
+            if now - last_use < self.keepalive_interval:
+                alive_connections.append((connection, last_use))
+            elif self._is_alive(connection):
+                alive_connections.append((connection, now))
+            else:
+                self._close(connection)
+        with self._lock:
+            self._idle_connections = alive_connections + self._idle_connections
+            while len(self._idle_connections) > self.max_size:
+                self._close(self._idle_connections.pop(0)[0])
+
+    def clear(self) -> None:
+        with self._lock:
+            connections = self._idle_connections
+            self._idle_connections = []
+        for connection, _ in connections:
+            self._close(connection)
+
+    @property
+    def nb_idle_connections(self) -> int:
+        return len(self._idle_connections)
+
+    def _is_alive(self, connection: smtplib.SMTP) -> bool:
+        try:
+            return connection.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _close(self, connection: smtplib.SMTP) -> None:
+        try:
+            connection.quit()
+        except (smtplib.SMTPException, OSError):
+            connection.close()
+
+
+# INFO - G.M - 2019-11-21 - smtp connection pools are shared by the whole process,
+# by smtp server and login.
+_smtp_connection_pools = (
+    {}
+)  # type: typing.Dict[typing.Tuple[str, typing.Any, str, str], SmtpConnectionPool]
+_smtp_connection_pools_pid = None  # type: typing.Optional[int]
+_smtp_connection_pools_lock = threading.Lock()
+
+
+def get_smtp_connection_pool(config: CFG, smtp_config: SmtpConfiguration) -> SmtpConnectionPool:
+    global _smtp_connection_pools, _smtp_connection_pools_pid
+    key = (smtp_config.server, smtp_config.port, smtp_config.login, smtp_config.password)
+    with _smtp_connection_pools_lock:
+        # INFO - G.M - 2019-11-21 - connections must not be shared with forked processes
+        # (like rq work horses), create new pools there.
+        if _smtp_connection_pools_pid != os.getpid():
+            _smtp_connection_pools = {}
+            _smtp_connection_pools_pid = os.getpid()
+        if key not in _smtp_connection_pools:
+            _smtp_connection_pools[key] = SmtpConnectionPool(
+                smtp_config,
+                max_size=config.EMAIL__NOTIFICATION__SMTP__POOL_SIZE,
+                keepalive_interval=config.EMAIL__NOTIFICATION__SMTP__KEEPALIVE_INTERVAL,
+            )
+        return _smtp_connection_pools[key]
+
+
 class EmailSender(object):
     """
     Independent email sender class.
@@ -61,65 +254,14 @@ class EmailSender(object):
 
     def connect(self):
         if not self._smtp_connection:
-            log = "Connecting to SMTP server {}"
-            logger.info(self, log.format(self._smtp_config.server))
-            # TODO - G.M - 2019-01-29 - Support for SMTP SSL-only port connection
-            # using smtplib.SMTP_SSL
-            self._smtp_connection = smtplib.SMTP(self._smtp_config.server, self._smtp_config.port)
-            self._smtp_connection.ehlo()
-
-            if self._smtp_config.login:
-                try:
-                    starttls_result = self._smtp_connection.starttls()
-
-                    if starttls_result[0] == 220:
-                        logger.info(self, "SMTP Start TLS OK")
-
-                    log = "SMTP Start TLS return code: {} with message: {}"
-                    logger.debug(
-                        self, log.format(starttls_result[0], starttls_result[1].decode("utf-8"))
-                    )
-                except smtplib.SMTPResponseException as exc:
-                    log = "SMTP start TLS return error code: {} with message: {}"
-                    logger.error(self, log.format(exc.smtp_code, exc.smtp_error.decode("utf-8")))
-                except Exception as exc:
-                    log = "Unexpected exception during SMTP start TLS process: {}"
-                    logger.error(self, log.format(exc.__str__()))
-                    logger.error(self, traceback.format_exc())
-
-            if self._smtp_config.login:
-                try:
-                    login_res = self._smtp_connection.login(
-                        self._smtp_config.login, self._smtp_config.password
-                    )
-
-                    if login_res[0] == 235:
-                        logger.info(self, "SMTP Authentication Successful")
-                    if login_res[0] == 503:
-                        logger.info(self, "SMTP Already Authenticated")
-
-                    log = "SMTP login return code: {} with message: {}"
-                    logger.debug(self, log.format(login_res[0], login_res[1].decode("utf-8")))
-                except smtplib.SMTPAuthenticationError as exc:
-
-                    log = "SMTP auth return error code: {} with message: {}"
-                    logger.error(self, log.format(exc.smtp_code, exc.smtp_error.decode("utf-8")))
-                    logger.error(
-                        self, "check your auth params combinaison " "(login/password) for SMTP"
-                    )
-                except smtplib.SMTPResponseException as exc:
-                    log = "SMTP login return error code: {} with message: {}"
-                    logger.error(self, log.format(exc.smtp_code, exc.smtp_error.decode("utf-8")))
-                except Exception as exc:
-                    log = "Unexpected exception during SMTP login {}"
-                    logger.error(self, log.format(exc.__str__()))
-                    logger.error(self, traceback.format_exc())
+            self._smtp_connection = open_smtp_connection(self._smtp_config)
 
     def disconnect(self):
         if self._smtp_connection:
             log = "Disconnecting from SMTP server {}"
             logger.info(self, log.format(self._smtp_config.server))
             self._smtp_connection.quit()
+            self._smtp_connection = None
             logger.info(self, "Connection closed.")
 
     def send_mail(self, message: MIMEMultipart):
@@ -127,7 +269,8 @@ class EmailSender(object):
             log = "Not sending email to {} (service disabled)"
             logger.info(self, log.format(message["To"]))
         else:
-            self.connect()  # Actually, this connects to SMTP only if required
+            # INFO - G.M - 2019-11-21 - email is sent through connection of sender
+            # if connect() was called, else through a pooled connection.
             logger.info(self, "Sending email to {}".format(message["To"]))
             # TODO - G.M - 2019-01-29 - optimisize this code, we should not send
             # email if connection has failed.
@@ -135,7 +278,7 @@ class EmailSender(object):
             failed_action = "{:8s}".format("SENDFAIL")
             action = send_action
             try:
-                send_message_result = self._smtp_connection.send_message(message)
+                send_message_result = self._send_message(message)
                 # INFO - G.M - 2019-01-29 - send_message return if not failed,
                 # dict of refused recipients.
 
@@ -176,3 +319,35 @@ class EmailSender(object):
                 email_subject=message["Subject"],
                 config=self.config,
             )
+
+    def _send_message(self, message: MIMEMultipart) -> typing.Dict[str, typing.Any]:
+        if self._smtp_connection:
+            return self._smtp_connection.send_message(message)
+        pool = get_smtp_connection_pool(self.config, self._smtp_config)
+        connection = pool.acquire()
+        try:
+            result = connection.send_message(message)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # INFO - G.M - 2019-11-21 - pooled connection may have been closed by
+            # server since its last use, retry once with a new connection.
+            pool.release(connection, reusable=False)
+            logger.info(self, "SMTP connection lost, reconnecting to SMTP server")
+            connection = open_smtp_connection(self._smtp_config)
+            try:
+                result = connection.send_message(message)
+            except smtplib.SMTPResponseException:
+                pool.release(connection)
+                raise
+            except Exception:
+                pool.release(connection, reusable=False)
+                raise
+        except smtplib.SMTPResponseException:
+            # INFO - G.M - 2019-11-21 - server answered with an error, connection
+            # is still usable.
+            pool.release(connection)
+            raise
+        except Exception:
+            pool.release(connection, reusable=False)
+            raise
+        pool.release(connection)
+        return result
@@ -0,0 +1,110 @@
+import typing
+
+from rq import Queue
+from rq.exceptions import DequeueTimeout
+from rq.job import Job
+
+from tracim_backend.config import CFG
+from tracim_backend.lib.preview.pregeneration import PREVIEW_GENERATOR_QUEUE_NAME
+from tracim_backend.lib.preview.pregeneration import PreviewPregenerator
+from tracim_backend.lib.preview.pregeneration import generate_revisions_previews
+from tracim_backend.lib.utils.daemon import FakeDaemon
+from tracim_backend.lib.utils.logger import logger
+from tracim_backend.lib.utils.utils import get_redis_connection
+from tracim_backend.lib.utils.utils import get_rq_queue
+from tracim_backend.models.setup_models import get_engine
+from tracim_backend.models.setup_models import get_session_factory
+
+# INFO - G.M - 2019-11-25 - max number of queued jobs merged in one preview generation
+MAX_MERGED_JOBS = 100
+# INFO - G.M - 2019-11-25 - time in seconds to wait for a job before checking
+# if daemon stop was requested.
+DEQUEUE_TIMEOUT = 5
+
+
+class PreviewGeneratorDaemon(FakeDaemon):
+    """
+    Build previews of revisions queued in preview generator queue. All jobs available
+    at the same time are merged and their previews built in the process pool of
+    the daemon.
+    """
+
+    # NOTE: use *args and **kwargs because parent __init__ use strange
+    # * parameter
+    def __init__(self, config: "CFG", burst=True, *args, **kwargs):
+        """
+        :param config: tracim config
+        :param burst: if true, run one time, if false, run continously
+        """
+        super().__init__(*args, **kwargs)
+        self.config = config
+        self.burst = burst
+        self._stop_requested = False
+
+    def append_thread_callback(self, callback: typing.Callable) -> None:
+        logger.warning("PreviewGeneratorDaemon not implement append_thread_callback")
+        pass
+
+    def stop(self) -> None:
+        self._stop_requested = True
+
+    def run(self) -> None:
+        queue = get_rq_queue(get_redis_connection(self.config), PREVIEW_GENERATOR_QUEUE_NAME)
+        engine = get_engine(self.config)
+        session_factory = get_session_factory(engine)
+        try:
+            with PreviewPregenerator(self.config) as pregenerator:
+                while not self._stop_requested:
+                    jobs = self._dequeue_jobs(queue)
+                    if not jobs:
+                        if self.burst:
+                            break
+                        continue
+                    revision_ids = set()  # type: typing.Set[int]
+                    for job in jobs:
+                        revision_ids.update(job.kwargs["revision_ids"])
+                    try:
+                        results = generate_revisions_previews(
+                            self.config, revision_ids, session_factory, pregenerator
+                        )
+                        logger.info(
+                            self,
+                            "{} preview(s) built for {} revision(s) from {} job(s)".format(
+                                sum(result.nb_previews for result in results),
+                                len(revision_ids),
+                                len(jobs),
+                            ),
+                        )
+                    except Exception:
+                        # INFO - G.M - 2019-11-25 - do not retry, previews will be
+                        # built when viewed.
+                        logger.exception(
+                            self,
+                            "Something goes wrong during previews generation of {}".format(
+                                revision_ids
+                            ),
+                        )
+                    finally:
+                        for job in jobs:
+                            job.delete()
+        finally:
+            engine.dispose()
+
+    def _dequeue_jobs(self, queue: Queue) -> typing.List[Job]:
+        """
+        Wait for a job then get all other jobs already queued, up to MAX_MERGED_JOBS.
+        """
+        timeout = None if self.burst else DEQUEUE_TIMEOUT
+        try:
+            result = Queue.dequeue_any([queue], timeout, connection=queue.connection)
+        except DequeueTimeout:
+            return []
+        if not result:
+            return []
+        jobs = [result[0]]
+        while len(jobs) < MAX_MERGED_JOBS:
+            job = queue.dequeue()
+            if not job:
+                break
+            jobs.append(job)
+        return jobs
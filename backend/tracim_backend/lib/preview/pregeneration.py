@@ -0,0 +1,277 @@
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+import typing
+
+from depot.manager import DepotManager
+from preview_generator.exception import UnsupportedMimeType
+from preview_generator.manager import PreviewManager
+from sqlalchemy.event import listen
+from sqlalchemy.orm import Session
+from sqlalchemy.orm import sessionmaker
+import transaction
+
+from tracim_backend.config import CFG
+from tracim_backend.lib.utils.logger import logger
+from tracim_backend.lib.utils.utils import get_redis_connection
+from tracim_backend.lib.utils.utils import get_rq_queue
+from tracim_backend.models.data import ContentRevisionRO
+
+PREVIEW_GENERATOR_QUEUE_NAME = "preview_generator"
+PENDING_REVISIONS_SESSION_KEY = "preview_generator_pending_revisions"
+LISTENED_SESSION_KEY = "preview_generator_listened"
+
+# INFO - G.M - 2019-11-25 - preview manager of preview generation processes,
+# created once by process.
+_preview_manager = None  # type: typing.Optional[PreviewManager]
+
+
+RevisionFile = typing.NamedTuple(
+    "RevisionFile",
+    [("revision_id", int), ("file_path", str), ("file_extension", str), ("mimetype", str)],
+)
+# INFO - G.M - 2019-11-25 - error is None when all previews were built.
+RevisionPreviewsResult = typing.NamedTuple(
+    "RevisionPreviewsResult",
+    [("revision_id", int), ("nb_previews", int), ("error", typing.Optional[str])],
+)
+
+
+def _build_revision_previews(
+    preview_cache_dir: str,
+    revision_file: RevisionFile,
+    jpg_dims: typing.List[typing.Tuple[int, int]],
+    max_pages: int,
+) -> RevisionPreviewsResult:
+    """
+    Build pdf preview and jpg previews of first pages of a revision file, with same
+    parameters as previews endpoints so that they are served from preview cache.
+    Run in a process of preview generation pool.
+    """
+    global _preview_manager
+    if not _preview_manager:
+        _preview_manager = PreviewManager(preview_cache_dir, create_folder=True)
+    file_path = revision_file.file_path
+    file_ext = revision_file.file_extension
+    nb_previews = 0
+    try:
+        if _preview_manager.has_pdf_preview(file_path, file_ext=file_ext):
+            _preview_manager.get_pdf_preview(file_path, file_ext=file_ext)
+            nb_previews += 1
+        if _preview_manager.has_jpeg_preview(file_path, file_ext=file_ext):
+            nb_pages = _preview_manager.get_page_nb(file_path, file_ext=file_ext)
+            for page in range(min(nb_pages, max_pages)):
+                for width, height in jpg_dims:
+                    _preview_manager.get_jpeg_preview(
+                        file_path, page=page, width=width, height=height, file_ext=file_ext
+                    )
+                    nb_previews += 1
+    except UnsupportedMimeType:
+        pass
+    except Exception as exc:
+        return RevisionPreviewsResult(revision_file.revision_id, nb_previews, str(exc))
+    return RevisionPreviewsResult(revision_file.revision_id, nb_previews, None)
+
+
+class PreviewPregenerator(object):
+    """
+    Build previews of revisions files in a bounded process pool, so that first view
+    of a file does not wait for its previews.
+    Number of previews built at the same time for a mimetype prefix can be limited,
+    libreoffice conversions of office documents being slow and memory hungry.
+    """
+
+    def __init__(self, config: CFG, nb_workers: typing.Optional[int] = None) -> None:
+        """
+        :param config: tracim config
+        :param nb_workers: number of processes building previews,
+        PREVIEW__PREGENERATION__WORKERS if not given.
+        """
+        self._config = config
+        self.nb_workers = nb_workers or config.PREVIEW__PREGENERATION__WORKERS
+        self._jpg_dims = [(dim.width, dim.height) for dim in config.PREVIEW__JPG__ALLOWED_DIMS]
+        self._executor = None  # type: typing.Optional[ProcessPoolExecutor]
+
+    def __enter__(self) -> "PreviewPregenerator":
+        return self
+
+    def __exit__(self, *args: typing.Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._executor:
+            self._executor.shutdown()
+            self._executor = None
+
+    def get_revision_files(
+        self, session: Session, revision_ids: typing.Iterable[int]
+    ) -> typing.List[RevisionFile]:
+        revisions = (
+            session.query(ContentRevisionRO)
+            .filter(ContentRevisionRO.revision_id.in_(list(revision_ids)))
+            .order_by(ContentRevisionRO.revision_id)
+        )
+        depot = DepotManager.get()
+        revision_files = []
+        for revision in revisions:
+            if not revision.depot_file:
+                continue
+            try:
+                file_path = depot.get(revision.depot_file)._file_path
+            except IOError:
+                logger.warning(
+                    self, "File of revision {} not found in depot".format(revision.revision_id)
+                )
+                continue
+            revision_files.append(
+                RevisionFile(
+                    revision_id=revision.revision_id,
+                    file_path=file_path,
+                    file_extension=revision.file_extension,
+                    mimetype=revision.file_mimetype or "",
+                )
+            )
+        return revision_files
+
+    def build_previews(
+        self,
+        revision_files: typing.Iterable[RevisionFile],
+        result_callback: typing.Optional[typing.Callable[[RevisionPreviewsResult], None]] = None,
+    ) -> typing.List[RevisionPreviewsResult]:
+        """
+        Build previews of given revision files, running at most nb_workers builds
+        and mimetype concurrency limit builds by mimetype prefix at the same time.
+        """
+        if not self._executor:
+            self._executor = ProcessPoolExecutor(max_workers=self.nb_workers)
+        pending_files = list(revision_files)
+        running = {}  # type: typing.Dict[Future, typing.Optional[str]]
+        running_by_mimetype_prefix = Counter()  # type: typing.Counter[typing.Optional[str]]
+        results = []  # type: typing.List[RevisionPreviewsResult]
+        while pending_files or running:
+            waiting_files = []
+            for revision_file in pending_files:
+                mimetype_prefix = self._get_limited_mimetype_prefix(revision_file.mimetype)
+                if len(running) >= self.nb_workers or (
+                    mimetype_prefix
+                    and running_by_mimetype_prefix[mimetype_prefix]
+                    >= self._get_mimetype_concurrency(mimetype_prefix)
+                ):
+                    waiting_files.append(revision_file)
+                    continue
+                future = self._executor.submit(
+                    _build_revision_previews,
+                    self._config.PREVIEW_CACHE_DIR,
+                    revision_file,
+                    self._jpg_dims,
+                    self._config.PREVIEW__PREGENERATION__MAX_PAGES,
+                )
+                running[future] = mimetype_prefix
+                running_by_mimetype_prefix[mimetype_prefix] += 1
+            pending_files = waiting_files
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                running_by_mimetype_prefix[running.pop(future)] -= 1
+                result = future.result()
+                if result.error:
+                    logger.warning(
+                        self,
+                        "Unable to build previews of revision {}: {}".format(
+                            result.revision_id, result.error
+                        ),
+                    )
+                results.append(result)
+                if result_callback:
+                    result_callback(result)
+        return results
+
+    def _get_mimetype_concurrency(self, mimetype_prefix: str) -> int:
+        # INFO - G.M - 2019-11-25 - at least one build by mimetype, to always progress
+        return max(1, self._config.PREVIEW__PREGENERATION__MIMETYPE_CONCURRENCY[mimetype_prefix])
+
+    def _get_limited_mimetype_prefix(self, mimetype: str) -> typing.Optional[str]:
+        for mimetype_prefix in self._config.PREVIEW__PREGENERATION__MIMETYPE_CONCURRENCY:
+            if mimetype.startswith(mimetype_prefix):
+                return mimetype_prefix
+        return None
+
+
+def generate_revisions_previews(
+    config: CFG,
+    revision_ids: typing.Iterable[int],
+    session_factory: sessionmaker = None,
+    pregenerator: typing.Optional[PreviewPregenerator] = None,
+) -> typing.List[RevisionPreviewsResult]:
+    """
+    Build previews of given revisions using their own database session.
+    This is the function run by jobs of preview generator queue.
+    :param config: tracim config
+    :param revision_ids: ids of revisions
+    :param session_factory: session factory to use, a new one is created if not given.
+    :param pregenerator: pregenerator to use, a new one is created if not given.
+    """
+    # TODO - G.M - 2019-11-25 - fix circular import
+    from tracim_backend.models.setup_models import get_engine
+    from tracim_backend.models.setup_models import get_session_factory
+    from tracim_backend.models.setup_models import get_tm_session
+
+    engine = None
+    if not session_factory:
+        engine = get_engine(config)
+        session_factory = get_session_factory(engine)
+    transaction_manager = transaction.TransactionManager()
+    try:
+        with transaction_manager:
+            session = get_tm_session(session_factory, transaction_manager)
+            revision_files = PreviewPregenerator(config).get_revision_files(session, revision_ids)
+        if pregenerator:
+            return pregenerator.build_previews(revision_files)
+        with PreviewPregenerator(config) as new_pregenerator:
+            return new_pregenerator.build_previews(revision_files)
+    finally:
+        if engine:
+            engine.dispose()
+
+
+def queue_revision_previews_generation(
+    session: Session, config: CFG, revision: ContentRevisionRO
+) -> None:
+    """
+    Queue preview generation of a revision for the preview generator daemon.
+    Jobs are queued once session is committed, so that the daemon reads stored file,
+    and all revisions of a transaction are queued in a single job.
+    """
+    if not session.info.get(LISTENED_SESSION_KEY):
+
+        def enqueue_pending_revisions(session: Session) -> None:
+            pending_revisions = session.info.pop(PENDING_REVISIONS_SESSION_KEY, None)
+            if not pending_revisions:
+                return
+            revision_ids = sorted(
+                {revision.revision_id for revision in pending_revisions if revision.revision_id}
+            )
+            try:
+                redis_connection = get_redis_connection(config)
+                queue = get_rq_queue(redis_connection, PREVIEW_GENERATOR_QUEUE_NAME)
+                queue.enqueue(generate_revisions_previews, config=config, revision_ids=revision_ids)
+            except Exception:
+                # INFO - G.M - 2019-11-25 - data are already committed at this step,
+                # previews will be built when viewed.
+                logger.exception(
+                    queue_revision_previews_generation,
+                    "Something goes wrong during queuing of previews of revisions {}".format(
+                        revision_ids
+                    ),
+                )
+
+        def discard_pending_revisions(session: Session) -> None:
+            session.info.pop(PENDING_REVISIONS_SESSION_KEY, None)
+
+        listen(session, "after_commit", enqueue_pending_revisions)
+        listen(session, "after_rollback", discard_pending_revisions)
+        session.info[LISTENED_SESSION_KEY] = True
+    # INFO - G.M - 2019-11-25 - revision id is not known until flush, keep revision
+    # itself until commit.
+    session.info.setdefault(PENDING_REVISIONS_SESSION_KEY, []).append(revision)
@@ -1,13 +1,18 @@
 # coding: utf-8
-import copy
+from http import HTTPStatus
+from http.cookiejar import DefaultCookiePolicy
+import threading
+import time
 import typing
 from urllib.parse import urljoin
 
 from pyramid.response import Response as PyramidResponse
 import requests
 from requests import Response as RequestsResponse
+from requests.adapters import HTTPAdapter
 from requests.auth import AuthBase
 
+from tracim_backend.lib.utils.logger import logger
 from tracim_backend.lib.utils.request import TracimRequest
 
 # INFO - G.M - 2019-04-11 -  Hop-by-hop HTTP headers "are meaningful
@@ -36,6 +41,60 @@ DEFAULT_RESPONSE_HEADER_TO_DROP = HOP_BY_HOP_HEADER_HTTP + (
     "content-encoding",
 )
 DEFAULT_REQUEST_HEADER_TO_DROP = HOP_BY_HOP_HEADER_HTTP + ("authorization",)
+DEFAULT_POOL_SIZE = 10
+# INFO - G.M - 2019-12-02 - (connect timeout, read timeout) in seconds
+DEFAULT_TIMEOUT = (5.0, 60.0)
+RESPONSE_BODY_CHUNK_SIZE = 64 * 1024
+SERVER_TIMING_METRIC_NAME = "proxy"
+
+
+class ProxyLatencyStats(object):
+    """
+    Latency of behind server, from sending of request to reception of response
+    headers, in seconds. Shared by all threads using the proxy.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.nb_requests = 0
+        self.nb_errors = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def add_latency(self, latency: float) -> None:
+        with self._lock:
+            self.nb_requests += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+    def add_error(self) -> None:
+        with self._lock:
+            self.nb_errors += 1
+
+    @property
+    def mean_latency(self) -> float:
+        with self._lock:
+            return self.total_latency / self.nb_requests if self.nb_requests else 0.0
+
+
+class BehindResponseBody(object):
+    """
+    WSGI app_iter streaming body of behind server response chunk after chunk.
+    Connection to behind server is released to the pool once body is read or
+    app_iter closed by WSGI server.
+    """
+
+    def __init__(
+        self, behind_response: RequestsResponse, chunk_size: int = RESPONSE_BODY_CHUNK_SIZE
+    ) -> None:
+        self._behind_response = behind_response
+        self._chunk_size = chunk_size
+
+    def __iter__(self) -> typing.Iterator[bytes]:
+        return self._behind_response.iter_content(chunk_size=self._chunk_size)
+
+    def close(self) -> None:
+        self._behind_response.close()
 
 
 class Proxy(object):
@@ -45,14 +104,30 @@ class Proxy(object):
         default_request_headers_to_drop: typing.List[str] = DEFAULT_REQUEST_HEADER_TO_DROP,
         default_response_headers_to_drop: typing.List[str] = DEFAULT_RESPONSE_HEADER_TO_DROP,
         auth: typing.Union[typing.Optional[typing.Tuple[str, str]], AuthBase] = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        timeout: typing.Tuple[float, float] = DEFAULT_TIMEOUT,
     ) -> None:
         """
         :param auth: should be a username,password tuple or AuthBase requests lib object
+        :param pool_size: max number of kept-alive connections to behind server
+        :param timeout: (connect timeout, read timeout) of requests to behind server
         """
         self._base_address = base_address
         self.default_request_headers_to_drop = default_request_headers_to_drop
         self.default_response_headers_to_drop = default_response_headers_to_drop
         self.auth = auth
+        self.timeout = timeout
+        self.latency_stats = ProxyLatencyStats()
+        self._session = requests.Session()
+        # INFO - G.M - 2019-12-02 - session is shared by all users of the proxy,
+        # cookies of behind server must not be kept between requests.
+        self._session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def close(self) -> None:
+        self._session.close()
 
     def _get_behind_response(
         self,
@@ -63,29 +138,32 @@ class Proxy(object):
         auth: typing.Union[typing.Optional[typing.Tuple[str, str]], AuthBase],
     ) -> RequestsResponse:
         """
+        Send request to behind server through pooled session, only response headers
+        are read: body should be read with iter_content or response closed.
         :param auth: should be a username,password tuple or AuthBase requests lib object
         """
-        return requests.request(
+        return self._session.request(
             method=method,
             # FIXME BS 2018-11-29: Exclude some headers (like basic auth)
             headers=headers,
             data=data,
             url=url,
             auth=auth,
+            timeout=self.timeout,
+            stream=True,
         )
 
-    def _generate_proxy_response(self, status, headers: dict, body):
-        return PyramidResponse(status=status, headers=headers, body=body)
+    def _generate_proxy_response(self, status, headers: dict, app_iter: typing.Iterable[bytes]):
+        return PyramidResponse(status=status, headers=headers, app_iter=app_iter)
 
     def _add_extra_headers(self, headers: dict, extra_headers: dict):
-        extra_headers = copy.deepcopy(extra_headers)
-        new_headers = copy.deepcopy(headers)
+        new_headers = dict(headers)
         new_headers.update(extra_headers)
         return new_headers
 
     def _drop_request_headers(self, headers: dict) -> dict:
         new_headers = {}
-        for header_name, header_value in dict(headers).items():
+        for header_name, header_value in headers.items():
             if header_name.lower() in self.default_request_headers_to_drop:
                 continue
             new_headers[header_name] = header_value
@@ -93,7 +171,7 @@ class Proxy(object):
 
     def _drop_response_headers(self, headers: dict) -> dict:
         new_headers = {}
-        for header_name, header_value in dict(headers).items():
+        for header_name, header_value in headers.items():
             if header_name.lower() in self.default_response_headers_to_drop:
                 continue
             new_headers[header_name] = header_value
@@ -107,29 +185,47 @@ class Proxy(object):
         extra_response_headers: typing.Optional[dict] = None,
     ) -> PyramidResponse:
         # INFO - G.M - 2019-03-08 - Prepare behind request
-        request_headers = dict(request.headers)
-        extra_request_headers = extra_request_headers or {}
-        request_headers = self._drop_request_headers(request_headers)
+        request_headers = self._drop_request_headers(request.headers)
         if extra_request_headers:
             request_headers = self._add_extra_headers(request_headers, extra_request_headers)
         behind_url = urljoin(self._base_address, path)
 
-        behind_response = self._get_behind_response(
-            method=request.method,
-            headers=request_headers,
-            data=request.body,
-            url=behind_url,
-            auth=self.auth,
+        start_time = time.monotonic()
+        try:
+            behind_response = self._get_behind_response(
+                method=request.method,
+                headers=request_headers,
+                data=request.body,
+                url=behind_url,
+                auth=self.auth,
+            )
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as exc:
+            self.latency_stats.add_error()
+            logger.error(self, "Proxied request to {} failed: {}".format(behind_url, str(exc)))
+            if isinstance(exc, requests.exceptions.Timeout):
+                status = HTTPStatus.GATEWAY_TIMEOUT
+            else:
+                status = HTTPStatus.BAD_GATEWAY
+            return PyramidResponse(status=int(status))
+        latency = time.monotonic() - start_time
+        self.latency_stats.add_latency(latency)
+        logger.debug(
+            self,
+            "Proxied {} request to {}: {} in {:.1f}ms".format(
+                request.method, behind_url, behind_response.status_code, latency * 1000
+            ),
         )
 
         # INFO - G.M - 2019-03-08 - Prepare proxy response
-        response_headers = dict(behind_response.headers)
-        response_headers = self._drop_response_headers(response_headers)
+        response_headers = self._drop_response_headers(behind_response.headers)
+        response_headers["Server-Timing"] = "{};dur={:.1f}".format(
+            SERVER_TIMING_METRIC_NAME, latency * 1000
+        )
         if extra_response_headers:
-            response_headers = self._add_extra_headers(request_headers, extra_response_headers)
+            response_headers = self._add_extra_headers(response_headers, extra_response_headers)
 
         return self._generate_proxy_response(
             status=behind_response.status_code,
             headers=response_headers,
-            body=behind_response.content,
+            app_iter=BehindResponseBody(behind_response),
         )
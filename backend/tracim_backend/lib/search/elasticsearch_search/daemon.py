@@ -0,0 +1,125 @@
+import time
+import traceback
+import typing
+
+from rq import Queue
+from rq import get_failed_queue
+from rq.exceptions import DequeueTimeout
+from rq.job import Job
+from rq.job import JobStatus
+
+from tracim_backend.config import CFG
+from tracim_backend.lib.search.elasticsearch_search.indexer import SEARCH_INDEXER_QUEUE_NAME
+from tracim_backend.lib.search.elasticsearch_search.indexer import index_contents
+from tracim_backend.lib.utils.daemon import FakeDaemon
+from tracim_backend.lib.utils.logger import logger
+from tracim_backend.lib.utils.utils import get_redis_connection
+from tracim_backend.lib.utils.utils import get_rq_queue
+from tracim_backend.models.setup_models import get_engine
+from tracim_backend.models.setup_models import get_session_factory
+
+# INFO - G.M - 2019-11-14 - max number of queued jobs merged in one indexing
+MAX_MERGED_JOBS = 500
+# INFO - G.M - 2019-11-14 - time in seconds to wait for a job before checking
+# if daemon stop was requested.
+DEQUEUE_TIMEOUT = 5
+RETRY_DELAY = 10
+
+
+class SearchIndexerDaemon(FakeDaemon):
+    """
+    Index contents queued in search indexer queue. All jobs available at
+    the same time are merged so that each content is indexed only once, using
+    elasticsearch bulk api.
+    """
+
+    # NOTE: use *args and **kwargs because parent __init__ use strange
+    # * parameter
+    def __init__(self, config: "CFG", burst=True, *args, **kwargs):
+        """
+        :param config: tracim config
+        :param burst: if true, run one time, if false, run continously
+        """
+        super().__init__(*args, **kwargs)
+        self.config = config
+        self.burst = burst
+        self._stop_requested = False
+
+    def append_thread_callback(self, callback: typing.Callable) -> None:
+        logger.warning("SearchIndexerDaemon not implement append_thread_callback")
+        pass
+
+    def stop(self) -> None:
+        self._stop_requested = True
+
+    def run(self) -> None:
+        queue = get_rq_queue(get_redis_connection(self.config), SEARCH_INDEXER_QUEUE_NAME)
+        engine = get_engine(self.config)
+        session_factory = get_session_factory(engine)
+        try:
+            while not self._stop_requested:
+                jobs = self._dequeue_jobs(queue)
+                if not jobs:
+                    if self.burst:
+                        break
+                    continue
+                content_ids = set()  # type: typing.Set[int]
+                for job in jobs:
+                    content_ids.update(job.kwargs["content_ids"])
+                try:
+                    result = index_contents(self.config, content_ids, session_factory)
+                except Exception:
+                    logger.exception(
+                        self, "Something goes wrong during indexing of {}".format(content_ids)
+                    )
+                    if self.burst:
+                        # INFO - G.M - 2019-11-18 - keep jobs in rq failed queue, they
+                        # can be requeued with "rq requeue" once the issue is fixed.
+                        self._set_jobs_failed(jobs, traceback.format_exc())
+                        continue
+                    # INFO - G.M - 2019-11-14 - elasticsearch may be unavailable,
+                    # queue merged contents again to retry later.
+                    queue.enqueue(index_contents, config=self.config, content_ids=list(content_ids))
+                    self._delete_jobs(jobs)
+                    time.sleep(RETRY_DELAY)
+                    continue
+                logger.info(
+                    self,
+                    "{} content(s) indexed from {} job(s), {} error(s)".format(
+                        result.get_nb_content_correctly_indexed(),
+                        len(jobs),
+                        result.get_nb_index_errors(),
+                    ),
+                )
+                self._delete_jobs(jobs)
+        finally:
+            engine.dispose()
+
+    def _delete_jobs(self, jobs: typing.List[Job]) -> None:
+        for job in jobs:
+            job.delete()
+
+    def _set_jobs_failed(self, jobs: typing.List[Job], exc_info: str) -> None:
+        for job in jobs:
+            failed_queue = get_failed_queue(connection=job.connection, job_class=job.__class__)
+            job.set_status(JobStatus.FAILED)
+            failed_queue.quarantine(job, exc_info)
+
+    def _dequeue_jobs(self, queue: Queue) -> typing.List[Job]:
+        """
+        Wait for a job then get all other jobs already queued, up to MAX_MERGED_JOBS.
+        """
+        timeout = None if self.burst else DEQUEUE_TIMEOUT
+        try:
+            result = Queue.dequeue_any([queue], timeout, connection=queue.connection)
+        except DequeueTimeout:
+            return []
+        if not result:
+            return []
+        jobs = [result[0]]
+        while len(jobs) < MAX_MERGED_JOBS:
+            job = queue.dequeue()
+            if not job:
+                break
+            jobs.append(job)
+        return jobs
@@ -0,0 +1,2 @@
+ELASTICSEARCH_TEXT_EXTRACTION_MODE = "elasticsearch"
+LOCAL_TEXT_EXTRACTION_MODE = "local"
@@ -1,24 +1,40 @@
 from datetime import datetime
+import itertools
+import multiprocessing
 import typing
 
+from depot.manager import DepotManager
 from elasticsearch import Elasticsearch
 from elasticsearch.client import IngestClient
+from elasticsearch.helpers import bulk
 from elasticsearch_dsl import Index
 from elasticsearch_dsl import Search
 from sqlalchemy.orm import Session
 
 from tracim_backend import CFG
 from tracim_backend.app_models.contents import content_type_list
+from tracim_backend.lib.core.content import ContentApi
+from tracim_backend.lib.search.elasticsearch_search.data import LOCAL_TEXT_EXTRACTION_MODE
 from tracim_backend.lib.search.elasticsearch_search.models import ESContentSearchResponse
+from tracim_backend.lib.search.elasticsearch_search.text_extraction import FileTextExtractor
+from tracim_backend.lib.search.elasticsearch_search.text_extraction import FileToExtract
 from tracim_backend.lib.search.models import ContentSearchResponse
 from tracim_backend.lib.search.models import EmptyContentSearchResponse
+from tracim_backend.lib.search.search import IndexedContentsResults
 from tracim_backend.lib.search.search import SearchApi
 from tracim_backend.lib.search.search_factory import ELASTICSEARCH__SEARCH_ENGINE_SLUG
 from tracim_backend.lib.utils.logger import logger
 from tracim_backend.models.auth import User
 from tracim_backend.models.context_models import ContentInContext
+from tracim_backend.models.data import Content
+from tracim_backend.models.data import ContentRevisionRO
 from tracim_backend.models.data import UserRoleInWorkspace
 
+if typing.TYPE_CHECKING:
+    from tracim_backend.lib.search.elasticsearch_search.es_models import IndexedContent
+
+INDEX_BATCH_SIZE = 500
+
 
 class ESSearchApi(SearchApi):
     """
@@ -50,6 +66,9 @@ class ESSearchApi(SearchApi):
         )
         self.index_document_pattern_template = config.SEARCH__ELASTICSEARCH__INDEX_PATTERN_TEMPLATE
         self.index_document_alias = config.SEARCH__ELASTICSEARCH__INDEX_ALIAS
+        self._text_extractor = None  # type: typing.Optional[FileTextExtractor]
+        if self._use_local_text_extraction():
+            self._text_extractor = FileTextExtractor(config)
 
     def create_index(self) -> None:
         """
@@ -64,7 +83,7 @@ class ESSearchApi(SearchApi):
         # from https://github.com/elastic/elasticsearch-dsl-py/blob/master/examples/alias_migration.py
         # Configure index with our indexing preferences
         logger.info(self, "Create index settings ...")
-        if self._config.SEARCH__ELASTICSEARCH__USE_INGEST:
+        if self._config.SEARCH__ELASTICSEARCH__USE_INGEST and not self._use_local_text_extraction():
             self._create_ingest_pipeline()
         # create an index template
         index_template = IndexedContent._index.as_template(
@@ -160,6 +179,195 @@ class ESSearchApi(SearchApi):
         """
         Index/update a content into elastic_search engine
         """
+        indexed_content = self._get_indexed_content(content)
+        if "b64_file" in indexed_content:
+            indexed_content.save(
+                using=self.es,
+                pipeline="attachment",
+                index=self.index_document_alias,
+                request_timeout=self._config.SEARCH__ELASTICSEARCH__REQUEST_TIMEOUT,
+            )
+            return
+        indexed_content.save(
+            using=self.es,
+            index=self.index_document_alias,
+            request_timeout=self._config.SEARCH__ELASTICSEARCH__REQUEST_TIMEOUT,
+        )
+
+    def index_contents(self, content_ids: typing.Iterable[int]) -> IndexedContentsResults:
+        """
+        Index/update many contents at once using elasticsearch bulk api.
+        Each content is indexed only once, comments are indexed through their parent.
+        """
+        content_ids = list(set(content_ids))
+        actions, errored_indexed_content_ids = self._get_index_actions(content_ids)
+        errored_indexed_content_ids.extend(self._bulk_index(actions))
+        return IndexedContentsResults(content_ids, errored_indexed_content_ids)
+
+    def index_all_content(
+        self,
+        batch_size: int = INDEX_BATCH_SIZE,
+        nb_processes: int = 1,
+        after_content_id: int = 0,
+        batch_indexed_callback: typing.Optional[
+            typing.Callable[[typing.List[int], IndexedContentsResults], None]
+        ] = None,
+    ) -> IndexedContentsResults:
+        """
+        Index/update all content in current index of ElasticSearch, by batch of
+        contents ordered by content_id, without loading all contents in memory.
+        :param batch_size: number of contents indexed in one elasticsearch bulk request
+        :param nb_processes: number of processes preparing documents to index,
+        documents are prepared in current process if 1.
+        :param after_content_id: only index contents with greater content_id, allow
+        to resume an interrupted indexing.
+        :param batch_indexed_callback: called with content ids of batch and indexing result of
+        batch each time a batch is indexed.
+        """
+        content_ids_to_index = []  # type: typing.List[int]
+        errored_indexed_content_ids = []  # type: typing.List[int]
+        content_ids_batches = self._get_all_content_ids_batches(batch_size, after_content_id)
+        pool = None
+        if nb_processes > 1:
+            pool = multiprocessing.Pool(
+                nb_processes, initializer=_init_indexing_process, initargs=(self._config,)
+            )
+        try:
+            while True:
+                # INFO - G.M - 2019-11-15 - prepare only one batch per process at a time
+                # to not keep too many documents in memory
+                batches = list(itertools.islice(content_ids_batches, nb_processes))
+                if not batches:
+                    break
+                if pool:
+                    batches_actions = pool.map(_get_index_actions_in_indexing_process, batches)
+                else:
+                    batches_actions = [self._get_index_actions(batch) for batch in batches]
+                    self._session.expunge_all()
+                for batch, (actions, batch_errored_ids) in zip(batches, batches_actions):
+                    batch_errored_ids.extend(self._bulk_index(actions))
+                    content_ids_to_index.extend(batch)
+                    errored_indexed_content_ids.extend(batch_errored_ids)
+                    if batch_indexed_callback:
+                        batch_indexed_callback(
+                            batch, IndexedContentsResults(batch, batch_errored_ids)
+                        )
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+        return IndexedContentsResults(content_ids_to_index, errored_indexed_content_ids)
+
+    def _get_all_content_ids_batches(
+        self, batch_size: int, after_content_id: int = 0
+    ) -> typing.Iterator[typing.List[int]]:
+        """
+        Get ids of all contents to index by batch, ordered by content_id.
+        Comments are not returned as they are indexed through their parent.
+        """
+        last_content_id = after_content_id
+        while True:
+            content_ids = [
+                content_id
+                for (content_id,) in self._session.query(Content.id)
+                .join(
+                    ContentRevisionRO, Content.cached_revision_id == ContentRevisionRO.revision_id
+                )
+                .filter(ContentRevisionRO.type != content_type_list.Comment.slug)
+                .filter(Content.id > last_content_id)
+                .order_by(Content.id)
+                .limit(batch_size)
+            ]
+            if not content_ids:
+                return
+            yield content_ids
+            last_content_id = content_ids[-1]
+
+    def _get_index_actions(
+        self, content_ids: typing.List[int]
+    ) -> typing.Tuple[typing.List[typing.Dict[str, typing.Any]], typing.List[int]]:
+        """
+        Prepare elasticsearch bulk actions to index given contents.
+        :return: actions and ids of contents which cannot be prepared.
+        """
+        content_api = ContentApi(
+            session=self._session,
+            config=self._config,
+            current_user=None,
+            show_archived=True,
+            show_active=True,
+            show_deleted=True,
+        )
+        contents = content_api.get_contents_in_context(content_api.get_all(content_ids=content_ids))
+        file_texts = None
+        if self._text_extractor:
+            # INFO - G.M - 2019-11-15 - extract text of all files of batch in parallel
+            files_to_extract = []
+            for content in contents:
+                if content.content_type == content_type_list.Comment.slug:
+                    content = content.parent
+                if self._can_index_content(content):
+                    files_to_extract.append(self._get_file_to_extract(content))
+            file_texts = self._text_extractor.extract_texts(files_to_extract)
+        indexed_contents = {}  # type: typing.Dict[int, IndexedContent]
+        errored_indexed_content_ids = []  # type: typing.List[int]
+        for content in contents:
+            try:
+                indexed_content = self._get_indexed_content(content, file_texts)
+                indexed_content.full_clean()
+            except Exception as exc:
+                logger.error(
+                    self,
+                    "something goes wrong during indexing of content {}".format(content.content_id),
+                )
+                logger.exception(self, exc)
+                errored_indexed_content_ids.append(content.content_id)
+                continue
+            indexed_contents[indexed_content.meta.id] = indexed_content
+
+        actions = []
+        for indexed_content in indexed_contents.values():
+            action = indexed_content.to_dict(include_meta=True)
+            action["_index"] = self.index_document_alias
+            if "b64_file" in action["_source"]:
+                action["pipeline"] = "attachment"
+            actions.append(action)
+        return actions, errored_indexed_content_ids
+
+    def _bulk_index(self, actions: typing.List[typing.Dict[str, typing.Any]]) -> typing.List[int]:
+        """
+        Send actions to elasticsearch using bulk api.
+        :return: ids of contents which were not indexed.
+        """
+        errored_indexed_content_ids = []  # type: typing.List[int]
+        _, errors = bulk(
+            self.es,
+            actions,
+            raise_on_error=False,
+            request_timeout=self._config.SEARCH__ELASTICSEARCH__REQUEST_TIMEOUT,
+        )
+        for error in errors:
+            _, error_info = error.popitem()
+            logger.error(
+                self,
+                "something goes wrong during indexing of content {}: {}".format(
+                    error_info.get("_id"), error_info.get("error")
+                ),
+            )
+            errored_indexed_content_ids.append(int(error_info["_id"]))
+        return errored_indexed_content_ids
+
+    def _get_indexed_content(
+        self,
+        content: ContentInContext,
+        file_texts: typing.Optional[typing.Dict[int, typing.Optional[str]]] = None,
+    ) -> "IndexedContent":
+        """
+        Create elasticsearch document of a content, comments are indexed as part of
+        their parent document.
+        :param file_texts: already extracted file texts by revision_id, used
+        with local text extraction.
+        """
         # FIXME BS 2019-06-10: Load ES model only when ES search (see #1892)
         from tracim_backend.lib.search.elasticsearch_search.es_models import DigestComments
         from tracim_backend.lib.search.elasticsearch_search.es_models import DigestContent
@@ -238,27 +446,47 @@ class ESSearchApi(SearchApi):
             current_revision_id=content.current_revision_id,
         )
         indexed_content.meta.id = content.content_id
-        if self._can_index_content(content):
+        if self._can_index_content(content) and self._text_extractor:
+            if file_texts is not None and content.current_revision_id in file_texts:
+                file_text = file_texts[content.current_revision_id]
+            else:
+                file_text = self._text_extractor.extract_text(self._get_file_to_extract(content))
+            if file_text:
+                # INFO - G.M - 2019-11-15 - use same field as ingest attachment pipeline
+                # so that search is the same whatever the text extraction mode.
+                indexed_content.file_data = {"content": file_text}
+            else:
+                logger.debug(
+                    self,
+                    'Skip binary content file of content "{}": no text extracted'.format(
+                        content.content_id
+                    ),
+                )
+        elif self._can_index_content(content):
             file_ = content.get_b64_file()
             if file_:
                 indexed_content.b64_file = file_
-                indexed_content.save(
-                    using=self.es,
-                    pipeline="attachment",
-                    index=self.index_document_alias,
-                    request_timeout=self._config.SEARCH__ELASTICSEARCH__REQUEST_TIMEOUT,
+            else:
+                logger.debug(
+                    self,
+                    'Skip binary content file of content "{}": no binary content'.format(
+                        content.content_id
+                    ),
                 )
-                return
-            logger.debug(
-                self,
-                'Skip binary content file of content "{}": no binary content'.format(
-                    content.content_id
-                ),
-            )
-        indexed_content.save(
-            using=self.es,
-            index=self.index_document_alias,
-            request_timeout=self._config.SEARCH__ELASTICSEARCH__REQUEST_TIMEOUT,
+        return indexed_content
+
+    def _use_local_text_extraction(self) -> bool:
+        return (
+            self._config.SEARCH__ELASTICSEARCH__USE_INGEST
+            and self._config.SEARCH__ELASTICSEARCH__INGEST__TEXT_EXTRACTION_MODE
+            == LOCAL_TEXT_EXTRACTION_MODE
+        )
+
+    def _get_file_to_extract(self, content: ContentInContext) -> FileToExtract:
+        return FileToExtract(
+            revision_id=content.current_revision_id,
+            depot_file=content.content.depot_file,
+            file_extension=content.file_extension,
         )
 
     def _can_index_content(self, content: ContentInContext) -> bool:
@@ -418,3 +646,33 @@ class ESSearchApi(SearchApi):
                 ],
             },
         )
+
+
+# INFO - G.M - 2019-11-15 - search api of current process when process is part of
+# indexing process pool, see ESSearchApi.index_all_content
+_indexing_process_search_api = None  # type: typing.Optional[ESSearchApi]
+
+
+def _init_indexing_process(config: CFG) -> None:
+    """
+    Set up search api of a process of indexing process pool, with its own database
+    connection.
+    """
+    # TODO - G.M - 2019-11-15 - fix circular import
+    from tracim_backend.models.setup_models import get_engine
+    from tracim_backend.models.setup_models import get_session_factory
+
+    global _indexing_process_search_api
+    if not DepotManager.get():
+        config.configure_filedepot()
+    session = get_session_factory(get_engine(config))()
+    _indexing_process_search_api = ESSearchApi(session=session, current_user=None, config=config)
+
+
+def _get_index_actions_in_indexing_process(
+    content_ids: typing.List[int],
+) -> typing.Tuple[typing.List[typing.Dict[str, typing.Any]], typing.List[int]]:
+    try:
+        return _indexing_process_search_api._get_index_actions(content_ids)
+    finally:
+        _indexing_process_search_api._session.close()
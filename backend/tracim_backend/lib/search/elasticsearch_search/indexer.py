@@ -0,0 +1,94 @@
+import typing
+
+from sqlalchemy.event import listen
+from sqlalchemy.orm import Session
+from sqlalchemy.orm import sessionmaker
+import transaction
+
+from tracim_backend.config import CFG
+from tracim_backend.lib.search.search_factory import ELASTICSEARCH__SEARCH_ENGINE_SLUG
+from tracim_backend.lib.utils.logger import logger
+from tracim_backend.lib.utils.utils import get_redis_connection
+from tracim_backend.lib.utils.utils import get_rq_queue
+
+if typing.TYPE_CHECKING:
+    from tracim_backend.lib.search.search import IndexedContentsResults
+
+SEARCH_INDEXER_QUEUE_NAME = "search_indexer"
+PENDING_CONTENT_IDS_SESSION_KEY = "search_indexer_pending_content_ids"
+LISTENED_SESSION_KEY = "search_indexer_listened"
+
+
+def is_contents_indexing_async(config: CFG) -> bool:
+    return (
+        config.SEARCH__ENGINE == ELASTICSEARCH__SEARCH_ENGINE_SLUG
+        and config.SEARCH__ELASTICSEARCH__INDEXING_PROCESSING_MODE == config.CST.ASYNC
+    )
+
+
+def index_contents(
+    config: CFG, content_ids: typing.Iterable[int], session_factory: sessionmaker = None
+) -> "IndexedContentsResults":
+    """
+    Index/update given contents using their own database session.
+    This is the function run by jobs of search indexer queue.
+    :param config: tracim config
+    :param content_ids: ids of contents to index
+    :param session_factory: session factory to use, a new one is created if not given.
+    """
+    # TODO - G.M - 2019-11-14 - fix circular import
+    from tracim_backend.lib.search.elasticsearch_search.elasticsearch_search import ESSearchApi
+    from tracim_backend.models.setup_models import get_engine
+    from tracim_backend.models.setup_models import get_session_factory
+    from tracim_backend.models.setup_models import get_tm_session
+
+    engine = None
+    if not session_factory:
+        engine = get_engine(config)
+        session_factory = get_session_factory(engine)
+    transaction_manager = transaction.TransactionManager()
+    try:
+        with transaction_manager:
+            session = get_tm_session(session_factory, transaction_manager)
+            search_api = ESSearchApi(session=session, current_user=None, config=config)
+            return search_api.index_contents(content_ids)
+    finally:
+        if engine:
+            engine.dispose()
+
+
+def queue_contents_indexing(
+    session: Session, config: CFG, content_ids: typing.Iterable[int]
+) -> None:
+    """
+    Queue indexing of contents for the search indexer daemon.
+    Jobs are queued once session is committed, so that the daemon indexes up to date data,
+    and all contents indexed during a transaction are queued in a single job.
+    """
+    if not session.info.get(LISTENED_SESSION_KEY):
+
+        def enqueue_pending_content_ids(session: Session) -> None:
+            pending_content_ids = session.info.pop(PENDING_CONTENT_IDS_SESSION_KEY, None)
+            if not pending_content_ids:
+                return
+            try:
+                redis_connection = get_redis_connection(config)
+                queue = get_rq_queue(redis_connection, SEARCH_INDEXER_QUEUE_NAME)
+                queue.enqueue(index_contents, config=config, content_ids=list(pending_content_ids))
+            except Exception:
+                # INFO - G.M - 2019-11-14 - data are already committed at this step,
+                # do not fail because of indexing.
+                logger.exception(
+                    queue_contents_indexing,
+                    "Something goes wrong during queuing of indexing of contents {}".format(
+                        pending_content_ids
+                    ),
+                )
+
+        def discard_pending_content_ids(session: Session) -> None:
+            session.info.pop(PENDING_CONTENT_IDS_SESSION_KEY, None)
+
+        listen(session, "after_commit", enqueue_pending_content_ids)
+        listen(session, "after_rollback", discard_pending_content_ids)
+        session.info[LISTENED_SESSION_KEY] = True
+    session.info.setdefault(PENDING_CONTENT_IDS_SESSION_KEY, set()).update(content_ids)
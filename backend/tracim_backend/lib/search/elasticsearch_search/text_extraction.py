@@ -0,0 +1,113 @@
+from concurrent.futures import ThreadPoolExecutor
+import mimetypes
+import os
+import threading
+import typing
+
+from PyPDF2 import PdfFileReader
+from depot.io.interfaces import StoredFile
+from depot.manager import DepotManager
+from preview_generator.manager import PreviewManager
+
+from tracim_backend.config import CFG
+from tracim_backend.lib.utils.logger import logger
+
+PLAIN_TEXT_MIMETYPE = "text/plain"
+
+# INFO - G.M - 2019-11-15 - extraction pool is shared by the whole process to bound
+# number of files read at the same time, whatever the number of indexing requests.
+_extraction_pool = None  # type: typing.Optional[ThreadPoolExecutor]
+_extraction_pool_pid = None  # type: typing.Optional[int]
+_extraction_pool_lock = threading.Lock()
+
+
+def _get_extraction_pool(nb_workers: int) -> ThreadPoolExecutor:
+    global _extraction_pool, _extraction_pool_pid
+    with _extraction_pool_lock:
+        # INFO - G.M - 2019-11-15 - threads of pool are not copied in forked processes
+        # (like indexing processes of index-populate command), create a new pool there.
+        if not _extraction_pool or _extraction_pool_pid != os.getpid():
+            _extraction_pool = ThreadPoolExecutor(max_workers=nb_workers)
+            _extraction_pool_pid = os.getpid()
+        return _extraction_pool
+
+
+FileToExtract = typing.NamedTuple(
+    "FileToExtract", [("revision_id", int), ("depot_file", typing.Any), ("file_extension", str)],
+)
+
+
+class FileTextExtractor(object):
+    """
+    Extract text of files locally, using text or pdf previews of preview-generator,
+    so that only extracted text is sent to elasticsearch.
+    Extracted texts are cached by revision: file of a revision never changes, so
+    reindexing a content does not extract its file again.
+    """
+
+    def __init__(self, config: CFG) -> None:
+        self._config = config
+        self._cache_dir = config.SEARCH__ELASTICSEARCH__INGEST__TEXT_CACHE_DIR
+        os.makedirs(self._cache_dir, exist_ok=True)
+        self._preview_manager = PreviewManager(config.PREVIEW_CACHE_DIR, create_folder=True)
+
+    def extract_texts(
+        self, files: typing.Iterable[FileToExtract]
+    ) -> typing.Dict[int, typing.Optional[str]]:
+        """
+        Extract text of many files in extraction pool.
+        :return: extracted text by revision_id, None if text can't be extracted.
+        """
+        pool = _get_extraction_pool(
+            self._config.SEARCH__ELASTICSEARCH__INGEST__TEXT_EXTRACTION_WORKERS
+        )
+        futures = {file_.revision_id: pool.submit(self._get_text, file_) for file_ in files}
+        return {revision_id: future.result() for revision_id, future in futures.items()}
+
+    def extract_text(self, file_: FileToExtract) -> typing.Optional[str]:
+        return self.extract_texts([file_])[file_.revision_id]
+
+    def _get_cache_file_path(self, revision_id: int) -> str:
+        return os.path.join(self._cache_dir, "{}.txt".format(revision_id))
+
+    def _get_text(self, file_: FileToExtract) -> typing.Optional[str]:
+        cache_file_path = self._get_cache_file_path(file_.revision_id)
+        if os.path.exists(cache_file_path):
+            with open(cache_file_path, "r") as cache_file:
+                return cache_file.read() or None
+        try:
+            text = self._extract_text(file_)
+        except Exception as exc:
+            logger.warning(
+                self,
+                "Unable to extract text of file of revision {}: {}".format(file_.revision_id, exc),
+            )
+            return None
+        # INFO - G.M - 2019-11-15 - an empty cache file mean no text can be extracted,
+        # this avoid to try again at each reindex.
+        tmp_cache_file_path = "{}.{}.tmp".format(cache_file_path, threading.get_ident())
+        with open(tmp_cache_file_path, "w") as cache_file:
+            cache_file.write(text or "")
+        os.replace(tmp_cache_file_path, cache_file_path)
+        return text or None
+
+    def _extract_text(self, file_: FileToExtract) -> typing.Optional[str]:
+        depot_stored_file = DepotManager.get().get(file_.depot_file)  # type: StoredFile
+        file_path = depot_stored_file._file_path  # type: str
+        file_ext = file_.file_extension
+        # INFO - G.M - 2019-11-15 - plain text files are their own text: read them
+        # directly instead of running preview-generator builders.
+        if mimetypes.guess_type("file{}".format(file_ext))[0] == PLAIN_TEXT_MIMETYPE:
+            return depot_stored_file.read().decode("utf-8", errors="replace")
+        if self._preview_manager.has_text_preview(file_path, file_ext=file_ext):
+            text_preview_path = self._preview_manager.get_text_preview(file_path, file_ext=file_ext)
+            with open(text_preview_path, "r") as text_preview:
+                return text_preview.read()
+        if self._preview_manager.has_pdf_preview(file_path, file_ext=file_ext):
+            # INFO - G.M - 2019-11-15 - pdf preview is generated once and reused
+            # from preview cache if content was already previewed.
+            pdf_preview_path = self._preview_manager.get_pdf_preview(file_path, file_ext=file_ext)
+            with open(pdf_preview_path, "rb") as pdf_preview:
+                pdf = PdfFileReader(pdf_preview, strict=False)
+                return "\n".join(page.extractText() for page in pdf.pages)
+        return None
@@ -0,0 +1,94 @@
+from http import HTTPStatus
+import json
+import typing
+
+import marshmallow
+from pyramid.response import Response
+
+from tracim_backend.lib.utils.pagination import Page
+from tracim_backend.lib.utils.request import TracimRequest
+
+# INFO - G.M - 2019-11-29 - number of items encoded in one chunk of response body
+JSON_STREAM_CHUNK_SIZE = 100
+
+
+def iter_json_list(
+    schema: marshmallow.Schema,
+    items: typing.Iterable[typing.Any],
+    chunk_size: int = JSON_STREAM_CHUNK_SIZE,
+) -> typing.Iterator[bytes]:
+    """
+    Encode items as a json list, one item after the other: only encoded items
+    are kept, not the whole marshmallow output of the list.
+    :param schema: schema of one item (not many=True)
+    :param items: items to encode
+    :param chunk_size: number of items by yielded chunk
+    """
+    yield b"["
+    chunk = []  # type: typing.List[str]
+    first = True
+    for item in items:
+        encoded_item = json.dumps(schema.dump(item).data)
+        chunk.append(encoded_item if first else "," + encoded_item)
+        first = False
+        if len(chunk) >= chunk_size:
+            yield "".join(chunk).encode("utf-8")
+            chunk = []
+    if chunk:
+        yield "".join(chunk).encode("utf-8")
+    yield b"]"
+
+
+def iter_json_page(
+    schema: marshmallow.Schema, page: Page, chunk_size: int = JSON_STREAM_CHUNK_SIZE
+) -> typing.Iterator[bytes]:
+    """
+    Encode a page as a json object: its items are encoded as done by iter_json_list,
+    followed by pagination infos.
+    """
+    yield b'{"items": '
+    yield from iter_json_list(schema, page.items, chunk_size)
+    pagination = {
+        "next_page_token": page.next_page_token,
+        "has_next": page.has_next,
+        "per_page": page.per_page,
+    }
+    yield ", {}".format(json.dumps(pagination)[1:]).encode("utf-8")
+
+
+class TransactionalAppIter(object):
+    """
+    Response body iterator reading database while body is sent: view transaction
+    is already ended then, so chunks are built in a new transaction, aborted with
+    dbsession closing once response is sent.
+    """
+
+    def __init__(self, request: TracimRequest, chunks: typing.Iterable[bytes]) -> None:
+        self._request = request
+        self._chunks = chunks
+        self._transaction_begun = False
+        request.defer_dbsession_close()
+
+    def __iter__(self) -> typing.Iterator[bytes]:
+        self._request.tm.begin()
+        self._transaction_begun = True
+        yield from self._chunks
+
+    def close(self) -> None:
+        if self._transaction_begun:
+            self._request.tm.abort()
+        self._request.dbsession.close()
+
+
+def get_json_stream_response(
+    request: TracimRequest, chunks: typing.Iterable[bytes], http_code: int = HTTPStatus.OK
+) -> Response:
+    """
+    Response with body built from json chunks, encoded while response is sent.
+    """
+    return Response(
+        app_iter=TransactionalAppIter(request, chunks),
+        status=int(http_code),
+        headers=[("Content-Type", "application/json")],
+        charset=None,
+    )
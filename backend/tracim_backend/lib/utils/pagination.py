@@ -0,0 +1,127 @@
+import base64
+from datetime import datetime
+import json
+import typing
+
+from sqlalchemy import and_
+from sqlalchemy import desc
+from sqlalchemy import or_
+from sqlalchemy.orm import Query
+from sqlalchemy.sql.elements import ColumnElement
+
+from tracim_backend.exceptions import InvalidPageToken
+
+DATETIME_TOKEN_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+DATETIME_TOKEN_KEY = "datetime"
+
+
+# INFO - G.M - 2019-11-29 - Column used to sort paginated items. Values of these columns
+# must be unique all together (add primary key as last column) and not null.
+OrderColumn = typing.NamedTuple("OrderColumn", [("column", ColumnElement), ("descending", bool)])
+
+
+class Page(object):
+    """
+    Page of items found with keyset pagination.
+    """
+
+    def __init__(
+        self,
+        items: typing.List[typing.Any],
+        per_page: int,
+        next_page_token: typing.Optional[str] = None,
+    ) -> None:
+        self.items = items
+        self.per_page = per_page
+        self.next_page_token = next_page_token
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_page_token is not None
+
+
+def encode_page_token(values: typing.Sequence[typing.Any]) -> str:
+    """
+    Encode sort values of last item of a page as an opaque token.
+    """
+    token_values = []  # type: typing.List[typing.Any]
+    for value in values:
+        if isinstance(value, datetime):
+            value = {DATETIME_TOKEN_KEY: value.strftime(DATETIME_TOKEN_FORMAT)}
+        token_values.append(value)
+    return base64.urlsafe_b64encode(json.dumps(token_values).encode("utf-8")).decode("ascii")
+
+
+def decode_page_token(page_token: str, nb_values: int) -> typing.List[typing.Any]:
+    """
+    Decode sort values of a page token.
+    :raise InvalidPageToken: if token is not a valid token of nb_values values.
+    """
+    try:
+        token_values = json.loads(base64.urlsafe_b64decode(page_token.encode("ascii")))
+        assert isinstance(token_values, list) and len(token_values) == nb_values
+        values = []  # type: typing.List[typing.Any]
+        for value in token_values:
+            if isinstance(value, dict):
+                value = datetime.strptime(value[DATETIME_TOKEN_KEY], DATETIME_TOKEN_FORMAT)
+            values.append(value)
+        return values
+    except Exception as exc:
+        raise InvalidPageToken('Invalid page token "{}"'.format(page_token)) from exc
+
+
+def get_keyset_filter(
+    order_columns: typing.Sequence[OrderColumn], values: typing.Sequence[typing.Any]
+) -> ColumnElement:
+    """
+    Filter of items placed after given sort values, according to order columns:
+    (a > x) or (a = x and b > y) or ... with < instead of > for descending columns.
+    """
+    clauses = []
+    for index, order_column in enumerate(order_columns):
+        equalities = [
+            previous_column.column == value
+            for previous_column, value in zip(order_columns[:index], values[:index])
+        ]
+        if order_column.descending:
+            comparison = order_column.column < values[index]
+        else:
+            comparison = order_column.column > values[index]
+        clauses.append(and_(*equalities, comparison))
+    return or_(*clauses)
+
+
+def paginate_query(
+    query: Query,
+    order_columns: typing.Sequence[OrderColumn],
+    count: int,
+    page_token: typing.Optional[str] = None,
+) -> Page:
+    """
+    Return a page of query items using keyset pagination: next page is selected
+    by filtering on sort values of last item instead of using an offset, so
+    getting a page cost the same whatever its position.
+    Query must not be already ordered.
+    :param query: query of items
+    :param order_columns: columns to sort items by
+    :param count: max number of items of the page
+    :param page_token: next_page_token of previous page, None for first page.
+    :return: page of items, next_page_token is set if there is a next page.
+    """
+    if page_token:
+        values = decode_page_token(page_token, len(order_columns))
+        query = query.filter(get_keyset_filter(order_columns, values))
+    query = query.add_columns(*[order_column.column for order_column in order_columns])
+    query = query.order_by(
+        *[
+            desc(order_column.column) if order_column.descending else order_column.column
+            for order_column in order_columns
+        ]
+    )
+    # INFO - G.M - 2019-11-29 - get one more row to know if there is a next page
+    rows = query.limit(count + 1).all()
+    next_page_token = None
+    if len(rows) > count:
+        rows = rows[:count]
+        next_page_token = encode_page_token(rows[-1][1:])
+    return Page(items=[row[0] for row in rows], per_page=count, next_page_token=next_page_token)
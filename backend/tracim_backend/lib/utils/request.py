@@ -242,6 +242,7 @@ class TracimRequest(TracimContext, Request):
     def __init__(self, environ, charset=None, unicode_errors=None, decode_param_names=None, **kw):
         Request.__init__(self, environ, charset, unicode_errors, decode_param_names, **kw)
         TracimContext.__init__(self)
+        self._dbsession_close_deferred = False
 
         # INFO - G.M - 18-05-2018 - Close db at the end of the request
         self.add_finished_callback(self._cleanup)
@@ -270,7 +271,15 @@ class TracimRequest(TracimContext, Request):
         """
         self._current_user = None
         self._current_workspace = None
-        self.dbsession.close()
+        if not self._dbsession_close_deferred:
+            self.dbsession.close()
+
+    def defer_dbsession_close(self) -> None:
+        """
+        Keep dbsession open at the end of the request, for responses which use it
+        while their body is sent: they must close it themselves.
+        """
+        self._dbsession_close_deferred = True
 
     # INFO - G.M - 2018-12-03 - Internal utils function to simplify ID fetching
 
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 import json
 import os
+import threading
+from types import MappingProxyType
 import typing
 
 from babel.core import default_locale
@@ -21,6 +23,62 @@ def translator_marker(string: str) -> str:
     return string
 
 
+CachedCatalog = typing.NamedTuple(
+    "CachedCatalog", [("mtime", typing.Optional[float]), ("catalog", typing.Mapping[str, str])]
+)
+
+
+class TranslationCatalogCache(object):
+    """
+    Process-wide cache of json translation catalogs, shared by all Translator
+    instances: each translation file is read once and kept as an immutable dict.
+    Catalogs can optionally be reloaded when modification time of their file changes.
+    """
+
+    def __init__(self) -> None:
+        self._catalogs = {}  # type: typing.Dict[str, CachedCatalog]
+        self._lock = threading.Lock()
+
+    def get_catalog(self, filepath: str, auto_reload: bool = False) -> typing.Mapping[str, str]:
+        """
+        :param filepath: path of json translation file
+        :param auto_reload: reload catalog if file was modified since it was read
+        :return: translations of file, empty if file is missing or invalid
+        """
+        cached_catalog = self._catalogs.get(filepath)
+        if cached_catalog and not auto_reload:
+            return cached_catalog.catalog
+        mtime = self._get_mtime(filepath)
+        if cached_catalog and cached_catalog.mtime == mtime:
+            return cached_catalog.catalog
+        with self._lock:
+            cached_catalog = self._catalogs.get(filepath)
+            if not cached_catalog or cached_catalog.mtime != mtime:
+                cached_catalog = CachedCatalog(mtime=mtime, catalog=self._load_catalog(filepath))
+                self._catalogs[filepath] = cached_catalog
+            return cached_catalog.catalog
+
+    def clear(self) -> None:
+        with self._lock:
+            self._catalogs.clear()
+
+    def _get_mtime(self, filepath: str) -> typing.Optional[float]:
+        try:
+            return os.stat(filepath).st_mtime
+        except OSError:
+            return None
+
+    def _load_catalog(self, filepath: str) -> typing.Mapping[str, str]:
+        try:
+            with open(filepath) as file:
+                return MappingProxyType(json.load(file))
+        except Exception:
+            return MappingProxyType({})
+
+
+translation_catalog_cache = TranslationCatalogCache()
+
+
 class Translator(object):
     """
     Get translation from json file
@@ -40,30 +98,18 @@ class Translator(object):
             default_lang = fallback_lang
         self.default_lang = default_lang
 
-    def _get_json_translation_lang_filepath(self, lang: str) -> typing.Optional[str]:
+    def _get_json_translation_lang_filepath(self, lang: str) -> str:
         i18n_folder = self.config.BACKEND__I18N_FOLDER_PATH
-        lang_filepath = os.path.join(i18n_folder, lang, TRANSLATION_FILENAME)
-        if not os.path.isdir(self.config.BACKEND__I18N_FOLDER_PATH):
-            return None
-        else:
-            return lang_filepath
-
-    def _get_translation_from_file(self, filepath: str) -> typing.Optional[typing.Dict[str, str]]:
-        try:
-            with open(filepath) as file:
-                trads = json.load(file)
-                return trads
-        except Exception:
-            return None
+        return os.path.join(i18n_folder, lang, TRANSLATION_FILENAME)
 
     def _get_translation(self, lang: str, message: str) -> typing.Tuple[str, bool]:
-        try:
-            translation_filepath = self._get_json_translation_lang_filepath(lang)
-            translation = self._get_translation_from_file(translation_filepath)
-            if message in translation and translation[message]:
-                return translation[message], True
-        except Exception:
-            pass
+        translation = translation_catalog_cache.get_catalog(
+            self._get_json_translation_lang_filepath(lang),
+            auto_reload=self.config.BACKEND__I18N_AUTO_RELOAD,
+        )
+        new_trad = translation.get(message)
+        if new_trad:
+            return new_trad, True
         return message, False
 
     def get_translation(self, message: str, lang: str = None) -> str:
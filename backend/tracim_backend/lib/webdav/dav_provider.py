@@ -23,11 +23,22 @@ from tracim_backend.lib.utils.request import TracimContext
 from tracim_backend.lib.utils.utils import normpath
 from tracim_backend.lib.utils.utils import webdav_convert_file_name_to_bdd
 from tracim_backend.lib.webdav import resources
-from tracim_backend.lib.webdav.lock_storage import LockStorage
+from tracim_backend.lib.webdav.lock_storage import get_lock_storage
+from tracim_backend.lib.webdav.path_cache import CachedPath
+from tracim_backend.lib.webdav.path_cache import WebdavPathCache
 from tracim_backend.models.data import Content
 from tracim_backend.models.data import ContentNamespaces
 from tracim_backend.models.data import Workspace
 
+# INFO - G.M - 2019-11-18 - patterns used by reduce_path, order matters.
+REDUCE_PATH_SUBSTITUTIONS = [
+    (re.compile(r"/\.archived"), r""),
+    (re.compile(r"/\.deleted"), r""),
+    (re.compile(r"/\.history/[^/]+/(\d+)-.+"), r"/\1"),
+    (re.compile(r"/\.history/([^/]+)"), r"/\1"),
+    (re.compile(r"/\.history"), r""),
+]
+
 
 class WebdavTracimContext(TracimContext):
     def __init__(self, environ: typing.Dict[str, typing.Any], app_config: CFG, session: Session):
@@ -57,9 +68,12 @@ class WebdavTracimContext(TracimContext):
         """
         Current authenticated user if exist
         """
-        return self._generate_if_none(
+        # INFO - G.M - 2019-11-18 - keep user for the whole request, each resource
+        # of a listed folder needs it.
+        self._current_user = self._generate_if_none(
             self._current_user, self._get_user, self._get_current_user_email
         )
+        return self._current_user
 
     def _get_user(self, user_email: typing.Callable):
         user_email = user_email()
@@ -110,15 +124,16 @@ class WebdavTracimContext(TracimContext):
             self._current_content, self._get_content, self._get_content_path
         )
 
+    @property
+    def path_cache(self) -> WebdavPathCache:
+        return self.environ["wsgidav.provider"].path_cache
+
     def _get_content(self, content_path_fetcher):
         path = content_path_fetcher()
+        content_label = webdav_convert_file_name_to_bdd(basename(path))
         content_path = self.reduce_path(path)
         splited_local_path = content_path.strip("/").split("/")
         workspace_name = webdav_convert_file_name_to_bdd(splited_local_path[0])
-        wapi = WorkspaceApi(
-            current_user=self.current_user, session=self.dbsession, config=self.app_config
-        )
-        workspace = wapi.get_one_by_label(workspace_name)
         parents = []
         if len(splited_local_path) > 2:
             parent_string = splited_local_path[1:-1]
@@ -127,11 +142,68 @@ class WebdavTracimContext(TracimContext):
         content_api = ContentApi(
             config=self.app_config, current_user=self.current_user, session=self.dbsession
         )
-        return content_api.get_one_by_filename_and_parent_labels(
-            content_label=webdav_convert_file_name_to_bdd(basename(path)),
-            content_parent_labels=parents,
-            workspace=workspace,
+        user_id = self.current_user.user_id
+        cached_path = self.path_cache.get(user_id, path)
+        if cached_path:
+            content = self._get_cached_path_content(
+                content_api, cached_path, workspace_name, parents, content_label
+            )
+            if content:
+                return content
+            self.path_cache.invalidate_path(user_id, path)
+
+        wapi = WorkspaceApi(
+            current_user=self.current_user, session=self.dbsession, config=self.app_config
+        )
+        workspace = wapi.get_one_by_label(workspace_name)
+        content, parent_ids = content_api.get_one_and_parent_ids_by_filename_and_parent_labels(
+            content_label=content_label, content_parent_labels=parents, workspace=workspace
+        )
+        self.path_cache.set(
+            user_id,
+            path,
+            workspace_id=content.workspace_id,
+            content_id=content.content_id,
+            parent_ids=parent_ids,
         )
+        return content
+
+    def _get_cached_path_content(
+        self,
+        content_api: ContentApi,
+        cached_path: CachedPath,
+        workspace_name: str,
+        parent_labels: typing.List[str],
+        content_label: str,
+    ) -> typing.Optional[Content]:
+        """
+        Return content of a cached path if it is still at this path: content, its
+        parent folders or its workspace may have been renamed, moved or deleted since
+        path was cached, in another process. Content, parent folders and workspace
+        are checked in one query by ids, without resolving workspace by label.
+        """
+        if len(cached_path.parent_ids) != len(parent_labels):
+            return None
+        try:
+            content, workspace_label = content_api.get_one_and_workspace_label_by_path_ids(
+                content_id=cached_path.content_id,
+                workspace_id=cached_path.workspace_id,
+                content_parent_ids=list(cached_path.parent_ids),
+                content_parent_labels=parent_labels,
+            )
+        except ContentNotFound:
+            return None
+        # INFO - G.M - 2019-11-18 - workspace may be given by label or by
+        # "label~~workspace_id", see WorkspaceApi.get_one_by_label
+        splitted_workspace_name = workspace_name.split("~~", maxsplit=1)
+        if len(splitted_workspace_name) == 2 and splitted_workspace_name[1].isdecimal():
+            if int(splitted_workspace_name[1]) != cached_path.workspace_id:
+                return None
+        elif workspace_label != workspace_name:
+            return None
+        if content.file_name.lower() != content_label.lower():
+            return None
+        return content
 
     def _get_content_path(self):
         return normpath(self.path)
@@ -172,12 +244,11 @@ class WebdavTracimContext(TracimContext):
         ex: if the path is /a/b/.history/my_file/(1985 - edition) my_old_name, we're looking for,
         thus we remove all useless information
         """
-        path = re.sub(r"/\.archived", r"", path)
-        path = re.sub(r"/\.deleted", r"", path)
-        path = re.sub(r"/\.history/[^/]+/(\d+)-.+", r"/\1", path)
-        path = re.sub(r"/\.history/([^/]+)", r"/\1", path)
-        path = re.sub(r"/\.history", r"", path)
-
+        # INFO - G.M - 2019-11-18 - most paths do not contain any special folder
+        if "/." not in path:
+            return path
+        for pattern, replacement in REDUCE_PATH_SUBSTITUTIONS:
+            path = pattern.sub(replacement, path)
         return path
 
 
@@ -198,9 +269,10 @@ class Provider(DAVProvider):
         super(Provider, self).__init__()
 
         if manage_locks:
-            self.lockManager = LockManager(LockStorage())
+            self.lockManager = LockManager(get_lock_storage(app_config))
 
         self.app_config = app_config
+        self.path_cache = WebdavPathCache(ttl=app_config.WEBDAV__PATH_CACHE__TTL)
         self._show_archive = show_archived
         self._show_delete = show_deleted
         self._show_history = show_history
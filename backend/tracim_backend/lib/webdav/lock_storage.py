@@ -1,5 +1,11 @@
+import bisect
+import heapq
+import math
+import threading
 import time
+import typing
 
+from redis import Redis
 from wsgidav import util
 from wsgidav.lock_manager import generateLockToken
 from wsgidav.lock_manager import lockString
@@ -7,11 +13,27 @@ from wsgidav.lock_manager import normalizeLockRoot
 from wsgidav.lock_manager import validateLock
 from wsgidav.rw_lock import ReadWriteLock
 
+from tracim_backend.config import CFG
+from tracim_backend.lib.utils.utils import get_redis_connection
 from tracim_backend.lib.webdav.model import Lock
 from tracim_backend.lib.webdav.model import Url2Token
 
 _logger = util.getModuleLogger(__name__)
 
+MEMORY_LOCK_STORAGE = "memory"
+REDIS_LOCK_STORAGE = "redis"
+REDIS_LOCK_FIELDS = (
+    "token",
+    "depth",
+    "root",
+    "type",
+    "scope",
+    "owner",
+    "timeout",
+    "principal",
+    "expire",
+)
+
 
 def from_dict_to_base(lock):
     return Lock(
@@ -281,3 +303,320 @@ class LockStorage(object):
             return lockList
         finally:
             self._lock.release()
+
+
+def _normalize_timeout(timeout: typing.Optional[float]) -> float:
+    if timeout is None:
+        return LockStorage.LOCK_TIME_OUT_DEFAULT
+    timeout = float(timeout)
+    if timeout < 0 or timeout > LockStorage.LOCK_TIME_OUT_MAX:
+        return LockStorage.LOCK_TIME_OUT_MAX
+    return timeout
+
+
+def _prepare_new_lock(path: str, lock: typing.Dict[str, typing.Any]) -> str:
+    """
+    Complete lock dict of a lock to create like wsgidav lock storages do:
+    set normalized root, timeout, expire date and a new token.
+    :return: normalized path of lock
+    """
+    # We expect only a lock definition, not an existing lock
+    assert lock.get("token") is None
+    assert lock.get("expire") is None, "Use timeout instead of expire"
+    assert path and "/" in path
+    path = normalizeLockRoot(path)
+    lock["root"] = path
+    lock["timeout"] = _normalize_timeout(lock.get("timeout"))
+    lock["expire"] = time.time() + lock["timeout"]
+    validateLock(lock)
+    lock["token"] = generateLockToken()
+    return path
+
+
+def _get_children_path_range(path: str) -> typing.Tuple[str, str]:
+    """
+    Return range [start, end[ of paths which are children of path: children paths are
+    paths beginning with "path/", so they are sorted just after it and before "path0"
+    ("0" being the character following "/").
+    """
+    prefix = path if path.endswith("/") else path + "/"
+    return prefix, prefix[:-1] + "0"
+
+
+class MemoryLockStorage(object):
+    """
+    Lock storage keeping locks in memory of the webdav process, for single process
+    setups. Locks are indexed by sorted paths so that locks of children of a path are
+    found with a range lookup, and expired locks are purged from an expiration heap.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._locks = {}  # type: typing.Dict[str, typing.Dict[str, typing.Any]]
+        self._tokens_by_path = {}  # type: typing.Dict[str, typing.Set[str]]
+        self._sorted_paths = []  # type: typing.List[str]
+        self._expirations = []  # type: typing.List[typing.Tuple[float, str]]
+
+    def __repr__(self) -> str:
+        return "<MemoryLockStorage: {} lock(s)>".format(len(self._locks))
+
+    def open(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def cleanup(self) -> None:
+        with self._lock:
+            self._purge_expired()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._locks.clear()
+            self._tokens_by_path.clear()
+            self._sorted_paths.clear()
+            self._expirations.clear()
+
+    def get(self, token: str) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        with self._lock:
+            self._purge_expired()
+            lock = self._locks.get(token)
+            return dict(lock) if lock else None
+
+    def create(self, path: str, lock: typing.Dict[str, typing.Any]) -> typing.Dict[str, typing.Any]:
+        path = _prepare_new_lock(path, lock)
+        with self._lock:
+            self._purge_expired()
+            self._locks[lock["token"]] = dict(lock)
+            if path not in self._tokens_by_path:
+                self._tokens_by_path[path] = set()
+                bisect.insort(self._sorted_paths, path)
+            self._tokens_by_path[path].add(lock["token"])
+            heapq.heappush(self._expirations, (lock["expire"], lock["token"]))
+        _logger.debug("MemoryLockStorage.create(%r): %s" % (path, lockString(lock)))
+        return lock
+
+    def refresh(self, token: str, timeout: float) -> typing.Dict[str, typing.Any]:
+        assert timeout == -1 or timeout > 0
+        with self._lock:
+            lock = self._locks.get(token)
+            assert lock is not None, "Lock must exist"
+            lock["timeout"] = _normalize_timeout(timeout)
+            lock["expire"] = time.time() + lock["timeout"]
+            # INFO - G.M - 2019-11-19 - previous expiration of lock stay in heap,
+            # it is ignored when purging as it does not match lock expire anymore.
+            heapq.heappush(self._expirations, (lock["expire"], token))
+            return dict(lock)
+
+    def delete(self, token: str) -> bool:
+        with self._lock:
+            return self._delete(token)
+
+    def getLockList(
+        self, path: str, includeRoot: bool, includeChildren: bool, tokenOnly: bool
+    ) -> typing.List[typing.Union[str, typing.Dict[str, typing.Any]]]:
+        assert path and path.startswith("/")
+        assert includeRoot or includeChildren
+        path = normalizeLockRoot(path)
+        with self._lock:
+            self._purge_expired()
+            tokens = []  # type: typing.List[str]
+            if includeRoot:
+                tokens.extend(self._tokens_by_path.get(path, ()))
+            if includeChildren:
+                start, end = _get_children_path_range(path)
+                start_index = bisect.bisect_left(self._sorted_paths, start)
+                end_index = bisect.bisect_left(self._sorted_paths, end)
+                for child_path in self._sorted_paths[start_index:end_index]:
+                    if child_path != path:
+                        tokens.extend(self._tokens_by_path[child_path])
+            if tokenOnly:
+                return tokens
+            return [dict(self._locks[token]) for token in tokens]
+
+    def _delete(self, token: str) -> bool:
+        lock = self._locks.pop(token, None)
+        if lock is None:
+            return False
+        path = lock["root"]
+        path_tokens = self._tokens_by_path.get(path)
+        if path_tokens is not None:
+            path_tokens.discard(token)
+            if not path_tokens:
+                del self._tokens_by_path[path]
+                del self._sorted_paths[bisect.bisect_left(self._sorted_paths, path)]
+        _logger.debug("MemoryLockStorage.delete(%s)" % lockString(lock))
+        return True
+
+    def _purge_expired(self) -> None:
+        now = time.time()
+        while self._expirations and self._expirations[0][0] < now:
+            expire, token = heapq.heappop(self._expirations)
+            lock = self._locks.get(token)
+            if lock and lock["expire"] == expire:
+                self._delete(token)
+
+
+class RedisLockStorage(object):
+    """
+    Lock storage keeping locks in redis, shared by all webdav processes.
+    Each lock is a redis hash expiring with the lock, so redis purges expired locks.
+    Paths of locks are indexed in a sorted set of "path\\0token" members with same
+    score, so that locks of a path or of children of a path are found with a
+    lexicographical range lookup. Index entries of expired locks are removed
+    when they are found.
+    """
+
+    KEY_PREFIX = "tracim:webdav:locks:"
+
+    def __init__(self, redis_connection: Redis, key_prefix: str = KEY_PREFIX) -> None:
+        self._redis = redis_connection
+        self._lock_key_prefix = "{}lock:".format(key_prefix)
+        self._paths_key = "{}paths".format(key_prefix)
+
+    def __repr__(self) -> str:
+        return "<RedisLockStorage: {}>".format(self._paths_key)
+
+    def open(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def cleanup(self) -> None:
+        members = [member.decode() for member in self._redis.zrange(self._paths_key, 0, -1)]
+        self._get_locks_of_members(members)
+
+    def clear(self) -> None:
+        members = [member.decode() for member in self._redis.zrange(self._paths_key, 0, -1)]
+        pipeline = self._redis.pipeline()
+        for member in members:
+            pipeline.delete(self._get_lock_key(member.split("\0", 1)[1]))
+        pipeline.delete(self._paths_key)
+        pipeline.execute()
+
+    def get(self, token: str) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        return self._decode_lock(self._redis.hgetall(self._get_lock_key(token)))
+
+    def create(self, path: str, lock: typing.Dict[str, typing.Any]) -> typing.Dict[str, typing.Any]:
+        path = _prepare_new_lock(path, lock)
+        lock_key = self._get_lock_key(lock["token"])
+        pipeline = self._redis.pipeline()
+        pipeline.hmset(lock_key, self._encode_lock(lock))
+        pipeline.expireat(lock_key, math.ceil(lock["expire"]))
+        pipeline.zadd(self._paths_key, **{self._get_member(path, lock["token"]): 0})
+        pipeline.execute()
+        _logger.debug("RedisLockStorage.create(%r): %s" % (path, lockString(lock)))
+        return lock
+
+    def refresh(self, token: str, timeout: float) -> typing.Dict[str, typing.Any]:
+        assert timeout == -1 or timeout > 0
+        lock = self.get(token)
+        assert lock is not None, "Lock must exist"
+        lock["timeout"] = _normalize_timeout(timeout)
+        lock["expire"] = time.time() + lock["timeout"]
+        lock_key = self._get_lock_key(token)
+        pipeline = self._redis.pipeline()
+        pipeline.hmset(lock_key, self._encode_lock(lock))
+        pipeline.expireat(lock_key, math.ceil(lock["expire"]))
+        pipeline.execute()
+        return lock
+
+    def delete(self, token: str) -> bool:
+        lock = self.get(token)
+        if lock is None:
+            return False
+        pipeline = self._redis.pipeline()
+        pipeline.delete(self._get_lock_key(token))
+        pipeline.zrem(self._paths_key, self._get_member(lock["root"], token))
+        pipeline.execute()
+        _logger.debug("RedisLockStorage.delete(%s)" % lockString(lock))
+        return True
+
+    def getLockList(
+        self, path: str, includeRoot: bool, includeChildren: bool, tokenOnly: bool
+    ) -> typing.List[typing.Union[str, typing.Dict[str, typing.Any]]]:
+        assert path and path.startswith("/")
+        assert includeRoot or includeChildren
+        path = normalizeLockRoot(path)
+        members = []  # type: typing.List[str]
+        if includeRoot:
+            members.extend(self._get_members_in_range(path + "\0", path + "\1"))
+        if includeChildren:
+            start, end = _get_children_path_range(path)
+            members.extend(
+                member
+                for member in self._get_members_in_range(start, end)
+                if member.split("\0", 1)[0] != path
+            )
+        locks = self._get_locks_of_members(members)
+        if tokenOnly:
+            return [lock["token"] for lock in locks]
+        return locks
+
+    def _get_lock_key(self, token: str) -> str:
+        return "{}{}".format(self._lock_key_prefix, token)
+
+    def _get_member(self, path: str, token: str) -> str:
+        return "{}\0{}".format(path, token)
+
+    def _get_members_in_range(self, start: str, end: str) -> typing.List[str]:
+        members = self._redis.zrangebylex(self._paths_key, "[" + start, "(" + end)
+        return [member.decode() for member in members]
+
+    def _get_locks_of_members(self, members: typing.List[str]) -> typing.List[typing.Dict]:
+        """
+        Return locks indexed by members of path index, removing members of expired
+        locks from index.
+        """
+        if not members:
+            return []
+        pipeline = self._redis.pipeline()
+        for member in members:
+            pipeline.hgetall(self._get_lock_key(member.split("\0", 1)[1]))
+        locks = []
+        expired_members = []
+        for member, encoded_lock in zip(members, pipeline.execute()):
+            lock = self._decode_lock(encoded_lock)
+            if lock is None:
+                expired_members.append(member)
+            else:
+                locks.append(lock)
+        if expired_members:
+            self._redis.zrem(self._paths_key, *expired_members)
+        return locks
+
+    def _encode_lock(
+        self, lock: typing.Dict[str, typing.Any]
+    ) -> typing.Dict[str, typing.Union[str, bytes]]:
+        # INFO - G.M - 2019-11-19 - owner is a xml bytestring, keep it as is.
+        return {
+            key: lock[key] if isinstance(lock[key], bytes) else str(lock[key])
+            for key in REDIS_LOCK_FIELDS
+            if lock.get(key) is not None
+        }
+
+    def _decode_lock(
+        self, encoded_lock: typing.Dict[bytes, bytes]
+    ) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        if not encoded_lock:
+            return None
+        lock = {key: None for key in REDIS_LOCK_FIELDS}
+        for key, value in encoded_lock.items():
+            key = key.decode()
+            lock[key] = value if key == "owner" else value.decode()
+        lock["timeout"] = float(lock["timeout"])
+        lock["expire"] = float(lock["expire"])
+        # INFO - G.M - 2019-11-19 - redis expire keys at second precision
+        if lock["expire"] < time.time():
+            return None
+        return lock
+
+
+def get_lock_storage(config: CFG) -> typing.Union[MemoryLockStorage, RedisLockStorage]:
+    """
+    Return lock storage of webdav according to config.
+    """
+    if config.WEBDAV__LOCK_STORAGE == REDIS_LOCK_STORAGE:
+        return RedisLockStorage(get_redis_connection(config))
+    return MemoryLockStorage()
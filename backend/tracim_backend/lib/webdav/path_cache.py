@@ -0,0 +1,110 @@
+from collections import OrderedDict
+import threading
+import time
+import typing
+
+# INFO - G.M - 2019-11-18 - max number of paths kept in cache, oldest ones
+# are dropped first.
+PATH_CACHE_MAX_SIZE = 10000
+
+
+# INFO - G.M - 2019-11-18 - parent_ids are ids of parent folders, from workspace
+# root to direct parent of content.
+CachedPath = typing.NamedTuple(
+    "CachedPath",
+    [
+        ("workspace_id", int),
+        ("content_id", int),
+        ("parent_ids", typing.Tuple[int, ...]),
+        ("expire_at", float),
+    ],
+)
+
+
+class WebdavPathCache(object):
+    """
+    Process-wide cache of webdav paths already resolved to a content.
+    Webdav clients do many requests on same paths in a short time (PROPFIND, LOCK,
+    GET, ...), this avoid resolving again each folder of the path for each of them.
+    Entries expire after a short ttl and are invalidated when a content of their
+    workspace is moved, renamed or deleted through webdav. As contents may also be
+    changed in other processes, callers must check that content, parent folders and
+    workspace of an entry still match its path before using it.
+    Paths are cached by user, as workspaces found by label depend on user roles.
+    """
+
+    def __init__(self, ttl: float, max_size: int = PATH_CACHE_MAX_SIZE) -> None:
+        """
+        :param ttl: time in seconds during which a resolved path is kept,
+        0 disable cache.
+        :param max_size: max number of paths kept.
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._paths = (
+            OrderedDict()
+        )  # type: typing.MutableMapping[typing.Tuple[int, str], CachedPath]
+        self._paths_by_workspace = {}  # type: typing.Dict[int, typing.Set[typing.Tuple[int, str]]]
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int, path: str) -> typing.Optional[CachedPath]:
+        if not self.ttl:
+            return None
+        key = (user_id, path)
+        with self._lock:
+            cached_path = self._paths.get(key)
+            if cached_path and cached_path.expire_at < time.monotonic():
+                self._remove(key)
+                return None
+            return cached_path
+
+    def set(
+        self,
+        user_id: int,
+        path: str,
+        workspace_id: int,
+        content_id: int,
+        parent_ids: typing.Sequence[int],
+    ) -> None:
+        if not self.ttl:
+            return
+        key = (user_id, path)
+        with self._lock:
+            self._remove(key)
+            self._paths[key] = CachedPath(
+                workspace_id=workspace_id,
+                content_id=content_id,
+                parent_ids=tuple(parent_ids),
+                expire_at=time.monotonic() + self.ttl,
+            )
+            self._paths_by_workspace.setdefault(workspace_id, set()).add(key)
+            while len(self._paths) > self.max_size:
+                oldest_key = next(iter(self._paths))
+                self._remove(oldest_key)
+
+    def invalidate_path(self, user_id: int, path: str) -> None:
+        with self._lock:
+            self._remove((user_id, path))
+
+    def invalidate_workspace(self, workspace_id: int) -> None:
+        """
+        Remove all cached paths of a workspace, to be used when content(s) of this
+        workspace are moved, renamed or deleted.
+        """
+        with self._lock:
+            for key in self._paths_by_workspace.pop(workspace_id, set()):
+                self._paths.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._paths.clear()
+            self._paths_by_workspace.clear()
+
+    def _remove(self, key: typing.Tuple[int, str]) -> None:
+        cached_path = self._paths.pop(key, None)
+        if cached_path:
+            workspace_paths = self._paths_by_workspace.get(cached_path.workspace_id)
+            if workspace_paths:
+                workspace_paths.discard(key)
+                if not workspace_paths:
+                    del self._paths_by_workspace[cached_path.workspace_id]
@@ -8,6 +8,7 @@ import re
 from time import mktime
 import typing
 
+from depot.io.interfaces import StoredFile
 from sqlalchemy.orm import Session
 import transaction
 from wsgidav import compat
@@ -43,6 +44,7 @@ from tracim_backend.lib.utils.utils import webdav_convert_file_name_to_bdd
 from tracim_backend.lib.utils.utils import webdav_convert_file_name_to_display
 from tracim_backend.lib.webdav.design import design_page
 from tracim_backend.lib.webdav.design import design_thread
+from tracim_backend.lib.webdav.path_cache import WebdavPathCache
 from tracim_backend.lib.webdav.utils import FakeFileStream
 from tracim_backend.models.data import ActionDescription
 from tracim_backend.models.data import Content
@@ -60,10 +62,15 @@ def webdav_check_right(authorization_checker: AuthorizationChecker):
     def decorator(func: typing.Callable) -> typing.Callable:
         @functools.wraps(func)
         def wrapper(self: "_DAVResource", *arg, **kwarg) -> typing.Callable:
-            try:
-                authorization_checker.check(tracim_context=self.tracim_context)
-            except TracimException as exc:
-                raise DAVError(HTTP_FORBIDDEN, contextinfo=str(exc)) from exc
+            # INFO - G.M - 2019-11-18 - wsgidav call many methods of each resource,
+            # check each authorization only once by resource.
+            checked_authorizations = getattr(self, "checked_authorizations", set())
+            if authorization_checker not in checked_authorizations:
+                try:
+                    authorization_checker.check(tracim_context=self.tracim_context)
+                except TracimException as exc:
+                    raise DAVError(HTTP_FORBIDDEN, contextinfo=str(exc)) from exc
+                checked_authorizations.add(authorization_checker)
             return func(self, *arg, **kwarg)
 
         return wrapper
@@ -77,10 +84,18 @@ class ManageActions(object):
     method as to not duplicate too much code
     """
 
-    def __init__(self, session: Session, action_type: str, api: ContentApi, content: Content):
+    def __init__(
+        self,
+        session: Session,
+        action_type: str,
+        api: ContentApi,
+        content: Content,
+        path_cache: typing.Optional[WebdavPathCache] = None,
+    ):
         self.session = session
         self.content_api = api
         self.content = content
+        self.path_cache = path_cache
 
         self._actions = {
             ActionDescription.ARCHIVING: self.content_api.archive,
@@ -100,7 +115,10 @@ class ManageActions(object):
         except TracimException as exc:
             raise DAVError(HTTP_FORBIDDEN, contextinfo=str(exc)) from exc
 
+        workspace_id = self.content.workspace_id
         transaction.commit()
+        if self.path_cache:
+            self.path_cache.invalidate_workspace(workspace_id)
 
 
 class RootResource(DAVCollection):
@@ -111,6 +129,7 @@ class RootResource(DAVCollection):
     def __init__(self, path: str, environ: dict, tracim_context: "WebdavTracimContext"):
         super(RootResource, self).__init__(path, environ)
         self.tracim_context = tracim_context
+        self.checked_authorizations = set()  # type: typing.Set[AuthorizationChecker]
         self.user = tracim_context.current_user
         self.session = tracim_context.dbsession
         # TODO BS 20170221: Web interface should list all workspace to. We
@@ -263,12 +282,14 @@ class WorkspaceResource(DAVCollection):
         environ: dict,
         workspace: Workspace,
         tracim_context: "WebdavTracimContext",
+        checked_authorizations: typing.Optional[typing.Set[AuthorizationChecker]] = None,
     ) -> None:
         super(WorkspaceResource, self).__init__(path, environ)
 
         self.workspace = workspace
         self.content = None
         self.tracim_context = tracim_context
+        self.checked_authorizations = checked_authorizations or set()
         self.user = tracim_context.current_user
         self.session = tracim_context.dbsession
         self.label = label
@@ -434,14 +455,50 @@ class WorkspaceResource(DAVCollection):
                 self.session.add(self.workspace)
                 self.session.flush()
                 workspace_api.execute_update_workspace_actions(self.workspace)
+                workspace_id = self.workspace.workspace_id
                 transaction.commit()
+                self.tracim_context.path_cache.invalidate_workspace(workspace_id)
             except TracimException as exc:
                 raise DAVError(HTTP_FORBIDDEN, contextinfo=str(exc))
 
     def getMemberList(self) -> [_DAVResource]:
-        members = []
-
         children = self.content_api.get_all(False, content_type_list.Any_SLUG, self.workspace)
+        members_content_api = ContentApi(
+            current_user=self.user,
+            config=self.provider.app_config,
+            session=self.session,
+            namespaces_filter=[ContentNamespaces.CONTENT],
+        )
+        return self._get_member_resources(children, members_content_api)
+
+    def _get_member_resources(
+        self, children: typing.List[Content], content_api: ContentApi
+    ) -> typing.List[_DAVResource]:
+        """
+        Create resources of all given children. Everything needed by wsgidav to
+        get their properties is loaded at once: read authorization is checked once
+        for all members (they are all in the collection workspace), and comments of
+        threads are loaded in one query.
+        :param content_api: content api shared by members, filtering on their namespace
+        """
+        members = []
+        try:
+            is_reader.check(self.tracim_context)
+            checked_authorizations = {is_reader}
+        except TracimException:
+            checked_authorizations = set()
+
+        thread_ids = [
+            content.content_id
+            for content in children
+            if content.type == content_type_list.Thread.slug
+        ]
+        comments_by_thread_id = {
+            thread_id: [] for thread_id in thread_ids
+        }  # type: typing.Dict[int, typing.List[Content]]
+        if thread_ids:
+            for comment in content_api.get_all(thread_ids, content_type_list.Comment.slug):
+                comments_by_thread_id[comment.parent_id].append(comment)
 
         for content in children:
             content_path = "%s/%s" % (
@@ -449,33 +506,46 @@ class WorkspaceResource(DAVCollection):
                 webdav_convert_file_name_to_display(content.file_name),
             )
 
-            if content.type == content_type_list.Folder.slug:
-                members.append(
-                    FolderResource(
-                        path=content_path,
-                        environ=self.environ,
-                        workspace=self.workspace,
-                        content=content,
-                        tracim_context=self.tracim_context,
+            try:
+                if content.type == content_type_list.Folder.slug:
+                    members.append(
+                        FolderResource(
+                            path=content_path,
+                            environ=self.environ,
+                            workspace=self.workspace,
+                            content=content,
+                            tracim_context=self.tracim_context,
+                            checked_authorizations=set(checked_authorizations),
+                        )
                     )
-                )
-            elif content.type == content_type_list.File.slug:
-                self._file_count += 1
-                members.append(
-                    FileResource(
-                        path=content_path,
-                        environ=self.environ,
-                        content=content,
-                        tracim_context=self.tracim_context,
+                elif content.type == content_type_list.File.slug:
+                    self._file_count += 1
+                    members.append(
+                        FileResource(
+                            path=content_path,
+                            environ=self.environ,
+                            content=content,
+                            tracim_context=self.tracim_context,
+                            checked_authorizations=set(checked_authorizations),
+                            content_api=content_api,
+                        )
                     )
-                )
-            else:
-                self._file_count += 1
-                members.append(
-                    OtherFileResource(
-                        content_path, self.environ, content, tracim_context=self.tracim_context
+                else:
+                    self._file_count += 1
+                    members.append(
+                        OtherFileResource(
+                            path=content_path,
+                            environ=self.environ,
+                            content=content,
+                            tracim_context=self.tracim_context,
+                            checked_authorizations=set(checked_authorizations),
+                            content_api=content_api,
+                            comments=comments_by_thread_id.get(content.content_id),
+                        )
                     )
-                )
+            except NotImplementedError:
+                pass
+
         return members
 
 
@@ -493,6 +563,7 @@ class FolderResource(WorkspaceResource):
         workspace: Workspace,
         content: Content,
         tracim_context: "WebdavTracimContext",
+        checked_authorizations: typing.Optional[typing.Set[AuthorizationChecker]] = None,
     ):
         super(FolderResource, self).__init__(
             path=path,
@@ -500,6 +571,7 @@ class FolderResource(WorkspaceResource):
             workspace=workspace,
             tracim_context=tracim_context,
             label=workspace.label,
+            checked_authorizations=checked_authorizations,
         )
         self.content = content
 
@@ -528,6 +600,7 @@ class FolderResource(WorkspaceResource):
             api=self.content_api,
             content=self.content,
             session=self.session,
+            path_cache=self.tracim_context.path_cache,
         ).action()
 
     def supportRecursiveMove(self, destpath: str):
@@ -568,6 +641,7 @@ class FolderResource(WorkspaceResource):
                     api=self.content_api,
                     content=self.content,
                     session=self.session,
+                    path_cache=self.tracim_context.path_cache,
                 ).action()
             else:
                 invalid_path = True
@@ -585,6 +659,7 @@ class FolderResource(WorkspaceResource):
                     api=self.content_api,
                     content=self.content,
                     session=self.session,
+                    path_cache=self.tracim_context.path_cache,
                 ).action()
             else:
                 invalid_path = True
@@ -624,6 +699,7 @@ class FolderResource(WorkspaceResource):
             destination_parent = self.tracim_context.candidate_parent_content
         except ContentNotFound:
             destination_parent = None
+        workspace_id = self.content.workspace_id
         try:
             with new_revision(content=self.content, tm=transaction.manager, session=self.session):
                 # renaming file if needed
@@ -647,10 +723,12 @@ class FolderResource(WorkspaceResource):
         except TracimException as exc:
             raise DAVError(HTTP_FORBIDDEN, contextinfo=str(exc)) from exc
 
+        workspace_ids = {workspace_id, self.content.workspace_id}
         transaction.commit()
+        for workspace_id in workspace_ids:
+            self.tracim_context.path_cache.invalidate_workspace(workspace_id)
 
     def getMemberList(self) -> [_DAVResource]:
-        members = []
         content_api = ContentApi(
             current_user=self.user,
             config=self.provider.app_config,
@@ -660,48 +738,7 @@ class FolderResource(WorkspaceResource):
         visible_children = content_api.get_all(
             [self.content.content_id], content_type_list.Any_SLUG, self.workspace
         )
-
-        for content in visible_children:
-            content_path = "%s/%s" % (
-                self.path,
-                webdav_convert_file_name_to_display(content.file_name),
-            )
-
-            try:
-                if content.type == content_type_list.Folder.slug:
-                    members.append(
-                        FolderResource(
-                            path=content_path,
-                            environ=self.environ,
-                            workspace=self.workspace,
-                            content=content,
-                            tracim_context=self.tracim_context,
-                        )
-                    )
-                elif content.type == content_type_list.File.slug:
-                    self._file_count += 1
-                    members.append(
-                        FileResource(
-                            path=content_path,
-                            environ=self.environ,
-                            content=content,
-                            tracim_context=self.tracim_context,
-                        )
-                    )
-                else:
-                    self._file_count += 1
-                    members.append(
-                        OtherFileResource(
-                            path=content_path,
-                            environ=self.environ,
-                            content=content,
-                            tracim_context=self.tracim_context,
-                        )
-                    )
-            except NotImplementedError:
-                pass
-
-        return members
+        return self._get_member_resources(visible_children, content_api)
 
 
 class FileResource(DAVNonCollection):
@@ -710,14 +747,26 @@ class FileResource(DAVNonCollection):
     """
 
     def __init__(
-        self, path: str, environ: dict, content: Content, tracim_context: "WebdavTracimContext"
+        self,
+        path: str,
+        environ: dict,
+        content: Content,
+        tracim_context: "WebdavTracimContext",
+        checked_authorizations: typing.Optional[typing.Set[AuthorizationChecker]] = None,
+        content_api: typing.Optional[ContentApi] = None,
     ) -> None:
+        """
+        :param checked_authorizations: authorizations already checked for this resource
+        :param content_api: content api to use, it should filter on content namespace, to
+        share same api between all members of a collection.
+        """
         super(FileResource, self).__init__(path, environ)
         self.tracim_context = tracim_context
+        self.checked_authorizations = checked_authorizations or set()
         self.content = content
         self.user = tracim_context.current_user
         self.session = tracim_context.dbsession
-        self.content_api = ContentApi(
+        self.content_api = content_api or ContentApi(
             current_user=self.user,
             config=tracim_context.app_config,
             session=self.session,
@@ -733,7 +782,12 @@ class FileResource(DAVNonCollection):
 
     @webdav_check_right(is_reader)
     def getContentLength(self) -> int:
-        return self.content.depot_file.file.content_length
+        # INFO - G.M - 2019-11-18 - use size stored in revision to not open depot file,
+        # size may be missing for revisions created before it was stored.
+        file_size = self.content.revision.file_size
+        if file_size is None:
+            return self.content.depot_file.file.content_length
+        return file_size
 
     @webdav_check_right(is_reader)
     def getContentType(self) -> str:
@@ -754,9 +808,21 @@ class FileResource(DAVNonCollection):
     def getLastModified(self) -> float:
         return mktime(self.content.updated.timetuple())
 
+    def getEtag(self) -> str:
+        # INFO - G.M - 2019-11-19 - depot files are never modified, a new file is stored
+        # for each new file data, so depot file id identify content of file.
+        return self.content.depot_file.file_id
+
+    def supportRanges(self) -> bool:
+        return True
+
     @webdav_check_right(is_reader)
     def getContent(self) -> typing.BinaryIO:
-        return self.content.depot_file.file
+        # INFO - G.M - 2019-11-19 - wsgidav seek file to requested range then read it
+        # by blocks: open file of depot storage directly as depot stored files
+        # are not seekable.
+        depot_stored_file = self.content.depot_file.file  # type: StoredFile
+        return open(depot_stored_file._file_path, "rb")
 
     def beginWrite(self, contentType: str = None) -> FakeFileStream:
         try:
@@ -769,6 +835,8 @@ class FileResource(DAVNonCollection):
             FileSizeOverOwnerEmptySpace,
         ) as exc:
             raise DAVError(HTTP_REQUEST_ENTITY_TOO_LARGE, contextinfo=str(exc))
+        # INFO - G.M - 2019-11-19 - wsgidav directly writes in returned stream,
+        # begin write of FakeFileStream to open depot upload stream.
         return FakeFileStream(
             content=self.content,
             content_api=self.content_api,
@@ -776,7 +844,7 @@ class FileResource(DAVNonCollection):
             workspace=self.content.workspace,
             path=self.path,
             session=self.session,
-        )
+        ).beginWrite(contentType)
 
     def moveRecursive(self, destpath):
         """As we support recursive move, copymovesingle won't be called, though with copy it'll be called
@@ -813,6 +881,7 @@ class FileResource(DAVNonCollection):
                     api=self.content_api,
                     content=self.content,
                     session=self.session,
+                    path_cache=self.tracim_context.path_cache,
                 ).action()
             else:
                 invalid_path = True
@@ -830,6 +899,7 @@ class FileResource(DAVNonCollection):
                     api=self.content_api,
                     content=self.content,
                     session=self.session,
+                    path_cache=self.tracim_context.path_cache,
                 ).action()
             else:
                 invalid_path = True
@@ -863,6 +933,7 @@ class FileResource(DAVNonCollection):
         """
 
         workspace = self.content.workspace
+        workspace_id = workspace.workspace_id
         parent = self.content.parent
         destpath = normpath(destpath)
         self.tracim_context.set_destpath(destpath)
@@ -917,7 +988,10 @@ class FileResource(DAVNonCollection):
         except TracimException as exc:
             raise DAVError(HTTP_FORBIDDEN, contextinfo=str(exc)) from exc
 
+        workspace_ids = {workspace_id, self.content.workspace_id}
         transaction.commit()
+        for workspace_id in workspace_ids:
+            self.tracim_context.path_cache.invalidate_workspace(workspace_id)
 
     def copyMoveSingle(self, destpath, isMove):
         if isMove:
@@ -986,6 +1060,7 @@ class FileResource(DAVNonCollection):
             api=self.content_api,
             content=self.content,
             session=self.session,
+            path_cache=self.tracim_context.path_cache,
         ).action()
 
 
@@ -995,15 +1070,32 @@ class OtherFileResource(FileResource):
     """
 
     def __init__(
-        self, path: str, environ: dict, content: Content, tracim_context: "WebdavTracimContext"
+        self,
+        path: str,
+        environ: dict,
+        content: Content,
+        tracim_context: "WebdavTracimContext",
+        checked_authorizations: typing.Optional[typing.Set[AuthorizationChecker]] = None,
+        content_api: typing.Optional[ContentApi] = None,
+        comments: typing.Optional[typing.List[Content]] = None,
     ):
+        """
+        :param comments: already loaded comments of thread
+        """
         super(OtherFileResource, self).__init__(
-            path, environ, content, tracim_context=tracim_context
+            path,
+            environ,
+            content,
+            tracim_context=tracim_context,
+            checked_authorizations=checked_authorizations,
+            content_api=content_api,
         )
 
         self.content_revision = self.content.revision
 
-        self.content_designed = self.design()
+        self._comments = comments
+        self._content_designed = None  # type: typing.Optional[str]
+        self._content_designed_data = None  # type: typing.Optional[bytes]
 
         # workaround for consistent request as we have to return a resource with a path ending with .html
         # when entering folder for windows, but only once because when we select it again it would have .html.html
@@ -1024,26 +1116,43 @@ class OtherFileResource(FileResource):
 
     @webdav_check_right(is_reader)
     def getContentLength(self) -> int:
-        return len(self.content_designed)
+        return len(self.content_designed_data)
 
     @webdav_check_right(is_reader)
     def getContentType(self) -> str:
         return "text/html; charset=utf-8"
 
+    def getEtag(self) -> None:
+        # INFO - G.M - 2019-11-19 - designed html change with comments of content,
+        # not only with its revision.
+        return None
+
+    def supportRanges(self) -> bool:
+        return False
+
     @webdav_check_right(is_reader)
     def getContent(self):
-        # TODO - G.M - 2019-06-13 - find solution to handle properly big file here without having
-        # big file in memory. see https://github.com/tracim/tracim/issues/1913
-        filestream = compat.BytesIO()
-
-        filestream.write(bytes(self.content_designed, "utf-8"))
-        filestream.seek(0)
-        return filestream
+        return compat.BytesIO(self.content_designed_data)
 
     @webdav_check_right(is_reader)
     def getDisplayInfo(self):
         return {"type": self.content.type.capitalize()}
 
+    @property
+    def content_designed(self) -> str:
+        # INFO - G.M - 2019-11-18 - design only when needed, not when listing collection
+        if self._content_designed is None:
+            self._content_designed = self.design()
+        return self._content_designed
+
+    @property
+    def content_designed_data(self) -> bytes:
+        # INFO - G.M - 2019-11-19 - encode designed html once, content length is the
+        # length of encoded html, not the number of characters of html.
+        if self._content_designed_data is None:
+            self._content_designed_data = self.content_designed.encode("utf-8")
+        return self._content_designed_data
+
     def design(self):
         # TODO - G.M - 2019-06-13 - find solution to handle properly big file here without having
         # big file in memory. see https://github.com/tracim/tracim/issues/1913
@@ -1053,5 +1162,9 @@ class OtherFileResource(FileResource):
             return design_thread(
                 self.content,
                 self.content_revision,
-                self.content_api.get_all([self.content.content_id], content_type_list.Comment.slug),
+                self._comments
+                if self._comments is not None
+                else self.content_api.get_all(
+                    [self.content.content_id], content_type_list.Comment.slug
+                ),
             )
@@ -1,6 +1,11 @@
 # -*- coding: utf-8 -*-
-import tempfile
+import os
+import threading
+import typing
 
+from depot.fields.upload import UploadedFile
+from depot.io.utils import FileIntent
+from depot.manager import DepotManager
 from sqlalchemy.orm import Session
 import transaction
 from wsgidav import util
@@ -29,6 +34,67 @@ class SpecialFolderExtension(object):
     History = "/.history"
 
 
+class DepotFileStreamWriter(object):
+    """
+    File-like object storing in depot the data written in it, as it arrives.
+    Written data go through a pipe read by a thread which stores the file in depot, so
+    the uploaded file is never fully kept in memory nor copied in a temporary file.
+    Writing blocks while the storage thread is late, which bounds memory used.
+    """
+
+    def __init__(self, filename: str, mimetype: str) -> None:
+        read_fd, write_fd = os.pipe()
+        self._reader = os.fdopen(read_fd, "rb")
+        self._writer = os.fdopen(write_fd, "wb")
+        self._uploaded_file = None  # type: typing.Optional[UploadedFile]
+        self._error = None  # type: typing.Optional[Exception]
+        self._thread = threading.Thread(
+            target=self._store, args=(filename, mimetype), name="webdav-upload", daemon=True
+        )
+        self._thread.start()
+
+    def _store(self, filename: str, mimetype: str) -> None:
+        try:
+            self._uploaded_file = UploadedFile(FileIntent(self._reader, filename, mimetype))
+        except Exception as exc:
+            self._error = exc
+        finally:
+            self._reader.close()
+
+    def write(self, data: bytes) -> None:
+        try:
+            self._writer.write(data)
+        except BrokenPipeError as exc:
+            # INFO - G.M - 2019-11-19 - storage thread stopped reading data,
+            # raise the error which stopped it.
+            self._thread.join()
+            raise (self._error or exc) from exc
+
+    def close(self) -> UploadedFile:
+        """
+        End writing and wait for the file to be fully stored in depot.
+        :return: stored file, to be set as depot_file of a revision.
+        """
+        if not self._writer.closed:
+            self._writer.close()
+        self._thread.join()
+        if self._error:
+            raise self._error
+        return self._uploaded_file
+
+    def abort(self) -> None:
+        """
+        Stop writing and delete the file from depot if it was already stored.
+        """
+        try:
+            self.close()
+        except Exception:
+            pass
+        if self._uploaded_file:
+            DepotManager.get(self._uploaded_file.depot_name).delete(self._uploaded_file.file_id)
+            self._uploaded_file = None
+
+
 class FakeFileStream(object):
     """
     Fake a FileStream that we're giving to wsgidav to receive data and create files / new revisions
@@ -63,15 +129,10 @@ class FakeFileStream(object):
         :param content:
         :param parent:
         """
-        # TODO - G.M - 2019-06-13 - use true streaming mecanism,
-        # instead of a true streaming mecanism we use
-        # a temporary file to avoid big file in memory without needing to refactor all
-        # upload mecanism of webdav
-        # see https://github.com/tracim/tracim/issues/1911
-        self.temp_file = tempfile.NamedTemporaryFile(suffix="tracim_webdav_upload_")
         self._session = session
-        self._file_name = file_name if file_name != "" else self._content.file_name
         self._content = content
+        self._file_name = file_name if file_name != "" else content.file_name
+        self._upload_stream = None  # type: typing.Optional[DepotFileStreamWriter]
         self._api = content_api
         self._workspace = workspace
         self._parent = parent
@@ -89,39 +150,47 @@ class FakeFileStream(object):
         Called by wsgidav, it expect a filestream which possess both 'write' and 'close' operation to write
         the file content.
         """
+        if self._content is None:
+            mimetype = util.guessMimeType(self._file_name)
+        else:
+            mimetype = util.guessMimeType(self._content.file_name)
+        self._upload_stream = DepotFileStreamWriter(self._file_name, mimetype)
         return self
 
     def endWrite(self, withErrors: bool):
         """
         Called by request_server when finished writing everything.
         As we call operation to create new content or revision in the close operation, called before endWrite, there
-        is nothing to do here.
+        is nothing to do here, except removing already stored data if upload failed.
         """
-        pass
+        if withErrors and self._upload_stream:
+            self._upload_stream.abort()
 
-    def write(self, s: str):
+    def write(self, s: bytes):
         """
-        Called by request_server when writing content to files, we put it inside a filestream
+        Called by request_server when writing content to files, data are streamed to depot storage
         """
-        self.temp_file.write(s)
+        self._upload_stream.write(s)
 
     def close(self):
         """
         Called by request_server when the file content has been written. We either add a new content or create
         a new revision
         """
-
-        self.temp_file.seek(0)
-
-        if self._content is None:
-            self.create_file()
-        else:
-            self.update_file()
-
-        transaction.commit()
-        self.temp_file.close()
-
-    def create_file(self):
+        uploaded_file = self._upload_stream.close()
+        try:
+            if self._content is None:
+                self.create_file(uploaded_file)
+            else:
+                self.update_file(uploaded_file)
+            transaction.commit()
+        except Exception:
+            # INFO - G.M - 2019-11-19 - file is already stored in depot, depot only
+            # removes files it stored itself on rollback.
+            self._upload_stream.abort()
+            raise
+
+    def create_file(self, uploaded_file: UploadedFile):
         """
         Called when this is a new file; will create a new Content initialized with the correct content
         """
@@ -138,14 +207,14 @@ class FakeFileStream(object):
                     do_save=False,
                 )
                 self._api.update_file_data(
-                    file, self._file_name, util.guessMimeType(self._file_name), self.temp_file
+                    file, self._file_name, util.guessMimeType(self._file_name), uploaded_file
                 )
                 self._api.execute_created_content_actions(file)
         except TracimException as exc:
             raise DAVError(HTTP_FORBIDDEN) from exc
         self._api.save(file, ActionDescription.CREATION)
 
-    def update_file(self):
+    def update_file(self, uploaded_file: UploadedFile):
         """
         Called when we're updating an existing content; we create a new revision and update the file content
         """
@@ -155,7 +224,7 @@ class FakeFileStream(object):
                     self._content,
                     self._file_name,
                     util.guessMimeType(self._content.file_name),
-                    self.temp_file,
+                    uploaded_file,
                 )
         except TracimException as exc:
             raise DAVError(HTTP_FORBIDDEN) from exc
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+from sqlalchemy import Column
+from sqlalchemy import DateTime
+from sqlalchemy import Integer
+from sqlalchemy import Text
+from sqlalchemy import Unicode
+
+from tracim_backend.models.meta import DeclarativeBase
+
+
+class AgendaSyncState(DeclarativeBase):
+    """
+    Props of an agenda as set on radicale server by last successful caldav sync.
+    Agendas whose props did not change since are skipped by next sync.
+    """
+
+    __tablename__ = "agenda_sync_states"
+
+    # INFO - G.M - 2019-11-30 - agenda_type is an AgendaType value, owner_id is
+    # user_id for private agendas and workspace_id for workspace ones.
+    agenda_type = Column(Unicode(32), primary_key=True)
+    owner_id = Column(Integer, primary_key=True, autoincrement=False)
+    agenda_name = Column(Unicode(1024), nullable=False, default="")
+    agenda_description = Column(Text(), nullable=False, default="")
+    synced = Column(DateTime, unique=False, nullable=False, default=datetime.utcnow)
@@ -34,6 +34,11 @@ from tracim_backend.models.data import UserRoleInWorkspace
 from tracim_backend.models.data import Workspace
 from tracim_backend.models.roles import WorkspaceRoles
 
+if typing.TYPE_CHECKING:
+    # INFO - G.M - 2019-11-07 - import for type-checking only, setted here to
+    # avoid circular import issue
+    from tracim_backend.lib.core.content import ContentApi
+
 
 class AboutModel(object):
     def __init__(
@@ -418,6 +423,8 @@ class ContentFilter(object):
         page_nb: int = None,
         limit: int = None,
         namespaces_filter: str = None,
+        count: int = None,
+        page_token: str = None,
     ) -> None:
         self.parent_ids = string_to_list(parent_ids, ",", int)
         self.namespaces_filter = string_to_list(namespaces_filter, ",", ContentNamespaces)
@@ -430,17 +437,39 @@ class ContentFilter(object):
         self.page_nb = page_nb
         self.label = label
         self.content_type = content_type
+        self.count = count
+        self.page_token = page_token
 
 
 class ActiveContentFilter(object):
-    def __init__(self, limit: int = None, before_content_id: datetime = None) -> None:
+    def __init__(
+        self,
+        limit: int = None,
+        before_content_id: datetime = None,
+        count: int = None,
+        page_token: str = None,
+    ) -> None:
         self.limit = limit
         self.before_content_id = before_content_id
+        self.count = count
+        self.page_token = page_token
 
 
 class ContentIdsQuery(object):
-    def __init__(self, content_ids: str = None) -> None:
+    def __init__(self, content_ids: str = None, count: int = None, page_token: str = None) -> None:
         self.content_ids = string_to_list(content_ids, ",", int)
+        self.count = count
+        self.page_token = page_token
+
+
+class PaginationQuery(object):
+    """
+    Keyset pagination query model
+    """
+
+    def __init__(self, count: int = None, page_token: str = None) -> None:
+        self.count = count
+        self.page_token = page_token
 
 
 class RoleUpdate(object):
@@ -775,7 +804,7 @@ class WorkspaceInContext(object):
 
     @property
     def used_space(self) -> int:
-        return self.workspace.get_size()
+        return self.workspace.used_space
 
     @property
     def allowed_space(self) -> int:
@@ -875,12 +904,46 @@ class ContentInContext(object):
     """
 
     def __init__(
-        self, content: Content, dbsession: Session, config: CFG, user: User = None
+        self,
+        content: Content,
+        dbsession: Session,
+        config: CFG,
+        user: User = None,
+        content_api: typing.Optional["ContentApi"] = None,
+        author: typing.Optional[User] = None,
+        actives_shares: typing.Optional[int] = None,
+        read_by_user: typing.Optional[bool] = None,
     ) -> None:
         self.content = content
         self.dbsession = dbsession
         self.config = config
         self._user = user
+        # INFO - G.M - 2019-11-07 - content_api, author, actives_shares and read_by_user
+        # can be prefetched for a whole list of contents,
+        # see ContentApi.get_contents_in_context
+        self._content_api = content_api
+        self._author = author
+        self._actives_shares = actives_shares
+        self._read_by_user = read_by_user
+
+    def _get_content_api(self) -> "ContentApi":
+        """
+        Return a ContentApi showing all contents, shared by all properties
+        of this object.
+        """
+        if not self._content_api:
+            from tracim_backend.lib.core.content import ContentApi
+
+            self._content_api = ContentApi(
+                current_user=self._user,
+                session=self.dbsession,
+                config=self.config,
+                show_deleted=True,
+                show_archived=True,
+                show_active=True,
+                show_temporary=True,
+            )
+        return self._content_api
 
     # Default
     @property
@@ -909,18 +972,13 @@ class ContentInContext(object):
     @property
     def parent(self) -> typing.Optional["ContentInContext"]:
         if self.content.parent:
-            from tracim_backend.lib.core.content import ContentApi
-
-            content_api = ContentApi(
-                current_user=self._user,
-                session=self.dbsession,
-                config=self.config,
-                show_deleted=True,
-                show_archived=True,
-                show_active=True,
-                show_temporary=True,
+            return ContentInContext(
+                self.content.parent,
+                self.dbsession,
+                self.config,
+                self._user,
+                content_api=self._get_content_api(),
             )
-            return content_api.get_content_in_context(self.content.parent)
         return None
 
     @property
@@ -937,18 +995,8 @@ class ContentInContext(object):
     @property
     def comments(self) -> typing.List["ContentInContext"]:
         comments_in_context = []
+        content_api = self._get_content_api()
         for comment in self.content.get_comments():
-            from tracim_backend.lib.core.content import ContentApi
-
-            content_api = ContentApi(
-                current_user=self._user,
-                session=self.dbsession,
-                config=self.config,
-                show_deleted=True,
-                show_archived=True,
-                show_active=True,
-                show_temporary=True,
-            )
             comment_in_context = content_api.get_content_in_context(comment)
             comments_in_context.append(comment_in_context)
         return comments_in_context
@@ -976,17 +1024,7 @@ class ContentInContext(object):
 
     @property
     def archived_through_parent_id(self) -> typing.Optional[int]:
-        from tracim_backend.lib.core.content import ContentApi
-
-        content_api = ContentApi(
-            current_user=self._user,
-            session=self.dbsession,
-            config=self.config,
-            show_deleted=True,
-            show_archived=True,
-            show_active=True,
-            show_temporary=True,
-        )
+        content_api = self._get_content_api()
         return content_api.get_archived_parent_id(self.content)
 
     @property
@@ -995,17 +1033,7 @@ class ContentInContext(object):
 
     @property
     def deleted_through_parent_id(self) -> typing.Optional[int]:
-        from tracim_backend.lib.core.content import ContentApi
-
-        content_api = ContentApi(
-            current_user=self._user,
-            session=self.dbsession,
-            config=self.config,
-            show_deleted=True,
-            show_archived=True,
-            show_active=True,
-            show_temporary=True,
-        )
+        content_api = self._get_content_api()
         return content_api.get_deleted_parent_id(self.content)
 
     @property
@@ -1014,17 +1042,7 @@ class ContentInContext(object):
 
     @property
     def is_editable(self) -> bool:
-        from tracim_backend.lib.core.content import ContentApi
-
-        content_api = ContentApi(
-            current_user=self._user,
-            session=self.dbsession,
-            config=self.config,
-            show_deleted=True,
-            show_archived=True,
-            show_active=True,
-            show_temporary=True,
-        )
+        content_api = self._get_content_api()
         return content_api.is_editable(self.content)
 
     @property
@@ -1033,9 +1051,8 @@ class ContentInContext(object):
 
     @property
     def author(self) -> UserInContext:
-        return UserInContext(
-            dbsession=self.dbsession, config=self.config, user=self.content.first_revision.owner
-        )
+        author = self._author or self.content.first_revision.owner
+        return UserInContext(dbsession=self.dbsession, config=self.config, user=author)
 
     @property
     def current_revision_id(self) -> int:
@@ -1056,7 +1073,7 @@ class ContentInContext(object):
     @property
     def last_modifier(self) -> UserInContext:
         return UserInContext(
-            dbsession=self.dbsession, config=self.config, user=self.content.last_revision.owner
+            dbsession=self.dbsession, config=self.config, user=self.content.revision.owner
         )
 
     # Context-related
@@ -1076,7 +1093,10 @@ class ContentInContext(object):
     @property
     def read_by_user(self) -> bool:
         assert self._user
-        return not self.content.has_new_information_for(self._user)
+        if self._read_by_user is None:
+            read_statuses = self._get_content_api().get_read_statuses([self.content_id])
+            self._read_by_user = read_statuses[self.content_id]
+        return self._read_by_user
 
     @property
     def frontend_url(self) -> str:
@@ -1095,17 +1115,7 @@ class ContentInContext(object):
         :return: page_nb of content if available, None if unavailable
         """
         if self.content.depot_file:
-            from tracim_backend.lib.core.content import ContentApi
-
-            content_api = ContentApi(
-                current_user=self._user,
-                session=self.dbsession,
-                config=self.config,
-                show_deleted=True,
-                show_archived=True,
-                show_active=True,
-                show_temporary=True,
-            )
+            content_api = self._get_content_api()
             return content_api.get_preview_page_nb(
                 self.content.revision_id, file_extension=self.content.file_extension
             )
@@ -1149,17 +1159,7 @@ class ContentInContext(object):
         if not self.content.depot_file:
             return False
 
-        from tracim_backend.lib.core.content import ContentApi
-
-        content_api = ContentApi(
-            current_user=self._user,
-            session=self.dbsession,
-            config=self.config,
-            show_deleted=True,
-            show_archived=True,
-            show_active=True,
-            show_temporary=True,
-        )
+        content_api = self._get_content_api()
         return content_api.has_pdf_preview(
             self.content.revision_id, file_extension=self.content.file_extension
         )
@@ -1172,17 +1172,7 @@ class ContentInContext(object):
         if not self.content.depot_file:
             return False
 
-        from tracim_backend.lib.core.content import ContentApi
-
-        content_api = ContentApi(
-            current_user=self._user,
-            session=self.dbsession,
-            config=self.config,
-            show_deleted=True,
-            show_archived=True,
-            show_active=True,
-            show_temporary=True,
-        )
+        content_api = self._get_content_api()
         return content_api.has_jpeg_preview(
             self.content.revision_id, file_extension=self.content.file_extension
         )
@@ -1208,6 +1198,8 @@ class ContentInContext(object):
 
     @property
     def actives_shares(self) -> int:
+        if self._actives_shares is not None:
+            return self._actives_shares
         # TODO - G.M - 2019-08-12 - handle case where share app is not enabled, by
         # not starting it there. see #2189
         from tracim_backend.applications.share.lib import ShareLib
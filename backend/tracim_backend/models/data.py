@@ -18,15 +18,21 @@ from sqlalchemy import Enum
 from sqlalchemy import ForeignKey
 from sqlalchemy import Index
 from sqlalchemy import Sequence
-from sqlalchemy import func
 from sqlalchemy import inspect
+from sqlalchemy import or_
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Query
+from sqlalchemy.orm import aliased
 from sqlalchemy.orm import backref
+from sqlalchemy.orm import contains_eager
+from sqlalchemy.orm import joinedload
 from sqlalchemy.orm import object_session
 from sqlalchemy.orm import relationship
 from sqlalchemy.orm.attributes import InstrumentedAttribute
 from sqlalchemy.orm.collections import attribute_mapped_collection
+from sqlalchemy.sql.selectable import CTE
+from sqlalchemy.types import BigInteger
 from sqlalchemy.types import Boolean
 from sqlalchemy.types import DateTime
 from sqlalchemy.types import Integer
@@ -91,6 +97,15 @@ class Workspace(DeclarativeBase):
     )
     owner_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
     owner = relationship("User", remote_side=[User.user_id])
+    # INFO - G.M - 2019-11-08 - size of files in this workspace, kept up to date on each
+    # new revision by update_workspaces_used_space, see get_size() for details.
+    used_space = Column(
+        BigInteger,
+        unique=False,
+        nullable=False,
+        default=0,
+        server_default=sqlalchemy.sql.expression.literal(0),
+    )
 
     @hybrid_property
     def contents(self) -> ["Content"]:
@@ -105,16 +120,25 @@ class Workspace(DeclarativeBase):
         return contents
 
     def get_size(self, include_deleted: bool = False, include_archived: bool = False) -> int:
-        size = 0
-        for revision in self.revisions:
-            # INFO - G.M - 2019-09-02 - Don't count deleted and archived file.
-            if not include_deleted and revision.node.is_deleted:
-                continue
-            if not include_archived and revision.node.is_archived:
-                continue
-            if revision.depot_file:
-                size += revision.depot_file.file.content_length
-        return size
+        """
+        Compute size of all files revisions of this workspace from database.
+        Files of deleted and archived contents are not counted by default.
+        To get this value without computing it, use used_space instead.
+        """
+        current_revision = aliased(ContentRevisionRO)
+        query = (
+            object_session(self)
+            .query(sqlalchemy.func.coalesce(sqlalchemy.func.sum(ContentRevisionRO.file_size), 0))
+            .join(Content, Content.id == ContentRevisionRO.content_id)
+            .join(current_revision, Content.cached_revision_id == current_revision.revision_id)
+            .filter(ContentRevisionRO.workspace_id == self.workspace_id)
+        )
+        # INFO - G.M - 2019-09-02 - Don't count deleted and archived file.
+        if not include_deleted:
+            query = query.filter(current_revision.is_deleted == False)  # noqa: E712
+        if not include_archived:
+            query = query.filter(current_revision.is_archived == False)  # noqa: E712
+        return query.scalar()
 
     def get_user_role(self, user: User) -> int:
         for role in user.roles:
@@ -126,7 +150,7 @@ class Workspace(DeclarativeBase):
         """ this method is for interoperability with Content class"""
         return self.label
 
-    def get_allowed_content_types(self) -> typing.List[ContentType]:
+    def get_allowed_content_types(self) -> typing.Sequence[ContentType]:
         # @see Content.get_allowed_content_types()
         return content_type_list.endpoint_allowed_types()
 
@@ -634,6 +658,8 @@ class ContentRevisionRO(DeclarativeBase):
     #  http://depot.readthedocs.io/en/latest/#attaching-files-to-models
     # http://depot.readthedocs.io/en/latest/api.html#module-depot.fields
     depot_file = Column(UploadedFileField, unique=False, nullable=True)
+    # INFO - G.M - 2019-11-08 - size of depot_file, set when revision is flushed
+    file_size = Column(BigInteger, unique=False, nullable=True)
     properties = Column("properties", Text(), unique=False, nullable=False, default="")
 
     type = Column(Unicode(32), unique=False, nullable=False)
@@ -688,6 +714,7 @@ class ContentRevisionRO(DeclarativeBase):
         "workspace_id",
         "is_temporary",
         "content_namespace",
+        "file_size",
     )
 
     # Read by must be used like this:
@@ -714,7 +741,9 @@ class ContentRevisionRO(DeclarativeBase):
         return ContentRevisionRO.label + ContentRevisionRO.file_extension
 
     @classmethod
-    def new_from(cls, revision: "ContentRevisionRO") -> "ContentRevisionRO":
+    def new_from(
+        cls, revision: "ContentRevisionRO", reuse_depot_file: bool = False
+    ) -> "ContentRevisionRO":
         """
 
         Return new instance of ContentRevisionRO where properties are copied from revision parameter.
@@ -722,6 +751,8 @@ class ContentRevisionRO(DeclarativeBase):
 
         :param revision: revision to copy
         :type revision: ContentRevisionRO
+        :param reuse_depot_file: share depot file of revision instead of storing
+        a new copy of it.
         :return: new revision from revision parameter
         :rtype: ContentRevisionRO
         """
@@ -732,7 +763,9 @@ class ContentRevisionRO(DeclarativeBase):
             setattr(new_rev, column_name, column_value)
 
         new_rev.updated = datetime.utcnow()
-        if revision.depot_file:
+        if revision.depot_file and reuse_depot_file:
+            new_rev.depot_file = cls._get_shared_depot_file(revision.depot_file)
+        elif revision.depot_file:
             try:
                 new_rev.depot_file = FileIntent(
                     revision.depot_file.file, revision.file_name, revision.file_mimetype
@@ -747,12 +780,27 @@ class ContentRevisionRO(DeclarativeBase):
 
         return new_rev
 
+    @classmethod
+    def _get_shared_depot_file(cls, depot_file: UploadedFile) -> UploadedFile:
+        """
+        Return a reference to an already stored depot file, without storing
+        the file again.
+        """
+        # INFO - G.M - 2019-11-13 - depot files are never modified, only replaced
+        # by new ones, so revisions can share them. Depot deletes "files" listed
+        # in file info on rollback or on row deletion: the shared reference
+        # must not list them to not delete file of original revision.
+        file_info = dict(depot_file)
+        file_info["files"] = []
+        return UploadedFile(file_info)
+
     @classmethod
     def copy(
         cls,
         revision: "ContentRevisionRO",
         parent: "Content",
         new_content_namespace: ContentNamespaces,
+        reuse_depot_file: bool = False,
     ) -> "ContentRevisionRO":
 
         copy_rev = cls()
@@ -772,7 +820,9 @@ class ContentRevisionRO(DeclarativeBase):
             setattr(copy_rev, column_name, column_value)
 
         # copy attached_file
-        if revision.depot_file:
+        if revision.depot_file and reuse_depot_file:
+            copy_rev.depot_file = cls._get_shared_depot_file(revision.depot_file)
+        elif revision.depot_file:
             try:
                 copy_rev.depot_file = FileIntent(
                     revision.depot_file.file, revision.file_name, revision.file_mimetype
@@ -830,6 +880,14 @@ class ContentRevisionRO(DeclarativeBase):
     def get_label(self) -> str:
         return self.label or self.file_name or ""
 
+    def get_depot_file_size(self) -> typing.Optional[int]:
+        """
+        Read size of file of this revision from depot, None if revision has no file.
+        """
+        if not self.depot_file:
+            return None
+        return self.depot_file.file.content_length
+
     def get_last_action(self) -> ActionDescription:
         return ActionDescription(self.revision_type)
 
@@ -876,6 +934,10 @@ class Content(DeclarativeBase):
                   .filter(Content.label == 'foo')
                   .one()
 
+    Last revision of each content is stored in content.cached_revision_id, this value is updated
+    each time a new revision is created through Content.new_revision(), so joining content with
+    its current revision is a simple equi-join on the revision primary key.
+
     ContentApi provide also prepared Content at tracim.lib.content.ContentApi#get_canonical_query:
 
     content = ContentApi.get_canonical_query()
@@ -890,6 +952,16 @@ class Content(DeclarativeBase):
     )  # This flag allow to serialize a given revision if required by the user
 
     id = Column(Integer, primary_key=True)
+    # INFO - G.M - 2019-11-05 - pointer to the last revision of content, avoid the need of
+    # a correlated subquery to find it.
+    cached_revision_id = Column(
+        Integer,
+        ForeignKey("content_revisions.revision_id", use_alter=True, ondelete="SET NULL"),
+        nullable=True,
+    )
+    current_revision = relationship(
+        "ContentRevisionRO", uselist=False, foreign_keys=[cached_revision_id], post_update=True
+    )
     # TODO - A.P - 2017-09-05 - revisions default sorting
     # The only sorting that makes sens is ordering by "updated" field. But:
     # - its content will soon replace the one of "created",
@@ -1210,46 +1282,76 @@ class Content(DeclarativeBase):
         :return: list of children Content
         :rtype Content
         """
-        # TODO - G.M - 2019-02-08 - Refactor this code to be more efficient
-        all_childrens_revisions = (
-            object_session(self)
-            .query(ContentRevisionRO)
-            .filter(ContentRevisionRO.parent_id == self.content_id)
-            .order_by(ContentRevisionRO.content_id)
+        return (
+            self._get_current_revision_query()
+            .filter(ContentRevisionRO.parent_id == self.id)
+            .order_by(Content.id)
             .all()
         )
-        children_content_ids = set([cr.content_id for cr in all_childrens_revisions])
-        # INFO - G.M - 2019-05-06 - we get max revision (latest) for each content (defined
-        # by content id). As we use a group_by , what we retrieve here
-        #  is not a list of ContentRevisionRO, but a standard object of sqlalchemy.
-        all_up_to_date_revisions_result = (
+
+    def _get_current_revision_query(self) -> Query:
+        """
+        Query of Content joined with their current revision, current revision
+        being loaded in the same query.
+        """
+        return (
             object_session(self)
-            .query(func.max(ContentRevisionRO.revision_id))
-            .filter(ContentRevisionRO.content_id.in_(children_content_ids))
-            .group_by(ContentRevisionRO.content_id)
-            .order_by(ContentRevisionRO.content_id)
-            .all()
+            .query(Content)
+            .join(ContentRevisionRO, Content.cached_revision_id == ContentRevisionRO.revision_id)
+            .options(contains_eager(Content.current_revision))
         )
 
-        all_up_to_date_revisions_ids = [value[0] for value in all_up_to_date_revisions_result]
-        valid_children = []
-        for revision in all_childrens_revisions:
-            if revision.revision_id in all_up_to_date_revisions_ids:
-                valid_children.append(revision.node)
-
-        return valid_children
+    def _get_children_tree_cte(self) -> CTE:
+        """
+        Recursive CTE of content_id of all children of content (including children of
+        children...), according to the current revision of each content.
+        """
+        session = object_session(self)
+        children_tree = (
+            session.query(ContentRevisionRO.content_id.label("content_id"))
+            .join(Content, Content.cached_revision_id == ContentRevisionRO.revision_id)
+            .filter(ContentRevisionRO.parent_id == self.id)
+            .cte("children_tree", recursive=True)
+        )
+        # INFO - G.M - 2019-11-06 - use UNION instead of UNION ALL to be sure to stop
+        # even if database contains a cycle in content tree.
+        return children_tree.union(
+            session.query(ContentRevisionRO.content_id)
+            .join(Content, Content.cached_revision_id == ContentRevisionRO.revision_id)
+            .join(children_tree, ContentRevisionRO.parent_id == children_tree.c.content_id)
+        )
 
     def get_children(self, recursively: bool = False) -> ["Content"]:
         """
         Get all children of content recursively or not (including children of children...)
         """
-        children = []
-        for child in self.children:
-            children.append(child)
-            if recursively:
-                children.extend(child.get_children(recursively=recursively))
-        children = sorted(children, key=lambda child: child.content_id)
-        return children
+        if not recursively:
+            return self.children
+        children_tree = self._get_children_tree_cte()
+        return (
+            self._get_current_revision_query()
+            .join(children_tree, children_tree.c.content_id == Content.id)
+            .order_by(Content.id)
+            .all()
+        )
+
+    def get_children_ids(self, recursively: bool = False) -> typing.List[int]:
+        """
+        Get ids of all children of content recursively or not, without loading them,
+        ordered by content id like get_children.
+        """
+        session = object_session(self)
+        if not recursively:
+            query = (
+                session.query(ContentRevisionRO.content_id)
+                .join(Content, Content.cached_revision_id == ContentRevisionRO.revision_id)
+                .filter(ContentRevisionRO.parent_id == self.id)
+                .order_by(ContentRevisionRO.content_id)
+            )
+        else:
+            children_tree = self._get_children_tree_cte()
+            query = session.query(children_tree.c.content_id).order_by(children_tree.c.content_id)
+        return [content_id for (content_id,) in query.all()]
 
     @property
     def revision(self) -> ContentRevisionRO:
@@ -1278,32 +1380,48 @@ class Content(DeclarativeBase):
     @depot_file.setter
     def depot_file(self, value):
         self.revision.depot_file = value
+        # INFO - G.M - 2019-11-08 - size of file of new revision is read from depot
+        # on flush, see update_workspaces_used_space
+        if not inspect(self.revision).has_identity:
+            self.revision.file_size = None
 
     def get_current_revision(self) -> ContentRevisionRO:
+        if self.current_revision:
+            return self.current_revision
+
         if not self.revisions:
             return self.new_revision()
 
+        # INFO - G.M - 2019-11-05 - cached revision is not set (not migrated data or
+        # revisions manually added), fallback to last revision and fix cached value.
         # If last revisions revision don't have revision_id, return it we just add it.
         if self.revisions[-1].revision_id is None:
-            return self.revisions[-1]
-
-        # Revisions should be ordred by revision_id but we ensure that here
-        revisions = sorted(self.revisions, key=lambda revision: revision.revision_id)
-        return revisions[-1]
+            self.current_revision = self.revisions[-1]
+        else:
+            # Revisions should be ordred by revision_id but we ensure that here
+            revisions = sorted(self.revisions, key=lambda revision: revision.revision_id)
+            self.current_revision = revisions[-1]
+        return self.current_revision
 
-    def new_revision(self) -> ContentRevisionRO:
+    def new_revision(self, reuse_depot_file: bool = False) -> ContentRevisionRO:
         """
         Return and assign to this content a new revision.
         If it's a new content, revision is totally new.
         If this content already own revision, revision is build from last revision.
+        :param reuse_depot_file: share depot file of last revision instead of
+        storing a new copy of it.
         :return:
         """
         if not self.revisions:
             self.revisions.append(ContentRevisionRO())
+            self.current_revision = self.revisions[0]
             return self.revisions[0]
 
-        new_rev = ContentRevisionRO.new_from(self.get_current_revision())
+        new_rev = ContentRevisionRO.new_from(
+            self.get_current_revision(), reuse_depot_file=reuse_depot_file
+        )
         self.revisions.append(new_rev)
+        self.current_revision = new_rev
         return new_rev
 
     def get_valid_children(self, content_types: list = None) -> ["Content"]:
@@ -1508,13 +1626,23 @@ class Content(DeclarativeBase):
 
     def get_tree_revisions(self) -> typing.List[ContentRevisionRO]:
         """Get all revision sorted by id of content and all his children recursively"""
-        revisions = []  # type: typing.List[ContentRevisionRO]
-        for revision in self.revisions:
-            revisions.append(revision)
-        for child in self.get_children(recursively=True):
-            revisions.extend(child.revisions)
-        revisions = sorted(revisions, key=lambda revision: revision.revision_id)
-        return revisions
+        session = object_session(self)
+        children_tree = self._get_children_tree_cte()
+        return (
+            session.query(ContentRevisionRO)
+            .options(joinedload(ContentRevisionRO.node))
+            .filter(
+                or_(
+                    ContentRevisionRO.content_id == self.id,
+                    ContentRevisionRO.content_id.in_(session.query(children_tree.c.content_id)),
+                )
+            )
+            .order_by(ContentRevisionRO.revision_id)
+            .all()
+        )
+
+
+Index("idx__content__cached_revision_id", Content.cached_revision_id)
 
 
 class RevisionReadStatus(DeclarativeBase):
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+from hashlib import sha256
+
+from sqlalchemy import Column
+from sqlalchemy import DateTime
+from sqlalchemy import ForeignKey
+from sqlalchemy import Integer
+from sqlalchemy import Unicode
+
+from tracim_backend.models.meta import DeclarativeBase
+
+
+class ProcessedEmailReply(DeclarativeBase):
+    """
+    Email replies already added as comment, identified by their Message-ID, so that
+    a reply fetched again (mail fetcher stopped before flagging it in mailbox for
+    example) does not create the same comment twice.
+    """
+
+    MESSAGE_ID_HASH_LENGTH = 64
+
+    __tablename__ = "processed_email_replies"
+
+    # INFO - G.M - 2019-11-22 - Message-ID can be up to 998 chars long, store its hash
+    # to keep primary key short.
+    message_id_hash = Column(Unicode(MESSAGE_ID_HASH_LENGTH), primary_key=True)
+    comment_id = Column(Integer, ForeignKey("content.id"), nullable=True)
+    created = Column(DateTime, unique=False, nullable=False, default=datetime.utcnow)
+
+    @classmethod
+    def hash_message_id(cls, message_id: str) -> str:
+        return sha256(message_id.encode("utf-8")).hexdigest()
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+from datetime import timedelta
+
+from sqlalchemy import Boolean
+from sqlalchemy import Column
+from sqlalchemy import DateTime
+from sqlalchemy import ForeignKey
+from sqlalchemy import Integer
+
+from tracim_backend.models.meta import DeclarativeBase
+
+# INFO - G.M - 2019-11-26 - time during which a revision without any preview is not
+# probed again: previews may become available with tools installed later (like
+# libreoffice) or with a new version of preview generator.
+UNAVAILABLE_PREVIEWS_TTL = timedelta(days=1)
+
+
+class RevisionPreviewInfo(DeclarativeBase):
+    """
+    Preview capabilities of a file revision, as given by preview generator the first
+    time they were asked. Revisions files never change, so these values can be served
+    from database instead of probing preview generator on each content listing.
+    Revisions without any preview are probed again once outdated.
+    """
+
+    __tablename__ = "revision_preview_infos"
+
+    revision_id = Column(Integer, ForeignKey("content_revisions.revision_id"), primary_key=True)
+    page_nb = Column(Integer, nullable=True)
+    has_pdf_preview = Column(Boolean, nullable=False, default=False)
+    has_jpeg_preview = Column(Boolean, nullable=False, default=False)
+    created = Column(DateTime, unique=False, nullable=False, default=datetime.utcnow)
+
+    def is_outdated(self) -> bool:
+        if self.has_pdf_preview or self.has_jpeg_preview:
+            return False
+        return self.created < datetime.utcnow() - UNAVAILABLE_PREVIEWS_TTL
@@ -69,6 +69,7 @@ def new_revision(
     tm: TransactionManager,
     content: Content,
     force_create_new_revision: bool = False,
+    reuse_depot_file: bool = False,
 ) -> Content:
     """
     Prepare context to update a Content. It will add a new updatable revision
@@ -78,12 +79,14 @@ def new_revision(
     :param content: Content instance to update
     :param force_create_new_revision: Decide if new_rev should or should not
     be forced.
+    :param reuse_depot_file: new revision share depot file of previous one
+    instead of storing a new copy of it.
     :return:
     """
     with session.no_autoflush:
         try:
             if force_create_new_revision or inspect(content.revision).has_identity:
-                content.new_revision()
+                content.new_revision(reuse_depot_file=reuse_depot_file)
             RevisionsIntegrity.add_to_updatable(content.revision)
             yield content
         except Exception as e:
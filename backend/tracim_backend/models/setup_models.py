@@ -15,12 +15,15 @@ import zope.sqlalchemy
 from tracim_backend.applications.share.models import ContentShare  # noqa: F401
 from tracim_backend.applications.upload_permissions.models import UploadPermission  # noqa: F401
 from tracim_backend.lib.utils.utils import sliced_dict
+from tracim_backend.models.agenda_sync import AgendaSyncState  # noqa: F401
 from tracim_backend.models.auth import Group  # noqa: F401
 from tracim_backend.models.auth import Permission  # noqa: F401
 from tracim_backend.models.auth import User  # noqa: F401
 from tracim_backend.models.data import Content  # noqa: F401
 from tracim_backend.models.data import ContentRevisionRO  # noqa: F401
+from tracim_backend.models.email_reply import ProcessedEmailReply  # noqa: F401
 from tracim_backend.models.meta import DeclarativeBase  # noqa: F401
+from tracim_backend.models.preview_info import RevisionPreviewInfo  # noqa: F401
 from tracim_backend.models.tracim_session import TracimSession
 
 if typing.TYPE_CHECKING:
@@ -92,8 +95,10 @@ def get_tm_session(session_factory, transaction_manager) -> Session:
     # see https://stackoverflow.com/questions/16152241/how-to-get-a-sqlalchemy-session-managed-by-zope-transaction-that-has-the-same-sc
     zope.sqlalchemy.register(dbsession, transaction_manager=transaction_manager, keep_session=True)
     from tracim_backend.models.revision_protection import prevent_content_revision_delete
+    from tracim_backend.models.used_space import update_workspaces_used_space
 
     listen(dbsession, "before_flush", prevent_content_revision_delete)
+    listen(dbsession, "before_flush", update_workspaces_used_space)
     return dbsession
 
 
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+import typing
+
+from sqlalchemy import func
+from sqlalchemy.orm.unitofwork import UOWTransaction
+
+from tracim_backend.models.data import Content
+from tracim_backend.models.data import ContentRevisionRO
+from tracim_backend.models.data import Workspace
+from tracim_backend.models.meta import DeclarativeBase
+from tracim_backend.models.tracim_session import TracimSession
+
+
+def _get_revision_workspace_id(revision: ContentRevisionRO) -> typing.Optional[int]:
+    if revision.workspace_id:
+        return revision.workspace_id
+    # INFO - G.M - 2019-11-08 - workspace_id is not set until flush when
+    # workspace is given through relationship
+    if revision.workspace:
+        return revision.workspace.workspace_id
+    return None
+
+
+def update_workspaces_used_space(
+    session: TracimSession, flush_context: UOWTransaction, instances: [DeclarativeBase]
+) -> None:
+    """
+    Keep Workspace.used_space up to date according to new revisions:
+    - set file_size of new revisions with a new file.
+    - add file size of new revision to its workspace if its content is active.
+    - add/remove file size of all previous revisions of content if content
+    become active/inactive (deleted or archived).
+    """
+    new_revisions = [
+        instance for instance in session.new if isinstance(instance, ContentRevisionRO)
+    ]
+    if not new_revisions:
+        return
+
+    used_space_deltas = defaultdict(int)  # type: typing.Dict[int, int]
+    with session.no_autoflush:
+        contents = []  # type: typing.List[Content]
+        for revision in new_revisions:
+            if revision.node is not None and revision.node not in contents:
+                contents.append(revision.node)
+
+        for content in contents:
+            # INFO - G.M - 2019-11-08 - size of content revisions already counted
+            # by workspace, and state of content before this flush.
+            counted_sizes = defaultdict(int)  # type: typing.Dict[int, int]
+            was_active = False
+            if content.id is not None:
+                counted_sizes.update(
+                    session.query(
+                        ContentRevisionRO.workspace_id, func.sum(ContentRevisionRO.file_size)
+                    )
+                    .filter(ContentRevisionRO.content_id == content.id)
+                    .filter(ContentRevisionRO.file_size != None)  # noqa: E711
+                    .group_by(ContentRevisionRO.workspace_id)
+                    .all()
+                )
+                previous_state = (
+                    session.query(ContentRevisionRO.is_deleted, ContentRevisionRO.is_archived)
+                    .join(Content, Content.cached_revision_id == ContentRevisionRO.revision_id)
+                    .filter(Content.id == content.id)
+                    .one_or_none()
+                )
+                if previous_state:
+                    was_active = not previous_state.is_deleted and not previous_state.is_archived
+
+            for revision in content.revisions:
+                if revision not in session.new:
+                    continue
+                # INFO - G.M - 2019-11-08 - file size is cloned from previous revision,
+                # depot file is only read for revisions with a new file.
+                if revision.file_size is None:
+                    revision.file_size = revision.get_depot_file_size()
+                if was_active and not revision.is_active:
+                    for workspace_id, size in counted_sizes.items():
+                        used_space_deltas[workspace_id] -= size
+                elif not was_active and revision.is_active:
+                    for workspace_id, size in counted_sizes.items():
+                        used_space_deltas[workspace_id] += size
+
+                workspace_id = _get_revision_workspace_id(revision)
+                if revision.file_size and workspace_id:
+                    counted_sizes[workspace_id] += revision.file_size
+                    if revision.is_active:
+                        used_space_deltas[workspace_id] += revision.file_size
+                was_active = revision.is_active
+
+        for workspace_id, delta in used_space_deltas.items():
+            if not delta or not workspace_id:
+                continue
+            workspace = session.query(Workspace).get(workspace_id)
+            # INFO - G.M - 2019-11-08 - use sql expression to avoid lost update
+            # with concurrent transactions
+            workspace.used_space = Workspace.used_space + delta
@@ -1,4 +1,7 @@
 ## -*- coding: utf-8 -*-
+## INFO - G.M - 2019-11-19 - this template does not use "user" variable, same body
+## is sent to all recipients with same language and role.
+<%! recipient_independent = True %>
 	<!--FIXME After discuss with Damien: dont add intelligent code in template -->
     <%
         call_to_action_url = content_in_context.frontend_url
@@ -43,6 +43,8 @@ class TestCommandsList(object):
         assert output.find("webdav start") > 0
         assert output.find("caldav start") > 0
         assert output.find("caldav sync") > 0
+        assert output.find("workspace used-space-update") > 0
+        assert output.find("workspace clone") > 0
         assert output.find("search index-create") > 0
         assert output.find("search index-populate") > 0
         assert output.find("search index-upgrade-experimental") > 0
@@ -339,6 +341,78 @@ class TestCommands(object):
         assert not new_user.validate_password("admin@admin.admin")
         assert new_user.profile.slug == "trusted-users"
 
+    def test_func__workspace_used_space_update_command__ok__nominal_case(
+        self, session, workspace_api_factory
+    ) -> None:
+        """
+        Test workspace used space recompute
+        """
+        workspace = workspace_api_factory.get().create_workspace("workspace_1", save_now=True)
+        workspace.used_space = 42
+        transaction.commit()
+        workspace_id = workspace.workspace_id
+        session.close()
+        # NOTE GM 2019-07-21: Unset Depot configuration. Done here and not in fixture because
+        # TracimCLI need reseted context when ran.
+        DepotManager._clear()
+        app = TracimCLI()
+        result = app.run(
+            [
+                "workspace",
+                "used-space-update",
+                "-c",
+                "{}#command_test".format(TEST_CONFIG_FILE_PATH),
+                "--debug",
+            ]
+        )
+        assert result == 0
+        workspace = workspace_api_factory.get().get_one(workspace_id)
+        assert workspace.used_space == 0
+
+    def test_func__workspace_clone_command__ok__nominal_case(
+        self, session, workspace_api_factory, content_api_factory, content_type_list
+    ) -> None:
+        """
+        Test workspace clone
+        """
+        workspace = workspace_api_factory.get().create_workspace("workspace_1", save_now=True)
+        content_api = content_api_factory.get()
+        folder = content_api.create(
+            content_type_list.Folder.slug, workspace, None, "folder", do_save=True
+        )
+        content_api.create(content_type_list.Page.slug, workspace, folder, "page", do_save=True)
+        transaction.commit()
+        workspace_id = workspace.workspace_id
+        session.close()
+        # NOTE GM 2019-07-21: Unset Depot configuration. Done here and not in fixture because
+        # TracimCLI need reseted context when ran.
+        DepotManager._clear()
+        app = TracimCLI()
+        result = app.run(
+            [
+                "workspace",
+                "clone",
+                "-c",
+                "{}#command_test".format(TEST_CONFIG_FILE_PATH),
+                "--workspace_id",
+                str(workspace_id),
+                "--label",
+                "workspace_2",
+                "-l",
+                "admin@admin.admin",
+                "--debug",
+            ]
+        )
+        assert result == 0
+        new_workspace = workspace_api_factory.get().get_one_by_label("workspace_2")
+        content_api = content_api_factory.get()
+        new_root_contents = content_api.get_all(parent_ids=[0], workspace=new_workspace)
+        assert len(new_root_contents) == 1
+        new_folder = new_root_contents[0]
+        assert new_folder.label == "folder"
+        new_page = content_api.get_one_by_label_and_parent("page", new_folder)
+        assert new_page.workspace_id == new_workspace.workspace_id
+
     def test__init__db__ok_db_already_exist(self, hapic, session, user_api_factory):
         """
         Test database initialisation
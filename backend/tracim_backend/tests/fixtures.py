@@ -30,6 +30,8 @@ from tracim_backend.tests.utils import TEST_CONFIG_FILE_PATH
 from tracim_backend.tests.utils import ApplicationApiFactory
 from tracim_backend.tests.utils import ContentApiFactory
 from tracim_backend.tests.utils import ElasticSearchHelper
+from tracim_backend.tests.utils import FakeCaldavServer
+from tracim_backend.tests.utils import FakeElasticSearch
 from tracim_backend.tests.utils import GroupApiFactory
 from tracim_backend.tests.utils import MailHogHelper
 from tracim_backend.tests.utils import RadicaleServerHelper
@@ -304,6 +306,23 @@ def elasticsearch(app_config, session) -> ElasticSearchHelper:
     elasticsearch_helper.delete_index()
 
 
+@pytest.fixture
+def fake_elasticsearch(monkeypatch) -> FakeElasticSearch:
+    fake_elasticsearch = FakeElasticSearch()
+    monkeypatch.setattr(
+        "tracim_backend.lib.search.elasticsearch_search.elasticsearch_search.Elasticsearch",
+        lambda *args, **kwargs: fake_elasticsearch,
+    )
+    return fake_elasticsearch
+
+
+@pytest.fixture
+def fake_caldav_server() -> FakeCaldavServer:
+    fake_caldav_server = FakeCaldavServer()
+    yield fake_caldav_server
+    fake_caldav_server.stop()
+
+
 @pytest.fixture
 def radicale_server(config_uri, config_section) -> RadicaleServerHelper:
     radicale_server_helper = RadicaleServerHelper(config_uri, config_section)
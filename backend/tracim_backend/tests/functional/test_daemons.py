@@ -1,7 +1,17 @@
+from mock import patch
 import pytest
+from rq import get_failed_queue
+import transaction
 
 from tracim_backend.lib.mail_fetcher.daemon import MailFetcherDaemon
+from tracim_backend.lib.mail_notifier.content_notification import CONTENT_NOTIFICATION_QUEUE_NAME
+from tracim_backend.lib.mail_notifier.daemon import ContentNotifierDaemon
 from tracim_backend.lib.mail_notifier.daemon import MailSenderDaemon
+from tracim_backend.lib.search.elasticsearch_search.daemon import SearchIndexerDaemon
+from tracim_backend.lib.search.elasticsearch_search.indexer import SEARCH_INDEXER_QUEUE_NAME
+from tracim_backend.lib.utils.utils import get_redis_connection
+from tracim_backend.lib.utils.utils import get_rq_queue
+from tracim_backend.models.revision_protection import new_revision
 from tracim_backend.tests.fixtures import *  # noqa: F403,F40
 
 
@@ -38,6 +48,32 @@ class TestMailNotifyDaemon(object):
         assert headers["To"][0] == "bob <bob@bob>"
         assert headers["Subject"][0] == "[TRACIM] Created account"
 
+    @pytest.mark.mail
+    def test_func__send_queued_emails__ok__through_smtp_connection_pool(
+        self, user_api_factory, mailhog, app_config
+    ):
+        api = user_api_factory.get()
+        for index in range(5):
+            api.create_user(
+                email="bob{}@bob".format(index),
+                password="password",
+                name="bob",
+                do_save=True,
+                do_notify=True,
+            )
+        queue = get_rq_queue(get_redis_connection(app_config), "mail_sender")
+        assert len(queue) == 5
+
+        daemon = MailSenderDaemon(app_config, burst=True)
+        daemon.run()
+        assert len(queue) == 0
+        assert daemon.nb_sent_jobs == 5
+        assert daemon.mails_per_second > 0
+        response = mailhog.get_mailhog_mails()
+        assert sorted(mail["Content"]["Headers"]["To"][0] for mail in response) == [
+            "bob <bob{}@bob>".format(index) for index in range(5)
+        ]
+
     @pytest.mark.mail
     def test_func__create_new_content_with_notification__ok__nominal_case(
         self,
@@ -79,6 +115,56 @@ class TestMailNotifyDaemon(object):
         )
 
 
+@pytest.mark.usefixtures("base_fixture")
+@pytest.mark.usefixtures("default_content_fixture")
+@pytest.mark.parametrize(
+    "config_section", [{"name": "mail_test_async_content_notification"}], indirect=True
+)
+class TestContentNotifierDaemon(object):
+    @pytest.mark.mail
+    def test_func__notify_queued_events__ok__digest_of_same_content(
+        self,
+        app_config,
+        session,
+        user_api_factory,
+        mailhog,
+        workspace_api_factory,
+        content_api_factory,
+        content_type_list,
+    ):
+        queue = get_rq_queue(get_redis_connection(app_config), CONTENT_NOTIFICATION_QUEUE_NAME)
+        queue.empty()
+        uapi = user_api_factory.get()
+        current_user = uapi.get_one_by_email("admin@admin.admin")
+        wapi = workspace_api_factory.get(current_user=current_user)
+        workspace = wapi.get_one_by_label("Recipes")
+        user = uapi.get_one_by_email("bob@fsf.local")
+        wapi.enable_notifications(user, workspace)
+
+        api = content_api_factory.get(current_user=user)
+        thread = api.create(
+            content_type_list.Thread.slug, workspace, None, "thread", do_save=True, do_notify=False,
+        )
+        transaction.commit()
+        api.create_comment(workspace, thread, "first comment", do_save=True)
+        transaction.commit()
+        api.create_comment(workspace, thread, "second comment", do_save=True)
+        transaction.commit()
+        # INFO - G.M - 2019-11-20 - nothing is built during requests
+        assert mailhog.get_mailhog_mails() == []
+        assert queue.count == 2
+
+        ContentNotifierDaemon(app_config, burst=True).run()
+        MailSenderDaemon(app_config, burst=True).run()
+        response = mailhog.get_mailhog_mails()
+        assert len(response) == 1
+        headers = response[0]["Content"]["Headers"]
+        assert headers["From"][0] == '"Bob i. via Tracim" <test_user_from+3@localhost>'
+        assert headers["To"][0] == "Global manager <admin@admin.admin>"
+        assert headers["Subject"][0] == "[TRACIM] [Recipes] thread (Opened)"
+        assert queue.count == 0
+
+
 class TestMailFetcherDaemon(object):
     @pytest.mark.mail
     def test_func__mail_fetcher_daemon__ok__run(self, app_config):
@@ -107,3 +193,78 @@ class TestMailSenderDaemon(object):
             mail_fetcher.run()
         except AttributeError:
             pytest.fail("Mail sender raise attribute error")
+
+
+@pytest.mark.usefixtures("base_fixture")
+@pytest.mark.parametrize(
+    "config_section", [{"name": "functional_test_elasticsearch_async_indexing"}], indirect=True
+)
+class TestSearchIndexerDaemon(object):
+    def test_func__index_queued_contents__ok__merge_updates(
+        self,
+        app_config,
+        session,
+        fake_elasticsearch,
+        workspace_api_factory,
+        content_api_factory,
+        content_type_list,
+    ):
+        queue = get_rq_queue(get_redis_connection(app_config), SEARCH_INDEXER_QUEUE_NAME)
+        queue.empty()
+        workspace = workspace_api_factory.get().create_workspace("workspace", save_now=True)
+        api = content_api_factory.get()
+        folder = api.create(content_type_list.Folder.slug, workspace, None, "folder", do_save=True)
+        api.execute_created_content_actions(folder)
+        page = api.create(content_type_list.Page.slug, workspace, folder, "page", do_save=True)
+        api.execute_created_content_actions(page)
+        transaction.commit()
+        for label in ("page 2", "page 3"):
+            with new_revision(session=session, tm=transaction.manager, content=page):
+                api.update_content(page, new_label=label)
+            api.save(page)
+            api.execute_update_content_actions(page)
+            transaction.commit()
+        # INFO - G.M - 2019-11-14 - nothing is indexed before daemon run
+        assert len(queue) == 3
+        assert fake_elasticsearch.nb_bulk_requests == 0
+
+        daemon = SearchIndexerDaemon(app_config, burst=True)
+        daemon.run()
+
+        assert len(queue) == 0
+        assert fake_elasticsearch.nb_bulk_requests == 1
+        assert set(fake_elasticsearch.documents.keys()) == {
+            str(folder.content_id),
+            str(page.content_id),
+        }
+        assert fake_elasticsearch.documents[str(page.content_id)]["label"] == "page 3"
+
+    def test_func__index_queued_contents__err__keep_failed_jobs(
+        self,
+        app_config,
+        fake_elasticsearch,
+        workspace_api_factory,
+        content_api_factory,
+        content_type_list,
+    ):
+        queue = get_rq_queue(get_redis_connection(app_config), SEARCH_INDEXER_QUEUE_NAME)
+        queue.empty()
+        failed_queue = get_failed_queue(connection=queue.connection)
+        failed_queue.empty()
+        workspace = workspace_api_factory.get().create_workspace("workspace", save_now=True)
+        api = content_api_factory.get()
+        page = api.create(content_type_list.Page.slug, workspace, None, "page", do_save=True)
+        api.execute_created_content_actions(page)
+        transaction.commit()
+        job_ids = queue.get_job_ids()
+        assert len(job_ids) == 1
+
+        with patch(
+            "tracim_backend.lib.search.elasticsearch_search.daemon.index_contents",
+            side_effect=ConnectionError(),
+        ):
+            SearchIndexerDaemon(app_config, burst=True).run()
+
+        assert len(queue) == 0
+        assert failed_queue.get_job_ids() == job_ids
+        assert fake_elasticsearch.documents == {}
@@ -9,6 +9,7 @@ from rq import SimpleWorker
 import transaction
 
 from tracim_backend.lib.mail_notifier.sender import EmailSender
+from tracim_backend.lib.mail_notifier.sender import get_smtp_connection_pool
 from tracim_backend.lib.mail_notifier.utils import SmtpConfiguration
 from tracim_backend.lib.utils.utils import get_redis_connection
 from tracim_backend.lib.utils.utils import get_rq_queue
@@ -72,6 +73,67 @@ class TestEmailSender(object):
         assert response[0]["MIME"]["Parts"][0]["Body"] == text
         assert response[0]["MIME"]["Parts"][1]["Body"] == html
 
+    def _get_test_mail(self, subject: str) -> MIMEText:
+        msg = MIMEText(subject, "plain")
+        msg["Subject"] = subject
+        msg["From"] = "test_send_mail@localhost"
+        msg["To"] = "receiver_test_send_mail@localhost"
+        return msg
+
+    def test__func__send_email__ok__reuse_pooled_connection(self, app_config, mailhog):
+        smtp_config = SmtpConfiguration(
+            app_config.EMAIL__NOTIFICATION__SMTP__SERVER,
+            app_config.EMAIL__NOTIFICATION__SMTP__PORT,
+            app_config.EMAIL__NOTIFICATION__SMTP__USER,
+            app_config.EMAIL__NOTIFICATION__SMTP__PASSWORD,
+        )
+        pool = get_smtp_connection_pool(app_config, smtp_config)
+        pool.clear()
+        sender = EmailSender(app_config, smtp_config, True)
+        sender.send_mail(self._get_test_mail("first mail"))
+        assert pool.nb_idle_connections == 1
+        connection = pool.acquire()
+        pool.release(connection)
+        sender.send_mail(self._get_test_mail("second mail"))
+        assert pool.nb_idle_connections == 1
+        assert pool.acquire() is connection
+        pool.release(connection)
+        pool.clear()
+
+        response = mailhog.get_mailhog_mails()
+        assert len(response) == 2
+
+    def test__func__send_email__ok__reconnect_closed_connection(self, app_config, mailhog):
+        smtp_config = SmtpConfiguration(
+            app_config.EMAIL__NOTIFICATION__SMTP__SERVER,
+            app_config.EMAIL__NOTIFICATION__SMTP__PORT,
+            app_config.EMAIL__NOTIFICATION__SMTP__USER,
+            app_config.EMAIL__NOTIFICATION__SMTP__PASSWORD,
+        )
+        pool = get_smtp_connection_pool(app_config, smtp_config)
+        pool.clear()
+        sender = EmailSender(app_config, smtp_config, True)
+        sender.send_mail(self._get_test_mail("first mail"))
+        # INFO - G.M - 2019-11-21 - simulate a connection closed by smtp server
+        closed_connection = pool.acquire()
+        closed_connection.sock.close()
+        pool.release(closed_connection)
+        sender.send_mail(self._get_test_mail("second mail"))
+        assert pool.nb_idle_connections == 1
+        connection = pool.acquire()
+        assert connection is not closed_connection
+
+        # INFO - G.M - 2019-11-21 - closed idle connection is dropped by keepalive check
+        connection.close()
+        pool.release(connection)
+        pool.keepalive_interval = 0
+        pool.keep_alive()
+        assert pool.nb_idle_connections == 0
+        pool.keepalive_interval = app_config.EMAIL__NOTIFICATION__SMTP__KEEPALIVE_INTERVAL
+
+        response = mailhog.get_mailhog_mails()
+        assert len(response) == 2
+
 
 @pytest.mark.usefixtures("base_fixture")
 @pytest.mark.usefixtures("default_content_fixture")
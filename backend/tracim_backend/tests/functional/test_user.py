@@ -3440,6 +3440,47 @@ class TestUsersEndpoint(object):
         assert "code" in res.json.keys()
         assert res.json_body["code"] == ErrorCode.INSUFFICIENT_USER_PROFILE
 
+    def test_api__get_users__ok_200__paginated(
+        self, user_api_factory, group_api_factory, web_testapp, admin_user
+    ):
+        uapi = user_api_factory.get()
+        gapi = group_api_factory.get()
+        groups = [gapi.get_one_with_name("users")]
+        users = []
+        for name in ("alice", "bob", "carol"):
+            users.append(
+                uapi.create_user(
+                    email="{}@test.test".format(name),
+                    password="password",
+                    name=name,
+                    groups=groups,
+                    do_save=True,
+                    do_notify=False,
+                )
+            )
+        transaction.commit()
+
+        web_testapp.authorization = ("Basic", ("admin@admin.admin", "admin@admin.admin"))
+        res = web_testapp.get("/api/v2/users", params={"count": 3}, status=200).json_body
+        # INFO - G.M - 2019-11-29 - users are sorted by display name, admin one
+        # is "Global manager"
+        assert [user["user_id"] for user in res["items"]] == [user.user_id for user in users]
+        assert res["per_page"] == 3
+        assert res["has_next"] is True
+        res = web_testapp.get(
+            "/api/v2/users", params={"count": 3, "page_token": res["next_page_token"]}, status=200
+        ).json_body
+        assert [user["user_id"] for user in res["items"]] == [admin_user.user_id]
+        assert res["has_next"] is False
+        assert res["next_page_token"] is None
+
+    def test_api__get_users__err_400__invalid_page_token(self, web_testapp):
+        web_testapp.authorization = ("Basic", ("admin@admin.admin", "admin@admin.admin"))
+        res = web_testapp.get(
+            "/api/v2/users", params={"count": 3, "page_token": "invalid"}, status=400
+        )
+        assert res.json_body["code"] == ErrorCode.INVALID_PAGE_TOKEN
+
 
 @pytest.mark.usefixtures("base_fixture")
 @pytest.mark.parametrize("config_section", [{"name": "functional_test"}], indirect=True)
@@ -286,6 +286,59 @@ class TestFunctionalWebdavGet(object):
         webdav_testapp.get("/workspace1", status=200)
         webdav_testapp.get("/workspace1/report.txt", status=404)
 
+    def test_functional__webdav_access_to_content__ok__range_and_etag(
+        self, session, workspace_api_factory, content_api_factory, content_type_list, webdav_testapp
+    ) -> None:
+
+        workspace_api = workspace_api_factory.get(show_deleted=True)
+        workspace = workspace_api.create_workspace("workspace1", save_now=True)
+        api = content_api_factory.get()
+        with session.no_autoflush:
+            file = api.create(
+                content_type_list.File.slug,
+                workspace,
+                None,
+                filename="report.txt",
+                do_save=False,
+                do_notify=False,
+            )
+            api.update_file_data(file, "report.txt", "text/plain", b"test_content")
+            api.save(file)
+        transaction.commit()
+
+        webdav_testapp.authorization = ("Basic", ("admin@admin.admin", "admin@admin.admin"))
+        res = webdav_testapp.get("/workspace1/report.txt", status=200)
+        assert res.body == b"test_content"
+        etag = res.headers["ETag"]
+        res = webdav_testapp.get(
+            "/workspace1/report.txt", headers={"Range": "bytes=5-"}, status=206
+        )
+        assert res.body == b"content"
+        assert res.headers["Content-Range"] == "bytes 5-11/12"
+        webdav_testapp.get("/workspace1/report.txt", headers={"If-None-Match": etag}, status=304)
+
+    def test_functional__webdav_put_file__ok__create_and_update(
+        self, session, workspace_api_factory, content_api_factory, webdav_testapp
+    ) -> None:
+
+        workspace_api = workspace_api_factory.get(show_deleted=True)
+        workspace_api.create_workspace("workspace1", save_now=True)
+        transaction.commit()
+
+        webdav_testapp.authorization = ("Basic", ("admin@admin.admin", "admin@admin.admin"))
+        webdav_testapp.put("/workspace1/report.txt", b"first content", status=201)
+        res = webdav_testapp.get("/workspace1/report.txt", status=200)
+        assert res.body == b"first content"
+        first_etag = res.headers["ETag"]
+        webdav_testapp.put("/workspace1/report.txt", b"second content", status=204)
+        res = webdav_testapp.get("/workspace1/report.txt", status=200)
+        assert res.body == b"second content"
+        assert res.headers["ETag"] != first_etag
+        content = content_api_factory.get().get_one_by_filename_and_parent_labels(
+            "report.txt", workspace_api_factory.get().get_one_by_label("workspace1")
+        )
+        assert content.revision.file_size == len(b"second content")
+
     @pytest.mark.parametrize(
         "workspace_label, webdav_workspace_label, dir_label, webdav_dir_label, content_filename, webdav_content_filename",
         [
@@ -2589,6 +2589,28 @@ class TestWorkspaceContents(object):
         assert content["modified"]
         assert content["created"]
 
+    def test_api__get_workspace_content__ok_200__get_default_paginated(self, web_testapp):
+        """
+        Check obtain workspace contents with defaults filters, page by page
+        """
+        web_testapp.authorization = ("Basic", ("admin@admin.admin", "admin@admin.admin"))
+        res = web_testapp.get(
+            "/api/v2/workspaces/1/contents", params={"count": 2}, status=200
+        ).json_body
+        # INFO - G.M - 2019-11-29 - contents are sorted by label
+        assert [content["content_id"] for content in res["items"]] == [11, 2]
+        assert res["items"][0]["label"] == "Current Menu"
+        assert res["per_page"] == 2
+        assert res["has_next"] is True
+        res = web_testapp.get(
+            "/api/v2/workspaces/1/contents",
+            params={"count": 2, "page_token": res["next_page_token"]},
+            status=200,
+        ).json_body
+        assert [content["content_id"] for content in res["items"]] == [1]
+        assert res["has_next"] is False
+        assert res["next_page_token"] is None
+
     def test_api__get_workspace_content__ok_200__get_default_html_documents(self, web_testapp):
         """
         Check obtain workspace contents with defaults filters + content_filter
@@ -0,0 +1,115 @@
+import pytest
+import transaction
+
+from tracim_backend.lib.agenda.sync import AgendaSynchronizer
+from tracim_backend.models.agenda_sync import AgendaSyncState
+from tracim_backend.tests.fixtures import *  # noqa: F403,F40
+
+
+@pytest.fixture
+def caldav_config(app_config, fake_caldav_server):
+    app_config.CALDAV__RADICALE_PROXY__BASE_URL = fake_caldav_server.base_url
+    return app_config
+
+
+@pytest.mark.usefixtures("base_fixture")
+class TestAgendaSynchronizer(object):
+    def _create_workspaces(self, workspace_api_factory):
+        workspace_api = workspace_api_factory.get()
+        workspace = workspace_api.create_workspace("Agenda", description="With agenda")
+        workspace_api.create_workspace("No agenda", agenda_enabled=False)
+        transaction.commit()
+        return workspace
+
+    def test_unit__sync__ok__create_agendas(
+        self, session, caldav_config, fake_caldav_server, workspace_api_factory, admin_user
+    ):
+        workspace = self._create_workspaces(workspace_api_factory)
+        results = []
+
+        stats = AgendaSynchronizer(session, caldav_config, nb_workers=2).sync(
+            result_callback=results.append
+        )
+        assert stats.nb_agendas == 2
+        assert stats.nb_created == 2
+        assert stats.nb_updated == 0
+        assert stats.nb_skipped == 0
+        assert stats.nb_errors == 0
+        assert len(results) == 2
+        assert fake_caldav_server.agendas == {
+            "/agenda/user/{}/".format(admin_user.user_id): {
+                "name": "Global manager",
+                "description": "",
+            },
+            "/agenda/workspace/{}/".format(workspace.workspace_id): {
+                "name": "Agenda",
+                "description": "With agenda",
+            },
+        }
+        assert session.query(AgendaSyncState).count() == 2
+
+    def test_unit__sync__ok__skip_unchanged_agendas(
+        self, session, caldav_config, fake_caldav_server, workspace_api_factory, admin_user
+    ):
+        workspace = self._create_workspaces(workspace_api_factory)
+        AgendaSynchronizer(session, caldav_config).sync()
+        transaction.commit()
+        nb_requests = len(fake_caldav_server.requests)
+
+        stats = AgendaSynchronizer(session, caldav_config).sync()
+        assert stats.nb_skipped == 2
+        assert stats.nb_created == stats.nb_updated == stats.nb_errors == 0
+        assert len(fake_caldav_server.requests) == nb_requests
+
+        workspace = session.merge(workspace)
+        workspace.label = "Renamed agenda"
+        transaction.commit()
+        stats = AgendaSynchronizer(session, caldav_config).sync()
+        assert stats.nb_skipped == 1
+        assert stats.nb_updated == 1
+        agenda_path = "/agenda/workspace/{}/".format(workspace.workspace_id)
+        assert fake_caldav_server.agendas[agenda_path]["name"] == "Renamed agenda"
+        assert fake_caldav_server.requests[nb_requests:] == [
+            ("GET", agenda_path),
+            ("PROPPATCH", agenda_path),
+        ]
+
+        stats = AgendaSynchronizer(session, caldav_config, force=True).sync()
+        assert stats.nb_skipped == 0
+        assert stats.nb_updated == 2
+
+    def test_unit__sync__ok__failed_agenda_not_skipped(
+        self, session, caldav_config, fake_caldav_server, workspace_api_factory, admin_user
+    ):
+        self._create_workspaces(workspace_api_factory)
+        user_agenda_path = "/agenda/user/{}/".format(admin_user.user_id)
+        fake_caldav_server.failing_paths.add(user_agenda_path)
+
+        stats = AgendaSynchronizer(session, caldav_config).sync()
+        assert stats.nb_created == 1
+        assert stats.nb_errors == 1
+        transaction.commit()
+
+        fake_caldav_server.failing_paths.clear()
+        stats = AgendaSynchronizer(session, caldav_config).sync()
+        assert stats.nb_skipped == 1
+        assert stats.nb_created == 1
+        assert user_agenda_path in fake_caldav_server.agendas
+
+    def test_unit__sync__ok__reuse_connections(
+        self, session, caldav_config, fake_caldav_server, user_api_factory
+    ):
+        user_api = user_api_factory.get()
+        for index in range(20):
+            user_api.create_user(
+                email="user{}@test.test".format(index),
+                name="user {}".format(index),
+                do_notify=False,
+            )
+        transaction.commit()
+
+        stats = AgendaSynchronizer(session, caldav_config, nb_workers=3).sync()
+        assert stats.nb_created == 21
+        # INFO - G.M - 2019-11-30 - 2 requests by agenda, through one connection by thread
+        assert len(fake_caldav_server.requests) == 42
+        assert len(fake_caldav_server.client_addresses) <= 3
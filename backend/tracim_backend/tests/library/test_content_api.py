@@ -1,13 +1,17 @@
 # -*- coding: utf-8 -*-
+import datetime
 import typing
 
+from mock import patch
 import pytest
 import transaction
+from zope.sqlalchemy import mark_changed
 
 from tracim_backend.app_models.contents import ContentType
 from tracim_backend.exceptions import ContentFilenameAlreadyUsedInFolder
 from tracim_backend.exceptions import ContentInNotEditableState
 from tracim_backend.exceptions import EmptyLabelNotAllowed
+from tracim_backend.exceptions import RevisionFilePathSearchFailedDepotCorrupted
 from tracim_backend.exceptions import SameValueError
 from tracim_backend.exceptions import UnallowedSubContent
 from tracim_backend.lib.core.content import ContentApi
@@ -17,9 +21,12 @@ from tracim_backend.models.auth import User
 from tracim_backend.models.data import ActionDescription
 from tracim_backend.models.data import Content
 from tracim_backend.models.data import ContentNamespaces
+from tracim_backend.models.data import ContentRevisionRO
 from tracim_backend.models.data import UserRoleInWorkspace
+from tracim_backend.models.preview_info import RevisionPreviewInfo
 from tracim_backend.models.revision_protection import new_revision
 from tracim_backend.tests.fixtures import *  # noqa F403,F401
+from tracim_backend.tests.utils import create_1000px_png_test_image
 from tracim_backend.tests.utils import eq_
 
 
@@ -1604,7 +1611,8 @@ class TestContentApi(object):
         assert text_file_copy.content_id != text_file.content_id
         assert text_file_copy.workspace_id == workspace2.workspace_id
         assert text_file_copy.depot_file.file.read() == text_file.depot_file.file.read()
-        assert text_file_copy.depot_file.path != text_file.depot_file.path
+        # INFO - G.M - 2019-11-13 - copy shares the stored file of original content
+        assert text_file_copy.depot_file.file_id == text_file.depot_file.file_id
         assert text_file_copy.label == "test_file_copy"
         assert text_file_copy.type == text_file.type
         assert text_file_copy.parent.content_id == folderb.content_id
@@ -1670,7 +1678,8 @@ class TestContentApi(object):
         assert text_file_copy.content_id != text_file.content_id
         assert text_file_copy.workspace_id == workspace.workspace_id
         assert text_file_copy.depot_file.file.read() == text_file.depot_file.file.read()
-        assert text_file_copy.depot_file.path != text_file.depot_file.path
+        # INFO - G.M - 2019-11-13 - copy shares the stored file of original content
+        assert text_file_copy.depot_file.file_id == text_file.depot_file.file_id
         assert text_file_copy.label == "test_file_copy"
         assert text_file_copy.type == text_file.type
         assert text_file_copy.content_namespace == ContentNamespaces.UPLOAD
@@ -1772,6 +1781,47 @@ class TestContentApi(object):
         for revision in text_file_copy.get_tree_revisions()[-3:]:
             assert revision.revision_type == ActionDescription.COPY
 
+    def test_unit_copy_folder__ok__share_depot_file_and_report_progress(
+        self, workspace_api_factory, session, app_config, content_type_list, admin_user
+    ):
+        """
+        Check that copy of a folder tree does not store files again
+        and report its progress.
+        """
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        api = ContentApi(current_user=admin_user, session=session, config=app_config)
+        foldera = api.create(content_type_list.Folder.slug, workspace, None, "folder a", "", True)
+        with session.no_autoflush:
+            text_file = api.create(
+                content_type_slug=content_type_list.File.slug,
+                workspace=workspace,
+                parent=foldera,
+                label="test_file",
+                do_save=False,
+            )
+            api.update_file_data(text_file, "test_file", "text/plain", b"test_content")
+        api.save(text_file, ActionDescription.CREATION)
+        api.create_comment(
+            workspace, parent=text_file, content="just a comment", do_save=True, do_notify=False
+        )
+        progress = []
+        api.copy(
+            item=foldera,
+            new_label="folder a copy",
+            progress_callback=lambda copied, total: progress.append((copied, total)),
+        )
+        transaction.commit()
+
+        foldera_copy = api.get_one_by_label_and_parent("folder a copy", None)
+        text_file_copy = api.get_one_by_label_and_parent("test_file", foldera_copy)
+        tree_revisions_number = len(foldera.get_tree_revisions())
+        assert progress[-1] == (tree_revisions_number, tree_revisions_number)
+        assert len(progress) == tree_revisions_number
+        assert text_file_copy.depot_file.file_id == text_file.depot_file.file_id
+        assert text_file_copy.depot_file.file.read() == b"test_content"
+        assert len(text_file_copy.children) == 1
+        assert api.get_read_statuses([foldera_copy.content_id]) == {foldera_copy.content_id: True}
+
     def test_unit_copy_file_different_label_different_parent__err__allowed_subcontent(
         self,
         user_api_factory,
@@ -1877,7 +1927,8 @@ class TestContentApi(object):
         assert text_file_copy.content_id != text_file.content_id
         assert text_file_copy.workspace_id == workspace2.workspace_id
         assert text_file_copy.depot_file.file.read() == text_file.depot_file.file.read()
-        assert text_file_copy.depot_file.path != text_file.depot_file.path
+        # INFO - G.M - 2019-11-13 - copy shares the stored file of original content
+        assert text_file_copy.depot_file.file_id == text_file.depot_file.file_id
         assert text_file_copy.label == text_file.label
         assert text_file_copy.type == text_file.type
         assert text_file_copy.parent.content_id == folderb.content_id
@@ -1938,7 +1989,8 @@ class TestContentApi(object):
         assert text_file_copy.content_id != text_file.content_id
         assert text_file_copy.workspace_id == workspace.workspace_id
         assert text_file_copy.depot_file.file.read() == text_file.depot_file.file.read()
-        assert text_file_copy.depot_file.path != text_file.depot_file.path
+        # INFO - G.M - 2019-11-13 - copy shares the stored file of original content
+        assert text_file_copy.depot_file.file_id == text_file.depot_file.file_id
         assert text_file_copy.label == "test_file_copy"
         assert text_file_copy.type == text_file.type
         assert text_file_copy.parent.content_id == foldera.content_id
@@ -2136,6 +2188,70 @@ class TestContentApi(object):
         for rev in page_4.revisions:
             eq_(user_b in rev.read_by.keys(), True)
 
+    def test_mark_read__workspace__ok__by_batch(
+        self,
+        user_api_factory,
+        group_api_factory,
+        workspace_api_factory,
+        session,
+        app_config,
+        content_type_list,
+        role_api_factory,
+    ):
+        uapi = user_api_factory.get()
+        group_api = group_api_factory.get()
+        groups = [group_api.get_one(Group.TIM_USER)]
+        user_a = uapi.create_minimal_user(email="this.is@user", groups=groups, save_now=True)
+        user_b = uapi.create_minimal_user(
+            email="this.is@another.user", groups=groups, save_now=True
+        )
+        wapi = workspace_api_factory.get(current_user=user_a)
+        workspace = wapi.create_workspace("test workspace", save_now=True)
+        role_api = role_api_factory.get(current_user=user_a)
+        role_api.create_one(user_b, workspace, UserRoleInWorkspace.READER, False)
+        cont_api_a = ContentApi(current_user=user_a, session=session, config=app_config)
+        folder = cont_api_a.create(
+            content_type_list.Folder.slug, workspace, None, "folder", do_save=True
+        )
+        content_ids = [folder.content_id]
+        for index in range(3):
+            page = cont_api_a.create(
+                content_type_list.Page.slug,
+                workspace,
+                folder,
+                "page {}".format(index),
+                do_save=True,
+            )
+            content_ids.append(page.content_id)
+        folder_id = folder.content_id
+        page_id = page.content_id
+        user_b_id = user_b.user_id
+        workspace_id = workspace.workspace_id
+        transaction.commit()
+
+        def get_content_api_b() -> ContentApi:
+            user_b = uapi.get_one(user_b_id)
+            return ContentApi(current_user=user_b, session=session, config=app_config)
+
+        with patch("tracim_backend.lib.core.content.READ_STATUS_BATCH_SIZE", 2):
+            cont_api_b = get_content_api_b()
+            assert not any(cont_api_b.get_read_statuses(content_ids).values())
+            cont_api_b.mark_read__workspace(workspace=wapi.get_one(workspace_id))
+            # INFO - G.M - 2019-11-12 - read statuses are written without orm: check they
+            # are committed, closing session rollbacks anything not committed
+            transaction.commit()
+            session.close()
+            cont_api_b = get_content_api_b()
+            assert all(cont_api_b.get_read_statuses(content_ids).values())
+            cont_api_b.mark_unread(cont_api_b.get_one(page_id, content_type_list.Any_SLUG))
+            transaction.commit()
+            session.close()
+            read_statuses = get_content_api_b().get_read_statuses(content_ids)
+        # INFO - G.M - 2019-11-12 - unread page makes its parent folder unread
+        assert read_statuses == {
+            content_id: content_id not in (folder_id, page_id) for content_id in content_ids
+        }
+
     def test_mark_read(
         self,
         user_api_factory,
@@ -2240,6 +2356,73 @@ class TestContentApi(object):
         for rev in page_4.revisions:
             eq_(user_b in rev.read_by.keys(), True)
 
+    def test_unit__get_read_statuses__ok__follow_children(
+        self,
+        user_api_factory,
+        group_api_factory,
+        workspace_api_factory,
+        session,
+        app_config,
+        content_type_list,
+        role_api_factory,
+    ):
+        uapi = user_api_factory.get()
+        group_api = group_api_factory.get()
+        groups = [
+            group_api.get_one(Group.TIM_USER),
+            group_api.get_one(Group.TIM_MANAGER),
+            group_api.get_one(Group.TIM_ADMIN),
+        ]
+
+        user_a = uapi.create_minimal_user(email="this.is@user", groups=groups, save_now=True)
+        user_b = uapi.create_minimal_user(
+            email="this.is@another.user", groups=groups, save_now=True
+        )
+
+        wapi = workspace_api_factory.get(current_user=user_a)
+        workspace = wapi.create_workspace("test workspace", save_now=True)
+
+        role_api = role_api_factory.get(current_user=user_a)
+        role_api.create_one(user_b, workspace, UserRoleInWorkspace.READER, False)
+        cont_api_a = ContentApi(current_user=user_a, session=session, config=app_config)
+        cont_api_b = ContentApi(current_user=user_b, session=session, config=app_config)
+
+        folder = cont_api_a.create(
+            content_type_list.Folder.slug, workspace, None, "this is a folder", do_save=True
+        )
+        page = cont_api_a.create(
+            content_type_list.Page.slug, workspace, folder, "this is a page", do_save=True
+        )
+        ids = [folder.content_id, page.content_id]
+        assert cont_api_a.get_read_statuses(ids) == {folder.content_id: True, page.content_id: True}
+        assert cont_api_b.get_read_statuses(ids) == {
+            folder.content_id: False,
+            page.content_id: False,
+        }
+
+        cont_api_b.mark_read(folder)
+        assert cont_api_b.get_read_statuses(ids) == {folder.content_id: True, page.content_id: True}
+        for rev in page.revisions:
+            assert user_b in rev.read_by.keys()
+
+        # INFO - G.M - 2019-11-12 - new comment in page: page and its parent folder are unread
+        cont_api_a.create_comment(workspace, page, "just a comment", do_save=True)
+        assert cont_api_b.get_read_statuses(ids) == {
+            folder.content_id: False,
+            page.content_id: False,
+        }
+
+        cont_api_b.mark_read(page)
+        assert cont_api_b.get_read_statuses(ids) == {folder.content_id: True, page.content_id: True}
+
+        cont_api_b.mark_unread(folder)
+        assert cont_api_b.get_read_statuses(ids) == {
+            folder.content_id: False,
+            page.content_id: False,
+        }
+        for rev in page.revisions:
+            assert user_b not in rev.read_by.keys()
+
     def test_unit__update__ok__nominal_case(
         self,
         user_api_factory,
@@ -3666,6 +3849,210 @@ class TestContentApi(object):
         last_actives = api.get_last_active(workspace=workspace2)
         assert len(last_actives) == 0
 
+    def test_unit__get_last_active__ok__keyset_pagination_same_activity_date(
+        self,
+        session,
+        workspace_api_factory,
+        app_config,
+        user_api_factory,
+        group_api_factory,
+        content_type_list,
+    ):
+        uapi = user_api_factory.get()
+        group_api = group_api_factory.get()
+        groups = [
+            group_api.get_one(Group.TIM_USER),
+            group_api.get_one(Group.TIM_MANAGER),
+            group_api.get_one(Group.TIM_ADMIN),
+        ]
+
+        user = uapi.create_minimal_user(email="this.is@user", groups=groups, save_now=True)
+        workspace = workspace_api_factory.get(current_user=user).create_workspace(
+            "test workspace", save_now=True
+        )
+        api = ContentApi(current_user=user, session=session, config=app_config)
+        main_folder = api.create(
+            content_type_list.Folder.slug, workspace, None, "this is randomized folder", "", True
+        )
+        pages = [
+            api.create(
+                content_type_list.Page.slug, workspace, main_folder, "page {}".format(i), "", True
+            )
+            for i in range(4)
+        ]
+        api.create_comment(workspace, pages[0], "juste a super comment", True)
+        # INFO - G.M - 2019-11-06 - all contents share the same activity date,
+        # content_id should be used to order them and to get next pages.
+        # revisions updated date is set directly as freeze_time does not apply to
+        # its column default.
+        session.query(ContentRevisionRO).filter(
+            ContentRevisionRO.workspace_id == workspace.workspace_id
+        ).update(
+            {ContentRevisionRO.updated: datetime.datetime(2000, 1, 1, 0, 0, 5)},
+            synchronize_session=False,
+        )
+        session.flush()
+
+        last_actives = api.get_last_active(workspace=workspace, limit=2)
+        assert last_actives == [pages[3], pages[2]]
+        last_actives = api.get_last_active(
+            workspace=workspace, limit=2, before_content=last_actives[-1]
+        )
+        assert last_actives == [pages[1], pages[0]]
+        last_actives = api.get_last_active(
+            workspace=workspace, limit=2, before_content=last_actives[-1]
+        )
+        assert last_actives == [main_folder]
+
+    def test_unit__get_contents_in_context__ok__nominal_case(
+        self,
+        session,
+        workspace_api_factory,
+        app_config,
+        user_api_factory,
+        group_api_factory,
+        content_type_list,
+    ):
+        uapi = user_api_factory.get()
+        group_api = group_api_factory.get()
+        groups = [
+            group_api.get_one(Group.TIM_USER),
+            group_api.get_one(Group.TIM_MANAGER),
+            group_api.get_one(Group.TIM_ADMIN),
+        ]
+        user = uapi.create_minimal_user(email="this.is@user", groups=groups, save_now=True)
+        user2 = uapi.create_minimal_user(email="this.is@user2", groups=groups, save_now=True)
+        workspace = workspace_api_factory.get(current_user=user).create_workspace(
+            "test workspace", save_now=True
+        )
+        api = ContentApi(current_user=user, session=session, config=app_config)
+        folder = api.create(content_type_list.Folder.slug, workspace, None, "folder", "", True)
+        page = api.create(content_type_list.Page.slug, workspace, folder, "page", "", True)
+        with new_revision(session=session, tm=transaction.manager, content=page):
+            page.owner = user2
+            page.description = "Just an update"
+        api.save(page)
+        transaction.commit()
+
+        contents_in_context = api.get_contents_in_context([folder, page])
+        assert [content.content_id for content in contents_in_context] == [
+            folder.content_id,
+            page.content_id,
+        ]
+        folder_in_context, page_in_context = contents_in_context
+        assert folder_in_context.parent is None
+        assert folder_in_context.author.user_id == user.user_id
+        assert folder_in_context.actives_shares == 0
+        assert page_in_context.parent.content_id == folder.content_id
+        assert page_in_context.author.user_id == user.user_id
+        assert page_in_context.last_modifier.user_id == user2.user_id
+        assert page_in_context.actives_shares == 0
+        assert api.get_contents_in_context([]) == []
+
+    def test_unit__get_preview_info__ok__stored_on_first_call(
+        self,
+        session,
+        workspace_api_factory,
+        app_config,
+        user_api_factory,
+        group_api_factory,
+        content_type_list,
+    ):
+        uapi = user_api_factory.get()
+        group_api = group_api_factory.get()
+        groups = [
+            group_api.get_one(Group.TIM_USER),
+            group_api.get_one(Group.TIM_MANAGER),
+            group_api.get_one(Group.TIM_ADMIN),
+        ]
+        user = uapi.create_minimal_user(email="this.is@user", groups=groups, save_now=True)
+        workspace = workspace_api_factory.get(current_user=user).create_workspace(
+            "test workspace", save_now=True
+        )
+        api = ContentApi(current_user=user, session=session, config=app_config)
+        with session.no_autoflush:
+            file = api.create(content_type_list.File.slug, workspace, None, "file", "", False)
+            api.update_file_data(
+                file, "test_image.png", "image/png", create_1000px_png_test_image().read()
+            )
+        api.save(file)
+        transaction.commit()
+        revision_id = file.revision_id
+
+        preview_info = api.get_preview_info(revision_id, ".png")
+        assert preview_info.page_nb == 1
+        assert preview_info.has_pdf_preview is False
+        assert preview_info.has_jpeg_preview is True
+        transaction.commit()
+        assert session.query(RevisionPreviewInfo).get(revision_id).page_nb == 1
+
+        session.expunge_all()
+        api = ContentApi(current_user=None, session=session, config=app_config)
+        with patch.object(api, "preview_manager") as preview_manager:
+            api.load_preview_infos([revision_id])
+            assert api.get_preview_page_nb(revision_id, ".png") == 1
+            assert api.has_pdf_preview(revision_id, ".png") is False
+            assert api.has_jpeg_preview(revision_id, ".png") is True
+        assert not preview_manager.method_calls
+
+    def test_unit__get_preview_info__ok__unavailable_previews_probed_again_once_outdated(
+        self, session, workspace_api_factory, app_config, admin_user, content_type_list
+    ):
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        api = ContentApi(current_user=admin_user, session=session, config=app_config)
+        with session.no_autoflush:
+            file = api.create(content_type_list.File.slug, workspace, None, "file", "", False)
+            api.update_file_data(file, "test_file.txt", "text/plain", b"test")
+        api.save(file)
+        transaction.commit()
+        revision_id = file.revision_id
+
+        with patch.object(api, "preview_manager") as preview_manager:
+            preview_manager.get_page_nb.return_value = None
+            preview_manager.has_pdf_preview.return_value = False
+            preview_manager.has_jpeg_preview.return_value = False
+            # INFO - G.M - 2019-11-26 - preview info is stored without flushing
+            # pending changes of session.
+            with session.no_autoflush:
+                folder = api.create(
+                    content_type_list.Folder.slug, workspace, None, "folder", "", False
+                )
+                session.add(folder)
+                assert api.get_preview_info(revision_id, ".txt").has_jpeg_preview is False
+                assert folder in session.new
+            for instance in list(session.new):
+                session.expunge(instance)
+            transaction.commit()
+            assert api.get_preview_info(revision_id, ".txt").has_jpeg_preview is False
+            assert preview_manager.has_jpeg_preview.call_count == 1
+
+            session.execute(
+                RevisionPreviewInfo.__table__.update()
+                .where(RevisionPreviewInfo.revision_id == revision_id)
+                .values(created=datetime.datetime.utcnow() - datetime.timedelta(days=2))
+            )
+            mark_changed(session)
+            transaction.commit()
+            preview_manager.has_jpeg_preview.return_value = True
+            assert api.get_preview_info(revision_id, ".txt").has_jpeg_preview is True
+            assert preview_manager.has_jpeg_preview.call_count == 2
+        transaction.commit()
+        session.expunge_all()
+        assert session.query(RevisionPreviewInfo).get(revision_id).has_jpeg_preview is True
+
+    def test_unit__get_preview_info__ok__not_stored_if_file_unavailable(self, session, app_config):
+        api = ContentApi(current_user=None, session=session, config=app_config)
+        with patch.object(
+            api,
+            "get_one_revision_filepath",
+            side_effect=RevisionFilePathSearchFailedDepotCorrupted(),
+        ):
+            preview_info = api.get_preview_info(42, ".html")
+        assert preview_info.page_nb is None
+        assert preview_info.has_pdf_preview is False
+        assert preview_info.has_jpeg_preview is False
+        assert session.query(RevisionPreviewInfo).get(42) is None
+
 
 @pytest.mark.usefixtures("test_fixture")
 class TestContentApiSecurity(object):
@@ -0,0 +1,94 @@
+from mock import Mock
+import pytest
+
+from tracim_backend.app_models.applications import Application
+from tracim_backend.app_models.contents import ContentTypeList
+from tracim_backend.app_models.contents import content_status_list
+from tracim_backend.exceptions import ContentTypeNotExist
+
+
+def _get_app(slug: str, content_type_slug: str, is_active: bool = True, slug_alias=None):
+    app_config = Mock()
+    app_config.APPS_COLORS = {"primary": "#fff"}
+    app = Application(
+        label=slug,
+        slug="contents/{}".format(slug),
+        fa_icon="file-o",
+        is_active=is_active,
+        config={},
+        main_route="",
+        app_config=app_config,
+    )
+    app.add_content_type(
+        slug=content_type_slug,
+        label=content_type_slug,
+        creation_label=content_type_slug,
+        available_statuses=content_status_list.get_all(),
+        slug_alias=slug_alias,
+    )
+    return app
+
+
+class TestContentTypeList(object):
+    def test_unit__content_type_list__ok__nominal_case(self):
+        app_list = [
+            _get_app("html-document", "html-document", slug_alias=["page"]),
+            _get_app("file", "file"),
+            _get_app("markdownpluspage", "markdownpage", is_active=False),
+        ]
+        content_type_list = ContentTypeList(app_list)
+        assert content_type_list.restricted_allowed_types_slug() == ("html-document", "file")
+        assert content_type_list.endpoint_allowed_types_slug() == (
+            "html-document",
+            "file",
+            "comment",
+        )
+        assert [
+            content_type.slug for content_type in content_type_list.endpoint_allowed_types()
+        ] == ["html-document", "file", "comment"]
+        assert content_type_list.query_allowed_types_slugs() == (
+            "html-document",
+            "page",
+            "file",
+            "comment",
+            "any",
+        )
+        # INFO - G.M - 2019-11-28 - returned values are shared, they should not change
+        assert content_type_list.endpoint_allowed_types() is (
+            content_type_list.endpoint_allowed_types()
+        )
+        assert len(content_type_list.endpoint_allowed_types()) == 3
+
+    def test_unit__get_one_by_slug__ok__slug_and_alias(self):
+        content_type_list = ContentTypeList(
+            [
+                _get_app("html-document", "html-document", slug_alias=["page"]),
+                _get_app("file", "file"),
+            ]
+        )
+        html_document_type = content_type_list.get_one_by_slug("html-document")
+        assert html_document_type.slug == "html-document"
+        assert content_type_list.get_one_by_slug("page") is html_document_type
+        assert content_type_list.get_one_by_slug("comment") is content_type_list.Comment
+        assert content_type_list.get_one_by_slug("event") is content_type_list.Event
+        assert content_type_list.File.slug == "file"
+
+    def test_unit__get_one_by_slug__err__inactive_or_unknown_content_type(self):
+        content_type_list = ContentTypeList(
+            [_get_app("markdownpluspage", "markdownpage", is_active=False)]
+        )
+        with pytest.raises(ContentTypeNotExist):
+            content_type_list.get_one_by_slug("markdownpage")
+        with pytest.raises(ContentTypeNotExist):
+            content_type_list.get_one_by_slug("unknown")
+
+    def test_unit__load_content_types__ok__app_list_updated(self):
+        app_list = [_get_app("file", "file")]
+        content_type_list = ContentTypeList(app_list)
+        assert content_type_list.restricted_allowed_types_slug() == ("file",)
+        app_list.append(_get_app("thread", "thread"))
+        # INFO - G.M - 2019-11-28 - registry is frozen until content types are loaded again
+        assert content_type_list.restricted_allowed_types_slug() == ("file",)
+        content_type_list.load_content_types()
+        assert content_type_list.restricted_allowed_types_slug() == ("file", "thread")
+        assert content_type_list.Thread.slug == "thread"
@@ -0,0 +1,131 @@
+import pytest
+import transaction
+
+from tracim_backend.lib.search.elasticsearch_search.elasticsearch_search import ESSearchApi
+from tracim_backend.lib.search.elasticsearch_search.text_extraction import FileTextExtractor
+from tracim_backend.models.data import ActionDescription
+from tracim_backend.tests.fixtures import *  # noqa: F403,F40
+
+
+@pytest.mark.usefixtures("base_fixture")
+@pytest.mark.parametrize(
+    "config_section", [{"name": "functional_test_elasticsearch_search"}], indirect=True
+)
+class TestESSearchApi(object):
+    def _create_contents(self, workspace_api_factory, content_api_factory, content_type_list):
+        workspace = workspace_api_factory.get().create_workspace("workspace", save_now=True)
+        api = content_api_factory.get()
+        folder = api.create(content_type_list.Folder.slug, workspace, None, "folder", do_save=True)
+        contents = [folder]
+        for page_number in range(4):
+            page = api.create(
+                content_type_list.Page.slug,
+                workspace,
+                folder,
+                "page {}".format(page_number),
+                do_save=True,
+            )
+            api.create_comment(workspace, page, "a comment", do_save=True)
+            contents.append(page)
+        transaction.commit()
+        return contents
+
+    def test_unit__index_all_content__ok__by_batch_and_resume(
+        self,
+        session,
+        app_config,
+        fake_elasticsearch,
+        workspace_api_factory,
+        content_api_factory,
+        content_type_list,
+    ):
+        contents = self._create_contents(
+            workspace_api_factory, content_api_factory, content_type_list
+        )
+        content_ids = [content.content_id for content in contents]
+        search_api = ESSearchApi(session=session, current_user=None, config=app_config)
+        indexed_batches = []
+        result = search_api.index_all_content(
+            batch_size=2,
+            after_content_id=content_ids[0],
+            batch_indexed_callback=lambda batch, batch_result: indexed_batches.append(batch),
+        )
+        # INFO - G.M - 2019-11-15 - comments are indexed with their parent,
+        # contents before checkpoint are not indexed.
+        assert indexed_batches == [content_ids[1:3], content_ids[3:5]]
+        assert fake_elasticsearch.nb_bulk_requests == 2
+        assert result.get_nb_contents_to_index() == 4
+        assert result.get_nb_index_errors() == 0
+        assert set(fake_elasticsearch.documents.keys()) == {
+            str(content_id) for content_id in content_ids[1:]
+        }
+        assert len(fake_elasticsearch.documents[str(content_ids[1])]["comments"]) == 1
+
+    def test_unit__index_all_content__ok__many_processes(
+        self,
+        session,
+        app_config,
+        fake_elasticsearch,
+        workspace_api_factory,
+        content_api_factory,
+        content_type_list,
+    ):
+        contents = self._create_contents(
+            workspace_api_factory, content_api_factory, content_type_list
+        )
+        search_api = ESSearchApi(session=session, current_user=None, config=app_config)
+        result = search_api.index_all_content(batch_size=2, nb_processes=2)
+        assert result.get_nb_index_errors() == 0
+        assert fake_elasticsearch.nb_bulk_requests == 3
+        assert set(fake_elasticsearch.documents.keys()) == {
+            str(content.content_id) for content in contents
+        }
+
+
+@pytest.mark.usefixtures("base_fixture")
+@pytest.mark.parametrize(
+    "config_section",
+    [{"name": "functional_test_elasticsearch_local_text_extraction"}],
+    indirect=True,
+)
+class TestESSearchApiLocalTextExtraction(object):
+    def test_unit__index_contents__ok__send_extracted_text_and_cache_it(
+        self,
+        session,
+        app_config,
+        fake_elasticsearch,
+        workspace_api_factory,
+        content_api_factory,
+        content_type_list,
+        monkeypatch,
+    ):
+        workspace = workspace_api_factory.get().create_workspace("workspace", save_now=True)
+        api = content_api_factory.get()
+        with session.no_autoflush:
+            text_file = api.create(
+                content_type_slug=content_type_list.File.slug,
+                workspace=workspace,
+                label="test_file",
+                do_save=False,
+            )
+            api.update_file_data(text_file, "test_file.txt", "text/plain", b"some searchable text")
+        api.save(text_file, ActionDescription.CREATION)
+        transaction.commit()
+
+        nb_extractions = {"value": 0}
+        extract_text = FileTextExtractor._extract_text
+
+        def counting_extract_text(self, file_):
+            nb_extractions["value"] += 1
+            return extract_text(self, file_)
+
+        monkeypatch.setattr(FileTextExtractor, "_extract_text", counting_extract_text)
+        search_api = ESSearchApi(session=session, current_user=None, config=app_config)
+        search_api.index_contents([text_file.content_id])
+        search_api.index_contents([text_file.content_id])
+
+        document = fake_elasticsearch.documents[str(text_file.content_id)]
+        assert "b64_file" not in document
+        assert "some searchable text" in document["file_data"]["content"]
+        assert nb_extractions["value"] == 1
+        assert fake_elasticsearch.nb_bulk_requests == 2
@@ -2,13 +2,22 @@ from email.message import Message
 
 from mock import MagicMock
 from mock import Mock
+from mock import patch
 import pytest
 import responses
+import transaction
 
 from tracim_backend.exceptions import AutoReplyEmailNotAllowed
 from tracim_backend.exceptions import BadStatusCode
+from tracim_backend.exceptions import EmptyEmailBody
+from tracim_backend.lib.mail_fetcher.comments import EmailReply
+from tracim_backend.lib.mail_fetcher.comments import _create_comment
+from tracim_backend.lib.mail_fetcher.comments import create_comments_from_replies
+from tracim_backend.lib.mail_fetcher.email_fetcher import IMAP_CHECKED_FLAG
+from tracim_backend.lib.mail_fetcher.email_fetcher import IMAP_SEEN_FLAG
 from tracim_backend.lib.mail_fetcher.email_fetcher import DecodedMail
 from tracim_backend.lib.mail_fetcher.email_fetcher import MailFetcher
+from tracim_backend.tests.fixtures import *  # noqa: F403,F40
 
 
 class TestDecodedMail(object):
@@ -129,6 +138,12 @@ class TestDecodedMail(object):
             == "12"
         )
 
+    def test_unit__get_message_id__ok__nominal_case(self):
+        message = Message()
+        message["Message-ID"] = " <1234.5678@mail.localhost> "
+        assert DecodedMail(message, 1).get_message_id() == "<1234.5678@mail.localhost>"
+        assert DecodedMail(Message(), 1).get_message_id() is None
+
 
 class TestMailFetcher(object):
     def test_unit__stop__ok__nominal_test(self):
@@ -418,3 +433,153 @@ class TestMailFetcher(object):
         ]
         mf._notify_tracim(mails=mails, imapc=imapc_mock)
         assert mf._send_request.call_count == 2
+
+    def test_unit__add_comments__ok__flag_handled_mails_at_once(self):
+        mf = MailFetcher(
+            host="host_imap",
+            port="993",
+            use_ssl=True,
+            password="imap_password",
+            folder="INBOX",
+            use_idle=True,
+            use_html_parsing=True,
+            use_txt_parsing=True,
+            lockfile_path="email_fetcher.lock",
+            api_base_url="http://127.0.0.1:6543/api/",
+            burst=True,
+            api_key="apikey",
+            connection_max_lifetime=60,
+            heartbeat=60,
+            reply_to_pattern="",
+            references_pattern="",
+            user="imap_user",
+            processing_mode="DIRECT",
+            parsing_workers=2,
+        )
+        imapc_mock = MagicMock()
+        mails = []
+        for uid in (1, 2, 3):
+            mail = Mock()
+            mail.uid = uid
+            mail.get_body.return_value = "CONTENT{}".format(uid)
+            mail.get_key.return_value = str(uid)
+            mail.get_from_address.return_value = "useremailaddress@mydomain.com"
+            mail.get_message_id.return_value = "<{}@mydomain.com>".format(uid)
+            mails.append(mail)
+        mails[2].get_body.side_effect = EmptyEmailBody()
+        with patch(
+            "tracim_backend.lib.mail_fetcher.email_fetcher.create_comments_from_replies"
+        ) as create_comments_mock:
+            create_comments_mock.return_value = [1, 2]
+            mf._add_comments(mails=mails, imapc=imapc_mock)
+        replies = create_comments_mock.call_args[0][2]
+        assert replies == [
+            EmailReply(
+                uid=1,
+                message_id="<1@mydomain.com>",
+                content_id=1,
+                user_email="useremailaddress@mydomain.com",
+                body="CONTENT1",
+            ),
+            EmailReply(
+                uid=2,
+                message_id="<2@mydomain.com>",
+                content_id=2,
+                user_email="useremailaddress@mydomain.com",
+                body="CONTENT2",
+            ),
+        ]
+        imapc_mock.add_flags.assert_called_once_with([1, 2], [IMAP_CHECKED_FLAG, IMAP_SEEN_FLAG])
+
+
+@pytest.mark.usefixtures("base_fixture")
+class TestCreateCommentsFromReplies(object):
+    def test_func__create_comments_from_replies__ok__idempotent_by_message_id(
+        self,
+        app_config,
+        session_factory,
+        workspace_api_factory,
+        content_api_factory,
+        content_type_list,
+    ):
+        workspace = workspace_api_factory.get().create_workspace("workspace", save_now=True)
+        api = content_api_factory.get()
+        thread = api.create(
+            content_type_list.Thread.slug, workspace, None, "thread", do_save=True, do_notify=False
+        )
+        thread_id = thread.content_id
+        transaction.commit()
+        replies = [
+            EmailReply(
+                uid=1,
+                message_id="<reply@mydomain.com>",
+                content_id=thread_id,
+                user_email="admin@admin.admin",
+                body="<p>reply</p>",
+            ),
+            # INFO - G.M - 2019-11-22 - same mail fetched twice
+            EmailReply(
+                uid=2,
+                message_id="<reply@mydomain.com>",
+                content_id=thread_id,
+                user_email="admin@admin.admin",
+                body="<p>reply</p>",
+            ),
+            EmailReply(
+                uid=3,
+                message_id="<unknown@mydomain.com>",
+                content_id=thread_id,
+                user_email="unknown@mydomain.com",
+                body="<p>reply</p>",
+            ),
+        ]
+        assert create_comments_from_replies(app_config, session_factory, replies) == [1, 2]
+        assert create_comments_from_replies(app_config, session_factory, replies[:1]) == [1]
+
+        thread = content_api_factory.get().get_one(thread_id, content_type_list.Any_SLUG)
+        comments = thread.get_comments()
+        assert len(comments) == 1
+        assert comments[0].description == "<p>reply</p>"
+
+    def test_func__create_comments_from_replies__ok__invalid_reply_rolled_back(
+        self,
+        app_config,
+        session_factory,
+        workspace_api_factory,
+        content_api_factory,
+        content_type_list,
+    ):
+        workspace = workspace_api_factory.get().create_workspace("workspace", save_now=True)
+        api = content_api_factory.get()
+        thread = api.create(
+            content_type_list.Thread.slug, workspace, None, "thread", do_save=True, do_notify=False
+        )
+        thread_id = thread.content_id
+        transaction.commit()
+        replies = [
+            EmailReply(
+                uid=uid,
+                message_id="<reply{}@mydomain.com>".format(uid),
+                content_id=thread_id,
+                user_email="admin@admin.admin",
+                body="<p>reply {}</p>".format(uid),
+            )
+            for uid in (1, 2, 3)
+        ]
+
+        def create_comment(config, session, user, reply):
+            comment = _create_comment(config, session, user, reply)
+            if reply.uid == 2:
+                raise ValueError("invalid reply")
+            return comment
+
+        with patch(
+            "tracim_backend.lib.mail_fetcher.comments._create_comment", side_effect=create_comment
+        ):
+            assert create_comments_from_replies(app_config, session_factory, replies) == [1, 3]
+
+        thread = content_api_factory.get().get_one(thread_id, content_type_list.Any_SLUG)
+        assert sorted(comment.description for comment in thread.get_comments()) == [
+            "<p>reply 1</p>",
+            "<p>reply 3</p>",
+        ]
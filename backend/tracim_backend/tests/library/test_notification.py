@@ -1,8 +1,15 @@
 # -*- coding: utf-8 -*-
+import os
 
+import pytest
+
+import tracim_backend
+from tracim_backend.exceptions import EmailTemplateError
 from tracim_backend.lib.core.notifications import DummyNotifier
 from tracim_backend.lib.core.notifications import NotifierFactory
 from tracim_backend.lib.mail_notifier.notifier import EmailNotifier
+from tracim_backend.lib.mail_notifier.notifier import get_email_manager
+from tracim_backend.lib.mail_notifier.notifier import get_email_template
 from tracim_backend.models.auth import User
 from tracim_backend.models.data import Content
 from tracim_backend.tests.fixtures import *  # noqa: F403,F40
@@ -32,3 +39,50 @@ class TestNotifierFactory(object):
 class TestEmailNotifier(object):
     # TODO - G.M - 04-03-2017 -  [emailNotif] - Restore test for email Notif
     pass
+
+
+class TestEmailTemplate(object):
+    def test_unit__get_email_template__ok__cached_until_modified(self, tmpdir):
+        template_path = str(tmpdir.join("template.mak"))
+        with open(template_path, "w") as template_file:
+            template_file.write("Hello ${name}")
+        template = get_email_template(template_path)
+        assert template.render(name="bob") == "Hello bob"
+        assert get_email_template(template_path) is template
+
+        with open(template_path, "w") as template_file:
+            template_file.write("Bye ${name}")
+        modified_at = os.path.getmtime(template_path) + 10
+        os.utime(template_path, (modified_at, modified_at))
+        new_template = get_email_template(template_path)
+        assert new_template is not template
+        assert new_template.render(name="bob") == "Bye bob"
+
+    def test_unit__is_template_recipient_independent__ok__nominal_case(
+        self, app_config, session, tmpdir
+    ):
+        email_manager = get_email_manager(app_config, session)
+        content_update_template_path = os.path.join(
+            os.path.dirname(tracim_backend.__file__),
+            "templates",
+            "mail",
+            "content_update_body_html.mak",
+        )
+        assert email_manager._is_template_recipient_independent(content_update_template_path)
+        template_path = str(tmpdir.join("template.mak"))
+        with open(template_path, "w") as template_file:
+            template_file.write("Hello ${content_in_context.label}")
+        assert not email_manager._is_template_recipient_independent(template_path)
+        with open(template_path, "w") as template_file:
+            template_file.write("<%! recipient_independent = False %>Hello")
+        assert not email_manager._is_template_recipient_independent(template_path)
+        with open(template_path, "w") as template_file:
+            template_file.write("Hello ${")
+        assert not email_manager._is_template_recipient_independent(template_path)
+
+    def test_unit__is_template_recipient_independent__err__missing_template(
+        self, app_config, session, tmpdir
+    ):
+        email_manager = get_email_manager(app_config, session)
+        with pytest.raises(EmailTemplateError):
+            email_manager._is_template_recipient_independent(str(tmpdir.join("missing.mak")))
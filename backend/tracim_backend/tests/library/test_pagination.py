@@ -0,0 +1,87 @@
+from datetime import datetime
+import json
+
+import marshmallow
+import pytest
+
+from tracim_backend.exceptions import InvalidPageToken
+from tracim_backend.lib.core.user import UserApi
+from tracim_backend.lib.utils.json_stream import iter_json_list
+from tracim_backend.lib.utils.json_stream import iter_json_page
+from tracim_backend.lib.utils.pagination import Page
+from tracim_backend.lib.utils.pagination import decode_page_token
+from tracim_backend.lib.utils.pagination import encode_page_token
+from tracim_backend.tests.fixtures import *  # noqa: F403,F40
+
+
+class ItemSchema(marshmallow.Schema):
+    item_id = marshmallow.fields.Int()
+    label = marshmallow.fields.String()
+
+
+class TestPageToken(object):
+    def test_unit__page_token__ok__roundtrip(self):
+        values = ["label", datetime(2019, 11, 29, 10, 20, 30, 123456), 12]
+        assert decode_page_token(encode_page_token(values), 3) == values
+
+    @pytest.mark.parametrize("page_token", ["invalid", encode_page_token([1, 2]), "W3sifV0="])
+    def test_unit__page_token__err__invalid_token(self, page_token):
+        with pytest.raises(InvalidPageToken):
+            decode_page_token(page_token, 3)
+
+
+class TestJsonStream(object):
+    def test_unit__iter_json_list__ok__nominal_case(self):
+        items = [{"item_id": item_id, "label": str(item_id)} for item_id in range(5)]
+        chunks = list(iter_json_list(ItemSchema(), items, chunk_size=2))
+        # INFO - G.M - 2019-11-29 - "[", 3 chunks of items, "]"
+        assert len(chunks) == 5
+        assert json.loads(b"".join(chunks).decode("utf-8")) == items
+
+    def test_unit__iter_json_list__ok__empty_list(self):
+        assert json.loads(b"".join(iter_json_list(ItemSchema(), [])).decode("utf-8")) == []
+
+    def test_unit__iter_json_page__ok__nominal_case(self):
+        items = [{"item_id": 1, "label": "one"}]
+        page = Page(items=items, per_page=1, next_page_token="token")
+        assert json.loads(b"".join(iter_json_page(ItemSchema(), page)).decode("utf-8")) == {
+            "items": items,
+            "next_page_token": "token",
+            "has_next": True,
+            "per_page": 1,
+        }
+
+
+@pytest.mark.usefixtures("base_fixture")
+class TestUserApiPagination(object):
+    def test_unit__get_all_page__ok__nominal_case(self, session, app_config, admin_user):
+        api = UserApi(current_user=None, session=session, config=app_config)
+        users = [
+            api.create_user(email="{}@test.test".format(name), name=name, do_notify=False)
+            for name in ("carol", "Bob", "alice")
+        ]
+        session.flush()
+        # INFO - G.M - 2019-11-29 - admin display name is "Global manager"
+        expected_ids = [users[2].user_id, users[1].user_id, users[0].user_id, admin_user.user_id]
+
+        page = api.get_all_page(count=3)
+        assert [user.user_id for user in page.items] == expected_ids[:3]
+        assert page.has_next
+        page = api.get_all_page(count=3, page_token=page.next_page_token)
+        assert [user.user_id for user in page.items] == expected_ids[3:]
+        assert not page.has_next
+
+    def test_unit__get_all_page__ok__same_display_name(self, session, app_config):
+        api = UserApi(current_user=None, session=session, config=app_config)
+        for index in range(3):
+            api.create_user(email="bob{}@test.test".format(index), name="bob", do_notify=False)
+        session.flush()
+
+        user_ids = []
+        page = api.get_all_page(count=1)
+        while True:
+            user_ids.extend(user.user_id for user in page.items)
+            if not page.has_next:
+                break
+            page = api.get_all_page(count=1, page_token=page.next_page_token)
+        assert len(user_ids) == len(set(user_ids)) == 4
@@ -0,0 +1,124 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+from mock import Mock
+from mock import patch
+from sqlalchemy.orm import Session
+
+from tracim_backend.lib.preview.pregeneration import PreviewPregenerator
+from tracim_backend.lib.preview.pregeneration import RevisionFile
+from tracim_backend.lib.preview.pregeneration import RevisionPreviewsResult
+from tracim_backend.lib.preview.pregeneration import generate_revisions_previews
+from tracim_backend.lib.preview.pregeneration import queue_revision_previews_generation
+
+
+def _get_config(mimetype_concurrency=None):
+    config = Mock()
+    config.PREVIEW_CACHE_DIR = "/tmp/preview_cache"
+    config.PREVIEW__JPG__ALLOWED_DIMS = []
+    config.PREVIEW__PREGENERATION__MAX_PAGES = 1
+    config.PREVIEW__PREGENERATION__WORKERS = 4
+    config.PREVIEW__PREGENERATION__MIMETYPE_CONCURRENCY = mimetype_concurrency or {}
+    return config
+
+
+class TestPreviewPregenerator(object):
+    def test_unit__get_limited_mimetype_prefix__ok__nominal_case(self):
+        pregenerator = PreviewPregenerator(
+            _get_config({"application/vnd.oasis.opendocument": 1, "application/msword": 1})
+        )
+        assert (
+            pregenerator._get_limited_mimetype_prefix(
+                "application/vnd.oasis.opendocument.presentation"
+            )
+            == "application/vnd.oasis.opendocument"
+        )
+        assert pregenerator._get_limited_mimetype_prefix("image/png") is None
+        assert pregenerator._get_limited_mimetype_prefix("") is None
+
+    def test_unit__build_previews__ok__mimetype_concurrency_limited(self):
+        running = {"office": 0, "other": 0}
+        max_running = {"office": 0, "other": 0}
+        lock = threading.Lock()
+
+        def build_revision_previews(preview_cache_dir, revision_file, jpg_dims, max_pages):
+            kind = "office" if revision_file.mimetype.startswith("application/vnd") else "other"
+            with lock:
+                running[kind] += 1
+                max_running[kind] = max(max_running[kind], running[kind])
+            time.sleep(0.05)
+            with lock:
+                running[kind] -= 1
+            return RevisionPreviewsResult(revision_file.revision_id, 1, None)
+
+        revision_files = [
+            RevisionFile(1, "/tmp/1", ".odt", "application/vnd.oasis.opendocument.text"),
+            RevisionFile(2, "/tmp/2", ".ods", "application/vnd.oasis.opendocument.spreadsheet"),
+            RevisionFile(3, "/tmp/3", ".png", "image/png"),
+            RevisionFile(4, "/tmp/4", ".png", "image/png"),
+            RevisionFile(5, "/tmp/5", ".odp", "application/vnd.oasis.opendocument.presentation"),
+            RevisionFile(6, "/tmp/6", ".png", "image/png"),
+        ]
+        callback_results = []
+        with patch(
+            "tracim_backend.lib.preview.pregeneration.ProcessPoolExecutor", ThreadPoolExecutor
+        ), patch(
+            "tracim_backend.lib.preview.pregeneration._build_revision_previews",
+            build_revision_previews,
+        ):
+            with PreviewPregenerator(
+                _get_config({"application/vnd.oasis.opendocument": 1}), nb_workers=3
+            ) as pregenerator:
+                results = pregenerator.build_previews(
+                    revision_files, result_callback=callback_results.append
+                )
+        assert sorted(result.revision_id for result in results) == [1, 2, 3, 4, 5, 6]
+        assert callback_results == results
+        assert max_running["office"] == 1
+        assert max_running["other"] <= 2
+
+    def test_unit__generate_revisions_previews__ok__use_given_pregenerator(self):
+        session_factory = Mock()
+        pregenerator = Mock()
+        pregenerator.build_previews.return_value = [RevisionPreviewsResult(1, 3, None)]
+        revision_files = [RevisionFile(1, "/tmp/1", ".png", "image/png")]
+        with patch.object(
+            PreviewPregenerator, "get_revision_files", return_value=revision_files
+        ), patch("tracim_backend.models.setup_models.get_tm_session"):
+            results = generate_revisions_previews(
+                _get_config(), [1], session_factory=session_factory, pregenerator=pregenerator
+            )
+        pregenerator.build_previews.assert_called_once_with(revision_files)
+        assert results == [RevisionPreviewsResult(1, 3, None)]
+
+
+class TestQueueRevisionPreviewsGeneration(object):
+    def test_unit__queue_revision_previews_generation__ok__queued_once_after_commit(self):
+        session = Session()
+        queue = Mock()
+        config = _get_config()
+        with patch("tracim_backend.lib.preview.pregeneration.get_redis_connection"), patch(
+            "tracim_backend.lib.preview.pregeneration.get_rq_queue", return_value=queue
+        ):
+            queue_revision_previews_generation(session, config, Mock(revision_id=12))
+            queue_revision_previews_generation(session, config, Mock(revision_id=3))
+            assert not queue.enqueue.called
+            session.commit()
+            assert queue.enqueue.call_count == 1
+            assert queue.enqueue.call_args[1]["revision_ids"] == [3, 12]
+            # INFO - G.M - 2019-11-25 - nothing pending, nothing queued
+            session.commit()
+            assert queue.enqueue.call_count == 1
+
+    def test_unit__queue_revision_previews_generation__ok__not_queued_on_rollback(self):
+        session = Session()
+        queue = Mock()
+        config = _get_config()
+        with patch("tracim_backend.lib.preview.pregeneration.get_redis_connection"), patch(
+            "tracim_backend.lib.preview.pregeneration.get_rq_queue", return_value=queue
+        ):
+            queue_revision_previews_generation(session, config, Mock(revision_id=12))
+            session.rollback()
+            session.commit()
+            assert not queue.enqueue.called
@@ -1,4 +1,53 @@
+from http.server import BaseHTTPRequestHandler
+import threading
+import time
+
+import pytest
+
+from tracim_backend.lib.proxy.proxy import BehindResponseBody
 from tracim_backend.lib.proxy.proxy import Proxy
+from tracim_backend.tests.utils import ThreadingHTTPServer
+
+BEHIND_RESPONSE_BODY = b"BEGIN:VCALENDAR\n" + b"X" * 200000 + b"\nEND:VCALENDAR\n"
+
+
+class BehindRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        self.server.client_addresses.add(self.client_address)
+        if self.path == "/slow":
+            # INFO - G.M - 2019-12-02 - no response before proxy read timeout
+            time.sleep(0.5)
+            self.close_connection = True
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/calendar")
+        self.send_header("Content-Length", str(len(BEHIND_RESPONSE_BODY)))
+        self.send_header("Set-Cookie", "session=secret")
+        self.end_headers()
+        self.wfile.write(BEHIND_RESPONSE_BODY)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def behind_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), BehindRequestHandler)
+    server.client_addresses = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class FakeRequest(object):
+    def __init__(self, method="GET"):
+        self.headers = {"Authorization": "Basic dGVzdA==", "Connection": "keep-alive"}
+        self.body = b""
+        self.method = method
 
 
 class TestProxy(object):
@@ -68,11 +117,11 @@ class TestProxy(object):
     def test_get_response_for_request__ok_nominal_case(self):
         proxy = Proxy("http://localhost:8080")
 
-        def mocked_generate_proxy_response(status, headers, body):
+        def mocked_generate_proxy_response(status, headers, app_iter):
             response = FakeResponse()
             response.headers = headers
             response.status_code = status
-            response.body = body
+            response.body = b"".join(app_iter)
             return response
 
         def mocked_get_behind_response(method, headers, data, url, auth):
@@ -91,6 +140,9 @@ class TestProxy(object):
                 self.content = self.body
                 self.status_code = 200
 
+            def iter_content(self, chunk_size):
+                return iter([self.body])
+
         class FakeRequest(object):
             def __init__(self):
                 self.headers = {
@@ -119,3 +171,56 @@ class TestProxy(object):
         assert response.headers != test_fake_response.headers
         assert response.headers.get("extra_header") == "extra_header"
         assert response.status_code == test_fake_response.status_code
+
+    def test_get_response_for_request__ok__streamed_body(self, behind_server):
+        proxy = Proxy("http://127.0.0.1:{}".format(behind_server.server_address[1]))
+        response = proxy.get_response_for_request(
+            request=FakeRequest(),
+            path="/agenda/user/1/",
+            extra_response_headers={"extra_header": "extra_header"},
+        )
+        assert response.status_code == 200
+        assert isinstance(response.app_iter, BehindResponseBody)
+        chunks = list(response.app_iter)
+        assert len(chunks) > 1
+        assert b"".join(chunks) == BEHIND_RESPONSE_BODY
+        response.app_iter.close()
+        assert response.headers["Content-Type"] == "text/calendar"
+        assert response.headers["extra_header"] == "extra_header"
+        assert response.headers["Server-Timing"].startswith("proxy;dur=")
+        assert "Authorization" not in response.headers
+        assert proxy.latency_stats.nb_requests == 1
+        assert proxy.latency_stats.mean_latency > 0
+        proxy.close()
+
+    def test_get_response_for_request__ok__pooled_connection(self, behind_server):
+        proxy = Proxy("http://127.0.0.1:{}".format(behind_server.server_address[1]))
+        for _ in range(3):
+            response = proxy.get_response_for_request(request=FakeRequest(), path="/agenda/")
+            assert b"".join(response.app_iter) == BEHIND_RESPONSE_BODY
+            response.app_iter.close()
+        assert len(behind_server.client_addresses) == 1
+        # INFO - G.M - 2019-12-02 - cookies of behind server are not kept by session
+        assert not proxy._session.cookies
+        assert proxy.latency_stats.nb_requests == 3
+        proxy.close()
+
+    def test_get_response_for_request__err_504__timeout(self, behind_server):
+        proxy = Proxy(
+            "http://127.0.0.1:{}".format(behind_server.server_address[1]), timeout=(1, 0.1)
+        )
+        response = proxy.get_response_for_request(request=FakeRequest(), path="/slow")
+        assert response.status_code == 504
+        assert proxy.latency_stats.nb_errors == 1
+        assert proxy.latency_stats.nb_requests == 0
+        proxy.close()
+
+    def test_get_response_for_request__err_502__connection_error(self, behind_server):
+        port = behind_server.server_address[1]
+        behind_server.shutdown()
+        behind_server.server_close()
+        proxy = Proxy("http://127.0.0.1:{}".format(port))
+        response = proxy.get_response_for_request(request=FakeRequest(), path="/agenda/")
+        assert response.status_code == 502
+        assert proxy.latency_stats.nb_errors == 1
+        proxy.close()
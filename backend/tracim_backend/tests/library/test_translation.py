@@ -0,0 +1,76 @@
+import json
+import os
+
+from mock import Mock
+from mock import patch
+import pytest
+
+from tracim_backend.lib.utils.translation import TRANSLATION_FILENAME
+from tracim_backend.lib.utils.translation import Translator
+from tracim_backend.lib.utils.translation import translation_catalog_cache
+
+
+def _write_catalog(i18n_folder, lang: str, catalog: dict) -> str:
+    lang_folder = i18n_folder.join(lang)
+    lang_folder.ensure(dir=True)
+    filepath = str(lang_folder.join(TRANSLATION_FILENAME))
+    with open(filepath, "w") as file:
+        json.dump(catalog, file)
+    return filepath
+
+
+@pytest.fixture
+def i18n_config(tmpdir):
+    _write_catalog(tmpdir, "en", {"Hello": "Hello !", "Welcome": "Welcome !", "Empty": ""})
+    _write_catalog(tmpdir, "fr", {"Hello": "Bonjour !", "Empty": ""})
+    config = Mock()
+    config.DEFAULT_LANG = "en"
+    config.BACKEND__I18N_FOLDER_PATH = str(tmpdir)
+    config.BACKEND__I18N_AUTO_RELOAD = False
+    yield config
+    translation_catalog_cache.clear()
+
+
+class TestTranslator(object):
+    def test_unit__get_translation__ok__nominal_case(self, i18n_config):
+        translator = Translator(i18n_config, default_lang="fr")
+        assert translator.get_translation("Hello") == "Bonjour !"
+        assert translator.get_translation("Hello", lang="en") == "Hello !"
+
+    def test_unit__get_translation__ok__fallback_lang(self, i18n_config):
+        translator = Translator(i18n_config, default_lang="fr")
+        # INFO - G.M - 2019-11-27 - missing and empty translations use fallback lang
+        assert translator.get_translation("Welcome") == "Welcome !"
+        assert translator.get_translation("Welcome", lang="de") == "Welcome !"
+        assert translator.get_translation("Hello", lang="de") == "Hello !"
+        assert translator.get_translation("Empty") == "Empty"
+        assert translator.get_translation("Unknown message") == "Unknown message"
+
+    def test_unit__get_translation__ok__explicit_fallback_lang(self, i18n_config):
+        translator = Translator(i18n_config, default_lang="de", fallback_lang="fr")
+        assert translator.get_translation("Hello") == "Bonjour !"
+        assert translator.get_translation("Welcome") == "Welcome"
+
+    def test_unit__get_translation__ok__no_i18n_folder(self, i18n_config, tmpdir):
+        i18n_config.BACKEND__I18N_FOLDER_PATH = str(tmpdir.join("unknown"))
+        translator = Translator(i18n_config, default_lang="fr")
+        assert translator.get_translation("Hello") == "Hello"
+
+    def test_unit__get_translation__ok__catalog_read_once(self, i18n_config):
+        with patch("tracim_backend.lib.utils.translation.json.load", wraps=json.load) as load:
+            for _ in range(10):
+                translator = Translator(i18n_config, default_lang="fr")
+                assert translator.get_translation("Hello") == "Bonjour !"
+                assert translator.get_translation("Welcome") == "Welcome !"
+        # INFO - G.M - 2019-11-27 - fr and en catalogs
+        assert load.call_count == 2
+
+    def test_unit__get_translation__ok__auto_reload(self, i18n_config, tmpdir):
+        translator = Translator(i18n_config, default_lang="fr")
+        assert translator.get_translation("Hello") == "Bonjour !"
+        filepath = _write_catalog(tmpdir, "fr", {"Hello": "Salut !"})
+        stat = os.stat(filepath)
+        os.utime(filepath, (stat.st_atime, stat.st_mtime + 10))
+        assert translator.get_translation("Hello") == "Bonjour !"
+        i18n_config.BACKEND__I18N_AUTO_RELOAD = True
+        assert translator.get_translation("Hello") == "Salut !"
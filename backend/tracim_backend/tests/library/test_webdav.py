@@ -1,15 +1,23 @@
 # -*- coding: utf-8 -*-
+import heapq
 from unittest.mock import MagicMock
 
 import pytest
+from sqlalchemy import event
+import transaction
 
 from tracim_backend import WebdavAppFactory
 from tracim_backend.lib.core.notifications import DummyNotifier
+from tracim_backend.lib.utils.utils import get_redis_connection
 from tracim_backend.lib.webdav import Provider
 from tracim_backend.lib.webdav import TracimDomainController
+from tracim_backend.lib.webdav.lock_storage import MemoryLockStorage
+from tracim_backend.lib.webdav.lock_storage import RedisLockStorage
+from tracim_backend.lib.webdav.path_cache import WebdavPathCache
 from tracim_backend.lib.webdav.resources import RootResource
 from tracim_backend.models.data import Content
 from tracim_backend.models.data import ContentRevisionRO
+from tracim_backend.models.revision_protection import new_revision
 from tracim_backend.tests.fixtures import *  # noqa: F403,F40
 from tracim_backend.tests.utils import eq_
 from tracim_backend.tests.utils import webdav_put_new_test_file_helper
@@ -41,6 +49,133 @@ class TestWebdavFactory(object):
         assert isinstance(config["domaincontroller"], TracimDomainController)
 
 
+class TestWebdavPathCache(object):
+    def test_unit__get__ok__nominal_case(self):
+        path_cache = WebdavPathCache(ttl=60)
+        path_cache.set(1, "/w1/f1/file.txt", workspace_id=1, content_id=3, parent_ids=[2])
+        cached_path = path_cache.get(1, "/w1/f1/file.txt")
+        assert cached_path.workspace_id == 1
+        assert cached_path.content_id == 3
+        assert cached_path.parent_ids == (2,)
+        assert path_cache.get(2, "/w1/f1/file.txt") is None
+
+    def test_unit__get__ok__expired_or_disabled(self):
+        path_cache = WebdavPathCache(ttl=-1)
+        path_cache.set(1, "/w1/file.txt", workspace_id=1, content_id=3, parent_ids=[])
+        assert path_cache.get(1, "/w1/file.txt") is None
+        path_cache = WebdavPathCache(ttl=0)
+        path_cache.set(1, "/w1/file.txt", workspace_id=1, content_id=3, parent_ids=[])
+        assert path_cache.get(1, "/w1/file.txt") is None
+
+    def test_unit__invalidate_workspace__ok__nominal_case(self):
+        path_cache = WebdavPathCache(ttl=60)
+        path_cache.set(1, "/w1/file.txt", workspace_id=1, content_id=3, parent_ids=[])
+        path_cache.set(2, "/w1/file.txt", workspace_id=1, content_id=3, parent_ids=[])
+        path_cache.set(1, "/w2/file.txt", workspace_id=2, content_id=4, parent_ids=[])
+        path_cache.invalidate_workspace(1)
+        assert path_cache.get(1, "/w1/file.txt") is None
+        assert path_cache.get(2, "/w1/file.txt") is None
+        assert path_cache.get(1, "/w2/file.txt").content_id == 4
+
+    def test_unit__set__ok__drop_oldest_paths(self):
+        path_cache = WebdavPathCache(ttl=60, max_size=2)
+        path_cache.set(1, "/w1/a.txt", workspace_id=1, content_id=3, parent_ids=[])
+        path_cache.set(1, "/w1/b.txt", workspace_id=1, content_id=4, parent_ids=[])
+        path_cache.set(1, "/w1/c.txt", workspace_id=1, content_id=5, parent_ids=[])
+        assert path_cache.get(1, "/w1/a.txt") is None
+        assert path_cache.get(1, "/w1/b.txt").content_id == 4
+        assert path_cache.get(1, "/w1/c.txt").content_id == 5
+
+
+@pytest.fixture(params=["memory", "redis"])
+def lock_storage(request, app_config):
+    if request.param == "redis":
+        storage = RedisLockStorage(
+            get_redis_connection(app_config), key_prefix="tracim:test:webdav:locks:"
+        )
+    else:
+        storage = MemoryLockStorage()
+    storage.clear()
+    yield storage
+    storage.clear()
+
+
+def _new_lock(timeout=60):
+    return {
+        "type": "write",
+        "scope": "exclusive",
+        "depth": "infinity",
+        "owner": b"<owner>bob</owner>",
+        "principal": "bob",
+        "timeout": timeout,
+    }
+
+
+class TestWebdavLockStorage(object):
+    def test_unit__create_and_get__ok__nominal_case(self, lock_storage):
+        lock = lock_storage.create("/w1/file.txt", _new_lock())
+        stored_lock = lock_storage.get(lock["token"])
+        assert stored_lock["root"] == "/w1/file.txt"
+        assert stored_lock["owner"] == b"<owner>bob</owner>"
+        assert stored_lock["depth"] == "infinity"
+        assert stored_lock["timeout"] == 60
+        assert lock_storage.get("opaquelocktoken:unknown") is None
+
+    def test_unit__get_lock_list__ok__root_and_children(self, lock_storage):
+        folder_lock = lock_storage.create("/w1/folder", _new_lock())
+        file_lock = lock_storage.create("/w1/folder/file.txt", _new_lock())
+        lock_storage.create("/w1/folder2/file.txt", _new_lock())
+        lock_storage.create("/w1/folder.txt", _new_lock())
+        assert lock_storage.getLockList(
+            "/w1/folder", includeRoot=True, includeChildren=False, tokenOnly=True
+        ) == [folder_lock["token"]]
+        assert lock_storage.getLockList(
+            "/w1/folder", includeRoot=False, includeChildren=True, tokenOnly=True
+        ) == [file_lock["token"]]
+        locks = lock_storage.getLockList(
+            "/w1/folder", includeRoot=True, includeChildren=True, tokenOnly=False
+        )
+        assert {lock["root"] for lock in locks} == {"/w1/folder", "/w1/folder/file.txt"}
+        assert (
+            len(
+                lock_storage.getLockList(
+                    "/", includeRoot=True, includeChildren=True, tokenOnly=True
+                )
+            )
+            == 4
+        )
+
+    def test_unit__refresh_and_delete__ok__nominal_case(self, lock_storage):
+        lock = lock_storage.create("/w1/file.txt", _new_lock())
+        refreshed_lock = lock_storage.refresh(lock["token"], 120)
+        assert refreshed_lock["timeout"] == 120
+        assert refreshed_lock["expire"] > lock["expire"]
+        assert lock_storage.get(lock["token"])["timeout"] == 120
+        assert lock_storage.delete(lock["token"]) is True
+        assert lock_storage.delete(lock["token"]) is False
+        assert lock_storage.get(lock["token"]) is None
+        assert (
+            lock_storage.getLockList(
+                "/w1/file.txt", includeRoot=True, includeChildren=True, tokenOnly=True
+            )
+            == []
+        )
+
+    def test_unit__get_lock_list__ok__expired_lock(self, lock_storage):
+        lock = lock_storage.create("/w1/file.txt", _new_lock())
+        # INFO - G.M - 2019-11-19 - make lock expire without waiting
+        if isinstance(lock_storage, MemoryLockStorage):
+            lock_storage._locks[lock["token"]]["expire"] = 0
+            heapq.heappush(lock_storage._expirations, (0, lock["token"]))
+        else:
+            lock_storage._redis.hset(lock_storage._get_lock_key(lock["token"]), "expire", "0")
+        assert lock_storage.get(lock["token"]) is None
+        assert (
+            lock_storage.getLockList("/w1", includeRoot=True, includeChildren=True, tokenOnly=True)
+            == []
+        )
+
+
 @pytest.mark.usefixtures("base_fixture")
 @pytest.mark.usefixtures("default_content_fixture")
 class TestWebDav(object):
@@ -170,6 +305,64 @@ class TestWebDav(object):
         assert pie, "Apple_Pie should be found"
         eq_("Apple_Pie.txt", pie.name)
 
+    def test_unit__get_content__ok__cached_path_with_renamed_parents(
+        self,
+        user_api_factory,
+        webdav_provider,
+        webdav_environ_factory,
+        content_api_factory,
+        workspace_api_factory,
+        session,
+    ):
+        user = user_api_factory.get().get_one_by_email("bob@fsf.local")
+        environ = webdav_environ_factory.get(user)
+        assert webdav_provider.getResourceInst("/Recipes/Desserts/Apple_Pie.txt", environ)
+
+        # INFO - G.M - 2019-11-18 - rename parent folder without webdav, path
+        # cache is not invalidated.
+        content_api = content_api_factory.get(current_user=user)
+        folder = content_api.get_one_by_filename_and_parent_labels(
+            "Desserts", workspace=workspace_api_factory.get().get_one_by_label("Recipes")
+        )
+        with new_revision(session=session, tm=transaction.manager, content=folder):
+            content_api.update_content(folder, new_label="Sweets")
+        content_api.save(folder)
+        assert webdav_provider.getResourceInst("/Recipes/Desserts/Apple_Pie.txt", environ) is None
+        assert webdav_provider.getResourceInst("/Recipes/Sweets/Apple_Pie.txt", environ)
+
+        workspace_api = workspace_api_factory.get()
+        workspace_api.update_workspace(
+            workspace_api.get_one_by_label("Recipes"), label="Cooking", save_now=True
+        )
+        assert webdav_provider.getResourceInst("/Recipes/Sweets/Apple_Pie.txt", environ) is None
+        assert webdav_provider.getResourceInst("/Cooking/Sweets/Apple_Pie.txt", environ)
+
+    def test_unit__get_content__ok__cached_path_checked_in_one_query(
+        self, user_api_factory, webdav_provider, webdav_environ_factory, engine
+    ):
+        environ = webdav_environ_factory.get(
+            user_api_factory.get().get_one_by_email("bob@fsf.local")
+        )
+        statements = []
+
+        def count_statement(*args, **kwargs):
+            statements.append(args[2])
+
+        def get_content_statements() -> int:
+            del statements[:]
+            event.listen(engine, "before_cursor_execute", count_statement)
+            try:
+                assert webdav_provider.getResourceInst("/Recipes/Desserts/Apple_Pie.txt", environ)
+            finally:
+                event.remove(engine, "before_cursor_execute", count_statement)
+            return len(statements)
+
+        webdav_provider.path_cache.clear()
+        nb_statements_without_cache = get_content_statements()
+        # INFO - G.M - 2019-11-18 - cached content is checked by ids in one query,
+        # instead of resolving workspace and path by labels
+        assert get_content_statements() < nb_statements_without_cache
+
     def test_unit__delete_content__ok(
         self, app_config, user_api_factory, webdav_provider, webdav_environ_factory, session
     ):
@@ -201,6 +394,46 @@ class TestWebDav(object):
         )
         eq_(None, result, msg="Result should be None instead {0}".format(result))
 
+    def test_unit__list_folder_members_properties__ok__queries_not_related_to_members_number(
+        self, webdav_provider, webdav_environ_factory, user_api_factory, engine
+    ):
+        environ = webdav_environ_factory.get(
+            user_api_factory.get().get_one_by_email("bob@fsf.local")
+        )
+        statements = []
+
+        def count_statement(*args, **kwargs):
+            statements.append(args[2])
+
+        def list_folder_members_properties() -> int:
+            folder = webdav_provider.getResourceInst("/Recipes/Salads/", environ)
+            del statements[:]
+            event.listen(engine, "before_cursor_execute", count_statement)
+            try:
+                for member in folder.getMemberList():
+                    member.getDisplayName()
+                    member.getCreationDate()
+                    member.getLastModified()
+                    if not member.isCollection:
+                        member.getContentLength()
+                        member.getContentType()
+            finally:
+                event.remove(engine, "before_cursor_execute", count_statement)
+            return len(statements)
+
+        webdav_put_new_test_file_helper(
+            webdav_provider, environ, "/Recipes/Salads/salad_0.txt", b"Salad 0\n"
+        )
+        nb_statements = list_folder_members_properties()
+        for file_number in range(1, 6):
+            webdav_put_new_test_file_helper(
+                webdav_provider,
+                environ,
+                "/Recipes/Salads/salad_{}.txt".format(file_number),
+                b"Salad\n",
+            )
+        assert list_folder_members_properties() == nb_statements
+
     def test_unit__create_content__ok(
         self, app_config, webdav_provider, webdav_environ_factory, user_api_factory
     ):
@@ -1,12 +1,17 @@
 # -*- coding: utf-8 -*-
+from mock import patch
 import pytest
+import transaction
+from zope.sqlalchemy import mark_changed
 
 from tracim_backend.lib.core.workspace import WorkspaceApi
 from tracim_backend.models.auth import AuthType
 from tracim_backend.models.auth import Group
 from tracim_backend.models.data import Content
+from tracim_backend.models.data import ContentRevisionRO
 from tracim_backend.models.data import UserRoleInWorkspace
 from tracim_backend.models.data import Workspace
+from tracim_backend.models.revision_protection import new_revision
 from tracim_backend.tests.fixtures import *  # noqa: F403,F40
 
 
@@ -34,6 +39,123 @@ class TestThread(object):
         folder = content_api.get_canonical_query().filter(Content.label == "folder_1").one()
         assert [folder] == list(workspace.get_valid_children())
 
+    def test_unit__used_space__ok__follow_content_changes(
+        self, admin_user, session, app_config, content_api_factory, content_type_list
+    ):
+        wapi = WorkspaceApi(current_user=admin_user, session=session, config=app_config)
+        workspace = wapi.create_workspace("workspace_1", save_now=True)
+        api = content_api_factory.get()
+        with session.no_autoflush:
+            text_file = api.create(
+                content_type_slug=content_type_list.File.slug,
+                workspace=workspace,
+                label="test_file",
+                do_save=False,
+            )
+            api.update_file_data(text_file, "test_file", "text/plain", b"test_content")
+        api.save(text_file)
+        transaction.commit()
+        assert text_file.revision.file_size == 12
+        assert workspace.used_space == 12
+        assert wapi.get_user_used_space(admin_user) == 12
+
+        with new_revision(session=session, tm=transaction.manager, content=text_file):
+            api.delete(text_file)
+        api.save(text_file)
+        transaction.commit()
+        assert workspace.used_space == 0
+        assert workspace.get_size() == 0
+
+        with new_revision(session=session, tm=transaction.manager, content=text_file):
+            api.undelete(text_file)
+        api.save(text_file)
+        transaction.commit()
+        # INFO - G.M - 2019-11-08 - file of each revision is counted
+        assert workspace.used_space == 36
+        assert workspace.get_size() == 36
+        assert wapi.update_used_space(workspace) == 36
+
+    def test_unit__used_space__ok__file_size_read_once_by_file(
+        self, admin_user, session, app_config, content_api_factory, content_type_list
+    ):
+        wapi = WorkspaceApi(current_user=admin_user, session=session, config=app_config)
+        workspace = wapi.create_workspace("workspace_1", save_now=True)
+        api = content_api_factory.get()
+        with session.no_autoflush:
+            text_file = api.create(
+                content_type_slug=content_type_list.File.slug,
+                workspace=workspace,
+                label="test_file",
+                do_save=False,
+            )
+            api.update_file_data(text_file, "test_file", "text/plain", b"test_content")
+        api.save(text_file)
+        transaction.commit()
+
+        # INFO - G.M - 2019-11-08 - file size is cloned by metadata only revisions
+        with patch.object(
+            ContentRevisionRO, "get_depot_file_size", autospec=True
+        ) as get_depot_file_size:
+            with new_revision(session=session, tm=transaction.manager, content=text_file):
+                api.update_content(text_file, new_label="renamed_file")
+            api.save(text_file)
+            transaction.commit()
+        get_depot_file_size.assert_not_called()
+        assert text_file.revision.file_size == 12
+        assert workspace.used_space == 24
+
+        with new_revision(session=session, tm=transaction.manager, content=text_file):
+            api.update_file_data(text_file, "renamed_file", "text/plain", b"new")
+        api.save(text_file)
+        transaction.commit()
+        assert text_file.revision.file_size == 3
+        assert workspace.used_space == 27
+
+    def test_unit__update_used_space__ok__fill_missing_file_size(
+        self, admin_user, session, app_config, content_api_factory, content_type_list
+    ):
+        wapi = WorkspaceApi(current_user=admin_user, session=session, config=app_config)
+        workspace = wapi.create_workspace("workspace_1", save_now=True)
+        api = content_api_factory.get()
+        with session.no_autoflush:
+            text_file = api.create(
+                content_type_slug=content_type_list.File.slug,
+                workspace=workspace,
+                label="test_file",
+                do_save=False,
+            )
+            api.update_file_data(text_file, "test_file", "text/plain", b"test_content")
+        api.save(text_file)
+        transaction.commit()
+        revision_id = text_file.revision.revision_id
+        workspace_id = workspace.workspace_id
+
+        # INFO - G.M - 2019-11-18 - simulate revisions and workspace migrated
+        # without file size
+        session.execute(
+            ContentRevisionRO.__table__.update()
+            .where(ContentRevisionRO.revision_id == revision_id)
+            .values(file_size=None)
+        )
+        session.execute(
+            Workspace.__table__.update()
+            .where(Workspace.workspace_id == workspace_id)
+            .values(used_space=0)
+        )
+        mark_changed(session)
+        transaction.commit()
+        session.close()
+
+        workspace = session.query(Workspace).get(workspace_id)
+        assert session.query(ContentRevisionRO).get(revision_id).file_size is None
+        assert workspace.used_space == 0
+        assert wapi.update_used_space(workspace) == 12
+        transaction.commit()
+        session.close()
+
+        assert session.query(ContentRevisionRO).get(revision_id).file_size == 12
+        assert session.query(Workspace).get(workspace_id).used_space == 12
+
     def test__unit__get_notifiable_roles__ok__nominal_case(
         self, admin_user, session, app_config, user_api_factory, role_api_factory
     ):
@@ -269,6 +269,68 @@ class TestContent(object):
         session.flush()
         assert parent_folder.children == []
 
+    def test_unit__get_children__ok__recursively(self, admin_user, session, content_type_list):
+        workspace = Workspace(label="TEST_WORKSPACE_1", owner=admin_user)
+        session.add(workspace)
+        session.flush()
+        parent_folder = Content(
+            owner=admin_user,
+            workspace=workspace,
+            type=content_type_list.Folder.slug,
+            label="parent",
+            revision_type=ActionDescription.CREATION,
+        )
+        session.add(parent_folder)
+        session.flush()
+        children_folder = Content(
+            owner=admin_user,
+            workspace=workspace,
+            type=content_type_list.Folder.slug,
+            label="children",
+            revision_type=ActionDescription.CREATION,
+            parent=parent_folder,
+        )
+        session.add(children_folder)
+        session.flush()
+        sub_children_page = Content(
+            owner=admin_user,
+            workspace=workspace,
+            type=content_type_list.Page.slug,
+            label="sub_children",
+            revision_type=ActionDescription.CREATION,
+            parent=children_folder,
+        )
+        session.add(sub_children_page)
+        session.flush()
+        with new_revision(session=session, tm=transaction.manager, content=sub_children_page):
+            sub_children_page.description = "updated"
+        session.flush()
+
+        assert parent_folder.get_children() == [children_folder]
+        assert parent_folder.get_children(recursively=True) == [children_folder, sub_children_page]
+        assert parent_folder.get_children_ids(recursively=True) == [
+            children_folder.content_id,
+            sub_children_page.content_id,
+        ]
+        assert children_folder.get_children(recursively=True) == [sub_children_page]
+        assert sub_children_page.get_children(recursively=True) == []
+        tree_revision_ids = [
+            revision.revision_id for revision in parent_folder.get_tree_revisions()
+        ]
+        assert tree_revision_ids == sorted(
+            [revision.revision_id for revision in parent_folder.revisions]
+            + [revision.revision_id for revision in children_folder.revisions]
+            + [revision.revision_id for revision in sub_children_page.revisions]
+        )
+        assert len(tree_revision_ids) == 4
+
+        # INFO - G.M - 2019-11-06 - moved content is not a children anymore
+        with new_revision(session=session, tm=transaction.manager, content=sub_children_page):
+            sub_children_page.parent = None
+        session.flush()
+        assert parent_folder.get_children(recursively=True) == [children_folder]
+        assert len(parent_folder.get_tree_revisions()) == 2
+
     def test_unit__query_content__ok__nominal_case(self, admin_user, session, content_type_list):
         workspace = Workspace(label="TEST_WORKSPACE_1", owner=admin_user)
         session.add(workspace)
@@ -338,6 +400,39 @@ class TestContent(object):
         assert content1.id == content1_from_query.id
         assert "TEST_CONTENT_DESCRIPTION_1_UPDATED" == content1_from_query.description
 
+    def test_unit__cached_revision_id__ok__follow_last_revision(
+        self, admin_user, session, content_type_list
+    ):
+        workspace = Workspace(label="TEST_WORKSPACE_1", owner=admin_user)
+        session.add(workspace)
+        session.flush()
+        content = Content(
+            owner=admin_user,
+            workspace=workspace,
+            type=content_type_list.Page.slug,
+            label="TEST_CONTENT_1",
+            description="TEST_CONTENT_DESCRIPTION_1",
+            revision_type=ActionDescription.CREATION,
+            is_deleted=False,
+            is_archived=False,
+        )
+        session.add(content)
+        session.flush()
+        assert content.cached_revision_id == content.revisions[-1].revision_id
+        with new_revision(session=session, tm=transaction.manager, content=content):
+            content.description = "TEST_CONTENT_DESCRIPTION_1_UPDATED"
+        session.flush()
+        assert len(content.revisions) == 2
+        assert content.cached_revision_id == content.revisions[-1].revision_id
+        assert content.revision == content.revisions[-1]
+
+        base_query = session.query(Content).join(
+            ContentRevisionRO, Content.cached_revision_id == ContentRevisionRO.revision_id
+        )
+        content_from_query = base_query.filter(Content.workspace == workspace).one()
+        assert content_from_query.id == content.id
+        assert content_from_query.description == "TEST_CONTENT_DESCRIPTION_1_UPDATED"
+
     def test_unit__get_allowed_content_type__ok(
         self, admin_user, session, content_type_list
     ) -> None:
@@ -1,11 +1,19 @@
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
 from io import BytesIO
+import json
 import multiprocessing
 import os
+import socketserver
+import threading
+from types import SimpleNamespace
 import typing
 from typing import Any
 from typing import Optional
+from xml.etree import ElementTree
 
 from PIL import Image
+from elasticsearch.serializer import JSONSerializer
 import plaster
 import requests
 from requests import Response
@@ -228,6 +236,117 @@ class ElasticSearchHelper(object):
         self.elastic_search_api.delete_index()
 
 
+class FakeElasticSearch(object):
+    """
+    Local fake of elasticsearch client, only supporting bulk api, indexed documents
+    are stored in documents dict with document id as key.
+    Its transport only gives the serializer used by elasticsearch.helpers.bulk.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        self.documents = {}  # type: typing.Dict[str, typing.Dict[str, typing.Any]]
+        self.nb_bulk_requests = 0
+        self.transport = SimpleNamespace(serializer=JSONSerializer())
+
+    def bulk(self, body: str, *args, **kwargs) -> typing.Dict[str, typing.Any]:
+        self.nb_bulk_requests += 1
+        lines = [json.loads(line) for line in body.splitlines() if line]
+        items = []
+        for action, source in zip(lines[::2], lines[1::2]):
+            op_type, action_info = action.popitem()
+            # INFO - G.M - 2019-11-26 - elasticsearch stores document ids as strings
+            document_id = str(action_info["_id"])
+            self.documents[document_id] = source
+            items.append({op_type: {"_id": document_id, "status": 201}})
+        return {"errors": False, "items": items}
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    """
+    HTTP server handling each request in a thread (http.server one is only
+    available since python 3.7).
+    """
+
+    daemon_threads = True
+
+
+class FakeCaldavServer(object):
+    """
+    Local fake of radicale server, only supporting agenda creation (MKCOL) and props
+    update (PROPPATCH). Agendas props are stored in agendas dict with agenda path as key.
+    Requests to paths of failing_paths fail with a 500 status.
+    """
+
+    PROPS_TAGS = {
+        "{DAV:}displayname": "name",
+        "{urn:ietf:params:xml:ns:caldav}calendar-description": "description",
+    }
+
+    def __init__(self) -> None:
+        self.agendas = {}  # type: typing.Dict[str, typing.Dict[str, str]]
+        self.requests = []  # type: typing.List[typing.Tuple[str, str]]
+        self.client_addresses = set()  # type: typing.Set[typing.Tuple[str, int]]
+        self.failing_paths = set()  # type: typing.Set[str]
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._get_handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def base_url(self) -> str:
+        return "http://{}:{}".format(*self._server.server_address)
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _get_props(self, body: bytes) -> typing.Dict[str, str]:
+        return {
+            self.PROPS_TAGS[element.tag]: element.text or ""
+            for element in ElementTree.fromstring(body).iter()
+            if element.tag in self.PROPS_TAGS
+        }
+
+    def _handle(self, method: str, path: str, body: bytes) -> int:
+        with self._lock:
+            self.requests.append((method, path))
+            if path in self.failing_paths:
+                return 500
+            if method == "GET":
+                return 200 if path in self.agendas else 404
+            if method == "MKCOL":
+                if path in self.agendas:
+                    return 405
+                self.agendas[path] = self._get_props(body)
+                return 201
+            if path not in self.agendas:
+                return 404
+            self.agendas[path].update(self._get_props(body))
+            return 207
+
+    def _get_handler_class(self) -> typing.Type[BaseHTTPRequestHandler]:
+        fake_server = self
+
+        class FakeCaldavRequestHandler(BaseHTTPRequestHandler):
+            # INFO - G.M - 2019-11-30 - keep-alive connections
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self) -> None:
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with fake_server._lock:
+                    fake_server.client_addresses.add(self.client_address)
+                self.send_response(fake_server._handle(self.command, self.path, body))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            do_GET = do_MKCOL = do_PROPPATCH = _respond
+
+            def log_message(self, *args: typing.Any) -> None:
+                pass
+
+        return FakeCaldavRequestHandler
+
+
 class RadicaleServerHelper(object):
     def __init__(self, config_uri, config_section):
         settings = plaster.get_settings(config_uri, config_section)
@@ -1,5 +1,6 @@
 # coding: utf-8
 from http import HTTPStatus
+import typing
 
 from hapic import HapicData
 from pyramid.config import Configurator
@@ -13,6 +14,8 @@ from tracim_backend.lib.agenda.authorization import can_access_user_agenda
 from tracim_backend.lib.agenda.authorization import can_access_workspace_event_agenda
 from tracim_backend.lib.agenda.authorization import can_access_workspace_root_agenda
 from tracim_backend.lib.agenda.determiner import CaldavAuthorizationDeterminer
+from tracim_backend.lib.proxy.proxy import DEFAULT_POOL_SIZE
+from tracim_backend.lib.proxy.proxy import DEFAULT_TIMEOUT
 from tracim_backend.lib.proxy.proxy import Proxy
 from tracim_backend.lib.utils.authorization import check_right
 from tracim_backend.lib.utils.request import TracimRequest
@@ -30,13 +33,24 @@ RADICALE_HTTP_AUTH_PASSWORD = "tracimpass"
 
 class RadicaleProxyController(Controller):
     def __init__(
-        self, proxy_base_address, radicale_base_path, radicale_user_path, radicale_workspace_path
+        self,
+        proxy_base_address,
+        radicale_base_path,
+        radicale_user_path,
+        radicale_workspace_path,
+        proxy_pool_size: int = DEFAULT_POOL_SIZE,
+        proxy_timeout: typing.Tuple[float, float] = DEFAULT_TIMEOUT,
     ):
         self._authorization = CaldavAuthorizationDeterminer()
         self.radicale_base_path_dir = radicale_base_path
         self.radicale_path_user_dir = radicale_user_path
         self.radicale_path_workspace_dir = radicale_workspace_path
-        self._proxy = Proxy(base_address=proxy_base_address, auth=HTTPBasicAuth("tracim", "tracim"))
+        self._proxy = Proxy(
+            base_address=proxy_base_address,
+            auth=HTTPBasicAuth("tracim", "tracim"),
+            pool_size=proxy_pool_size,
+            timeout=proxy_timeout,
+        )
 
     @hapic.with_api_doc(disable_doc=True)
     @check_right(can_access_user_agenda)
@@ -679,6 +679,9 @@ class FileController(Controller):
         )
         content = api.get_one(hapic_data.path.content_id, content_type=content_type_list.Any_SLUG)
         revisions = content.revisions
+        api.load_preview_infos(
+            revision.revision_id for revision in revisions if revision.depot_file
+        )
         return [api.get_revision_in_context(revision) for revision in revisions]
 
     @hapic.with_api_doc(tags=[SWAGGER_TAG__CONTENT_FILE_ENDPOINTS])
@@ -46,6 +46,7 @@ from tracim_backend.models.context_models import KnownMemberQuery
 from tracim_backend.models.context_models import LoginCredentials
 from tracim_backend.models.context_models import MoveParams
 from tracim_backend.models.context_models import PageQuery
+from tracim_backend.models.context_models import PaginationQuery
 from tracim_backend.models.context_models import RadicaleUserSubitemsPath
 from tracim_backend.models.context_models import RadicaleWorkspaceSubitemsPath
 from tracim_backend.models.context_models import ResetPasswordCheckToken
@@ -594,7 +595,31 @@ class PageQuerySchema(FileQuerySchema):
         return PageQuery(**data)
 
 
-class FilterContentQuerySchema(marshmallow.Schema):
+class BasePaginatedQuerySchema(marshmallow.Schema):
+    count = marshmallow.fields.Int(
+        example=10,
+        default=None,
+        allow_none=True,
+        description="if set, return a page of at most count elements "
+        '({"items": [...], "next_page_token": "...", "has_next": true, "per_page": 10}) '
+        "instead of the list of all elements",
+        validate=strictly_positive_int_validator,
+    )
+    page_token = StrippedString(
+        example="WyJkb2MiLCAxMl0=",
+        default=None,
+        allow_none=True,
+        description="next_page_token of previous page, to get next page. Used only with count.",
+    )
+
+
+class PaginationQuerySchema(BasePaginatedQuerySchema):
+    @post_load
+    def make_pagination_query(self, data: typing.Dict[str, typing.Any]) -> object:
+        return PaginationQuery(**data)
+
+
+class FilterContentQuerySchema(BasePaginatedQuerySchema):
 
     parent_ids = StrippedString(
         validate=regex_string_as_list_of_int,
@@ -666,7 +691,7 @@ class FilterContentQuerySchema(marshmallow.Schema):
         return ContentFilter(**data)
 
 
-class ActiveContentFilterQuerySchema(marshmallow.Schema):
+class ActiveContentFilterQuerySchema(BasePaginatedQuerySchema):
     limit = marshmallow.fields.Int(
         example=2,
         default=0,
@@ -686,7 +711,7 @@ class ActiveContentFilterQuerySchema(marshmallow.Schema):
         return ActiveContentFilter(**data)
 
 
-class ContentIdsQuerySchema(marshmallow.Schema):
+class ContentIdsQuerySchema(BasePaginatedQuerySchema):
 
     content_ids = StrippedString(
         validate=regex_string_as_list_of_int,
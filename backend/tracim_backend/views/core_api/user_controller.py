@@ -5,6 +5,7 @@ from tracim_backend.config import CFG
 from tracim_backend.exceptions import EmailAlreadyExistInDb
 from tracim_backend.exceptions import ExternalAuthUserEmailModificationDisallowed
 from tracim_backend.exceptions import ExternalAuthUserPasswordModificationDisallowed
+from tracim_backend.exceptions import InvalidPageToken
 from tracim_backend.exceptions import PasswordDoNotMatch
 from tracim_backend.exceptions import UserCantChangeIsOwnProfile
 from tracim_backend.exceptions import UserCantDeleteHimself
@@ -18,6 +19,8 @@ from tracim_backend.lib.core.workspace import WorkspaceApi
 from tracim_backend.lib.utils.authorization import check_right
 from tracim_backend.lib.utils.authorization import has_personal_access
 from tracim_backend.lib.utils.authorization import is_administrator
+from tracim_backend.lib.utils.json_stream import get_json_stream_response
+from tracim_backend.lib.utils.json_stream import iter_json_page
 from tracim_backend.lib.utils.request import TracimRequest
 from tracim_backend.lib.utils.utils import generate_documentation_swagger_tag
 from tracim_backend.lib.utils.utils import password_generator
@@ -28,6 +31,7 @@ from tracim_backend.views.core_api.schemas import ContentDigestSchema
 from tracim_backend.views.core_api.schemas import ContentIdsQuerySchema
 from tracim_backend.views.core_api.schemas import KnownMemberQuerySchema
 from tracim_backend.views.core_api.schemas import NoContentSchema
+from tracim_backend.views.core_api.schemas import PaginationQuerySchema
 from tracim_backend.views.core_api.schemas import ReadStatusSchema
 from tracim_backend.views.core_api.schemas import SetEmailSchema
 from tracim_backend.views.core_api.schemas import SetPasswordSchema
@@ -123,16 +127,26 @@ class UserController(Controller):
         return uapi.get_user_with_context(request.candidate_user)
 
     @hapic.with_api_doc(tags=[SWAGGER_TAG__USER_ENDPOINTS])
+    @hapic.handle_exception(InvalidPageToken, HTTPStatus.BAD_REQUEST)
     @check_right(is_administrator)
+    @hapic.input_query(PaginationQuerySchema())
     @hapic.output_body(UserDigestSchema(many=True))
     def users(self, context, request: TracimRequest, hapic_data=None):
         """
         Get all users
+        If count is set, return a page of users sorted by display name instead of a list,
+        use its next_page_token as page_token to get next page.
         """
         app_config = request.registry.settings["CFG"]  # type: CFG
         uapi = UserApi(
             current_user=request.current_user, session=request.dbsession, config=app_config  # User
         )
+        if hapic_data.query.count:
+            page = uapi.get_all_page(
+                count=hapic_data.query.count, page_token=hapic_data.query.page_token
+            )
+            page.items = [uapi.get_user_with_context(user) for user in page.items]
+            return get_json_stream_response(request, iter_json_page(UserDigestSchema(), page))
         users = uapi.get_all()
         context_users = [uapi.get_user_with_context(user) for user in users]
         return context_users
@@ -387,6 +401,7 @@ class UserController(Controller):
         return
 
     @hapic.with_api_doc(tags=[SWAGGER_TAG__USER_CONTENT_ENDPOINTS])
+    @hapic.handle_exception(InvalidPageToken, HTTPStatus.BAD_REQUEST)
     @check_right(has_personal_access)
     @hapic.input_path(UserWorkspaceIdPathSchema())
     @hapic.input_query(ActiveContentFilterQuerySchema())
@@ -394,6 +409,8 @@ class UserController(Controller):
     def last_active_content(self, context, request: TracimRequest, hapic_data=None):
         """
         Get last_active_content for user
+        If count is set, return a page of contents instead of a list,
+        use its next_page_token as page_token to get next page.
         """
         app_config = request.registry.settings["CFG"]  # type: CFG
         content_filter = hapic_data.query
@@ -410,6 +427,14 @@ class UserController(Controller):
         workspace = None
         if hapic_data.path.workspace_id:
             workspace = wapi.get_one(hapic_data.path.workspace_id)
+        if content_filter.count:
+            page = api.get_last_active_page(
+                count=content_filter.count,
+                page_token=content_filter.page_token,
+                workspace=workspace,
+            )
+            page.items = api.get_contents_in_context(page.items)
+            return get_json_stream_response(request, iter_json_page(ContentDigestSchema(), page))
         before_content = None
         if content_filter.before_content_id:
             before_content = api.get_one(
@@ -420,9 +445,10 @@ class UserController(Controller):
         last_actives = api.get_last_active(
             workspace=workspace, limit=content_filter.limit or None, before_content=before_content
         )
-        return [api.get_content_in_context(content) for content in last_actives]
+        return api.get_contents_in_context(last_actives)
 
     @hapic.with_api_doc(tags=[SWAGGER_TAG__USER_CONTENT_ENDPOINTS])
+    @hapic.handle_exception(InvalidPageToken, HTTPStatus.BAD_REQUEST)
     @check_right(has_personal_access)
     @hapic.input_path(UserWorkspaceIdPathSchema())
     @hapic.input_query(ContentIdsQuerySchema())
@@ -430,6 +456,8 @@ class UserController(Controller):
     def contents_read_status(self, context, request: TracimRequest, hapic_data=None):
         """
         get user_read status of contents
+        If count is set, return a page of read status instead of a list,
+        use its next_page_token as page_token to get next page.
         """
         app_config = request.registry.settings["CFG"]  # type: CFG
         api = ContentApi(
@@ -445,13 +473,22 @@ class UserController(Controller):
         workspace = None
         if hapic_data.path.workspace_id:
             workspace = wapi.get_one(hapic_data.path.workspace_id)
+        if hapic_data.query.count:
+            page = api.get_last_active_page(
+                count=hapic_data.query.count,
+                page_token=hapic_data.query.page_token,
+                workspace=workspace,
+                content_ids=hapic_data.query.content_ids or None,
+            )
+            page.items = api.get_contents_in_context(page.items)
+            return get_json_stream_response(request, iter_json_page(ReadStatusSchema(), page))
         last_actives = api.get_last_active(
             workspace=workspace,
             limit=None,
             before_content=None,
             content_ids=hapic_data.query.content_ids or None,
         )
-        return [api.get_content_in_context(content) for content in last_actives]
+        return api.get_contents_in_context(last_actives)
 
     @hapic.with_api_doc(tags=[SWAGGER_TAG__USER_CONTENT_ENDPOINTS])
     @check_right(has_personal_access)
@@ -2,6 +2,7 @@ import typing
 
 from pyramid.config import Configurator
 from pyramid.httpexceptions import HTTPFound
+from pyramid.response import Response
 import transaction
 
 from tracim_backend.app_models.contents import content_type_list
@@ -12,6 +13,7 @@ from tracim_backend.exceptions import ContentFilenameAlreadyUsedInFolder
 from tracim_backend.exceptions import ContentNotFound
 from tracim_backend.exceptions import EmailValidationFailed
 from tracim_backend.exceptions import EmptyLabelNotAllowed
+from tracim_backend.exceptions import InvalidPageToken
 from tracim_backend.exceptions import ParentNotFound
 from tracim_backend.exceptions import RoleAlreadyExistError
 from tracim_backend.exceptions import UnallowedSubContent
@@ -37,6 +39,8 @@ from tracim_backend.lib.utils.authorization import is_administrator
 from tracim_backend.lib.utils.authorization import is_content_manager
 from tracim_backend.lib.utils.authorization import is_reader
 from tracim_backend.lib.utils.authorization import is_trusted_user
+from tracim_backend.lib.utils.json_stream import get_json_stream_response
+from tracim_backend.lib.utils.json_stream import iter_json_page
 from tracim_backend.lib.utils.request import TracimRequest
 from tracim_backend.lib.utils.utils import generate_documentation_swagger_tag
 from tracim_backend.lib.utils.utils import password_generator
@@ -393,18 +397,21 @@ class WorkspaceController(Controller):
         )
 
     @hapic.with_api_doc(tags=[SWAGGER_TAG__CONTENT_ENDPOINTS])
+    @hapic.handle_exception(InvalidPageToken, HTTPStatus.BAD_REQUEST)
     @check_right(is_reader)
     @hapic.input_path(WorkspaceIdPathSchema())
     @hapic.input_query(FilterContentQuerySchema())
     @hapic.output_body(ContentDigestSchema(many=True))
     def workspace_content(
         self, context, request: TracimRequest, hapic_data=None
-    ) -> typing.List[ContentInContext]:
+    ) -> typing.Union[typing.List[ContentInContext], Response]:
         """
         return a list of contents of the space.
         This is NOT the full content list: by default, returned contents are the ones at root level.
         In order to get contents in a given folder, then use parent_id query filter.
         You can also show.hide archived/deleted contents.
+        If count is set, return a page of contents sorted by label instead of a list,
+        use its next_page_token as page_token to get next page.
         """
         app_config = request.registry.settings["CFG"]  # type: CFG
         content_filter = hapic_data.query
@@ -417,6 +424,18 @@ class WorkspaceController(Controller):
             show_deleted=content_filter.show_deleted,
             show_active=content_filter.show_active,
         )
+        if content_filter.count:
+            page = api.get_all_page(
+                count=content_filter.count,
+                page_token=content_filter.page_token,
+                parent_ids=content_filter.parent_ids,
+                complete_path_to_id=content_filter.complete_path_to_id,
+                workspace=request.current_workspace,
+                content_type=content_filter.content_type or content_type_list.Any_SLUG,
+                label=content_filter.label,
+            )
+            page.items = api.get_contents_in_context(page.items)
+            return get_json_stream_response(request, iter_json_page(ContentDigestSchema(), page))
         contents = api.get_all(
             parent_ids=content_filter.parent_ids,
             complete_path_to_id=content_filter.complete_path_to_id,
@@ -425,8 +444,7 @@ class WorkspaceController(Controller):
             label=content_filter.label,
             order_by_properties=[Content.label],
         )
-        contents = [api.get_content_in_context(content) for content in contents]
-        return contents
+        return api.get_contents_in_context(contents)
 
     @hapic.with_api_doc(tags=[SWAGGER_TAG__CONTENT_ENDPOINTS])
     @hapic.handle_exception(EmptyLabelNotAllowed, HTTPStatus.BAD_REQUEST)
@@ -29,7 +29,9 @@ class SearchFilterQuery(object):
         self.size = size
         self.page_nb = page_nb
         if not content_types:
-            self.content_types = content_type_list.restricted_allowed_types_slug()
+            # INFO - G.M - 2019-11-29 - content types registry gives a shared tuple,
+            # search apis expect a list.
+            self.content_types = list(content_type_list.restricted_allowed_types_slug())
         else:
             self.content_types = string_to_list(content_types, ",", str)
         self.show_deleted = bool(show_deleted)